@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Query, Response
 from typing import List, Optional, Any
 import datetime
 
@@ -19,6 +19,9 @@ import logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Cursor opaco da próxima página da listagem de alertas, repassado do policy_engine_service.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 # Helper function to proxy requests to the policy_engine_service for alerts
 async def _proxy_alerts_request(
     method: str,
@@ -27,6 +30,7 @@ async def _proxy_alerts_request(
     request_obj: Request, # FastAPI Request object
     params: Optional[dict] = None,
     payload: Optional[dict] = None,
+    response_obj: Optional[Response] = None, # When given, pagination headers are copied to the gateway response
 ) -> Any:
     # Headers for downstream services.
     # For now, policy_engine_service does not validate the end-user token itself for /alerts,
@@ -69,6 +73,9 @@ async def _proxy_alerts_request(
                 detail=f"Policy Engine Service error (Alerts - {endpoint}): {detail_error}",
             )
 
+        if response_obj is not None and NEXT_CURSOR_HEADER in response.headers:
+            response_obj.headers[NEXT_CURSOR_HEADER] = response.headers[NEXT_CURSOR_HEADER]
+
         # For 204 No Content, return None or an empty dict, as .json() would fail
         if response.status_code == 204:
             return None
@@ -86,9 +93,11 @@ async def _proxy_alerts_request(
 @router.get("/", response_model=List[AlertSchema], name="alerts:list_alerts")
 async def list_alerts_gateway(
     request: Request,
+    response: Response,
     current_user: TokenData = Depends(require_user), # Papel mínimo: User
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
     sort_by: Optional[str] = Query(None),
     sort_order: Optional[str] = Query("desc"),
     provider: Optional[str] = Query(None),
@@ -103,9 +112,10 @@ async def list_alerts_gateway(
 ):
     """
     Proxy to list alerts from the Policy Engine Service.
+    The `X-Next-Cursor` header of the downstream response is passed through for keyset pagination.
     """
     params = {
-        "skip": skip, "limit": limit, "sort_by": sort_by, "sort_order": sort_order,
+        "skip": skip, "limit": limit, "cursor": cursor, "sort_by": sort_by, "sort_order": sort_order,
         "provider": provider, "severity": severity.value if severity else None,
         "status": status.value if status else None, "resource_id": resource_id,
         "policy_id": policy_id, "account_id": account_id, "region": region,
@@ -114,7 +124,7 @@ async def list_alerts_gateway(
     }
     # Remove None params
     params = {k: v for k, v in params.items() if v is not None}
-    return await _proxy_alerts_request("GET", "/", current_user, request, params=params)
+    return await _proxy_alerts_request("GET", "/", current_user, request, params=params, response_obj=response)
 
 @router.get("/{alert_id}", response_model=AlertSchema, name="alerts:get_alert")
 async def get_alert_gateway(
@@ -217,11 +217,22 @@ async def _orchestrate_aws_analysis(
         logger.exception(f"Erro ao coletar dados do serviço '{service_name}': {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao coletar dados do serviço '{service_name}'.")
 
-    if not collected_data:
-        return []
+    # O Policy Engine só resolve os alertas dos recursos ausentes quando o coletor confirma a coleta completa;
+    # numa coleta parcial (ex.: uma região falhou) ou sem confirmação, analisa o que veio e nada mais.
+    collection_complete = (
+        collector_response.headers.get("X-Collection-Complete", "").lower() == "true"
+        and collector_response.headers.get("X-Collection-Partial", "").lower() != "true"
+    )
 
-    # 3. Enviar os dados para o Policy Engine
-    analysis_payload = {"provider": "aws", "service": service_name, "data": collected_data, "account_id": str(linked_account_id)}
+    # 3. Enviar os dados para o Policy Engine. Uma coleta vazia também é enviada: confirmada como completa,
+    # ela resolve os alertas dos recursos que deixaram de existir.
+    analysis_payload = {
+        "provider": "aws",
+        "service": service_name,
+        "data": collected_data or [],
+        "account_id": str(linked_account_id),
+        "collection_complete": collection_complete,
+    }
     alerts: List[Dict[str, Any]]
     try:
         engine_response = await policy_engine_service_client.post("/analyze", json=analysis_payload)
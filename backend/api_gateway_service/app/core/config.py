@@ -20,6 +20,13 @@ class BaseAppSettings(BaseSettings):
 
     JWT_ALGORITHM: str = "HS256"
     HTTP_CLIENT_TIMEOUT: int = 60
+    # Pool de conexões de cada serviço downstream (um httpx.AsyncClient compartilhado por serviço).
+    # HTTP/2 requer o pacote h2 (httpx[http2]); sem ele, o cliente usa HTTP/1.1.
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 5.0
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_CLIENT_HTTP2: bool = False
 
     # Endereço do Vault
     VAULT_ADDR: str = "http://vault:8200"
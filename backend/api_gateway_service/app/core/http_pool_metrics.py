@@ -0,0 +1,66 @@
+import logging
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import httpx
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# (serviço, cliente, limite de conexões) de cada pool exportado.
+PoolSource = Tuple[str, Optional[httpx.AsyncClient], Optional[int]]
+
+
+def httpcore_pool_stats(client: Optional[httpx.AsyncClient]) -> Optional[Dict[str, int]]:
+    """
+    Conexões em uso e ociosas e requisições aguardando uma conexão livre, lidas do pool do httpcore no momento
+    da chamada. `_transport._pool` e `_requests` são internos do httpx/httpcore: cada atributo é lido com
+    padrão, e um formato inesperado devolve None (sem métricas) em vez de quebrar a coleta de /metrics.
+    Transportes sem pool (ex.: MockTransport) também devolvem None.
+    """
+    if client is None or client.is_closed:
+        return None
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return None
+    try:
+        connections = list(connections)
+        idle = sum(1 for connection in connections if getattr(connection, "is_idle", lambda: False)())
+        queued = sum(1 for request in getattr(pool, "_requests", None) or () if getattr(request, "connection", None) is None)
+    except (AttributeError, TypeError) as e:
+        logger.debug(f"Pool do httpcore em formato inesperado; métricas do pool ignoradas: {e}")
+        return None
+    return {"active": len(connections) - idle, "idle": idle, "queued": queued}
+
+
+class HttpClientPoolCollector:
+    """Exporta a utilização dos pools HTTP devolvidos por `sources` a cada coleta de /metrics."""
+
+    def __init__(self, prefix: str, sources: Callable[[], Iterable[PoolSource]]):
+        self.prefix = prefix
+        self.sources = sources
+
+    def collect(self):
+        connections = GaugeMetricFamily(
+            f"{self.prefix}_http_client_connections", "Conexões abertas do pool HTTP por serviço e estado.",
+            labels=["service", "state"],
+        )
+        queued = GaugeMetricFamily(
+            f"{self.prefix}_http_client_queued_requests", "Requisições aguardando uma conexão livre no pool HTTP.",
+            labels=["service"],
+        )
+        max_connections = GaugeMetricFamily(
+            f"{self.prefix}_http_client_max_connections", "Limite de conexões do pool HTTP de cada serviço.",
+            labels=["service"],
+        )
+        for service, client, limit in self.sources():
+            stats = httpcore_pool_stats(client)
+            if stats is None:
+                continue
+            connections.add_metric([service, "active"], stats["active"])
+            connections.add_metric([service, "idle"], stats["idle"])
+            queued.add_metric([service], stats["queued"])
+            max_connections.add_metric([service], limit or 0)
+        yield connections
+        yield queued
+        yield max_connections
@@ -26,6 +26,7 @@ async def startup_event():
     logger.info(f"Auth Service URL: {settings.AUTH_SERVICE_URL}")
     logger.info(f"Collector Service URL: {settings.COLLECTOR_SERVICE_URL}")
     logger.info(f"Policy Engine Service URL: {settings.POLICY_ENGINE_SERVICE_URL}")
+    http_client.start_clients()
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -1,16 +1,59 @@
 import httpx
 from fastapi import HTTPException, status
-from typing import Optional, Dict, Any, Union
+from prometheus_client import REGISTRY
+from typing import Optional, Dict, Any, List, Union
 from app.core.config import settings
+from app.core.http_pool_metrics import HttpClientPoolCollector, PoolSource, httpcore_pool_stats
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
 class HttpClient:
-    def __init__(self, base_url: str):
+    """
+    Cliente de um serviço downstream. Todas as chamadas compartilham um único httpx.AsyncClient (keep-alive e
+    pool de conexões limitado), criado em `start_clients` na inicialização do gateway, ou na primeira chamada,
+    e fechado em `close_clients` no encerramento.
+    """
+
+    def __init__(self, base_url: str, service: str):
         self.base_url = base_url
-        self.timeout = settings.HTTP_CLIENT_TIMEOUT
+        self.service = service
+        self.timeout = httpx.Timeout(settings.HTTP_CLIENT_TIMEOUT, connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT)
+        self.limits = httpx.Limits(
+            max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        _registered_clients.append(self)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            http2 = settings.HTTP_CLIENT_HTTP2
+            if http2 and not _http2_available():
+                logger.warning("HTTP_CLIENT_HTTP2 habilitado, mas o pacote 'h2' não está instalado. Usando HTTP/1.1.")
+                http2 = False
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, http2=http2)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def pool_stats(self) -> Optional[Dict[str, int]]:
+        """Conexões em uso e ociosas e requisições aguardando conexão, lidas do pool do httpcore."""
+        return httpcore_pool_stats(self._client)
 
     async def _request(
         self,
@@ -25,17 +68,16 @@ class HttpClient:
     ) -> httpx.Response:
         url = f"{self.base_url}{endpoint}"
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                if is_json_data:
-                    response = await client.request(
-                        method, url, json=data, params=params, headers=headers
-                    )
-                else:
-                    response = await client.request(
-                        method, url, data=data, params=params, headers=headers
-                    )
-                # response.raise_for_status() # Levanta exceção para 4xx/5xx, pode ser muito agressivo aqui
-                return response
+            if is_json_data:
+                response = await self.client.request(
+                    method, url, json=data, params=params, headers=headers
+                )
+            else:
+                response = await self.client.request(
+                    method, url, data=data, params=params, headers=headers
+                )
+            # response.raise_for_status() # Levanta exceção para 4xx/5xx, pode ser muito agressivo aqui
+            return response
         except httpx.TimeoutException:
             logger.error(f"Timeout requesting {method} {url}")
             raise HTTPException(
@@ -106,7 +148,33 @@ class HttpClient:
         return await self._request("DELETE", endpoint, params=params, headers=headers)
 
 
+_registered_clients: List[HttpClient] = []
+
+
+def _pool_sources() -> List[PoolSource]:
+    return [(c.service, c._client, c.limits.max_connections) for c in _registered_clients]
+
+
+try:
+    REGISTRY.register(HttpClientPoolCollector("api_gateway", _pool_sources))
+except ValueError:
+    # Coletor já registrado por uma importação anterior deste módulo por outro caminho.
+    pass
+
+
+def start_clients() -> None:
+    """Cria os clientes compartilhados na inicialização, antes da primeira requisição."""
+    for http_client in _registered_clients:
+        http_client.client
+
+
+async def close_clients() -> None:
+    """Fecha os clientes compartilhados e suas conexões no encerramento do gateway."""
+    for http_client in _registered_clients:
+        await http_client.aclose()
+
+
 # Instâncias de cliente para cada serviço downstream
-auth_service_client = HttpClient(base_url=settings.AUTH_SERVICE_URL)
-collector_service_client = HttpClient(base_url=settings.COLLECTOR_SERVICE_URL)
-policy_engine_service_client = HttpClient(base_url=settings.POLICY_ENGINE_SERVICE_URL)
+auth_service_client = HttpClient(base_url=settings.AUTH_SERVICE_URL, service="auth_service")
+collector_service_client = HttpClient(base_url=settings.COLLECTOR_SERVICE_URL, service="collector_service")
+policy_engine_service_client = HttpClient(base_url=settings.POLICY_ENGINE_SERVICE_URL, service="policy_engine_service")
@@ -1,7 +1,8 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from app.models.audit_event_model import AuditEvent
 from app.schemas.audit_event_schema import AuditEventCreate
-from typing import Optional
+from typing import Optional, Sequence
 
 def create_audit_event(db: Session, event: AuditEventCreate) -> AuditEvent:
     db_event = AuditEvent(**event.dict())
@@ -10,6 +11,14 @@ def create_audit_event(db: Session, event: AuditEventCreate) -> AuditEvent:
     db.refresh(db_event)
     return db_event
 
+def create_audit_events(db: Session, events: Sequence[AuditEventCreate]) -> int:
+    """Insere um lote de eventos com um único INSERT multi-linha e um único COMMIT."""
+    if not events:
+        return 0
+    db.execute(insert(AuditEvent), [event.model_dump() for event in events])
+    db.commit()
+    return len(events)
+
 def get_audit_events(
     db: Session,
     actor: Optional[str] = None,
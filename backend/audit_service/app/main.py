@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Body
 from sqlalchemy.orm import Session
 from app.db.session import get_db, engine
 from app.models import audit_event_model
@@ -19,6 +19,14 @@ def create_event(
 ):
     return crud_audit_event.create_audit_event(db=db, event=event)
 
+@app.post("/events/bulk", response_model=audit_event_schema.AuditEventBulkResult, status_code=201)
+def create_events_bulk(
+    events: list[audit_event_schema.AuditEventCreate] = Body(..., max_length=1000),
+    db: Session = Depends(get_db),
+):
+    """Grava um lote de eventos numa única instrução; usado pelos clientes que enfileiram a auditoria."""
+    return {"inserted": crud_audit_event.create_audit_events(db=db, events=events)}
+
 from typing import Optional
 
 @app.get("/events/", response_model=list[audit_event_schema.AuditEvent])
@@ -8,6 +8,9 @@ class AuditEventCreate(BaseModel):
     resource: Optional[str] = None
     details: Optional[Dict[str, Any]] = None
 
+class AuditEventBulkResult(BaseModel):
+    inserted: int
+
 class AuditEvent(AuditEventCreate):
     id: int
     timestamp: datetime
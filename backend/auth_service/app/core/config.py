@@ -2,7 +2,7 @@ import os
 import hvac
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import Optional
+from typing import Optional, Literal
 import logging
 
 # Configurar o logger
@@ -46,6 +46,12 @@ class AppSettings(BaseSettings):
 
     # URL do serviço de auditoria
     AUDIT_SERVICE_URL: Optional[str] = None
+    # Envio de eventos de auditoria em lotes a partir de uma fila limitada em memória.
+    # AUDIT_QUEUE_OVERFLOW com a fila cheia: "drop_oldest" (descarta o mais antigo) ou "block" (espera)
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 100
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_QUEUE_OVERFLOW: Literal["drop_oldest", "block"] = "drop_oldest"
 
     class Config:
         case_sensitive = True
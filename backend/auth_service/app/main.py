@@ -8,6 +8,7 @@ from app.api.v1 import auth_controller, admin_controller, linked_account_control
 from app.db.session import engine
 from app.models import user_model
 from app.core.logging_config import setup_logging # Importar a configuração de logging
+from app.services.audit_service_client import audit_service_client
 
 # Configurar o logging estruturado ANTES de instanciar o app
 setup_logging()
@@ -50,6 +51,8 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info(f"Encerrando o serviço: {settings.PROJECT_NAME}")
+    # Envia os eventos de auditoria ainda na fila.
+    await audit_service_client.close()
 
 @app.get("/health", tags=["Health Check"])
 async def health_check():
@@ -20,7 +20,10 @@ async def test_create_event_success(mock_post, audit_service_client):
         resource="test_resource",
         details={"key": "value"}
     )
+    # create_event só enfileira; o envio acontece no próximo lote.
+    await audit_service_client.flush()
     mock_post.assert_called_once()
+    await audit_service_client.close()
 
 @patch('app.services.audit_service_client.httpx.AsyncClient.post')
 @pytest.mark.asyncio
@@ -35,4 +38,7 @@ async def test_create_event_failure(mock_post, audit_service_client):
         resource="test_resource",
         details={"key": "value"}
     )
+    # create_event só enfileira; o envio acontece no próximo lote.
+    await audit_service_client.flush()
     mock_post.assert_called_once()
+    await audit_service_client.close()
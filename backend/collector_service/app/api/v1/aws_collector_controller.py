@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from typing import List
 from app.aws import s3_collector, ec2_collector, iam_collector, cloudtrail_collector
+from app.aws.regional_executor import RegionalResults
 from app.schemas.s3 import S3BucketData
 from app.schemas.ec2 import Ec2InstanceData, SecurityGroup
 from app.schemas.iam import IAMUserData, IAMRoleData, IAMPolicyData
@@ -11,6 +12,21 @@ import logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Sinaliza ao chamador se a coleta foi completa ou parcial (ex.: uma região falhou); ver
+# RegionalResults.failed_regions. Só coletores que acompanham as falhas (RegionalResults) confirmam a coleta
+# completa, e só com essa confirmação o Policy Engine resolve os alertas dos recursos ausentes.
+COLLECTION_COMPLETE_HEADER = "X-Collection-Complete"
+COLLECTION_PARTIAL_HEADER = "X-Collection-Partial"
+
+def _mark_collection_status(response: Response, data) -> None:
+    if not isinstance(data, RegionalResults):
+        return
+    if data.failed_regions:
+        response.headers[COLLECTION_PARTIAL_HEADER] = "true"
+        response.headers["X-Collection-Failed-Regions"] = ",".join(sorted(data.failed_regions))
+    else:
+        response.headers[COLLECTION_COMPLETE_HEADER] = "true"
+
 @router.post("/s3", response_model=List[S3BucketData])
 async def collect_s3_data(payload: CredentialsPayload):
     try:
@@ -21,18 +37,20 @@ async def collect_s3_data(payload: CredentialsPayload):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/ec2/instances", response_model=List[Ec2InstanceData])
-async def collect_ec2_instances_data(payload: CredentialsPayload):
+async def collect_ec2_instances_data(payload: CredentialsPayload, response: Response):
     try:
         data = await ec2_collector.get_ec2_instance_data_all_regions(credentials=payload.credentials)
+        _mark_collection_status(response, data)
         return data
     except Exception as e:
         logger.exception("Erro ao coletar dados de instâncias EC2.")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/ec2/security-groups", response_model=List[SecurityGroup])
-async def collect_ec2_security_groups_data(payload: CredentialsPayload):
+async def collect_ec2_security_groups_data(payload: CredentialsPayload, response: Response):
     try:
         data = await ec2_collector.get_security_group_data_all_regions(credentials=payload.credentials)
+        _mark_collection_status(response, data)
         return data
     except Exception as e:
         logger.exception("Erro ao coletar dados de Security Groups.")
@@ -72,9 +90,10 @@ class S3RemediationPayload(CredentialsPayload):
     region: str
 
 @router.post("/cloudtrail", response_model=List[CloudTrailData])
-async def collect_cloudtrail_data(payload: CredentialsPayload):
+async def collect_cloudtrail_data(payload: CredentialsPayload, response: Response):
     try:
         data = await cloudtrail_collector.list_trails(credentials=payload.credentials)
+        _mark_collection_status(response, data)
         return data
     except Exception as e:
         logger.exception("Erro ao coletar dados do CloudTrail.")
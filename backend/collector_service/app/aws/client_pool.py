@@ -0,0 +1,107 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+import boto3
+from botocore.config import Config
+from prometheus_client import Counter, Gauge
+
+from app.aws.regional_executor import credential_fingerprint
+from app.core.config import settings
+
+
+CLIENT_POOL_HITS = Counter(
+    "collector_aws_client_pool_hits_total", "Clientes boto3 reaproveitados do pool.", labelnames=["service"]
+)
+CLIENT_POOL_MISSES = Counter(
+    "collector_aws_client_pool_misses_total", "Clientes boto3 criados por não estarem no pool.", labelnames=["service"]
+)
+CLIENT_POOL_EVICTIONS = Counter(
+    "collector_aws_client_pool_evictions_total", "Clientes boto3 removidos do pool (expired ou size).",
+    labelnames=["reason"],
+)
+CLIENT_POOL_SIZE = Gauge("collector_aws_client_pool_size", "Clientes boto3 atualmente no pool.")
+
+PoolKey = Tuple[str, str, str]
+
+
+class Boto3ClientPool:
+    """
+    Reaproveita clientes boto3 por (impressão digital das credenciais, serviço, região). Criar um cliente custa
+    dezenas de milissegundos e alguns MB (carga do modelo do serviço), e os coletores pediam um novo a cada
+    região, bucket ou chamada. Clientes boto3 são thread-safe, então o mesmo cliente atende todas as threads
+    do regional_executor. Cada entrada vive no máximo `ttl_seconds` (credenciais temporárias expiram e contas
+    deixam de ser coletadas) e, acima de `max_size` entradas, as menos usadas recentemente saem primeiro.
+    """
+
+    def __init__(self, max_size: int = 256, ttl_seconds: float = 900.0, max_pool_connections: int = 10):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self.max_pool_connections = max_pool_connections
+        self._clients: "OrderedDict[PoolKey, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _create(self, service_name: str, region_name: str, credentials: Dict[str, Any]):
+        # Uma Session por cliente: a sessão padrão do boto3 não é thread-safe para criar clientes.
+        session = boto3.session.Session(
+            aws_access_key_id=credentials.get('aws_access_key_id'),
+            aws_secret_access_key=credentials.get('aws_secret_access_key'),
+            aws_session_token=credentials.get('aws_session_token'),
+            region_name=region_name,
+        )
+        return session.client(service_name, config=Config(max_pool_connections=self.max_pool_connections))
+
+    def _evict(self, key: PoolKey, reason: str) -> None:
+        del self._clients[key]
+        CLIENT_POOL_EVICTIONS.labels(reason=reason).inc()
+
+    def get(self, service_name: str, region_name: str, credentials: Dict[str, Any]):
+        key = (credential_fingerprint(credentials), service_name, region_name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._clients.move_to_end(key)
+                    self.hits += 1
+                    CLIENT_POOL_HITS.labels(service=service_name).inc()
+                    return entry[0]
+                self._evict(key, "expired")
+
+        # Criado fora do lock para não serializar as threads; se outra thread criou o mesmo cliente nesse
+        # intervalo, fica o dela.
+        client = self._create(service_name, region_name, credentials)
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is not None and entry[1] > now:
+                self._clients.move_to_end(key)
+                self.hits += 1
+                CLIENT_POOL_HITS.labels(service=service_name).inc()
+                return entry[0]
+            self._clients[key] = (client, now + self.ttl_seconds)
+            self._clients.move_to_end(key)
+            self.misses += 1
+            CLIENT_POOL_MISSES.labels(service=service_name).inc()
+            while len(self._clients) > self.max_size:
+                self._evict(next(iter(self._clients)), "size")
+            CLIENT_POOL_SIZE.set(len(self._clients))
+        return client
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+            CLIENT_POOL_SIZE.set(0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._clients), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+boto3_client_pool = Boto3ClientPool(
+    max_size=settings.AWS_CLIENT_POOL_MAX_SIZE,
+    ttl_seconds=settings.AWS_CLIENT_POOL_TTL_SECONDS,
+    max_pool_connections=settings.AWS_CLIENT_MAX_POOL_CONNECTIONS,
+)
@@ -1,65 +1,92 @@
-import boto3
+import asyncio
+import logging
 from typing import List, Dict, Any
+from botocore.exceptions import ClientError
 from app.schemas.collector_cloudtrail_schemas import CloudTrailTrail, CloudTrailStatus, CloudTrailData
-from app.core.config import get_credentials_from_vault
-from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.aws.client_pool import boto3_client_pool
+from app.aws.regional_executor import RegionalResults, credential_fingerprint, regional_executor
 
-def list_trails_sync(credentials: Dict[str, Any]) -> List[CloudTrailData]:
+logger = logging.getLogger(__name__)
+
+
+def _list_regions(credentials: Dict[str, Any]) -> List[str]:
+    ec2_client = boto3_client_pool.get("ec2", settings.AWS_REGION_NAME, credentials)
+    return [region['RegionName'] for region in ec2_client.describe_regions()['Regions']]
+
+
+def _describe_trails(region: str, credentials: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
-    Lista todos os CloudTrails na conta e obtém seu status.
+    Trails visíveis em `region`, incluindo as cópias (shadow trails) de trails multi-região e de organização.
+    Numa conta-membro o trail da organização só aparece como shadow trail, então elas não podem ser omitidas;
+    as repetições entre regiões são removidas por TrailARN em list_trails.
     """
-    session = boto3.Session(
-        aws_access_key_id=credentials.get("aws_access_key_id"),
-        aws_secret_access_key=credentials.get("aws_secret_access_key"),
-        aws_session_token=credentials.get("aws_session_token"),
-    )
+    cloudtrail_client = boto3_client_pool.get("cloudtrail", region, credentials)
+    return cloudtrail_client.describe_trails().get('trailList', [])
 
-    ec2_client = session.client('ec2', region_name='us-east-1')
-    regions = [region['RegionName'] for region in ec2_client.describe_regions()['Regions']]
 
-    all_trails_data: List[CloudTrailData] = []
-    trail_arns_processed = set()
+def _trail_data(trail: Dict[str, Any], credentials: Dict[str, Any]) -> CloudTrailData:
+    trail_arn = trail['TrailARN']
+    home_region = trail.get('HomeRegion') or settings.AWS_REGION_NAME
+    cloudtrail_client = boto3_client_pool.get("cloudtrail", home_region, credentials)
+    status_response = cloudtrail_client.get_trail_status(Name=trail_arn)
+
+    trail_info = CloudTrailTrail(
+        name=trail.get('Name'),
+        s3_bucket_name=trail.get('S3BucketName'),
+        is_multi_region_trail=trail.get('IsMultiRegionTrail', False),
+        log_file_validation_enabled=trail.get('LogFileValidationEnabled', False),
+        home_region=home_region,
+        trail_arn=trail_arn
+    )
 
-    for region in regions:
-        cloudtrail_client = session.client('cloudtrail', region_name=region)
-        try:
-            paginator = cloudtrail_client.get_paginator('describe_trails')
-            for page in paginator.paginate():
-                for trail in page.get('trailList', []):
-                    trail_arn = trail['TrailARN']
-                    if trail_arn in trail_arns_processed:
-                        continue
-                    trail_arns_processed.add(trail_arn)
+    status_info = CloudTrailStatus(
+        is_logging=status_response.get('IsLogging', False),
+        latest_delivery_time=str(status_response.get('LatestDeliveryTime')),
+        latest_notification_time=str(status_response.get('LatestNotificationTime')),
+        start_logging_time=str(status_response.get('StartLoggingTime')),
+        stop_logging_time=str(status_response.get('StopLoggingTime')),
+        latest_error=status_response.get('LatestDeliveryError')
+    )
 
-                    status_response = cloudtrail_client.get_trail_status(Name=trail_arn)
+    return CloudTrailData(trail_info=trail_info, status=status_info)
 
-                    trail_info = CloudTrailTrail(
-                        name=trail.get('Name'),
-                        s3_bucket_name=trail.get('S3BucketName'),
-                        is_multi_region_trail=trail.get('IsMultiRegionTrail', False),
-                        log_file_validation_enabled=trail.get('LogFileValidationEnabled', False),
-                        home_region=trail.get('HomeRegion'),
-                        trail_arn=trail_arn
-                    )
 
-                    status_info = CloudTrailStatus(
-                        is_logging=status_response.get('IsLogging', False),
-                        latest_delivery_time=str(status_response.get('LatestDeliveryTime')),
-                        latest_notification_time=str(status_response.get('LatestNotificationTime')),
-                        start_logging_time=str(status_response.get('StartLoggingTime')),
-                        stop_logging_time=str(status_response.get('StopLoggingTime')),
-                        latest_error=status_response.get('LatestDeliveryError')
-                    )
+async def list_trails(credentials: Dict[str, Any]) -> RegionalResults:
+    """
+    Lista todos os CloudTrails na conta e obtém seu status, com as credenciais recebidas do chamador.
+    As regiões são consultadas em paralelo pelo regional_executor, cada trail é considerado uma única vez
+    (por TrailARN) e get_trail_status é chamado em paralelo, na região principal de cada um. Uma região ou
+    trail com erro não impede os demais, mas entra em `failed_regions` do resultado (a região do erro ou a
+    região principal do trail): a coleta foi parcial.
+    """
+    regions = await regional_executor.run(_list_regions, credentials)
+    described = await regional_executor.fan_out(
+        regions,
+        lambda region: _describe_trails(region, credentials),
+        account_key=credential_fingerprint(credentials),
+    )
+    trails: Dict[str, Dict[str, Any]] = {}
+    for trail in described:
+        trails.setdefault(trail['TrailARN'], trail)
 
-                    all_trails_data.append(CloudTrailData(trail_info=trail_info, status=status_info))
-        except Exception as e:
-            print(f"Erro ao descrever trails na região {region}: {e}")
+    results = await asyncio.gather(
+        *(regional_executor.run(_trail_data, trail, credentials) for trail in trails.values()), return_exceptions=True
+    )
+    all_trails_data = RegionalResults()
+    all_trails_data.failed_regions.extend(described.failed_regions)
+    for trail, result in zip(trails.values(), results):
+        if isinstance(result, Exception):
+            message = result.response['Error']['Message'] if isinstance(result, ClientError) else str(result)
+            logger.error(f"Erro ao obter o status do trail {trail.get('TrailARN')}: {message}")
+            home_region = trail.get('HomeRegion') or settings.AWS_REGION_NAME
+            if home_region not in all_trails_data.failed_regions:
+                all_trails_data.failed_regions.append(home_region)
             continue
-
+        all_trails_data.append(result)
     return all_trails_data
 
-async def list_trails() -> List[CloudTrailData]:
-    aws_credentials = get_credentials_from_vault("aws")
-    if not aws_credentials:
-        raise Exception("Credenciais da AWS não encontradas no Vault.")
-    return await run_in_threadpool(list_trails_sync, credentials=aws_credentials)
+
+def list_trails_sync(credentials: Dict[str, Any]) -> List[CloudTrailData]:
+    """Versão síncrona de list_trails, para chamadores fora de um event loop."""
+    return asyncio.run(list_trails(credentials))
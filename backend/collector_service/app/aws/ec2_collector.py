@@ -1,44 +1,40 @@
-import boto3
 from botocore.exceptions import ClientError, NoCredentialsError, PartialCredentialsError
 from typing import List, Dict, Any, Optional
 from app.core.config import settings
 from app.schemas.ec2 import Ec2InstanceData, SecurityGroup, InstanceState # Adicionar outros schemas se necessário
 import logging
 from fastapi import HTTPException
+from app.aws.client_pool import boto3_client_pool
+from app.aws.regional_executor import credential_fingerprint, regional_executor
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-# Cache de clientes EC2 por região
-ec2_clients_cache = {}
-
 def get_ec2_client(region_name: str, credentials: Dict[str, Any]):
-    """Cria um cliente Boto3 para o EC2 com as credenciais fornecidas."""
+    """Cliente Boto3 para o EC2 com as credenciais fornecidas, reaproveitado do boto3_client_pool."""
     try:
-        return boto3.client(
-            "ec2",
-            region_name=region_name,
-            aws_access_key_id=credentials.get('aws_access_key_id'),
-            aws_secret_access_key=credentials.get('aws_secret_access_key'),
-            aws_session_token=credentials.get('aws_session_token'),
-        )
+        return boto3_client_pool.get("ec2", region_name, credentials)
     except (NoCredentialsError, PartialCredentialsError) as e:
         raise HTTPException(status_code=403, detail=f"Credenciais AWS para EC2 inválidas: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao criar cliente EC2: {e}")
 
+def _list_regions(credentials: Dict[str, Any]) -> List[str]:
+    client = get_ec2_client(settings.AWS_REGION_NAME, credentials)
+    return [region["RegionName"] for region in client.describe_regions()['Regions']]
+
 async def get_all_regions(credentials: Dict[str, Any]) -> List[str]:
     """Obtém todas as regiões AWS disponíveis usando as credenciais fornecidas."""
     try:
-        client = get_ec2_client(settings.AWS_REGION_NAME, credentials)
-        return [region["RegionName"] for region in client.describe_regions()['Regions']]
+        return await regional_executor.run(_list_regions, credentials)
     except Exception as e:
         logger.error(f"Erro ao listar regiões AWS: {e}")
         raise HTTPException(status_code=500, detail="Erro ao listar regiões AWS.")
 
-async def describe_ec2_instances(region_name: str, credentials: Dict[str, Any]) -> List[Ec2InstanceData]:
+def _describe_ec2_instances_sync(region_name: str, credentials: Dict[str, Any]) -> List[Ec2InstanceData]:
     """
-    Descreve todas as instâncias EC2 em uma região específica.
+    Descreve todas as instâncias EC2 em uma região específica. Síncrona (paginador boto3): roda numa thread
+    do regional_executor.
     """
     ec2_client = get_ec2_client(region_name, credentials)
     instances_data: List[Ec2InstanceData] = []
@@ -95,9 +91,14 @@ async def describe_ec2_instances(region_name: str, credentials: Dict[str, Any])
 
     return instances_data
 
-async def describe_security_groups(region_name: str, credentials: Dict[str, Any]) -> List[SecurityGroup]:
+async def describe_ec2_instances(region_name: str, credentials: Dict[str, Any]) -> List[Ec2InstanceData]:
+    """Descreve todas as instâncias EC2 em uma região específica."""
+    return await regional_executor.run(_describe_ec2_instances_sync, region_name, credentials)
+
+def _describe_security_groups_sync(region_name: str, credentials: Dict[str, Any]) -> List[SecurityGroup]:
     """
-    Descreve todos os Security Groups em uma região específica.
+    Descreve todos os Security Groups em uma região específica. Síncrona (paginador boto3): roda numa
+    thread do regional_executor.
     """
     ec2_client = get_ec2_client(region_name, credentials)
     sg_data: List[SecurityGroup] = []
@@ -131,42 +132,43 @@ async def describe_security_groups(region_name: str, credentials: Dict[str, Any]
         raise HTTPException(status_code=500, detail=f"ClientError in {region_name} for Security Groups: {e.response['Error']['Message']}") from e
     except Exception as e_region:
         logger.error(f"Unexpected error describing Security Groups in region {region_name}: {e_region}")
-        raise HTTPException(status_code=500, detail=f"Unexpected error in {region_name} for Security Groups: {str(e_region)}") from e
+        raise HTTPException(status_code=500, detail=f"Unexpected error in {region_name} for Security Groups: {str(e_region)}") from e_region
 
     return sg_data
 
 
+async def describe_security_groups(region_name: str, credentials: Dict[str, Any]) -> List[SecurityGroup]:
+    """Descreve todos os Security Groups em uma região específica."""
+    return await regional_executor.run(_describe_security_groups_sync, region_name, credentials)
+
+
 async def get_ec2_instance_data_all_regions(credentials: Dict[str, Any]) -> List[Ec2InstanceData]:
-    """Coleta dados de instâncias EC2 de todas as regiões habilitadas."""
-    all_instances: List[Ec2InstanceData] = []
+    """
+    Coleta dados de instâncias EC2 de todas as regiões habilitadas. As regiões são consultadas em paralelo
+    pelo regional_executor; uma região com erro ou que excede o prazo vira um item ERROR_REGION.
+    """
     regions = await get_all_regions(credentials)
+    logger.info(f"Fetching EC2 instance data for {len(regions)} regions...")
+
+    def on_error(region: str, error: BaseException) -> List[Ec2InstanceData]:
+        return [Ec2InstanceData(instance_id="ERROR_REGION", region=region, error_details=f"Unexpected error: {error}")]
 
-    for region in regions:
-        logger.info(f"Fetching EC2 instance data for region: {region}...")
-        instances_in_region = await describe_ec2_instances(region, credentials)
-        all_instances.extend(instances_in_region)
-    return all_instances
+    return await regional_executor.fan_out(
+        regions,
+        lambda region: _describe_ec2_instances_sync(region, credentials),
+        account_key=credential_fingerprint(credentials),
+        on_error=on_error,
+    )
 
 async def get_security_group_data_all_regions(credentials: Dict[str, Any]) -> List[SecurityGroup]:
-    """Coleta dados de Security Groups de todas as regiões habilitadas."""
-    all_sgs: List[SecurityGroup] = []
+    """
+    Coleta dados de Security Groups de todas as regiões habilitadas, em paralelo pelo regional_executor.
+    A falha em uma região (já registrada no log) não impede as outras; ela só não contribui com SGs.
+    """
     regions = await get_all_regions(credentials)
-
-    for region in regions:
-        logger.info(f"Fetching EC2 Security Group data for region: {region}...")
-        try:
-            sgs_in_region = await describe_security_groups(region, credentials)
-            all_sgs.extend(sgs_in_region)
-        except HTTPException as e:
-            # Se uma região falhar, podemos decidir continuar e coletar de outras,
-            # ou falhar tudo. Por enquanto, vamos logar e continuar,
-            # mas o erro já foi logado em describe_security_groups.
-            # Poderíamos adicionar um objeto de erro à lista all_sgs aqui se quiséssemos
-            # notificar o chamador sobre falhas parciais de forma estruturada.
-            logger.error(f"Failed to get Security Groups from region {region}: {e.detail}")
-            # Exemplo de como adicionar um erro:
-            # all_sgs.append(SecurityGroup(GroupId=f"ERROR_{region}", ErrorDetails=e.detail))
-            # Mas o schema SecurityGroup não tem ErrorDetails. Ajustar se necessário.
-            # Por ora, a falha em uma região (se não for credencial) não impede outras.
-            pass # A exceção já foi loggada.
-    return all_sgs
+    logger.info(f"Fetching EC2 Security Group data for {len(regions)} regions...")
+    return await regional_executor.fan_out(
+        regions,
+        lambda region: _describe_security_groups_sync(region, credentials),
+        account_key=credential_fingerprint(credentials),
+    )
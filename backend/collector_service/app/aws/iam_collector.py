@@ -1,13 +1,18 @@
-import boto3
+import csv
+import io
+import time
+from datetime import datetime
 from botocore.exceptions import ClientError, NoCredentialsError, PartialCredentialsError
 from typing import List, Dict, Any, Optional
 from app.core.config import settings # settings.AWS_REGION_NAME pode ser usado para o cliente inicial
-from app.schemas.iam import (
+from app.schemas.aws.iam_schemas import (
     IAMUserData, IAMUserAccessKeyMetadata, IAMUserMFADevice,
     IAMPolicyAttachment, IAMUserPolicy,
     IAMRoleData, IAMRoleLastUsed,
     IAMPolicyData
 )
+from app.aws.client_pool import boto3_client_pool
+from app.aws.regional_executor import regional_executor
 import logging
 from fastapi import HTTPException
 import json # Para carregar documentos de política inline
@@ -15,18 +20,14 @@ import json # Para carregar documentos de política inline
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
-iam_client_cache = None
+IAM_MODE_BULK = "bulk"
+IAM_MODE_PER_ENTITY = "per_entity"
 
 def get_iam_client(credentials: Dict[str, Any]):
-    """Cria um cliente Boto3 para o IAM com as credenciais fornecidas."""
+    """Cliente Boto3 para o IAM com as credenciais fornecidas, reaproveitado do boto3_client_pool."""
     try:
-        return boto3.client(
-            "iam",
-            region_name=settings.AWS_REGION_NAME, # IAM é global, mas a região é necessária
-            aws_access_key_id=credentials.get('aws_access_key_id'),
-            aws_secret_access_key=credentials.get('aws_secret_access_key'),
-            aws_session_token=credentials.get('aws_session_token'),
-        )
+        # IAM é global, mas a região é necessária
+        return boto3_client_pool.get("iam", settings.AWS_REGION_NAME, credentials)
     except (NoCredentialsError, PartialCredentialsError) as e:
         raise HTTPException(status_code=403, detail=f"Credenciais AWS para IAM inválidas: {e}")
     except Exception as e:
@@ -76,7 +77,7 @@ async def get_iam_user_details(user_name: str, client) -> Dict[str, Any]:
         paginator_mfa = client.get_paginator('list_mfa_devices')
         for page in paginator_mfa.paginate(UserName=user_name):
             for mfa_device in page.get("MFADevices", []):
-                details["mfa_devices"].append(IAMUserMFADevice(UserName=user_name, **mfa_device)) # Adiciona UserName aqui
+                details["mfa_devices"].append(IAMUserMFADevice(**{**mfa_device, "UserName": user_name})) # Adiciona UserName aqui
     except ClientError as e:
         logger.warning(f"Could not list MFA devices for user {user_name}: {e.response['Error']['Message']}")
 
@@ -115,6 +116,167 @@ async def get_iam_user_details(user_name: str, client) -> Dict[str, Any]:
     return details
 
 
+# --- Coleta em lote ---
+# get_account_authorization_details traz usuários, grupos, roles e políticas (com documentos inline e a versão
+# padrão das gerenciadas) em poucas páginas, e o relatório de credenciais traz idade e último uso das chaves,
+# último uso da senha e estado do MFA de todos os usuários de uma vez. Os dois são juntados em memória nos
+# mesmos schemas da coleta por entidade. O relatório não tem os IDs das chaves nem os seriais de MFA: os
+# seriais virtuais vêm de um único list_virtual_mfa_devices, e list_access_keys / list_mfa_devices só são
+# chamados para os usuários que o relatório indica ter chaves ou MFA de hardware.
+
+def _policy_document(document: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(document, str): # Documento pode vir como string JSON
+        return json.loads(document)
+    return document
+
+def _authorization_details(client, filters: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    details: Dict[str, List[Dict[str, Any]]] = {"UserDetailList": [], "GroupDetailList": [], "RoleDetailList": [], "Policies": []}
+    paginator = client.get_paginator('get_account_authorization_details')
+    for page in paginator.paginate(Filter=filters):
+        for key, items in details.items():
+            items.extend(page.get(key, []))
+    return details
+
+def _credential_report(client, timeout_seconds: float) -> Dict[str, Dict[str, str]]:
+    """Gera (ou reaproveita, se tiver menos de 4h) o relatório de credenciais e o indexa por nome de usuário."""
+    deadline = time.monotonic() + timeout_seconds
+    while client.generate_credential_report().get("State") != "COMPLETE":
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Relatório de credenciais não ficou pronto em {timeout_seconds}s.")
+        time.sleep(1)
+    content = client.get_credential_report()["Content"]
+    if isinstance(content, bytes):
+        content = content.decode("utf-8")
+    return {row["user"]: row for row in csv.DictReader(io.StringIO(content))}
+
+def _report_value(row: Dict[str, str], column: str) -> Optional[str]:
+    value = row.get(column)
+    return None if value in (None, "", "N/A", "no_information", "not_supported") else value
+
+def _report_datetime(row: Dict[str, str], column: str) -> Optional[datetime]:
+    value = _report_value(row, column)
+    return datetime.fromisoformat(value.replace("Z", "+00:00")) if value else None
+
+def _bulk_access_keys(client, user_name: str, row: Dict[str, str]) -> List[IAMUserAccessKeyMetadata]:
+    # Cada chave de list_access_keys é casada com a coluna access_key_1/2 do relatório de data de criação
+    # (last_rotated) mais próxima.
+    slots = []
+    for n in (1, 2):
+        rotated = _report_datetime(row, f"access_key_{n}_last_rotated")
+        if rotated:
+            slots.append({
+                "rotated": rotated,
+                "last_used_date": _report_datetime(row, f"access_key_{n}_last_used_date"),
+                "last_used_region": _report_value(row, f"access_key_{n}_last_used_region"),
+                "last_used_service": _report_value(row, f"access_key_{n}_last_used_service"),
+            })
+    access_keys = []
+    paginator_keys = client.get_paginator('list_access_keys')
+    for page in paginator_keys.paginate(UserName=user_name):
+        for key_meta in page.get("AccessKeyMetadata", []):
+            slot = min(slots, key=lambda s: abs((s["rotated"] - key_meta["CreateDate"]).total_seconds()), default=None)
+            last_used_info = {}
+            if slot is not None:
+                slots.remove(slot)
+                last_used_info = {k: v for k, v in slot.items() if k != "rotated"}
+            access_keys.append(IAMUserAccessKeyMetadata(**key_meta, **last_used_info))
+    return access_keys
+
+def _collect_iam_users_bulk(client, credential_report_timeout_seconds: float) -> List[IAMUserData]:
+    details = _authorization_details(client, ["User"])
+    report = _credential_report(client, credential_report_timeout_seconds)
+
+    virtual_mfa: Dict[str, List[IAMUserMFADevice]] = {}
+    for page in client.get_paginator('list_virtual_mfa_devices').paginate(AssignmentStatus='Assigned'):
+        for device in page.get("VirtualMFADevices", []):
+            user_name = device.get("User", {}).get("UserName")
+            if user_name:
+                virtual_mfa.setdefault(user_name, []).append(IAMUserMFADevice(
+                    UserName=user_name, SerialNumber=device["SerialNumber"], EnableDate=device["EnableDate"]
+                ))
+
+    users_data: List[IAMUserData] = []
+    for user in details["UserDetailList"]:
+        user_name = user["UserName"]
+        row = report.get(user_name, {})
+        errors = []
+
+        mfa_devices = virtual_mfa.get(user_name, [])
+        if not mfa_devices and row.get("mfa_active") == "true":
+            # MFA de hardware não aparece em list_virtual_mfa_devices.
+            try:
+                for page in client.get_paginator('list_mfa_devices').paginate(UserName=user_name):
+                    mfa_devices.extend(IAMUserMFADevice(**{**d, "UserName": user_name}) for d in page.get("MFADevices", []))
+            except ClientError as e:
+                errors.append(f"Could not list MFA devices: {e.response['Error']['Message']}")
+
+        access_keys = []
+        if any(_report_value(row, f"access_key_{n}_last_rotated") for n in (1, 2)):
+            try:
+                access_keys = _bulk_access_keys(client, user_name, row)
+            except ClientError as e:
+                errors.append(f"Could not list access keys: {e.response['Error']['Message']}")
+
+        inline_policies = []
+        for policy in user.get("UserPolicyList", []):
+            try:
+                inline_policies.append(IAMUserPolicy(
+                    PolicyName=policy["PolicyName"], policy_document=_policy_document(policy.get("PolicyDocument"))
+                ))
+            except json.JSONDecodeError as e_json:
+                logger.error(f"Error decoding inline policy JSON for user {user_name}, policy {policy['PolicyName']}: {e_json}")
+
+        users_data.append(IAMUserData(
+            UserId=user["UserId"],
+            UserName=user_name,
+            Arn=user["Arn"],
+            CreateDate=user["CreateDate"],
+            PasswordLastUsed=_report_datetime(row, "password_last_used"),
+            attached_policies=[IAMPolicyAttachment(**p) for p in user.get("AttachedManagedPolicies", [])],
+            inline_policies=inline_policies,
+            mfa_devices=mfa_devices,
+            access_keys=access_keys,
+            Tags=user.get("Tags", []),
+            error_details="; ".join(errors) or None,
+        ))
+    return users_data
+
+def _collect_iam_roles_bulk(client) -> List[IAMRoleData]:
+    # RoleDetailList não traz Description; o restante equivale a list_roles + detalhes por role.
+    roles_data: List[IAMRoleData] = []
+    for role in _authorization_details(client, ["Role"])["RoleDetailList"]:
+        role_name = role["RoleName"]
+        try:
+            assume_role_policy_doc = _policy_document(role.get("AssumeRolePolicyDocument"))
+        except json.JSONDecodeError:
+            logger.warning(f"Could not decode AssumeRolePolicyDocument for role {role_name}")
+            assume_role_policy_doc = {"Error": "Failed to decode policy document"}
+        inline_policies = []
+        for policy in role.get("RolePolicyList", []):
+            try:
+                inline_policies.append(IAMUserPolicy(
+                    PolicyName=policy["PolicyName"], policy_document=_policy_document(policy.get("PolicyDocument"))
+                ))
+            except json.JSONDecodeError as e_json:
+                logger.error(f"Error decoding inline policy JSON for role {role_name}, policy {policy['PolicyName']}: {e_json}")
+        role_last_used = role.get("RoleLastUsed")
+        roles_data.append(IAMRoleData(
+            RoleId=role["RoleId"],
+            RoleName=role_name,
+            Arn=role["Arn"],
+            CreateDate=role["CreateDate"],
+            AssumeRolePolicyDocument=assume_role_policy_doc,
+            attached_policies=[IAMPolicyAttachment(**p) for p in role.get("AttachedManagedPolicies", [])],
+            inline_policies=inline_policies,
+            RoleLastUsed=IAMRoleLastUsed(**role_last_used) if role_last_used else None,
+            Tags=role.get("Tags", []),
+        ))
+    return roles_data
+
+def _use_bulk(mode: Optional[str]) -> bool:
+    return (mode or settings.AWS_IAM_COLLECTION_MODE) == IAM_MODE_BULK
+
+
 async def get_account_summary_data(client) -> Dict[str, Any]:
     """Coleta o sumário da conta IAM."""
     try:
@@ -124,10 +286,26 @@ async def get_account_summary_data(client) -> Dict[str, Any]:
         logger.error(f"Could not get IAM account summary: {e.response['Error']['Message']}")
         return {"Error": f"Could not get IAM account summary: {e.response['Error']['Message']}"}
 
-async def get_iam_users_data(credentials: Dict[str, Any]) -> List[IAMUserData]:
+async def get_iam_users_data(credentials: Dict[str, Any], mode: Optional[str] = None) -> List[IAMUserData]:
+    """
+    Coleta os usuários IAM. No modo "bulk" (padrão de AWS_IAM_COLLECTION_MODE) usa a coleta em lote; se ela
+    não estiver disponível (ex.: sem permissão para iam:GetAccountAuthorizationDetails ou
+    iam:GenerateCredentialReport), cai para a coleta por usuário ("per_entity").
+    """
     client = get_iam_client(credentials)
     users_data: List[IAMUserData] = []
 
+    if _use_bulk(mode):
+        try:
+            users_data = await regional_executor.run(
+                _collect_iam_users_bulk, client, settings.AWS_IAM_CREDENTIAL_REPORT_TIMEOUT_SECONDS
+            )
+            if users_data:
+                users_data[0].account_summary = await get_account_summary_data(client)
+            return users_data
+        except (ClientError, TimeoutError) as e:
+            logger.warning(f"Bulk IAM user collection unavailable, falling back to per-user calls: {e}")
+
     try:
         # Coletar o sumário da conta primeiro
         account_summary = await get_account_summary_data(client)
@@ -209,10 +387,17 @@ async def get_iam_role_details(role_name: str, client) -> Dict[str, Any]:
 
     return details
 
-async def get_iam_roles_data(credentials: Dict[str, Any]) -> List[IAMRoleData]:
+async def get_iam_roles_data(credentials: Dict[str, Any], mode: Optional[str] = None) -> List[IAMRoleData]:
+    """Coleta as roles IAM, em lote por get_account_authorization_details ou por role (ver get_iam_users_data)."""
     client = get_iam_client(credentials)
     roles_data: List[IAMRoleData] = []
 
+    if _use_bulk(mode):
+        try:
+            return await regional_executor.run(_collect_iam_roles_bulk, client)
+        except ClientError as e:
+            logger.warning(f"Bulk IAM role collection unavailable, falling back to per-role calls: {e}")
+
     try:
         paginator = client.get_paginator('list_roles')
         for page in paginator.paginate():
@@ -240,9 +425,11 @@ async def get_iam_roles_data(credentials: Dict[str, Any]) -> List[IAMRoleData]:
                 role_last_used = role_dict.get("RoleLastUsed")
 
                 iam_role = IAMRoleData(
-                    **role_dict, # Passa todos os campos do dicionário da role
-                    AssumeRolePolicyDocument=assume_role_policy_doc, # Sobrescreve com o decodificado
-                    RoleLastUsed=IAMRoleLastUsed(**role_last_used) if role_last_used else None,
+                    **{
+                        **role_dict, # Passa todos os campos do dicionário da role
+                        "AssumeRolePolicyDocument": assume_role_policy_doc, # Sobrescreve com o decodificado
+                        "RoleLastUsed": IAMRoleLastUsed(**role_last_used) if role_last_used else None,
+                    },
                     **role_specific_details,
                     error_details=error_details_role
                 )
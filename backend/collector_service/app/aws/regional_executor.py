@@ -0,0 +1,160 @@
+import asyncio
+import hashlib
+import logging
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def credential_fingerprint(credentials: Dict[str, Any]) -> str:
+    """Identifica um conjunto de credenciais sem guardar o segredo (hash da chave de acesso + token)."""
+    material = "\0".join(
+        str(credentials.get(key) or "") for key in ("aws_access_key_id", "aws_secret_access_key", "aws_session_token")
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+class RegionalResults(list):
+    """Resultados mesclados de `RegionalExecutor.fan_out`, com as regiões que falharam ou excederam o prazo."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.failed_regions: List[str] = []
+
+
+class _AccountSlots:
+    """Semáforo de regiões de uma conta e quantas chamadas o usam (em andamento ou aguardando vaga)."""
+
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+class RegionalExecutor:
+    """
+    Executa a coleta síncrona de cada região (paginadores boto3) num ThreadPoolExecutor limitado, fora do
+    event loop. O pool é compartilhado por todas as contas (`max_workers`), e cada conta tem no máximo
+    `per_account_concurrency` regiões em andamento, para que uma conta com muitas regiões não ocupe todas as
+    threads nem estoure o rate limit da API. Os resultados são mesclados à medida que as regiões terminam;
+    uma região que falha ou passa de `region_timeout_seconds` é isolada por `on_error` sem travar as outras.
+    A vaga de uma região que passou do prazo só é liberada quando a thread termina de fato.
+    """
+
+    def __init__(self, max_workers: int = 32, per_account_concurrency: int = 8, region_timeout_seconds: Optional[float] = 300.0):
+        self.max_workers = max(1, max_workers)
+        self.per_account_concurrency = max(1, per_account_concurrency)
+        self.region_timeout_seconds = region_timeout_seconds
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Vagas por event loop (um asyncio.Semaphore não pode ser compartilhado entre loops) e por conta. A
+        # entrada de uma conta sai do mapa quando ninguém mais a usa, então ele só guarda as contas em coleta.
+        self._account_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _AccountSlots]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="aws-region")
+        return self._executor
+
+    async def _acquire(self, account_key: str) -> _AccountSlots:
+        per_loop = self._account_slots.setdefault(asyncio.get_running_loop(), {})
+        slots = per_loop.get(account_key)
+        if slots is None:
+            slots = per_loop[account_key] = _AccountSlots(self.per_account_concurrency)
+        slots.users += 1
+        try:
+            await slots.semaphore.acquire()
+        except BaseException:
+            self._release(account_key, slots, acquired=False)
+            raise
+        return slots
+
+    def _release(self, account_key: str, slots: _AccountSlots, acquired: bool = True) -> None:
+        if acquired:
+            slots.semaphore.release()
+        slots.users -= 1
+        if slots.users == 0:
+            per_loop = self._account_slots.get(asyncio.get_running_loop())
+            if per_loop is not None and per_loop.get(account_key) is slots:
+                del per_loop[account_key]
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Executa uma única chamada síncrona no pool, sem o limite por conta."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def _run_region(self, account_key: str, region: str, fn: Callable[[str], List[T]]) -> List[T]:
+        slots = await self._acquire(account_key)
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, fn, region)
+        except BaseException:
+            self._release(account_key, slots)
+            raise
+
+        def release(done: "asyncio.Future[List[T]]") -> None:
+            # Após o prazo ninguém mais lê o resultado; consultar a exceção evita o aviso de exceção não lida.
+            if not done.cancelled():
+                done.exception()
+            self._release(account_key, slots)
+
+        future.add_done_callback(release)
+        # Se o prazo vencer (ou a coleta for cancelada) a thread segue até o fim da chamada em curso e o resultado
+        # é descartado; o shield mantém o future vivo para que a vaga só seja devolvida quando a thread terminar.
+        shielded = asyncio.shield(future)
+        if self.region_timeout_seconds is None:
+            return await shielded
+        return await asyncio.wait_for(shielded, timeout=self.region_timeout_seconds)
+
+    async def fan_out(
+        self,
+        regions: Sequence[str],
+        fn: Callable[[str], List[T]],
+        *,
+        account_key: str,
+        on_error: Optional[Callable[[str, BaseException], List[T]]] = None,
+    ) -> RegionalResults:
+        """
+        Chama `fn(region)` para cada região e concatena as listas retornadas na ordem em que as regiões
+        terminam. Sem `on_error`, uma região com erro é registrada no log e contribui com uma lista vazia.
+        Em ambos os casos ela é listada em `failed_regions` do resultado: a coleta foi parcial.
+        """
+
+        async def run_region(region: str):
+            try:
+                return region, await self._run_region(account_key, region, fn), None
+            except asyncio.TimeoutError:
+                return region, None, TimeoutError(f"Região {region} excedeu {self.region_timeout_seconds}s.")
+            except Exception as e:
+                return region, None, e
+
+        results = RegionalResults()
+        for next_done in asyncio.as_completed([run_region(region) for region in regions]):
+            region, items, error = await next_done
+            if error is None:
+                results.extend(items)
+                continue
+            logger.error(f"Falha na coleta da região {region}: {error}")
+            results.failed_regions.append(region)
+            if on_error is not None:
+                results.extend(on_error(region, error))
+        return results
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+regional_executor = RegionalExecutor(
+    max_workers=settings.AWS_COLLECTOR_MAX_WORKERS,
+    per_account_concurrency=settings.AWS_REGION_CONCURRENCY_PER_ACCOUNT,
+    region_timeout_seconds=settings.AWS_REGION_TIMEOUT_SECONDS,
+)
@@ -1,8 +1,10 @@
-import boto3
+import time
+import asyncio
 from botocore.exceptions import ClientError, NoCredentialsError, PartialCredentialsError
 from typing import List, Dict, Any, Optional
+from prometheus_client import Counter, Gauge
 from app.core.config import settings
-from app.schemas.s3 import (
+from app.schemas.aws.s3_schemas import (
     S3BucketData,
     S3BucketACLDetails,
     S3BucketACLGrant,
@@ -10,23 +12,24 @@ from app.schemas.s3 import (
     S3BucketVersioning,
     S3BucketPublicAccessBlock,
     S3BucketLogging,
+    S3BucketEncryption,
 )
+from app.aws.client_pool import boto3_client_pool
+from app.aws.regional_executor import regional_executor
 import logging
 import json
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 
+
+S3_BUCKETS_COLLECTED = Counter("collector_s3_buckets_collected_total", "Buckets S3 com detalhes coletados.")
+S3_BUCKETS_PER_SECOND = Gauge("collector_s3_buckets_per_second", "Vazão da última coleta S3, em buckets/s.")
+
 def get_boto3_client(service_name: str, region_name: str, credentials: Dict[str, Any]):
-    """Cria um cliente Boto3 dinamicamente com as credenciais fornecidas."""
+    """Cliente Boto3 com as credenciais fornecidas, reaproveitado do boto3_client_pool."""
     try:
-        return boto3.client(
-            service_name,
-            region_name=region_name,
-            aws_access_key_id=credentials.get('aws_access_key_id'),
-            aws_secret_access_key=credentials.get('aws_secret_access_key'),
-            aws_session_token=credentials.get('aws_session_token')
-        )
+        return boto3_client_pool.get(service_name, region_name, credentials)
     except (NoCredentialsError, PartialCredentialsError) as e:
         raise HTTPException(status_code=403, detail=f"Credenciais AWS inválidas ou incompletas: {e}")
     except Exception as e:
@@ -68,54 +71,136 @@ def check_policy_for_public_access(policy_document: Dict[str, Any]) -> bool:
                 return True
     return False
 
-async def get_s3_data(credentials: Dict[str, Any]) -> List[S3BucketData]:
-    """
-    Ponto de entrada principal para coletar dados de S3 usando as credenciais fornecidas.
-    """
-    logger.info("Iniciando coleta de dados S3.")
-    collected_data: List[S3BucketData] = []
-    s3_global_client = get_boto3_client("s3", settings.AWS_REGION_NAME, credentials)
+def _fetch_acl(client, bucket_name: str) -> S3BucketACLDetails:
+    return parse_acl(client.get_bucket_acl(Bucket=bucket_name), bucket_name)
 
+def _fetch_policy(client, bucket_name: str) -> Optional[Dict[str, Any]]:
     try:
-        response = s3_global_client.list_buckets()
+        policy = client.get_bucket_policy(Bucket=bucket_name)["Policy"]
     except ClientError as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao listar buckets S3: {e.response['Error']['Message']}")
+        if e.response["Error"]["Code"] == "NoSuchBucketPolicy":
+            return None
+        raise
+    return json.loads(policy) if isinstance(policy, str) else policy
 
-    for bucket in response.get("Buckets", []):
-        bucket_name = bucket["Name"]
-        creation_date = bucket.get("CreationDate")
-        bucket_region = None
-        error_message = ""
+def _fetch_versioning(client, bucket_name: str) -> S3BucketVersioning:
+    response = client.get_bucket_versioning(Bucket=bucket_name)
+    return S3BucketVersioning(status=response.get("Status"), mfa_delete=response.get("MFADelete"))
 
-        try:
-            location_response = s3_global_client.get_bucket_location(Bucket=bucket_name)
-            bucket_region = location_response.get("LocationConstraint") or "us-east-1"
-            s3_regional_client = get_boto3_client("s3", bucket_region, credentials)
+def _fetch_public_access_block(client, bucket_name: str) -> Optional[S3BucketPublicAccessBlock]:
+    try:
+        response = client.get_public_access_block(Bucket=bucket_name)
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "NoSuchPublicAccessBlockConfiguration":
+            return None
+        raise
+    return S3BucketPublicAccessBlock(**response.get("PublicAccessBlockConfiguration", {}))
+
+def _fetch_logging(client, bucket_name: str) -> S3BucketLogging:
+    logging_enabled = client.get_bucket_logging(Bucket=bucket_name).get("LoggingEnabled")
+    if not logging_enabled:
+        return S3BucketLogging(enabled=False)
+    return S3BucketLogging(
+        enabled=True,
+        target_bucket=logging_enabled.get("TargetBucket"),
+        target_prefix=logging_enabled.get("TargetPrefix"),
+    )
 
-            # Coleta de detalhes
-            acl_details = None
-            try:
-                acl_response = s3_regional_client.get_bucket_acl(Bucket=bucket_name)
-                acl_details = parse_acl(acl_response, bucket_name)
-            except ClientError as e:
-                error_message += f"ACL fetch failed: {e.response['Error']['Message']}; "
+def _fetch_encryption(client, bucket_name: str) -> S3BucketEncryption:
+    try:
+        response = client.get_bucket_encryption(Bucket=bucket_name)
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ServerSideEncryptionConfigurationNotFoundError":
+            return S3BucketEncryption(enabled=False)
+        raise
+    rules = response.get("ServerSideEncryptionConfiguration", {}).get("Rules", [])
+    return S3BucketEncryption(enabled=bool(rules), rules=rules)
+
+# (campo de S3BucketData, rótulo usado em error_details, chamada)
+_BUCKET_DETAIL_FETCHERS = (
+    ("acl", "ACL", _fetch_acl),
+    ("policy", "Policy", _fetch_policy),
+    ("versioning", "Versioning", _fetch_versioning),
+    ("public_access_block", "Public access block", _fetch_public_access_block),
+    ("logging", "Logging", _fetch_logging),
+    ("encryption", "Encryption", _fetch_encryption),
+)
 
-            # ... (Lógica para policy, versioning, etc. aqui) ...
+def _error_message(e: Exception) -> str:
+    if isinstance(e, ClientError):
+        return e.response['Error'].get('Message') or e.response['Error'].get('Code', str(e))
+    return str(e)
+
+async def _collect_bucket(
+    bucket: Dict[str, Any], s3_global_client, credentials: Dict[str, Any], semaphore: asyncio.Semaphore
+) -> S3BucketData:
+    bucket_name = bucket["Name"]
+    error_message = ""
+    async with semaphore:
+        try:
+            location_response = await regional_executor.run(lambda: s3_global_client.get_bucket_location(Bucket=bucket_name))
+            bucket_region = location_response.get("LocationConstraint") or "us-east-1"
+        except Exception as e:
+            # Sem a região, tenta os detalhes pela região padrão; a maioria das chamadas ainda responde.
+            bucket_region = settings.AWS_REGION_NAME
+            error_message += f"Region determination failed: {_error_message(e)}; "
 
+        details: Dict[str, Any] = {}
+        try:
+            s3_regional_client = await regional_executor.run(get_boto3_client, "s3", bucket_region, credentials)
+            # As seis chamadas do bucket saem juntas; o limite real de threads é o do regional_executor.
+            results = await asyncio.gather(
+                *(regional_executor.run(fetch, s3_regional_client, bucket_name) for _, _, fetch in _BUCKET_DETAIL_FETCHERS),
+                return_exceptions=True,
+            )
+            for (field, label, _), result in zip(_BUCKET_DETAIL_FETCHERS, results):
+                if isinstance(result, Exception):
+                    error_message += f"{label} fetch failed: {_error_message(result)}; "
+                else:
+                    details[field] = result
         except Exception as e_bucket_level:
             error_message += f"Unexpected processing error: {str(e_bucket_level)}"
 
-        bucket_data = S3BucketData(
-            name=bucket_name,
-            creation_date=creation_date,
-            region=bucket_region or "unknown",
-            acl=acl_details,
-            # ... (outros campos) ...
-            error_details=error_message.strip() if error_message else None,
-        )
-        collected_data.append(bucket_data)
+    policy_is_public = None
+    if "policy" in details:
+        policy_is_public = check_policy_for_public_access(details["policy"])
+
+    return S3BucketData(
+        name=bucket_name,
+        creation_date=bucket.get("CreationDate"),
+        region=bucket_region,
+        policy_is_public=policy_is_public,
+        error_details=error_message.strip() if error_message else None,
+        **details,
+    )
+
+async def get_s3_data(credentials: Dict[str, Any]) -> List[S3BucketData]:
+    """
+    Ponto de entrada principal para coletar dados de S3 usando as credenciais fornecidas.
+    Até AWS_S3_BUCKET_CONCURRENCY buckets são processados ao mesmo tempo, cada um com as chamadas de detalhe
+    (ACL, policy, public access block, versioning, logging, encryption) em paralelo no regional_executor.
+    Os clientes regionais vêm do boto3_client_pool, um por região em vez de um por bucket.
+    """
+    logger.info("Iniciando coleta de dados S3.")
+    start = time.perf_counter()
+    s3_global_client = get_boto3_client("s3", settings.AWS_REGION_NAME, credentials)
+
+    try:
+        response = await regional_executor.run(s3_global_client.list_buckets)
+    except ClientError as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao listar buckets S3: {e.response['Error']['Message']}")
+
+    semaphore = asyncio.Semaphore(max(1, settings.AWS_S3_BUCKET_CONCURRENCY))
+    collected_data: List[S3BucketData] = await asyncio.gather(
+        *(_collect_bucket(bucket, s3_global_client, credentials, semaphore) for bucket in response.get("Buckets", []))
+    )
 
-    return collected_data
+    elapsed = time.perf_counter() - start
+    buckets_per_second = len(collected_data) / elapsed if elapsed > 0 else 0.0
+    S3_BUCKETS_COLLECTED.inc(len(collected_data))
+    S3_BUCKETS_PER_SECOND.set(buckets_per_second)
+    logger.info(f"Coleta S3 concluída: {len(collected_data)} buckets em {elapsed:.2f}s ({buckets_per_second:.1f} buckets/s).")
+    return list(collected_data)
 
 async def remediate_public_acl(credentials: Dict[str, Any], bucket_name: str, region: str) -> Dict[str, Any]:
     """
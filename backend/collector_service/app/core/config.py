@@ -1,7 +1,7 @@
 import os
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import Optional
+from typing import Literal, Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -20,6 +20,26 @@ class Settings(BaseSettings):
     AWS_ACCESS_KEY_ID: Optional[str] = None
     AWS_SECRET_ACCESS_KEY: Optional[str] = None
 
+    # Coleta multi-região: threads compartilhadas por todas as contas, regiões simultâneas por conta e
+    # prazo de cada região (None = sem prazo).
+    AWS_COLLECTOR_MAX_WORKERS: int = 32
+    AWS_REGION_CONCURRENCY_PER_ACCOUNT: int = 8
+    AWS_REGION_TIMEOUT_SECONDS: Optional[float] = 300.0
+
+    # Pool de clientes boto3 por (credenciais, serviço, região): entradas no máximo, validade de cada cliente
+    # e conexões HTTP por cliente (um cliente regional é compartilhado pelas threads da coleta).
+    AWS_CLIENT_POOL_MAX_SIZE: int = 256
+    AWS_CLIENT_POOL_TTL_SECONDS: float = 900.0
+    AWS_CLIENT_MAX_POOL_CONNECTIONS: int = 32
+
+    # Buckets S3 com detalhes sendo coletados ao mesmo tempo (as chamadas rodam no pool do regional_executor).
+    AWS_S3_BUCKET_CONCURRENCY: int = 16
+
+    # Coleta IAM: "bulk" (get_account_authorization_details + relatório de credenciais) ou "per_entity"
+    # (chamadas por usuário/role/política). O modo bulk cai para per_entity se não tiver permissão.
+    AWS_IAM_COLLECTION_MODE: Literal["bulk", "per_entity"] = "bulk"
+    AWS_IAM_CREDENTIAL_REPORT_TIMEOUT_SECONDS: float = 60.0
+
     AZURE_SUBSCRIPTION_ID: Optional[str] = None
     AZURE_TENANT_ID: Optional[str] = None
     AZURE_CLIENT_ID: Optional[str] = None
@@ -4,6 +4,7 @@ from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api.v1 import aws_collector_controller, gcp_collector_controller, huawei_collector_controller, azure_collector_controller, google_workspace_controller, m365_collector_controller
 from app.aws.s3_collector import remediate_public_acl
+from app.aws.regional_executor import regional_executor
 from pydantic import BaseModel
 from app.core.logging_config import setup_logging
 
@@ -39,6 +40,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info(f"Encerrando o serviço: {settings.PROJECT_NAME}")
+    regional_executor.shutdown()
 
 @app.get("/health", tags=["Health Check"])
 def health_check():
@@ -44,6 +44,11 @@ class S3BucketLogging(BaseModel):
     target_prefix: Optional[str] = Field(None)
 
 
+class S3BucketEncryption(BaseModel):
+    enabled: bool = Field(False, description="True if default server-side encryption is configured.")
+    rules: List[Dict[str, Any]] = Field([], description="ServerSideEncryptionConfiguration rules as returned by S3.")
+
+
 class S3BucketData(BaseModel):
     name: str = Field(description="Name of the S3 bucket.")
     creation_date: Optional[datetime] = Field(None, description="Date and time the bucket was created.")
@@ -54,7 +59,8 @@ class S3BucketData(BaseModel):
     versioning: Optional[S3BucketVersioning] = Field(None, description="Bucket versioning configuration.")
     public_access_block: Optional[S3BucketPublicAccessBlock] = Field(None, description="Public access block configuration.")
     logging: Optional[S3BucketLogging] = Field(None, description="Server access logging configuration.")
-    # Adicionar mais campos conforme necessário (ex: encryption, replication, lifecycle)
+    encryption: Optional[S3BucketEncryption] = Field(None, description="Default server-side encryption configuration.")
+    # Adicionar mais campos conforme necessário (ex: replication, lifecycle)
     error_details: Optional[str] = Field(None, description="Details of any error encountered while fetching data for this bucket.")
 
 
@@ -0,0 +1,50 @@
+import threading
+from unittest.mock import patch
+
+from app.aws.client_pool import Boto3ClientPool
+
+CREDENTIALS = {"aws_access_key_id": "testing", "aws_secret_access_key": "testing", "aws_session_token": "testing"}
+
+
+def test_pool_reuses_clients_per_credentials_service_and_region():
+    pool = Boto3ClientPool(max_size=10, ttl_seconds=60)
+
+    ec2_us = pool.get("ec2", "us-east-1", CREDENTIALS)
+    assert pool.get("ec2", "us-east-1", dict(CREDENTIALS)) is ec2_us
+    assert pool.get("ec2", "eu-west-1", CREDENTIALS) is not ec2_us
+    assert pool.get("s3", "us-east-1", CREDENTIALS) is not ec2_us
+    assert pool.get("ec2", "us-east-1", {**CREDENTIALS, "aws_access_key_id": "other"}) is not ec2_us
+    assert pool.stats() == {"size": 4, "max_size": 10, "hits": 1, "misses": 4}
+
+
+def test_pool_evicts_expired_and_least_recently_used_entries():
+    pool = Boto3ClientPool(max_size=2, ttl_seconds=60)
+    with patch("app.aws.client_pool.time.monotonic", return_value=1000.0):
+        first = pool.get("ec2", "us-east-1", CREDENTIALS)
+        pool.get("ec2", "us-west-2", CREDENTIALS)
+        pool.get("ec2", "us-east-1", CREDENTIALS)  # us-west-2 passa a ser o menos usado
+        pool.get("ec2", "eu-west-1", CREDENTIALS)
+        assert pool.get("ec2", "us-east-1", CREDENTIALS) is first
+        assert pool.stats()["size"] == 2
+
+    with patch("app.aws.client_pool.time.monotonic", return_value=1061.0):
+        assert pool.get("ec2", "us-east-1", CREDENTIALS) is not first
+
+
+def test_pool_is_safe_across_threads():
+    pool = Boto3ClientPool(max_size=10, ttl_seconds=60)
+    barrier = threading.Barrier(8)
+    clients = []
+
+    def worker():
+        barrier.wait()
+        clients.append(pool.get("iam", "us-east-1", CREDENTIALS))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(client) for client in clients}) == 1
+    assert pool.stats()["size"] == 1
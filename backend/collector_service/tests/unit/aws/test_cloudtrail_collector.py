@@ -0,0 +1,91 @@
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+from app.aws import cloudtrail_collector
+from app.aws.client_pool import boto3_client_pool
+
+CREDENTIALS = {"aws_access_key_id": "testing", "aws_secret_access_key": "testing"}
+
+# Trail da organização visto de uma conta-membro: o ARN é da conta de gerenciamento e o trail só aparece como
+# shadow trail, em todas as regiões.
+ORG_TRAIL = {
+    "Name": "org-trail", "TrailARN": "arn:aws:cloudtrail:us-east-1:111111111111:trail/org-trail",
+    "HomeRegion": "us-east-1", "IsMultiRegionTrail": True, "IsOrganizationTrail": True, "S3BucketName": "org-logs",
+}
+
+
+class _FakeMemberAccountClient:
+    def __init__(self, region, broken_regions=(), failing_status=()):
+        self.region = region
+        self.broken_regions = broken_regions
+        self.failing_status = failing_status
+
+    def describe_regions(self):
+        return {"Regions": [{"RegionName": r} for r in ("us-east-1", "eu-west-1", "sa-east-1")]}
+
+    def describe_trails(self, includeShadowTrails=True):
+        if self.region in self.broken_regions:
+            raise ClientError({"Error": {"Code": "AccessDenied", "Message": "denied"}}, "DescribeTrails")
+        return {"trailList": [ORG_TRAIL] if includeShadowTrails else []}
+
+    def get_trail_status(self, Name):
+        if Name in self.failing_status:
+            raise ClientError({"Error": {"Code": "TrailNotFoundException", "Message": "not found"}}, "GetTrailStatus")
+        return {"IsLogging": True}
+
+
+@pytest.fixture()
+def member_account(monkeypatch):
+    def install(**kwargs):
+        monkeypatch.setattr(
+            boto3_client_pool, "get", lambda service, region, credentials: _FakeMemberAccountClient(region, **kwargs)
+        )
+    return install
+
+
+@pytest.mark.asyncio
+async def test_list_trails_reports_each_trail_once_from_its_home_region():
+    boto3_client_pool.clear()
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1", **CREDENTIALS)
+        for region, name, multi_region in (("us-east-1", "global-trail", True), ("eu-west-1", "eu-only", False)):
+            s3.create_bucket(Bucket=f"{name}-logs")
+            cloudtrail = boto3.client("cloudtrail", region_name=region, **CREDENTIALS)
+            cloudtrail.create_trail(Name=name, S3BucketName=f"{name}-logs", IsMultiRegionTrail=multi_region)
+        cloudtrail.start_logging(Name="eu-only")
+
+        result = await cloudtrail_collector.list_trails(CREDENTIALS)
+    boto3_client_pool.clear()
+
+    trails = {t.trail_info.name: t for t in result}
+    assert len(result) == 2
+    assert result.failed_regions == []
+    assert trails["global-trail"].trail_info.home_region == "us-east-1"
+    assert trails["global-trail"].trail_info.is_multi_region_trail is True
+    assert trails["eu-only"].trail_info.home_region == "eu-west-1"
+    assert trails["eu-only"].status.is_logging is True
+    assert trails["global-trail"].status.is_logging is False
+
+
+@pytest.mark.asyncio
+async def test_member_account_sees_the_organization_shadow_trail_once(member_account):
+    member_account()
+
+    result = await cloudtrail_collector.list_trails(CREDENTIALS)
+
+    assert [t.trail_info.trail_arn for t in result] == [ORG_TRAIL["TrailARN"]]
+    assert result[0].trail_info.home_region == "us-east-1"
+    assert result[0].status.is_logging is True
+    assert result.failed_regions == []
+
+
+@pytest.mark.asyncio
+async def test_failed_regions_and_trail_statuses_mark_the_result_partial(member_account):
+    member_account(broken_regions=("sa-east-1",), failing_status=(ORG_TRAIL["TrailARN"],))
+
+    result = await cloudtrail_collector.list_trails(CREDENTIALS)
+
+    assert list(result) == []
+    assert sorted(result.failed_regions) == ["sa-east-1", "us-east-1"]
@@ -0,0 +1,91 @@
+import asyncio
+import time
+import threading
+
+import pytest
+
+from app.aws.regional_executor import RegionalExecutor, credential_fingerprint
+
+
+@pytest.mark.asyncio
+async def test_fan_out_isolates_slow_and_failing_regions():
+    executor = RegionalExecutor(max_workers=8, per_account_concurrency=4, region_timeout_seconds=0.5)
+    finished = []
+
+    def collect(region):
+        if region == "slow-1":
+            time.sleep(2)
+        if region == "broken-1":
+            raise RuntimeError("AccessDenied")
+        finished.append(region)
+        return [f"{region}-a", f"{region}-b"]
+
+    start = time.perf_counter()
+    result = await executor.fan_out(
+        ["us-east-1", "slow-1", "eu-west-1", "broken-1"],
+        collect,
+        account_key="acct",
+        on_error=lambda region, error: [f"ERROR:{region}"],
+    )
+    elapsed = time.perf_counter() - start
+    executor.shutdown()
+
+    assert elapsed < 1.5
+    assert sorted(result) == sorted(
+        ["us-east-1-a", "us-east-1-b", "eu-west-1-a", "eu-west-1-b", "ERROR:slow-1", "ERROR:broken-1"]
+    )
+    assert sorted(result.failed_regions) == ["broken-1", "slow-1"]
+
+
+@pytest.mark.asyncio
+async def test_fan_out_respects_per_account_concurrency():
+    executor = RegionalExecutor(max_workers=16, per_account_concurrency=2, region_timeout_seconds=None)
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def collect(region):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        return [region]
+
+    regions = [f"region-{i}" for i in range(8)]
+    result = await executor.fan_out(regions, collect, account_key="acct")
+    executor.shutdown()
+
+    assert sorted(result) == sorted(regions)
+    assert running["max"] == 2
+
+
+@pytest.mark.asyncio
+async def test_timed_out_region_holds_its_slot_until_the_thread_finishes():
+    executor = RegionalExecutor(max_workers=4, per_account_concurrency=1, region_timeout_seconds=0.1)
+    events = []
+
+    def collect(region):
+        events.append(f"start:{region}")
+        if region == "slow-1":
+            time.sleep(0.4)
+        events.append(f"end:{region}")
+        return [region]
+
+    first = await executor.fan_out(["slow-1"], collect, account_key="acct")
+    assert first.failed_regions == ["slow-1"]
+    second = await executor.fan_out(["us-east-1"], collect, account_key="acct")
+    executor.shutdown()
+
+    assert second == ["us-east-1"]
+    assert events == ["start:slow-1", "end:slow-1", "start:us-east-1", "end:us-east-1"]
+    # Sem coletas em andamento, nenhuma conta fica retida no mapa de vagas.
+    assert executor._account_slots[asyncio.get_running_loop()] == {}
+
+
+def test_credential_fingerprint_does_not_expose_secret():
+    credentials = {"aws_access_key_id": "AKIA", "aws_secret_access_key": "s3cr3t"}
+    fingerprint = credential_fingerprint(credentials)
+    assert "s3cr3t" not in fingerprint
+    assert fingerprint == credential_fingerprint(dict(credentials))
+    assert fingerprint != credential_fingerprint({**credentials, "aws_session_token": "token"})
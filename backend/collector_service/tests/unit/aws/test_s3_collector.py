@@ -1,28 +1,30 @@
 import pytest
-from unittest.mock import MagicMock, patch, call
+from unittest.mock import MagicMock
 from datetime import datetime, timezone
 import json
-import inspect
+
+import boto3
+from moto import mock_aws
 
 from app.aws import s3_collector
-from app.schemas.aws.s3_schemas import (
-    S3BucketData, S3BucketACLDetails, S3BucketACLGrant, S3BucketACLGrantee,
-    S3BucketVersioning, S3BucketPublicAccessBlock, S3BucketLogging
-)
+from app.aws.client_pool import boto3_client_pool
+from app.aws.regional_executor import regional_executor
 from app.core.config import Settings
-from botocore.exceptions import ClientError, NoCredentialsError, PartialCredentialsError
+from botocore.exceptions import ClientError, NoCredentialsError
 from fastapi import HTTPException
 
+CREDENTIALS = {"aws_access_key_id": "testing", "aws_secret_access_key": "testing"}
+
 @pytest.fixture(autouse=True)
-def manage_s3_collector_settings_and_cache():
+def manage_s3_collector_settings_and_clients():
     original_settings = s3_collector.settings
-    original_cache = s3_collector.s3_clients_cache.copy()
     s3_collector.settings = Settings(AWS_REGION_NAME="us-east-1")
-    s3_collector.s3_clients_cache.clear()
+    # Clientes criados dentro de um mock_aws não podem ser reaproveitados por outro teste.
+    boto3_client_pool.clear()
     yield
     s3_collector.settings = original_settings
-    s3_collector.s3_clients_cache = original_cache
-    s3_collector.s3_clients_cache.update(s3_collector.s3_clients_cache)
+    boto3_client_pool.clear()
+    regional_executor.shutdown()
 
 def test_parse_acl_no_grants():
     acl_response = {"Owner": {"DisplayName": "owner_display", "ID": "owner_id"}, "Grants": []}
@@ -40,7 +42,7 @@ def test_parse_acl_public_all_users_read():
     }
     result = s3_collector.parse_acl(acl_response, "test-bucket")
     assert result.is_public
-    assert "Public (AllUsers) with permission: READ" in result.public_details
+    assert "Public access via Group with permission: READ" in result.public_details
 
 def test_check_policy_not_public_empty_policy():
     assert not s3_collector.check_policy_for_public_access(None)
@@ -49,204 +51,208 @@ def test_check_policy_public_principal_star_allow():
     policy = {"Statement": [{"Effect": "Allow", "Principal": "*", "Action": "s3:GetObject"}]}
     assert s3_collector.check_policy_for_public_access(policy)
 
-@patch('app.aws.s3_collector.boto3.client')
-def test_get_s3_data_no_buckets(mock_boto_client):
-    mock_s3_global = MagicMock()
-    mock_s3_global.list_buckets.return_value = {"Buckets": []}
-    def client_side_effect(service_name, region_name=None, **kwargs):
-        if service_name == 's3' and (region_name == s3_collector.settings.AWS_REGION_NAME or region_name == "global"):
-            return mock_s3_global
-        raise ValueError(f"Unexpected client call: {service_name} with region {region_name}")
-    mock_boto_client.side_effect = client_side_effect
-    result = s3_collector.get_s3_data()
-    assert result == []
-    mock_s3_global.list_buckets.assert_called_once()
-
-@patch('app.aws.s3_collector.boto3.client')
-def test_get_s3_data_one_bucket_all_details_collected(mock_boto_client):
-    bucket_name = "test-bucket-1"
-    bucket_region = "us-west-2"
+def _client_error(code, message="", operation="Operation"):
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+def _regional_client(**overrides):
+    """Cliente regional sem policy, sem public access block nem criptografia; `overrides` troca as respostas."""
+    client = MagicMock()
+    client.get_bucket_acl.return_value = {"Owner": {"ID": "owner"}, "Grants": []}
+    client.get_bucket_policy.side_effect = _client_error("NoSuchBucketPolicy", "The bucket policy does not exist")
+    client.get_bucket_versioning.return_value = {}
+    client.get_public_access_block.side_effect = _client_error("NoSuchPublicAccessBlockConfiguration")
+    client.get_bucket_logging.return_value = {}
+    client.get_bucket_encryption.side_effect = _client_error("ServerSideEncryptionConfigurationNotFoundError")
+    for name, value in overrides.items():
+        method = getattr(client, name)
+        if isinstance(value, Exception):
+            method.side_effect = value
+        else:
+            method.side_effect = None
+            method.return_value = value
+    return client
+
+
+@pytest.fixture()
+def s3_clients(monkeypatch):
+    """
+    Substitui o boto3_client_pool por clientes falsos por região. O da região padrão também atende
+    list_buckets e get_bucket_location.
+    """
+    clients = {s3_collector.settings.AWS_REGION_NAME: _regional_client()}
+
+    def get(service_name, region_name, credentials):
+        assert service_name == "s3" and credentials == CREDENTIALS
+        return clients[region_name]
+
+    monkeypatch.setattr(boto3_client_pool, "get", get)
+    return clients
+
+
+def _global_client(clients):
+    return clients[s3_collector.settings.AWS_REGION_NAME]
+
+
+def _list_buckets(clients, *names, location=None):
     creation_date = datetime.now(timezone.utc)
-    mock_s3_global = MagicMock()
-    mock_s3_global.list_buckets.return_value = {"Buckets": [{"Name": bucket_name, "CreationDate": creation_date}]}
-    mock_s3_global.get_bucket_location.return_value = {"LocationConstraint": bucket_region}
-    mock_s3_regional = MagicMock()
-    mock_s3_regional.get_bucket_acl.return_value = {"Owner": {"ID": "owner"}, "Grants": []}
+    global_client = _global_client(clients)
+    global_client.list_buckets.return_value = {"Buckets": [{"Name": n, "CreationDate": creation_date} for n in names]}
+    if isinstance(location, Exception):
+        global_client.get_bucket_location.side_effect = location
+    else:
+        global_client.get_bucket_location.return_value = {"LocationConstraint": location} if location else {}
+    return creation_date
+
+
+@pytest.mark.asyncio
+async def test_get_s3_data_no_buckets(s3_clients):
+    _list_buckets(s3_clients)
+    assert await s3_collector.get_s3_data(CREDENTIALS) == []
+    _global_client(s3_clients).list_buckets.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_s3_data_one_bucket_all_details_collected(s3_clients):
+    creation_date = _list_buckets(s3_clients, "test-bucket-1", location="us-west-2")
     policy_doc = {"Statement": [{"Effect": "Allow", "Principal": "*", "Action": "s3:GetObject"}]}
-    mock_s3_regional.get_bucket_policy.return_value = {"Policy": json.dumps(policy_doc)}
-    mock_s3_regional.get_bucket_versioning.return_value = {"Status": "Enabled"}
-    mock_s3_regional.get_public_access_block.return_value = {"PublicAccessBlockConfiguration": {"BlockPublicAcls": True}}
-    mock_s3_regional.get_bucket_logging.return_value = {"LoggingEnabled": {"TargetBucket": "log-bucket"}}
-    def client_side_effect(service_name, region_name=None, **kwargs):
-        if service_name == 's3':
-            if region_name == s3_collector.settings.AWS_REGION_NAME or region_name == "global": return mock_s3_global
-            elif region_name == bucket_region: return mock_s3_regional
-        raise ValueError(f"Unexpected client call: {service_name} with region {region_name}")
-    mock_boto_client.side_effect = client_side_effect
-    result = s3_collector.get_s3_data()
-    assert len(result) == 1
-    b = result[0]
-    assert b.name == bucket_name
-    assert b.region == bucket_region
+    s3_clients["us-west-2"] = _regional_client(
+        get_bucket_policy={"Policy": json.dumps(policy_doc)},
+        get_bucket_versioning={"Status": "Enabled"},
+        get_public_access_block={"PublicAccessBlockConfiguration": {"BlockPublicAcls": True}},
+        get_bucket_logging={"LoggingEnabled": {"TargetBucket": "log-bucket"}},
+        get_bucket_encryption={"ServerSideEncryptionConfiguration": {"Rules": [{"ApplyServerSideEncryptionByDefault": {"SSEAlgorithm": "aws:kms"}}]}},
+    )
+
+    [b] = await s3_collector.get_s3_data(CREDENTIALS)
+
+    assert b.name == "test-bucket-1"
+    assert b.region == "us-west-2"
     assert b.creation_date == creation_date
     assert b.policy_is_public is True
     assert b.versioning.status == "Enabled"
     assert b.public_access_block.block_public_acls is True
-    assert b.logging.enabled is True
+    assert b.logging.enabled is True and b.logging.target_bucket == "log-bucket"
+    assert b.encryption.enabled is True
     assert b.error_details is None
 
-@patch('app.aws.s3_collector.boto3.client')
-def test_get_s3_data_list_buckets_no_credentials_error(mock_boto_client):
-    mock_s3_global = MagicMock()
-    mock_s3_global.list_buckets.side_effect = NoCredentialsError()
-    mock_boto_client.return_value = mock_s3_global
+
+@pytest.mark.asyncio
+async def test_get_s3_data_list_buckets_client_error(s3_clients):
+    _global_client(s3_clients).list_buckets.side_effect = _client_error("AccessDenied", "Access Denied", "ListBuckets")
     with pytest.raises(HTTPException) as exc_info:
-        s3_collector.get_s3_data()
+        await s3_collector.get_s3_data(CREDENTIALS)
     assert exc_info.value.status_code == 500
-    assert "AWS credentials not configured" in exc_info.value.detail
+    assert "Access Denied" in exc_info.value.detail
 
-@patch('app.aws.s3_collector.get_s3_client')
-@patch('app.aws.s3_collector.get_bucket_specific_s3_client')
-def test_get_s3_data_get_bucket_location_fails(mock_get_regional_client, mock_get_global_client):
-    bucket_name = "test-loc-fail"
-    creation_date = datetime.now(timezone.utc)
-    default_region = s3_collector.settings.AWS_REGION_NAME
-    mock_s3_global_instance = MagicMock()
-    mock_get_global_client.return_value = mock_s3_global_instance
-    mock_s3_default_region_instance = MagicMock()
-    mock_get_regional_client.return_value = mock_s3_default_region_instance
-    mock_s3_global_instance.list_buckets.return_value = {"Buckets": [{"Name": bucket_name, "CreationDate": creation_date}]}
-    location_error = ClientError({'Error': {'Code': 'AccessDenied', 'Message': 'Cannot get location'}}, 'GetBucketLocation')
-    mock_s3_global_instance.get_bucket_location.side_effect = location_error
-    mock_s3_default_region_instance.get_bucket_acl.return_value = {"Owner": {}, "Grants": []}
-    mock_s3_default_region_instance.get_bucket_policy.side_effect = ClientError({'Error': {'Code': 'NoSuchBucketPolicy'}},'GetBucketPolicy')
-    mock_s3_default_region_instance.get_bucket_versioning.return_value = {}
-    mock_s3_default_region_instance.get_public_access_block.side_effect = ClientError({'Error':{'Code': 'NoSuchPublicAccessBlockConfiguration'}}, 'GetPublicAccessBlock')
-    mock_s3_default_region_instance.get_bucket_logging.return_value = {}
-    result = s3_collector.get_s3_data()
-    assert len(result) == 1
-    assert result[0].name == bucket_name
-    assert result[0].region == default_region
-    assert "Region determination failed: Cannot get location" in result[0].error_details
-    mock_get_regional_client.assert_called_with(default_region)
-    mock_s3_default_region_instance.get_bucket_acl.assert_called_once()
-
-# Adicionei mais alguns testes síncronos baseados nos que eu tinha antes.
-@patch('app.aws.s3_collector.boto3.client')
-def test_get_s3_data_bucket_level_client_error_for_acl(mock_boto_client):
-    bucket_name = "test-bucket-errors"
-    bucket_region = "eu-west-1"
-    creation_date = datetime.now(timezone.utc)
-    mock_s3_global = MagicMock()
-    mock_s3_global.list_buckets.return_value = {"Buckets": [{"Name": bucket_name, "CreationDate": creation_date}]}
-    mock_s3_global.get_bucket_location.return_value = {"LocationConstraint": bucket_region}
-    mock_s3_regional = MagicMock()
-    acl_error_response = {'Error': {'Code': 'AccessDenied', 'Message': 'Cannot get ACL'}}
-    mock_s3_regional.get_bucket_acl.side_effect = ClientError(acl_error_response, 'GetBucketAcl')
-    mock_s3_regional.get_bucket_policy.side_effect = ClientError({'Error': {'Code': 'NoSuchBucketPolicy', 'Message': 'No policy'}}, 'GetBucketPolicy')
-    mock_s3_regional.get_bucket_versioning.return_value = {}
-    mock_s3_regional.get_public_access_block.side_effect = ClientError({'Error': {'Code': 'NoSuchPublicAccessBlockConfiguration', 'Message': 'No PAB'}}, 'GetPublicAccessBlock')
-    mock_s3_regional.get_bucket_logging.return_value = {}
-    def client_side_effect(service_name, region_name=None, **kwargs):
-        if service_name == 's3':
-            if region_name == s3_collector.settings.AWS_REGION_NAME or region_name == "global": return mock_s3_global
-            elif region_name == bucket_region: return mock_s3_regional
-        raise ValueError(f"Unexpected client call: {service_name} with region {region_name}")
-    mock_boto_client.side_effect = client_side_effect
-    result = s3_collector.get_s3_data()
-    assert len(result) == 1
-    bucket_data = result[0]
-    assert bucket_data.name == bucket_name
-    assert bucket_data.error_details is not None
-    assert "ACL fetch failed: Cannot get ACL" in bucket_data.error_details
-    assert bucket_data.acl is not None
-    assert bucket_data.acl.is_public is False
-    assert "Error fetching ACL: Cannot get ACL" in bucket_data.acl.public_details
-
-@patch('app.aws.s3_collector.boto3.client')
-def test_get_s3_data_no_such_bucket_policy(mock_boto_client):
-    bucket_name = "test-bucket-no-policy"
-    bucket_region = "ap-southeast-1"
-    creation_date = datetime.now(timezone.utc)
-    mock_s3_global = MagicMock()
-    mock_s3_global.list_buckets.return_value = {"Buckets": [{"Name": bucket_name, "CreationDate": creation_date}]}
-    mock_s3_global.get_bucket_location.return_value = {"LocationConstraint": bucket_region}
-    mock_s3_regional = MagicMock()
-    mock_s3_regional.get_bucket_acl.return_value = {"Owner": {}, "Grants": []}
-    mock_s3_regional.get_bucket_policy.side_effect = ClientError(
-        {'Error': {'Code': 'NoSuchBucketPolicy', 'Message': 'The bucket policy does not exist'}},
-        'GetBucketPolicy'
-    )
-    mock_s3_regional.get_bucket_versioning.return_value = {}
-    mock_s3_regional.get_public_access_block.side_effect = ClientError({'Error': {'Code': 'NoSuchPublicAccessBlockConfiguration'}}, 'GetPublicAccessBlock')
-    mock_s3_regional.get_bucket_logging.return_value = {}
-    def client_side_effect(service_name, region_name=None, **kwargs):
-        if service_name == 's3':
-            if region_name == s3_collector.settings.AWS_REGION_NAME or region_name == "global": return mock_s3_global
-            elif region_name == bucket_region: return mock_s3_regional
-        raise ValueError(f"Unexpected client call: {service_name} with region {region_name}")
-    mock_boto_client.side_effect = client_side_effect
-    result = s3_collector.get_s3_data()
-    assert len(result) == 1
-    bucket_data = result[0]
-    assert bucket_data.name == bucket_name
-    assert bucket_data.policy is None
-    assert bucket_data.policy_is_public is False
-    assert bucket_data.error_details is None
-
-@patch('app.aws.s3_collector.get_bucket_specific_s3_client')
-@patch('app.aws.s3_collector.get_s3_client')
-def test_get_s3_data_bucket_region_us_east_1(mock_get_s3_client, mock_get_bucket_specific_s3_client):
-    bucket_name = "test-bucket-us-east-1"
-    creation_date = datetime.now(timezone.utc)
-    mock_s3_global_instance = MagicMock()
-    mock_s3_global_instance.list_buckets.return_value = {"Buckets": [{"Name": bucket_name, "CreationDate": creation_date}]}
-    mock_s3_global_instance.get_bucket_location.return_value = {} # us-east-1 retorna None ou sem LocationConstraint
-    mock_get_s3_client.return_value = mock_s3_global_instance
-    mock_s3_us_east_1_instance = MagicMock()
-    mock_s3_us_east_1_instance.get_bucket_acl.return_value = {"Owner": {}, "Grants": []}
-    mock_s3_us_east_1_instance.get_bucket_policy.side_effect = ClientError({'Error': {'Code': 'NoSuchBucketPolicy'}}, 'GetBucketPolicy')
-    mock_s3_us_east_1_instance.get_bucket_versioning.return_value = {"Status": "Suspended"}
-    mock_s3_us_east_1_instance.get_public_access_block.side_effect = ClientError({'Error': {'Code': 'NoSuchPublicAccessBlockConfiguration'}}, 'GetPublicAccessBlock')
-    mock_s3_us_east_1_instance.get_bucket_logging.return_value = {}
-    mock_get_bucket_specific_s3_client.return_value = mock_s3_us_east_1_instance
-    result = s3_collector.get_s3_data()
-    assert len(result) == 1
-    bucket_data = result[0]
-    assert bucket_data.name == bucket_name
-    assert bucket_data.region == "us-east-1"
-    assert bucket_data.versioning.status == "Suspended"
-    mock_get_bucket_specific_s3_client.assert_called_once_with("us-east-1")
-    mock_s3_global_instance.get_bucket_location.assert_called_once_with(Bucket=bucket_name)
-    mock_s3_us_east_1_instance.get_bucket_acl.assert_called_once()
-
-@patch('app.aws.s3_collector.boto3.client')
-def test_get_s3_data_pab_not_configured(mock_boto_client):
-    bucket_name = "test-bucket-no-pab"
-    bucket_region = "eu-central-1"
-    creation_date = datetime.now(timezone.utc)
-    mock_s3_global = MagicMock()
-    mock_s3_global.list_buckets.return_value = {"Buckets": [{"Name": bucket_name, "CreationDate": creation_date}]}
-    mock_s3_global.get_bucket_location.return_value = {"LocationConstraint": bucket_region}
-    mock_s3_regional = MagicMock()
-    mock_s3_regional.get_bucket_acl.return_value = {"Owner": {}, "Grants": []}
-    mock_s3_regional.get_bucket_policy.side_effect = ClientError({'Error': {'Code': 'NoSuchBucketPolicy'}}, 'GetBucketPolicy')
-    mock_s3_regional.get_bucket_versioning.return_value = {}
-    mock_s3_regional.get_public_access_block.side_effect = ClientError(
-        {'Error': {'Code': 'NoSuchPublicAccessBlockConfiguration', 'Message': 'The public access block configuration does not exist'}},
-        'GetPublicAccessBlock'
-    )
-    mock_s3_regional.get_bucket_logging.return_value = {}
-    def client_side_effect(service_name, region_name=None, **kwargs):
-        if service_name == 's3':
-            if region_name == s3_collector.settings.AWS_REGION_NAME or region_name == "global": return mock_s3_global
-            elif region_name == bucket_region: return mock_s3_regional
-        raise ValueError(f"Unexpected client call: {service_name} with region {region_name}")
-    mock_boto_client.side_effect = client_side_effect
-    result = s3_collector.get_s3_data()
-    assert len(result) == 1
-    bucket_data = result[0]
-    assert bucket_data.name == bucket_name
-    assert bucket_data.public_access_block is not None
-    assert bucket_data.public_access_block.block_public_acls is False
-    assert bucket_data.error_details is None
+
+@pytest.mark.asyncio
+async def test_get_s3_data_invalid_credentials(monkeypatch):
+    def get(service_name, region_name, credentials):
+        raise NoCredentialsError()
+
+    monkeypatch.setattr(boto3_client_pool, "get", get)
+    with pytest.raises(HTTPException) as exc_info:
+        await s3_collector.get_s3_data(CREDENTIALS)
+    assert exc_info.value.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_get_s3_data_get_bucket_location_fails(s3_clients):
+    _list_buckets(s3_clients, "test-loc-fail", location=_client_error("AccessDenied", "Cannot get location"))
+
+    [b] = await s3_collector.get_s3_data(CREDENTIALS)
+
+    # Sem a região, os detalhes são pedidos na região padrão.
+    assert b.region == s3_collector.settings.AWS_REGION_NAME
+    assert b.error_details == "Region determination failed: Cannot get location;"
+    assert b.acl is not None
+    _global_client(s3_clients).get_bucket_acl.assert_called_once_with(Bucket="test-loc-fail")
+
+
+@pytest.mark.asyncio
+async def test_get_s3_data_bucket_level_client_error_for_acl(s3_clients):
+    _list_buckets(s3_clients, "test-bucket-errors", location="eu-west-1")
+    s3_clients["eu-west-1"] = _regional_client(get_bucket_acl=_client_error("AccessDenied", "Cannot get ACL", "GetBucketAcl"))
+
+    [b] = await s3_collector.get_s3_data(CREDENTIALS)
+
+    # Só o detalhe que falhou fica de fora; os outros foram coletados.
+    assert b.error_details == "ACL fetch failed: Cannot get ACL;"
+    assert b.acl is None
+    assert b.versioning is not None and b.logging is not None
+
+
+@pytest.mark.asyncio
+async def test_get_s3_data_no_such_bucket_policy_and_pab_not_configured(s3_clients):
+    _list_buckets(s3_clients, "test-bucket-no-policy", location="ap-southeast-1")
+    s3_clients["ap-southeast-1"] = _regional_client()
+
+    [b] = await s3_collector.get_s3_data(CREDENTIALS)
+
+    assert b.policy is None
+    assert b.policy_is_public is False
+    assert b.public_access_block is None
+    assert b.encryption.enabled is False
+    assert b.error_details is None
+
+
+@pytest.mark.asyncio
+async def test_get_s3_data_bucket_region_us_east_1(s3_clients):
+    _list_buckets(s3_clients, "test-bucket-us-east-1")  # us-east-1 retorna LocationConstraint vazio
+    _global_client(s3_clients).get_bucket_versioning.return_value = {"Status": "Suspended"}
+
+    [b] = await s3_collector.get_s3_data(CREDENTIALS)
+
+    assert b.region == "us-east-1"
+    assert b.versioning.status == "Suspended"
+    _global_client(s3_clients).get_bucket_location.assert_called_once_with(Bucket="test-bucket-us-east-1")
+
+
+@pytest.mark.asyncio
+async def test_get_s3_data_one_failing_bucket_does_not_affect_the_others(s3_clients):
+    _list_buckets(s3_clients, "bucket-ok", "bucket-broken", location="eu-west-1")
+    regional = _regional_client()
+
+    def versioning(Bucket):
+        if Bucket == "bucket-broken":
+            raise _client_error("AccessDenied", "Cannot get versioning", "GetBucketVersioning")
+        return {"Status": "Enabled"}
+
+    regional.get_bucket_versioning.side_effect = versioning
+    s3_clients["eu-west-1"] = regional
+
+    result = await s3_collector.get_s3_data(CREDENTIALS)
+
+    by_name = {b.name: b for b in result}
+    assert [b.name for b in result] == ["bucket-ok", "bucket-broken"]
+    assert by_name["bucket-ok"].error_details is None
+    assert by_name["bucket-ok"].versioning.status == "Enabled"
+    assert by_name["bucket-broken"].error_details == "Versioning fetch failed: Cannot get versioning;"
+    assert by_name["bucket-broken"].versioning is None
+    assert by_name["bucket-broken"].acl is not None
+
+
+@pytest.mark.asyncio
+async def test_get_s3_data_collects_bucket_details_concurrently():
+    credentials = {"aws_access_key_id": "testing", "aws_secret_access_key": "testing"}
+    with mock_aws():
+        s3 = boto3.client("s3", region_name="us-east-1", **credentials)
+        for i in range(20):
+            if i % 2:
+                s3.create_bucket(Bucket=f"bucket-{i:02d}", CreateBucketConfiguration={"LocationConstraint": "eu-west-1"})
+            else:
+                s3.create_bucket(Bucket=f"bucket-{i:02d}")
+        s3.put_bucket_encryption(
+            Bucket="bucket-00",
+            ServerSideEncryptionConfiguration={"Rules": [{"ApplyServerSideEncryptionByDefault": {"SSEAlgorithm": "AES256"}}]},
+        )
+
+        result = await s3_collector.get_s3_data(credentials)
+
+    assert [b.name for b in result] == [f"bucket-{i:02d}" for i in range(20)]
+    assert {b.region for b in result} == {"us-east-1", "eu-west-1"}
+    assert result[0].encryption.enabled is True
+    assert result[1].encryption.enabled is False
+    assert result[1].policy_is_public is False
+    assert all(b.error_details is None for b in result)
@@ -65,3 +65,55 @@ async def test_get_iam_policies_data(aws_credentials):
 
     assert len(result) == 1
     assert result[0].policy_name == policy_name
+
+@pytest.mark.asyncio
+async def test_bulk_mode_matches_per_entity_mode(aws_credentials):
+    def summarize(users):
+        return sorted(
+            (u.user_name, [k.access_key_id for k in u.access_keys], [m.serial_number for m in u.mfa_devices],
+             [(p.policy_name, p.policy_document) for p in u.inline_policies], u.tags)
+            for u in users
+        )
+
+    with mock_aws():
+        iam_client = boto3.client("iam", region_name="us-east-1")
+        policy_doc = {"Version": "2012-10-17", "Statement": [{"Effect": "Allow", "Action": "s3:*", "Resource": "*"}]}
+        for user_name in ("alice", "bob", "carol"):
+            iam_client.create_user(UserName=user_name, Tags=[{"Key": "team", "Value": "sec"}])
+        iam_client.create_access_key(UserName="alice")
+        iam_client.put_user_policy(UserName="bob", PolicyName="inline", PolicyDocument=json.dumps(policy_doc))
+        serial = iam_client.create_virtual_mfa_device(VirtualMFADeviceName="carol-mfa")["VirtualMFADevice"]["SerialNumber"]
+        iam_client.enable_mfa_device(UserName="carol", SerialNumber=serial, AuthenticationCode1="123456", AuthenticationCode2="654321")
+
+        bulk = await iam_collector.get_iam_users_data(credentials=aws_credentials, mode=iam_collector.IAM_MODE_BULK)
+        per_entity = await iam_collector.get_iam_users_data(credentials=aws_credentials, mode=iam_collector.IAM_MODE_PER_ENTITY)
+
+    assert summarize(bulk) == summarize(per_entity)
+    assert bulk[0].account_summary is not None
+
+def test_bulk_access_keys_joins_credential_report_by_creation_date():
+    from datetime import datetime, timezone
+    from unittest.mock import MagicMock
+
+    client = MagicMock()
+    client.get_paginator.return_value.paginate.return_value = [{"AccessKeyMetadata": [
+        {"AccessKeyId": "AKIANEW", "Status": "Active", "CreateDate": datetime(2024, 5, 1, tzinfo=timezone.utc)},
+        {"AccessKeyId": "AKIAOLD", "Status": "Inactive", "CreateDate": datetime(2020, 1, 1, tzinfo=timezone.utc)},
+    ]}]
+    row = {
+        "access_key_1_last_rotated": "2020-01-01T00:00:00+00:00",
+        "access_key_1_last_used_date": "N/A",
+        "access_key_1_last_used_region": "N/A",
+        "access_key_1_last_used_service": "N/A",
+        "access_key_2_last_rotated": "2024-05-01T00:00:00+00:00",
+        "access_key_2_last_used_date": "2024-06-01T12:00:00+00:00",
+        "access_key_2_last_used_region": "us-east-1",
+        "access_key_2_last_used_service": "s3",
+    }
+
+    keys = {k.access_key_id: k for k in iam_collector._bulk_access_keys(client, "alice", row)}
+
+    assert keys["AKIANEW"].last_used_service == "s3"
+    assert keys["AKIANEW"].last_used_date == datetime(2024, 6, 1, 12, tzinfo=timezone.utc)
+    assert keys["AKIAOLD"].last_used_date is None
+    assert keys["AKIAOLD"].last_used_region is None
@@ -1,18 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status
 from fastapi.concurrency import run_in_threadpool
-from typing import List, Union
+from sqlalchemy.orm import Session
+from typing import Dict, List, Tuple, Union
 
 from app.schemas.notification_schema import (
     EmailNotificationRequest,
     WebhookNotificationRequest,
     GoogleChatNotificationRequest, # Adicionado
     NotificationResponse,
-    AlertDataPayload
+    AlertDataPayload,
+    BulkNotificationRequest,
 )
 from app.services.email_service import send_email_notification_sync
 from app.services.webhook_service import send_webhook_notification_sync
 from app.services.google_chat_service import send_google_chat_notification_sync # Adicionado
 from app.core.config import settings
+from app.crud.crud_notification_rule import notification_rule_crud
+from app.db.session import get_db
+from app.models.notification_channel_model import ChannelTypeEnum
 import logging
 
 logger = logging.getLogger(__name__)
@@ -157,10 +162,6 @@ async def trigger_google_chat_notification(
     return NotificationResponse(
         status="accepted",
         message="Google Chat notification task accepted and will be processed in the background.",
-from app.crud.crud_notification_rule import notification_rule_crud
-from app.db.session import get_db
-from app.models.notification_channel_model import ChannelTypeEnum
-
         recipient=f"Google Chat Webhook (ends ...{target_url[-20:]})", # Não expor URL completa
         notification_type="google_chat"
     )
@@ -201,3 +202,63 @@ async def trigger_notifications_from_alert(
     else:
         logger.info(f"Nenhuma regra de notificação correspondeu ao alerta '{alert_data.title}'. Nenhuma notificação enviada.")
         return {"status": "no-match", "message": "Nenhuma regra de notificação correspondeu ao alerta."}
+
+def _schedule_default_channel(background_tasks: BackgroundTasks, channel: str, alert_data: AlertDataPayload) -> bool:
+    """Agenda um canal padrão (destino das settings); retorna False se o canal não estiver configurado."""
+    if channel == "email" and settings.DEFAULT_CRITICAL_ALERT_RECIPIENT_EMAIL:
+        background_tasks.add_task(send_email_background, recipient_email=settings.DEFAULT_CRITICAL_ALERT_RECIPIENT_EMAIL,
+                                  subject=f"CSPMEXA Critical Alert: {alert_data.title}", alert_data=alert_data)
+    elif channel == "webhook" and settings.WEBHOOK_DEFAULT_URL:
+        background_tasks.add_task(send_webhook_background, target_url=settings.WEBHOOK_DEFAULT_URL, alert_data=alert_data)
+    elif channel == "google_chat" and settings.GOOGLE_CHAT_WEBHOOK_URL:
+        background_tasks.add_task(send_google_chat_background, target_webhook_url=settings.GOOGLE_CHAT_WEBHOOK_URL, alert_data=alert_data)
+    else:
+        return False
+    return True
+
+@router.post("/notify/bulk", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_bulk_notifications(
+    bulk_request: BulkNotificationRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    Versão em lote de /notify/* e /trigger, usada pelo dispatcher do notification_outbox do policy_engine.
+    Para cada alerta, agenda os canais padrão pedidos e os canais das regras que correspondem a
+    (provider, severidade). As regras são lidas uma vez por requisição. Canais padrão sem destino configurado
+    são ignorados em vez de recusar o lote inteiro, que seria reenviado indefinidamente.
+    """
+    rules_by_key: Dict[Tuple[str, str], list] = {}
+    for rule in notification_rule_crud.get_multi(db):
+        rules_by_key.setdefault((rule.provider.value, rule.severity.value), []).append(rule)
+
+    triggered_tasks = 0
+    skipped_channels = 0
+    for item in bulk_request.notifications:
+        alert_data = item.alert_data
+        for channel in item.default_channels:
+            if _schedule_default_channel(background_tasks, channel, alert_data):
+                triggered_tasks += 1
+            else:
+                skipped_channels += 1
+        for rule in rules_by_key.get((alert_data.provider, alert_data.severity), ()):
+            channel = rule.channel
+            if channel.type == ChannelTypeEnum.EMAIL:
+                background_tasks.add_task(send_email_background, recipient_email=channel.configuration, subject=f"CSPMEXA Alert: {alert_data.title}", alert_data=alert_data)
+            elif channel.type == ChannelTypeEnum.WEBHOOK:
+                background_tasks.add_task(send_webhook_background, target_url=channel.configuration, alert_data=alert_data)
+            elif channel.type == ChannelTypeEnum.GOOGLE_CHAT:
+                background_tasks.add_task(send_google_chat_background, target_webhook_url=channel.configuration, alert_data=alert_data)
+            else:
+                continue
+            triggered_tasks += 1
+
+    if skipped_channels:
+        logger.warning(f"{skipped_channels} notificações de canais padrão ignoradas: canal sem destino configurado.")
+    logger.info(f"Lote de {len(bulk_request.notifications)} alertas recebido; {triggered_tasks} tarefas de notificação acionadas.")
+    return {
+        "status": "accepted",
+        "notifications": len(bulk_request.notifications),
+        "tasks": triggered_tasks,
+        "skipped_channels": skipped_channels,
+    }
@@ -32,6 +32,10 @@ class AppSettings(BaseSettings):
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
 
+    # Destinos padrão dos webhooks (usados quando a requisição não traz URL)
+    WEBHOOK_DEFAULT_URL: Optional[str] = None
+    GOOGLE_CHAT_WEBHOOK_URL: Optional[str] = None
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, HttpUrl
-from typing import Optional, Dict, Any, List, Union
+from pydantic import BaseModel, EmailStr, HttpUrl, Field
+from typing import Optional, Dict, Any, List, Literal, Union
 import datetime
 
 # Este é o payload de dados do alerta que é comum a diferentes tipos de notificação.
@@ -43,6 +43,15 @@ class GoogleChatNotificationRequest(BaseModel):
     alert_data: AlertDataPayload
     # thread_key: Optional[str] = None # Para agrupar mensagens em threads no Google Chat (futuro)
 
+# Schemas para o envio em lote (/notify/bulk), usado pelo dispatcher de notificações do policy_engine
+class BulkNotificationItem(BaseModel):
+    alert_data: AlertDataPayload
+    # Canais padrão (destinos das settings) a acionar além das regras de notificação; vazio = só as regras
+    default_channels: List[Literal["email", "webhook", "google_chat"]] = []
+
+class BulkNotificationRequest(BaseModel):
+    notifications: List[BulkNotificationItem] = Field(..., max_length=1000)
+
 # Schema de resposta genérico para endpoints de notificação
 from app.models.notification_channel_model import ChannelTypeEnum
 from app.models.notification_rule_model import CloudProviderEnum, AlertSeverityEnum
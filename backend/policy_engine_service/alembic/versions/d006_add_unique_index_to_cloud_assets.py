@@ -0,0 +1,42 @@
+"""Add unique index on cloud_assets (account_id, asset_id)
+
+Revision ID: d006
+Revises: d005
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd006'
+down_revision = 'd005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Remove duplicatas criadas antes da restrição existir, mantendo a linha mais recente de cada ativo.
+    op.execute(
+        """
+        DELETE FROM asset_relationships
+        WHERE source_asset_id IN (
+            SELECT a.id FROM cloud_assets a JOIN cloud_assets b
+              ON a.account_id = b.account_id AND a.asset_id = b.asset_id AND a.id < b.id
+        ) OR target_asset_id IN (
+            SELECT a.id FROM cloud_assets a JOIN cloud_assets b
+              ON a.account_id = b.account_id AND a.asset_id = b.asset_id AND a.id < b.id
+        )
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM cloud_assets a USING cloud_assets b
+        WHERE a.account_id = b.account_id AND a.asset_id = b.asset_id AND a.id < b.id
+        """
+    )
+    op.create_index('uq_cloud_assets_account_asset', 'cloud_assets', ['account_id', 'asset_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_cloud_assets_account_asset', table_name='cloud_assets')
@@ -0,0 +1,38 @@
+"""Add edge indexes to asset_relationships
+
+Revision ID: d007
+Revises: d006
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd007'
+down_revision = 'd006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Remove arestas duplicadas, mantendo a de menor id, antes de criar a restrição.
+    op.execute(
+        """
+        DELETE FROM asset_relationships a USING asset_relationships b
+        WHERE a.source_asset_id = b.source_asset_id
+          AND a.target_asset_id = b.target_asset_id
+          AND a.relationship_type = b.relationship_type
+          AND a.id > b.id
+        """
+    )
+    op.create_index(
+        'uq_asset_relationships_edge', 'asset_relationships',
+        ['source_asset_id', 'target_asset_id', 'relationship_type'], unique=True,
+    )
+    op.create_index('ix_asset_relationships_target', 'asset_relationships', ['target_asset_id'])
+
+
+def downgrade():
+    op.drop_index('ix_asset_relationships_target', table_name='asset_relationships')
+    op.drop_index('uq_asset_relationships_edge', table_name='asset_relationships')
@@ -0,0 +1,25 @@
+"""Add content_hash to cloud_assets
+
+Revision ID: d008
+Revises: d007
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd008'
+down_revision = 'd007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nulo nas linhas existentes: a próxima análise de cada ativo o reavalia e grava o hash.
+    op.add_column('cloud_assets', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    op.drop_column('cloud_assets', 'content_hash')
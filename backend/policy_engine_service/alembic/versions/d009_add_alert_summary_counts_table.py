@@ -0,0 +1,41 @@
+"""Add alert_summary_counts table
+
+Revision ID: d009
+Revises: d008
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd009'
+down_revision = 'd008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'alert_summary_counts',
+        sa.Column('account_id', sa.String(), nullable=False),
+        sa.Column('provider', sa.String(), nullable=False),
+        sa.Column('severity', sa.String(length=32), nullable=False),
+        sa.Column('status', sa.String(length=32), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('account_id', 'provider', 'severity', 'status'),
+    )
+    # Preenche com os alertas existentes; daqui em diante o CRUD mantém as contagens.
+    op.execute(
+        """
+        INSERT INTO alert_summary_counts (account_id, provider, severity, status, count)
+        SELECT COALESCE(account_id, ''), provider, CAST(severity AS VARCHAR), CAST(status AS VARCHAR), COUNT(*)
+        FROM alerts
+        GROUP BY COALESCE(account_id, ''), provider, CAST(severity AS VARCHAR), CAST(status AS VARCHAR)
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('alert_summary_counts')
@@ -0,0 +1,47 @@
+"""Add composite and trigram indexes for alert listing
+
+Revision ID: d010
+Revises: d009
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd010'
+down_revision = 'd009'
+branch_labels = None
+depends_on = None
+
+# Filtros comuns da listagem seguidos da ordenação padrão do keyset (last_seen_at, id).
+COMPOSITE_INDEXES = {
+    'ix_alerts_last_seen_id': ['last_seen_at', 'id'],
+    'ix_alerts_status_last_seen_id': ['status', 'last_seen_at', 'id'],
+    'ix_alerts_provider_status_last_seen_id': ['provider', 'status', 'last_seen_at', 'id'],
+    'ix_alerts_account_status_last_seen_id': ['account_id', 'status', 'last_seen_at', 'id'],
+    'ix_alerts_severity_status_last_seen_id': ['severity', 'status', 'last_seen_at', 'id'],
+    # Busca do alerta aberto de (provider, resource_id, policy_id) feita a cada ingestão.
+    'ix_alerts_open_lookup': ['provider', 'resource_id', 'policy_id', 'status'],
+}
+
+
+def upgrade():
+    for name, columns in COMPOSITE_INDEXES.items():
+        op.create_index(name, 'alerts', columns)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # O filtro resource_id é ILIKE '%...%'; um índice B-tree não ajuda, um GIN trigram sim
+        # (para termos de 3 ou mais caracteres). pg_trgm é uma extensão "trusted" a partir do PostgreSQL 13.
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_alerts_resource_id_trgm', 'alerts', ['resource_id'],
+            postgresql_using='gin', postgresql_ops={'resource_id': 'gin_trgm_ops'},
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_alerts_resource_id_trgm', table_name='alerts')
+    for name in reversed(list(COMPOSITE_INDEXES)):
+        op.drop_index(name, table_name='alerts')
@@ -0,0 +1,47 @@
+"""Add scan generations for auto-resolution of unseen alerts and assets
+
+Revision ID: d011
+Revises: d010
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd011'
+down_revision = 'd010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'scan_generations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('account_id', sa.String(), nullable=False),
+        sa.Column('provider', sa.String(), nullable=False),
+        sa.Column('service', sa.String(), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('resolved_alerts', sa.Integer(), nullable=True),
+        sa.Column('stale_assets', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_scan_generations_id', 'scan_generations', ['id'])
+    op.create_index('ix_scan_generations_scope', 'scan_generations', ['account_id', 'provider', 'service'])
+
+    # Nulo nas linhas existentes: contam como "não vistas" só depois da primeira varredura completa do escopo.
+    op.add_column('alerts', sa.Column('scan_generation', sa.Integer(), nullable=True))
+    op.add_column('cloud_assets', sa.Column('scan_generation', sa.Integer(), nullable=True))
+    op.add_column('cloud_assets', sa.Column('is_stale', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    op.drop_column('cloud_assets', 'is_stale')
+    op.drop_column('cloud_assets', 'scan_generation')
+    op.drop_column('alerts', 'scan_generation')
+    op.drop_index('ix_scan_generations_scope', table_name='scan_generations')
+    op.drop_index('ix_scan_generations_id', table_name='scan_generations')
+    op.drop_table('scan_generations')
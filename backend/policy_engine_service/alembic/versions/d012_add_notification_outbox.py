@@ -0,0 +1,37 @@
+"""Add notification outbox
+
+Revision ID: d012
+Revises: d011
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd012'
+down_revision = 'd011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('alert_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['alert_id'], ['alerts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Reserva do dispatcher: linhas vencidas por ordem de criação.
+    op.create_index('ix_notification_outbox_next_attempt', 'notification_outbox', ['next_attempt_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_notification_outbox_next_attempt', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
@@ -1,27 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import datetime
 
-from app.db.session import get_db
-from app.crud.crud_alert import alert_crud
+from app.db.session import get_async_db
+from app.crud.crud_alert import async_alert_crud, create_alert_and_notify, InvalidAlertCursorError
 from app.schemas.alert_schema import AlertSchema, AlertCreate, AlertUpdate, AlertStatusEnum, AlertSeverityEnum, AlertSummarySchema
 from app.models.alert_model import AlertModel # For direct model usage if necessary
 
 router = APIRouter()
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 @router.get("/summary", response_model=AlertSummarySchema)
-def get_alerts_summary(db: Session = Depends(get_db)):
+async def get_alerts_summary(db: AsyncSession = Depends(get_async_db)):
     """
     Get a summary of alerts, including counts by severity and status.
     """
-    summary = alert_crud.get_summary(db=db)
+    summary = await async_alert_crud.get_summary(db=db)
     return summary
 
 @router.post("/", response_model=AlertSchema, status_code=201)
-def create_alert(
+async def create_alert(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     alert_in: AlertCreate
 ):
     """
@@ -29,29 +31,31 @@ def create_alert(
     If an identical open alert already exists (based on provider, resource_id, policy_id, status=OPEN),
     it will update the `last_seen_at` of the existing alert instead of creating a new one.
     """
-    alert = alert_crud.create_alert(db=db, alert_in=alert_in)
+    alert = await create_alert_and_notify(db, alert_in=alert_in)
     return alert
 
 @router.get("/{alert_id}", response_model=AlertSchema)
-def read_alert(
+async def read_alert(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     alert_id: int,
 ):
     """
     Get a specific alert by ID.
     """
-    alert = alert_crud.get_alert(db=db, alert_id=alert_id)
+    alert = await async_alert_crud.get_alert(db=db, alert_id=alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     return alert
 
 @router.get("/", response_model=List[AlertSchema])
-def read_alerts(
-    db: Session = Depends(get_db),
-    skip: int = Query(0, ge=0),
+async def read_alerts(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    skip: int = Query(0, ge=0, description="Deprecated: prefer `cursor`, which does not rescan skipped rows"),
     limit: int = Query(100, ge=1, le=500), # Added max limit
-    sort_by: Optional[str] = Query(None, description="Column to sort by (e.g., 'created_at', 'severity', 'status')"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    sort_by: Optional[str] = Query(None, description="Column to sort by (e.g., 'last_seen_at', 'created_at', 'severity', 'status')"),
     sort_order: Optional[str] = Query("desc", description="Sort order: 'asc' or 'desc'"),
     provider: Optional[str] = Query(None, description="Filter by provider (e.g., 'aws', 'gcp')"),
     severity: Optional[AlertSeverityEnum] = Query(None, description="Filter by severity level"),
@@ -65,62 +69,69 @@ def read_alerts(
 ):
     """
     Retrieve a list of alerts with optional filtering and pagination.
+    When there are more results, the `X-Next-Cursor` response header carries the cursor for the next page;
+    pass it back as `cursor` with the same filters and sort.
     """
-    alerts = alert_crud.get_alerts(
-        db=db, skip=skip, limit=limit, sort_by=sort_by, sort_order=sort_order,
-        provider=provider, severity=severity, status=status, resource_id=resource_id,
-        policy_id=policy_id, account_id=account_id, region=region,
-        start_date=start_date, end_date=end_date
-    )
+    try:
+        alerts, next_cursor = await async_alert_crud.get_alerts_page(
+            db=db, skip=skip, limit=limit, cursor=cursor, sort_by=sort_by, sort_order=sort_order,
+            provider=provider, severity=severity, status=status, resource_id=resource_id,
+            policy_id=policy_id, account_id=account_id, region=region,
+            start_date=start_date, end_date=end_date
+        )
+    except InvalidAlertCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return alerts
 
 @router.put("/{alert_id}", response_model=AlertSchema)
-def update_alert_details(
+async def update_alert_details(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     alert_id: int,
     alert_in: AlertUpdate,
 ):
     """
     Update an alert's mutable details (e.g., status, severity, custom details, recommendation).
     """
-    alert_db_obj = alert_crud.get_alert(db=db, alert_id=alert_id)
+    alert_db_obj = await async_alert_crud.get_alert(db=db, alert_id=alert_id)
     if not alert_db_obj:
         raise HTTPException(status_code=404, detail="Alert not found")
 
-    updated_alert = alert_crud.update_alert(db=db, alert_id=alert_id, alert_in=alert_in)
+    updated_alert = await async_alert_crud.update_alert(db=db, alert_id=alert_id, alert_in=alert_in)
     return updated_alert
 
 @router.patch("/{alert_id}/status", response_model=AlertSchema)
-def update_alert_status_only(
+async def update_alert_status_only(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     alert_id: int,
     new_status: AlertStatusEnum = Query(..., description="The new status for the alert")
 ):
     """
     Quickly update the status of an alert.
     """
-    alert = alert_crud.update_alert_status(db=db, alert_id=alert_id, status=new_status)
+    alert = await async_alert_crud.update_alert_status(db=db, alert_id=alert_id, status=new_status)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     return alert
 
 
 @router.delete("/{alert_id}", response_model=AlertSchema)
-def delete_alert(
+async def delete_alert(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     alert_id: int,
 ):
     """
     Delete an alert by ID.
     """
-    alert = alert_crud.get_alert(db=db, alert_id=alert_id)
+    alert = await async_alert_crud.get_alert(db=db, alert_id=alert_id)
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found to delete")
 
-    deleted_alert_obj = alert_crud.remove_alert(db=db, alert_id=alert_id)
+    deleted_alert_obj = await async_alert_crud.remove_alert(db=db, alert_id=alert_id)
     # remove_alert returns the object that was deleted, so we can return it.
     # If it couldn't be found for deletion (e.g. race condition), it would be None.
     if not deleted_alert_obj:
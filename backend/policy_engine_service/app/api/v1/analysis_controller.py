@@ -1,13 +1,19 @@
-from fastapi import APIRouter, HTTPException, Body, Depends
-from sqlalchemy.orm import Session
-from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException, Body, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any, List, AsyncIterator, Optional, Tuple
+import json
 import logging
 
 from app.services.audit_service_client import audit_service_client
-from app.db.session import get_db
-from app.crud.crud_alert import alert_crud
-from app.engine.core_engine import policy_engine # Importa a instância do PolicyEngine
-from app.schemas.input_data_schema import AnalysisRequest
+from app.db.session import get_async_db, AsyncSessionLocal
+from app.crud.crud_alert import bulk_ingest_alerts_and_notify
+from app.core.config import settings
+from app.engine.core_engine import policy_engine, count_collection_errors # Importa a instância do PolicyEngine
+from app.schemas.input_data_schema import AnalysisRequest, AnalysisStreamHeader
+from app.engine.stream_ingestion import (
+    NDJSON_MEDIA_TYPE, NDJSONLineTooLong, iter_ndjson_lines, parse_json_object, parse_stream_record,
+)
 from app.schemas.alert_schema import AlertCreate, AlertSchema
 # AnalysisResponse e ProviderAnalysisResult podem ser usados se a resposta for mais estruturada
 # from app.schemas.analysis_schema import AnalysisResponse, ProviderAnalysisResult
@@ -18,11 +24,12 @@ router = APIRouter()
 @router.post("/analyze", response_model=List[AlertSchema]) # Retorna uma lista de alertas persistidos
 async def analyze_resources_and_persist_alerts(
     analysis_request: AnalysisRequest = Body(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Recebe dados de configuração de recursos, aplica políticas para gerar dados de alerta,
-    cria/atualiza alertas no banco de dados e retorna os alertas processados.
+    cria/atualiza alertas no banco de dados e retorna os alertas processados, mais os alertas OPEN
+    dos recursos inalterados desde a última análise (não reavaliados pela detecção de mudanças).
     """
     actor = "system" # Pode ser alterado para o ID do usuário se o token for passado
     resource = f"{analysis_request.provider}:{analysis_request.service}"
@@ -34,32 +41,51 @@ async def analyze_resources_and_persist_alerts(
 
     logger.info(f"Received analysis request for provider: {analysis_request.provider}, service: {analysis_request.service}, account: {analysis_request.account_id or 'N/A'}")
 
-    if not analysis_request.data:
-        logger.info(f"No data provided for analysis request for service: {analysis_request.service}. Returning empty list.")
-        return []
+    # Um /analyze só fecha a varredura de (conta, provider, serviço), resolvendo o que ela não viu, quando o
+    # coletor confirma a coleta completa (collection_complete) e nenhum registro é uma falha de coleta (ex.:
+    # ERROR_REGION). Muitos coletores registram a falha no log e devolvem [] ou uma lista parcial; sem a
+    # confirmação, o payload não pode ser tomado como o inventário inteiro.
+    collection_errors = count_collection_errors(analysis_request.data)
+    complete_scan = analysis_request.collection_complete and not collection_errors
+    if not complete_scan:
+        logger.info(
+            f"Coleta não confirmada como completa para {analysis_request.provider}/{analysis_request.service} "
+            f"(Account: {analysis_request.account_id or 'N/A'}, {collection_errors} registros com erro de coleta). "
+            f"Alertas não vistos não serão resolvidos."
+        )
 
+    scan_generation: Optional[int] = None
     try:
-        raw_alert_data_list: List[Dict[str, Any]] = await policy_engine.analyze(analysis_request)
+        scan_generation = await policy_engine.begin_scan(
+            analysis_request.account_id, analysis_request.provider, analysis_request.service
+        ) if complete_scan else None
+        outcome = await policy_engine.analyze(analysis_request, scan_generation=scan_generation)
+        raw_alert_data_list: List[Dict[str, Any]] = outcome.alerts
 
-        persisted_alerts_schemas: List[AlertSchema] = []
         if not raw_alert_data_list:
             logger.info(f"No alert data generated by policy engine for {analysis_request.provider}/{analysis_request.service}.")
-            return []
 
+        alerts_to_create: List[AlertCreate] = []
         for alert_data_dict in raw_alert_data_list:
             try:
                 alert_data_dict.setdefault("provider", analysis_request.provider.lower())
                 if analysis_request.account_id:
                     alert_data_dict.setdefault("account_id", analysis_request.account_id)
 
-                alert_to_create = AlertCreate(**alert_data_dict)
-
-                # alert_crud.create_alert agora é create_alert_and_notify (async)
-                created_alert_model = await alert_crud.create_alert(db=db, alert_in=alert_to_create)
-
-                persisted_alerts_schemas.append(AlertSchema.from_orm(created_alert_model))
+                alerts_to_create.append(AlertCreate(**alert_data_dict))
             except Exception as e:
-                logger.error(f"Error processing, persisting, or notifying for one alert for {analysis_request.provider}/{analysis_request.service}: {e} - Data: {alert_data_dict}", exc_info=True)
+                logger.error(f"Error validating one alert for {analysis_request.provider}/{analysis_request.service}: {e} - Data: {alert_data_dict}", exc_info=True)
+
+        # Persistência em lote: deduplicação em memória, uma consulta por lote para os alertas OPEN
+        # existentes e INSERT/UPDATE set-based. As notificações são disparadas para cada alerta persistido.
+        persisted_alerts_schemas: List[AlertSchema] = await bulk_ingest_alerts_and_notify(
+            db, alerts_in=alerts_to_create, batch_size=settings.ALERT_INGEST_BATCH_SIZE, scan_generation=scan_generation
+        ) if alerts_to_create else []
+        # Os recursos inalterados não são reavaliados: seus alertas OPEN vêm do banco, junto com os novos.
+        carried_alerts = await policy_engine.finalize_analysis(outcome)
+        resolved_alerts, stale_assets = await policy_engine.complete_scan(
+            scan_generation, analysis_request.account_id, analysis_request.provider, analysis_request.service
+        )
 
         logger.info(f"Analysis, persistence, and notification triggering for {analysis_request.provider}/{analysis_request.service} (Account: {analysis_request.account_id or 'N/A'}) completed. Processed {len(persisted_alerts_schemas)} alerts.")
 
@@ -67,13 +93,18 @@ async def analyze_resources_and_persist_alerts(
             actor=actor,
             action="analysis_completed",
             resource=resource,
-            details={**details, "alerts_found": len(persisted_alerts_schemas)},
+            details={
+                **details, "alerts_found": len(persisted_alerts_schemas), "alerts_carried_forward": len(carried_alerts),
+                "alerts_resolved": resolved_alerts,
+                "stale_assets": stale_assets, "complete_scan": complete_scan, "collection_errors": collection_errors,
+            },
         )
 
-        return persisted_alerts_schemas
+        return persisted_alerts_schemas + carried_alerts
 
     except Exception as e:
         logger.exception(f"Critical error during resource analysis, persistence or notification for service {analysis_request.service}")
+        await _abandon_scan(scan_generation)
 
         await audit_service_client.create_event(
             actor=actor,
@@ -85,3 +116,132 @@ async def analyze_resources_and_persist_alerts(
         raise HTTPException(
             status_code=500, detail=f"Error during resource analysis for {analysis_request.service}: {str(e)}"
         )
+
+
+async def _abandon_scan(scan_generation: Optional[int]) -> None:
+    try:
+        await policy_engine.abandon_scan(scan_generation)
+    except Exception:
+        logger.exception(f"Erro ao descartar a geração de varredura {scan_generation}.")
+
+
+def _ndjson_line(payload: Dict[str, Any]) -> bytes:
+    return (json.dumps(payload, default=str) + "\n").encode("utf-8")
+
+
+def _build_alerts(raw_alert_data_list: List[Dict[str, Any]], header: AnalysisStreamHeader) -> List[AlertCreate]:
+    alerts_to_create: List[AlertCreate] = []
+    for alert_data_dict in raw_alert_data_list:
+        try:
+            alert_data_dict.setdefault("provider", header.provider.lower())
+            if header.account_id:
+                alert_data_dict.setdefault("account_id", header.account_id)
+            alerts_to_create.append(AlertCreate(**alert_data_dict))
+        except Exception as e:
+            logger.error(f"Error validating one alert for {header.provider}/{header.service}: {e} - Data: {alert_data_dict}", exc_info=True)
+    return alerts_to_create
+
+
+async def _analyze_stream_chunk(
+    db: AsyncSession, header: AnalysisStreamHeader, records: List[Dict[str, Any]], scan_generation: Optional[int]
+) -> List[AlertSchema]:
+    request_chunk = AnalysisRequest.model_construct(
+        provider=header.provider, service=header.service, account_id=header.account_id, data=records
+    )
+    outcome = await policy_engine.analyze(request_chunk, include_aggregate_policies=False, scan_generation=scan_generation)
+    persisted = await bulk_ingest_alerts_and_notify(
+        db, alerts_in=_build_alerts(outcome.alerts, header), batch_size=settings.ALERT_INGEST_BATCH_SIZE,
+        scan_generation=scan_generation,
+    ) if outcome.alerts else []
+    return persisted + await policy_engine.finalize_analysis(outcome)
+
+
+async def _stream_analysis(header: AnalysisStreamHeader, lines: AsyncIterator[Tuple[int, bytes]]) -> AsyncIterator[bytes]:
+    resource = f"{header.provider}:{header.service}"
+    details = {"account_id": header.account_id}
+    totals = {"records": 0, "invalid_records": 0, "collection_errors": 0, "alerts": 0, "chunks": 0}
+    chunk_size = max(1, settings.STREAM_CHUNK_SIZE)
+
+    async def flush(db: AsyncSession, records: List[Dict[str, Any]]) -> List[bytes]:
+        persisted = await _analyze_stream_chunk(db, header, records, scan_generation)
+        totals["chunks"] += 1
+        totals["alerts"] += len(persisted)
+        return [_ndjson_line({"type": "alert", "alert": alert.model_dump(mode="json")}) for alert in persisted]
+
+    scan_generation: Optional[int] = None
+    try:
+        scan_generation = await policy_engine.begin_scan(
+            header.account_id, header.provider, header.service
+        ) if header.collection_complete else None
+        async with AsyncSessionLocal() as db:
+            records: List[Dict[str, Any]] = []
+            async for line_number, line in lines:
+                try:
+                    records.append(parse_stream_record(header.service, line))
+                    totals["records"] += 1
+                    totals["collection_errors"] += count_collection_errors(records[-1:])
+                except ValueError as e:
+                    totals["invalid_records"] += 1
+                    yield _ndjson_line({"type": "error", "line": line_number, "detail": str(e)})
+                    continue
+                if len(records) >= chunk_size:
+                    for output in await flush(db, records):
+                        yield output
+                    records = []
+            if records:
+                for output in await flush(db, records):
+                    yield output
+        # Só um stream confirmado como completo pelo coletor, sem registros inválidos nem falhas de coleta, fecha
+        # a varredura; com registros descartados ou regiões que falharam, os recursos correspondentes seriam
+        # tomados por ausentes. Nos outros casos a geração aberta no início é descartada.
+        if not totals["invalid_records"] and not totals["collection_errors"]:
+            totals["alerts_resolved"], totals["stale_assets"] = await policy_engine.complete_scan(
+                scan_generation, header.account_id, header.provider, header.service, include_aggregate_policies=False,
+            )
+        else:
+            await policy_engine.abandon_scan(scan_generation)
+    except Exception as e:
+        logger.exception(f"Critical error during streamed analysis for service {header.service}")
+        await _abandon_scan(scan_generation)
+        await audit_service_client.create_event(
+            actor="system", action="analysis_failed", resource=resource, details={**details, **totals, "error": str(e)},
+        )
+        yield _ndjson_line({"type": "error", "detail": f"Error during resource analysis for {header.service}: {str(e)}"})
+        return
+
+    await audit_service_client.create_event(
+        actor="system", action="analysis_completed", resource=resource, details={**details, "alerts_found": totals["alerts"], **totals},
+    )
+    yield _ndjson_line({"type": "summary", **totals})
+
+
+@router.post("/analyze/stream", response_class=StreamingResponse)
+async def analyze_resources_stream(request: Request):
+    """
+    Ingestão em streaming (NDJSON): a primeira linha é o cabeçalho {provider, service, account_id,
+    collection_complete} e
+    cada linha seguinte é um recurso. Os recursos são validados e avaliados em blocos de
+    STREAM_CHUNK_SIZE à medida que chegam, e a resposta é NDJSON com uma linha por alerta persistido ou
+    OPEN de um recurso inalterado ({"type": "alert"}), por registro inválido ({"type": "error"}) e um resumo final ({"type": "summary"}).
+    Como cada bloco é avaliado isoladamente, políticas que agregam sobre o conjunto inteiro de recursos
+    não são aplicadas neste modo; use /analyze para esses serviços.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type != NDJSON_MEDIA_TYPE:
+        raise HTTPException(status_code=415, detail=f"Content-Type deve ser {NDJSON_MEDIA_TYPE}.")
+
+    lines = iter_ndjson_lines(request.stream(), max_line_bytes=settings.STREAM_MAX_LINE_BYTES)
+    try:
+        _, header_line = await lines.__anext__()
+        header = AnalysisStreamHeader(**parse_json_object(header_line))
+    except StopAsyncIteration:
+        raise HTTPException(status_code=400, detail="Corpo vazio: a primeira linha deve ser o cabeçalho da análise.")
+    except (ValueError, NDJSONLineTooLong) as e:
+        raise HTTPException(status_code=400, detail=f"Cabeçalho inválido: {e}")
+
+    await audit_service_client.create_event(
+        actor="system", action="analysis_started", resource=f"{header.provider}:{header.service}",
+        details={"account_id": header.account_id, "mode": "stream"},
+    )
+    logger.info(f"Received streamed analysis request for provider: {header.provider}, service: {header.service}, account: {header.account_id or 'N/A'}")
+    return StreamingResponse(_stream_analysis(header, lines), media_type=NDJSON_MEDIA_TYPE)
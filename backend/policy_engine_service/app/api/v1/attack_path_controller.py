@@ -1,16 +1,17 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from app.db.session import get_db
-from app.crud.crud_attack_path import attack_path_crud
-from app.schemas.attack_path_schema import AttackPathSchema
+from app.db.session import get_async_db
+from app.crud.crud_attack_path import async_attack_path_crud
+from app.schemas.attack_path_schema import AttackPathSchema, AttackPathAnalysisStatus
+from app.services.attack_path_worker import attack_path_worker
 
 router = APIRouter()
 
 @router.get("/", response_model=List[AttackPathSchema])
-def read_attack_paths(
-    db: Session = Depends(get_db),
+async def read_attack_paths(
+    db: AsyncSession = Depends(get_async_db),
     skip: int = 0,
     limit: int = 100
 ):
@@ -18,5 +19,12 @@ def read_attack_paths(
     Recupera uma lista de caminhos de ataque encontrados.
     """
     # O CRUD para attack_path precisa de uma função get_multi
-    attack_paths = attack_path_crud.get_multi(db=db, skip=skip, limit=limit)
+    attack_paths = await async_attack_path_crud.get_multi(db=db, skip=skip, limit=limit)
     return attack_paths
+
+@router.get("/status", response_model=AttackPathAnalysisStatus)
+def read_attack_path_analysis_status():
+    """
+    Estado da análise de caminhos de ataque em background: contas pendentes e dados da última execução.
+    """
+    return attack_path_worker.status()
@@ -2,7 +2,7 @@ import os
 import hvac
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Literal
 
 # --- Configurações não-secretas ---
 class BaseAppSettings(BaseSettings):
@@ -12,6 +12,64 @@ class BaseAppSettings(BaseSettings):
     # URL do Notification Service
     NOTIFICATION_SERVICE_URL: str = "http://notification_service:8003/api/v1"
     AUDIT_SERVICE_URL: Optional[str] = None
+    # Envio de eventos de auditoria em lotes a partir de uma fila limitada em memória.
+    # AUDIT_QUEUE_OVERFLOW com a fila cheia: "drop_oldest" (descarta o mais antigo) ou "block" (espera)
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 100
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_QUEUE_OVERFLOW: Literal["drop_oldest", "block"] = "drop_oldest"
+    # Canais padrão do notification_service acionados para alertas críticos, além do e-mail
+    ENABLE_WEBHOOK_NOTIFICATIONS: bool = False
+    ENABLE_GOOGLE_CHAT_NOTIFICATIONS: bool = False
+
+    # Entrega do notification_outbox: alertas por requisição a /notify/bulk, requisições simultâneas,
+    # intervalo de varredura da fila e novas tentativas com backoff exponencial
+    NOTIFICATION_DISPATCH_BATCH_SIZE: int = 200
+    NOTIFICATION_DISPATCH_CONCURRENCY: int = 4
+    NOTIFICATION_DISPATCH_INTERVAL_SECONDS: float = 5.0
+    NOTIFICATION_DISPATCH_LEASE_SECONDS: float = 300.0
+    NOTIFICATION_DISPATCH_MAX_ATTEMPTS: int = 8
+    NOTIFICATION_RETRY_BASE_SECONDS: float = 5.0
+    NOTIFICATION_RETRY_MAX_SECONDS: float = 600.0
+
+    # Clientes HTTP compartilhados para os serviços downstream (um pool de conexões por serviço).
+    # HTTP/2 requer o pacote h2 (httpx[http2]); sem ele, o cliente usa HTTP/1.1.
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_CLIENT_TIMEOUT_SECONDS: float = 10.0
+    HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_CLIENT_HTTP2: bool = False
+
+    # Pool de conexões de cada engine (síncrona e assíncrona); ignorado com SQLite
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+
+    # Tamanho de cada bloco do upsert em lote de ativos (um INSERT ... ON CONFLICT por bloco)
+    ASSET_UPSERT_CHUNK_SIZE: int = 1000
+    # Tamanho do lote na ingestão de alertas (uma consulta de deduplicação por lote)
+    ALERT_INGEST_BATCH_SIZE: int = 500
+    # Intervalo da reconciliação do resumo de alertas com a tabela de alertas (0 desabilita)
+    ALERT_SUMMARY_RECONCILE_INTERVAL_SECONDS: float = 3600.0
+    # Pula a regravação e a reavaliação de ativos cujo hash de conteúdo não mudou desde a última análise
+    CHANGE_DETECTION_ENABLED: bool = True
+    # Ao fim de uma varredura completa, resolve os alertas OPEN e marca como obsoletos os ativos que ela não viu
+    SCAN_AUTO_RESOLVE_ENABLED: bool = True
+    # Intervalo de verificação do diretório de políticas para recarga a quente (0 desabilita)
+    POLICY_RELOAD_INTERVAL_SECONDS: float = 10.0
+
+    # Avaliação paralela de políticas (pool de processos)
+    EVALUATION_MAX_WORKERS: int = 0  # 0 = número de núcleos disponíveis
+    PARALLEL_EVALUATION_THRESHOLD: int = 5000  # abaixo disso a avaliação fica no próprio processo
+    EVALUATION_CHUNK_SIZE: int = 2000
+
+    # Ingestão NDJSON (/analyze/stream): recursos por bloco avaliado e tamanho máximo de uma linha
+    STREAM_CHUNK_SIZE: int = 500
+    STREAM_MAX_LINE_BYTES: int = 10 * 1024 * 1024
+
+    # Janela de agrupamento da análise de caminhos de ataque em background, por conta
+    ATTACK_PATH_DEBOUNCE_SECONDS: float = 30.0
 
     # Endereço do Vault
     VAULT_ADDR: str = "http://vault:8200"
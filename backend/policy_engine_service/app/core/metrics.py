@@ -0,0 +1,22 @@
+from typing import Any, Dict, Type, TypeVar
+
+from prometheus_client.metrics import MetricWrapperBase
+
+MetricT = TypeVar("MetricT", bound=MetricWrapperBase)
+
+# Métricas já criadas, por nome. Este módulo é sempre importado como app.core.metrics, então há um único cache
+# por processo mesmo quando o módulo que declara a métrica é importado por dois caminhos.
+_metrics: Dict[str, MetricWrapperBase] = {}
+
+
+def get_or_create_metric(metric_class: Type[MetricT], name: str, documentation: str, **kwargs: Any) -> MetricT:
+    """
+    Cria a métrica no registro padrão do prometheus_client na primeira chamada e a reaproveita nas seguintes.
+
+    Alguns módulos (ex.: app.engine.policy_metrics) são importados tanto como app.* quanto como
+    policy_engine_service.app.* e executam duas vezes; registrar a mesma série de novo levantaria ValueError.
+    """
+    metric = _metrics.get(name)
+    if metric is None:
+        metric = _metrics[name] = metric_class(name, documentation, **kwargs)
+    return metric
@@ -0,0 +1,30 @@
+from typing import Any, Callable, Awaitable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class AsyncCRUD:
+    """
+    Variante assíncrona de um objeto CRUD: cada método `crud.metodo(db, ...)` vira
+    `await async_crud.metodo(db, ...)`, com `db` uma AsyncSession.
+
+    O método síncrono roda em `AsyncSession.run_sync`, o mesmo mecanismo (greenlet) que a própria AsyncSession
+    usa: cada ida ao banco via asyncpg/aiosqlite devolve o controle ao event loop, então análises concorrentes
+    sobrepõem o I/O com o banco. A lógica de consulta (upserts por dialeto, deltas do resumo, keyset) fica
+    num lugar só, compartilhada com as threads de background que usam a sessão síncrona.
+    """
+
+    def __init__(self, crud: Any):
+        self._crud = crud
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        method = getattr(self._crud, name)
+        if not callable(method) or name.startswith("_"):
+            raise AttributeError(name)
+
+        async def call(db: AsyncSession, *args: Any, **kwargs: Any) -> Any:
+            return await db.run_sync(lambda session: method(session, *args, **kwargs))
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
@@ -1,36 +1,184 @@
 from sqlalchemy.orm import Session
-from typing import List, Optional, Type
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.engine import Row
+from typing import List, Optional, Type, Dict, Tuple, Sequence, Any
+from collections import Counter
 # from uuid import uuid4 # UUID not used for primary key in the current model
+import base64
+import enum
+import json
+import logging
 import datetime
 
-from app.models.alert_model import AlertModel, AlertStatus, AlertSeverity, AlertCreate, AlertUpdate
+from app.models.alert_model import (
+    AlertModel, AlertStatus, AlertSeverity, AlertCreate, AlertUpdate, AlertSummaryCount, SUMMARY_NO_ACCOUNT,
+)
+from app.crud.async_crud import AsyncCRUD
+from app.crud.crud_notification_outbox import notification_outbox_crud
 from app.schemas.alert_schema import AlertSchema # Using the refined AlertSchema for responses
-from sqlalchemy import desc, asc, func
+from sqlalchemy import desc, asc, func, select, insert, update, delete, tuple_, bindparam, text, or_
+from sqlalchemy.dialects import postgresql, sqlite
+
+logger = logging.getLogger(__name__)
+
+# (account_id, provider, severity, status) de uma linha de alert_summary_counts.
+SummaryKey = Tuple[str, str, str, str]
+
+
+def _enum_value(value: Any) -> str:
+    return value.value if isinstance(value, enum.Enum) else str(value)
+
+
+def _summary_key(account_id: Optional[str], provider: str, severity: Any, status: Any) -> SummaryKey:
+    return (account_id or SUMMARY_NO_ACCOUNT, provider, _enum_value(severity), _enum_value(status))
+
+
+# Colunas aceitas em sort_by. Todas são NOT NULL, requisito da comparação (coluna, id) do keyset.
+ALERT_SORT_COLUMNS = (
+    "last_seen_at", "first_seen_at", "created_at", "updated_at", "severity", "status",
+    "provider", "resource_type", "resource_id", "policy_id", "id",
+)
+DEFAULT_ALERT_SORT = "last_seen_at"
+_DATETIME_SORT_COLUMNS = {"last_seen_at", "first_seen_at", "created_at", "updated_at"}
+
+
+class InvalidAlertCursorError(ValueError):
+    pass
+
+
+def encode_alert_cursor(sort_by: str, sort_order: str, value: Any, alert_id: int) -> str:
+    """Cursor opaco (base64 de JSON) com a ordenação e a posição (valor da coluna, id) da última linha."""
+    if isinstance(value, datetime.datetime):
+        value = value.isoformat()
+    elif isinstance(value, enum.Enum):
+        value = value.value
+    payload = json.dumps([sort_by, sort_order, value, alert_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_alert_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_by, cursor_sort_order, value, alert_id = json.loads(base64.urlsafe_b64decode(padded))
+        if sort_by in _DATETIME_SORT_COLUMNS:
+            value = datetime.datetime.fromisoformat(value)
+        alert_id = int(alert_id)
+    except (ValueError, TypeError):
+        raise InvalidAlertCursorError("Invalid cursor")
+    if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order):
+        raise InvalidAlertCursorError("Cursor was issued for a different sort_by/sort_order")
+    return value, alert_id
+
 
 class CRUDAlert:
     def __init__(self, model: Type[AlertModel]):
         self.model = model
 
+    # --- Resumo incremental (alert_summary_counts) ---
+
+    def _apply_summary_deltas(self, db: Session, deltas: Dict[SummaryKey, int]) -> None:
+        """
+        Soma `deltas` às contagens do resumo com um único INSERT ... ON CONFLICT DO UPDATE, dentro da
+        transação do chamador. Deve ser chamado depois das escritas em `alerts` e logo antes do commit.
+        As chaves vão em ordem fixa para que transações concorrentes travem as linhas na mesma ordem.
+        """
+        rows = [
+            {"account_id": k[0], "provider": k[1], "severity": k[2], "status": k[3], "count": delta}
+            for k, delta in sorted(deltas.items()) if delta
+        ]
+        if not rows:
+            return
+        table = AlertSummaryCount.__table__
+        dialect_insert = sqlite.insert if db.bind.dialect.name == "sqlite" else postgresql.insert
+        stmt = dialect_insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[c.name for c in table.primary_key.columns],
+            set_={"count": table.c.count + stmt.excluded.count},
+        )
+        db.execute(stmt)
+
+    def _move_in_summary(self, deltas: Counter, before: SummaryKey, after: SummaryKey) -> None:
+        if before != after:
+            deltas[before] -= 1
+            deltas[after] += 1
+
+    def _summary_drift(self, db: Session, partition: Optional[Tuple[str, str]] = None) -> Dict[SummaryKey, int]:
+        """Diferença (contagem real - resumo) por combinação, opcionalmente restrita a um (account_id, provider)."""
+        alerts = self.model.__table__
+        summary = AlertSummaryCount.__table__
+        counts = select(alerts.c.account_id, alerts.c.provider, alerts.c.severity, alerts.c.status, func.count())
+        current_rows = select(summary)
+        if partition is not None:
+            account_id, provider = partition
+            account_filter = (
+                or_(alerts.c.account_id.is_(None), alerts.c.account_id == SUMMARY_NO_ACCOUNT)
+                if account_id == SUMMARY_NO_ACCOUNT else alerts.c.account_id == account_id
+            )
+            counts = counts.where(account_filter, alerts.c.provider == provider)
+            current_rows = current_rows.where(summary.c.account_id == account_id, summary.c.provider == provider)
+        actual: Counter = Counter()
+        for account_id, provider, severity, status, count in db.execute(
+            counts.group_by(alerts.c.account_id, alerts.c.provider, alerts.c.severity, alerts.c.status)
+        ):
+            actual[_summary_key(account_id, provider, severity, status)] += count
+        current = {(r.account_id, r.provider, r.severity, r.status): r.count for r in db.execute(current_rows)}
+        drift = {key: actual.get(key, 0) - current.get(key, 0) for key in set(actual) | set(current)}
+        return {key: delta for key, delta in drift.items() if delta}
+
+    def reconcile_summary(self, db: Session) -> int:
+        """
+        Recalcula o resumo a partir da tabela de alertas e corrige as linhas divergentes.
+        Retorna o número de combinações corrigidas (0 quando não há drift).
+
+        A contagem completa roda sem trava e só aponta os (account_id, provider) suspeitos: uma divergência
+        ali pode ser apenas um escritor em andamento. Cada partição suspeita é então recontada e corrigida
+        numa transação curta; no PostgreSQL a tabela de resumo é travada só durante essa recontagem, de modo
+        que escritores que já aplicaram seus deltas terminam antes e os seguintes somam sobre o valor corrigido.
+        """
+        summary = AlertSummaryCount.__table__
+        try:
+            suspects = sorted({key[:2] for key in self._summary_drift(db)})
+            # DELETE reavalia `count = 0` sobre a versão travada da linha, então dispensa a trava da tabela.
+            db.execute(delete(summary).where(summary.c.count == 0))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        corrected = 0
+        for partition in suspects:
+            try:
+                if db.bind.dialect.name == "postgresql":
+                    db.execute(text(f"LOCK TABLE {summary.name} IN EXCLUSIVE MODE"))
+                drift = self._summary_drift(db, partition)
+                self._apply_summary_deltas(db, drift)
+                db.execute(delete(summary).where(
+                    summary.c.account_id == partition[0], summary.c.provider == partition[1], summary.c.count == 0
+                ))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            corrected += len(drift)
+        if corrected:
+            logger.warning(f"Resumo de alertas corrigido: {corrected} combinações divergiam da tabela de alertas.")
+        return corrected
+
     def get_alert(self, db: Session, alert_id: int) -> Optional[AlertModel]:
         return db.query(self.model).filter(self.model.id == alert_id).first()
 
-    def get_alerts(
+    def _filtered_query(
         self,
         db: Session,
-        skip: int = 0,
-        limit: int = 100,
-        sort_by: Optional[str] = None,
-        sort_order: Optional[str] = "desc",
         provider: Optional[str] = None,
-        severity: Optional[AlertSeverity] = None, # Uses AlertSeverity enum from model
-        status: Optional[AlertStatus] = None,     # Uses AlertStatus enum from model
+        severity: Optional[AlertSeverity] = None,
+        status: Optional[AlertStatus] = None,
         resource_id: Optional[str] = None,
         policy_id: Optional[str] = None,
         account_id: Optional[str] = None,
         region: Optional[str] = None,
         start_date: Optional[datetime.datetime] = None,
         end_date: Optional[datetime.datetime] = None
-    ) -> List[AlertModel]:
+    ):
         query = db.query(self.model)
 
         if provider:
@@ -40,6 +188,7 @@ class CRUDAlert:
         if status:
             query = query.filter(self.model.status == status)
         if resource_id:
+            # Busca por substring; no PostgreSQL é atendida pelo índice trigram ix_alerts_resource_id_trgm (d010).
             query = query.filter(self.model.resource_id.ilike(f"%{resource_id}%"))
         if policy_id:
             query = query.filter(self.model.policy_id == policy_id)
@@ -51,27 +200,79 @@ class CRUDAlert:
             query = query.filter(self.model.created_at >= start_date)
         if end_date:
             query = query.filter(self.model.created_at <= end_date)
+        return query
 
-
-        if sort_by:
-            column = getattr(self.model, sort_by, None)
-            if column:
-                if sort_order.lower() == "asc":
-                    query = query.order_by(asc(column))
-                else:
-                    query = query.order_by(desc(column))
-            else:
-                query = query.order_by(desc(self.model.last_seen_at)) # Default sort
+    def get_alerts_page(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = "desc",
+        **filters: Any
+    ) -> Tuple[List[AlertModel], Optional[str]]:
+        """
+        Lista alertas ordenados por (sort_by, id) com paginação por cursor (keyset): `cursor` é o valor
+        retornado pela página anterior e a consulta continua a partir da última linha dela, em vez de
+        descartar `skip` linhas. Retorna (alertas, cursor da próxima página ou None na última página).
+        `skip` continua aceito para os clientes antigos. Levanta InvalidAlertCursorError se o cursor
+        for inválido ou tiver sido gerado com outra ordenação.
+        """
+        if sort_by not in ALERT_SORT_COLUMNS:
+            sort_by = DEFAULT_ALERT_SORT # Default sort
+        sort_order = "asc" if (sort_order or "").lower() == "asc" else "desc"
+        column = getattr(self.model, sort_by)
+
+        query = self._filtered_query(db, **filters)
+        if cursor:
+            last_value, last_id = decode_alert_cursor(cursor, sort_by, sort_order)
+            position = tuple_(column, self.model.id)
+            query = query.filter(position > (last_value, last_id) if sort_order == "asc" else position < (last_value, last_id))
+
+        order = asc if sort_order == "asc" else desc
+        if column is self.model.id:
+            query = query.order_by(order(self.model.id))
         else:
-             query = query.order_by(desc(self.model.last_seen_at))
+            query = query.order_by(order(column), order(self.model.id))
 
+        alerts = query.offset(skip).limit(limit + 1).all()
+        if len(alerts) <= limit:
+            return alerts, None
+        alerts = alerts[:limit]
+        return alerts, encode_alert_cursor(sort_by, sort_order, getattr(alerts[-1], sort_by), alerts[-1].id)
 
-        return query.offset(skip).limit(limit).all()
-
-    def create_alert(self, db: Session, *, alert_in: AlertCreate) -> AlertModel:
+    def get_alerts(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = "desc",
+        provider: Optional[str] = None,
+        severity: Optional[AlertSeverity] = None, # Uses AlertSeverity enum from model
+        status: Optional[AlertStatus] = None,     # Uses AlertStatus enum from model
+        resource_id: Optional[str] = None,
+        policy_id: Optional[str] = None,
+        account_id: Optional[str] = None,
+        region: Optional[str] = None,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+        cursor: Optional[str] = None
+    ) -> List[AlertModel]:
+        alerts, _ = self.get_alerts_page(
+            db, skip=skip, limit=limit, cursor=cursor, sort_by=sort_by, sort_order=sort_order,
+            provider=provider, severity=severity, status=status, resource_id=resource_id,
+            policy_id=policy_id, account_id=account_id, region=region,
+            start_date=start_date, end_date=end_date,
+        )
+        return alerts
+
+    def create_alert(self, db: Session, *, alert_in: AlertCreate, enqueue_notifications: bool = False) -> AlertModel:
         """
         Creates a new alert or updates the last_seen_at timestamp if an identical open alert exists.
         Identical is defined by: provider, resource_id, policy_id, and status=OPEN.
+        With enqueue_notifications, a notification_outbox row is written in the same transaction.
         """
 
         existing_alert = db.query(self.model).filter(
@@ -87,6 +288,13 @@ class CRUDAlert:
             existing_alert.last_seen_at = current_time
             # Optionally update severity if it has changed, or other mutable fields for an open alert
             if alert_in.severity != existing_alert.severity:
+                deltas: Counter = Counter()
+                self._move_in_summary(
+                    deltas,
+                    _summary_key(existing_alert.account_id, existing_alert.provider, existing_alert.severity, existing_alert.status),
+                    _summary_key(existing_alert.account_id, existing_alert.provider, alert_in.severity, existing_alert.status),
+                )
+                self._apply_summary_deltas(db, deltas)
                 existing_alert.severity = alert_in.severity
             if alert_in.details != existing_alert.details: # If details can change
                  existing_alert.details = alert_in.details
@@ -96,6 +304,8 @@ class CRUDAlert:
                  existing_alert.recommendation = alert_in.recommendation
 
             db.add(existing_alert)
+            if enqueue_notifications:
+                notification_outbox_crud.enqueue(db, [existing_alert.id])
             db.commit()
             db.refresh(existing_alert)
             return existing_alert
@@ -103,6 +313,7 @@ class CRUDAlert:
             # Create a new alert entry
             # For Pydantic V1, use .dict(). For V2, use .model_dump()
             alert_data = alert_in.model_dump() if hasattr(alert_in, 'model_dump') else alert_in.dict()
+            alert_data.pop("status", None) # AlertCreate tem status (default OPEN); o status de um alerta novo é sempre OPEN
 
             db_alert = self.model(
                 **alert_data,
@@ -117,18 +328,246 @@ class CRUDAlert:
                 status=AlertStatus.OPEN # Explicitly set status to OPEN for new alerts
             )
             db.add(db_alert)
+            self._apply_summary_deltas(db, {_summary_key(alert_in.account_id, alert_in.provider, alert_in.severity, AlertStatus.OPEN): 1})
+            if enqueue_notifications:
+                db.flush()
+                notification_outbox_crud.enqueue(db, [db_alert.id])
             db.commit()
             db.refresh(db_alert)
             return db_alert
 
+    # Colunas que um alerta OPEN existente pode ter atualizadas quando reaparece numa análise.
+    _MUTABLE_OPEN_FIELDS = ("severity", "details", "description", "recommendation")
+
+    def bulk_ingest_alerts(
+        self,
+        db: Session,
+        *,
+        alerts_in: Sequence[AlertCreate],
+        batch_size: int = 500,
+        scan_generation: Optional[int] = None,
+        enqueue_notifications: bool = False,
+    ) -> List[Row]:
+        """
+        Versão em lote de create_alert para os resultados de uma análise.
+
+        Os alertas são deduplicados em memória por (provider, resource_id, policy_id). Para cada lote,
+        os alertas OPEN já existentes são resolvidos com uma única consulta; os novos são inseridos com
+        um INSERT multi-linha e os existentes têm last_seen_at atualizado com um único UPDATE (os campos
+        mutáveis só são reescritos nas linhas em que realmente mudaram). Tudo ocorre numa única transação.
+
+        Com `scan_generation`, os alertas novos e os reconfirmados são carimbados com a varredura atual.
+        Com `enqueue_notifications`, uma linha de notification_outbox por alerta persistido entra na mesma transação.
+
+        Retorna as linhas persistidas (Row com todas as colunas de `alerts`), obtidas via RETURNING
+        quando o dialeto suporta, na ordem em que os alertas foram recebidos.
+        """
+        table = self.model.__table__
+        unique_alerts: Dict[Tuple[str, str, str], AlertCreate] = {}
+        for alert_in in alerts_in:
+            unique_alerts[(alert_in.provider, alert_in.resource_id, alert_in.policy_id)] = alert_in
+        if not unique_alerts:
+            return []
+
+        use_returning = db.bind.dialect.full_returning
+        keys = list(unique_alerts.keys())
+        persisted: Dict[Tuple[str, str, str], Row] = {}
+        summary_deltas: Counter = Counter()
+        current_time = datetime.datetime.now(datetime.timezone.utc)
+
+        try:
+            for start in range(0, len(keys), batch_size):
+                batch_keys = keys[start:start + batch_size]
+                key_filter = tuple_(table.c.provider, table.c.resource_id, table.c.policy_id).in_(batch_keys)
+                existing_rows = db.execute(
+                    select(table).where(table.c.status == AlertStatus.OPEN, key_filter)
+                ).all()
+                existing = {(r.provider, r.resource_id, r.policy_id): r for r in existing_rows}
+
+                new_values = []
+                changed_values = []
+                for key in batch_keys:
+                    alert_in = unique_alerts[key]
+                    values = {
+                        "severity": AlertSeverity(alert_in.severity),
+                        "details": alert_in.details,
+                        "description": alert_in.description,
+                        "recommendation": alert_in.recommendation,
+                    }
+                    current = existing.get(key)
+                    if current is None:
+                        new_values.append({
+                            **values,
+                            "resource_id": alert_in.resource_id,
+                            "resource_type": alert_in.resource_type,
+                            "account_id": alert_in.account_id,
+                            "region": alert_in.region,
+                            "provider": alert_in.provider,
+                            "title": alert_in.title,
+                            "policy_id": alert_in.policy_id,
+                            "status": AlertStatus.OPEN,
+                            "scan_generation": scan_generation,
+                        })
+                        summary_deltas[_summary_key(alert_in.account_id, alert_in.provider, values["severity"], AlertStatus.OPEN)] += 1
+                    elif any(getattr(current, field) != values[field] for field in self._MUTABLE_OPEN_FIELDS):
+                        changed_values.append({"_id": current.id, **{f"_{k}": v for k, v in values.items()}})
+                        self._move_in_summary(
+                            summary_deltas,
+                            _summary_key(current.account_id, current.provider, current.severity, current.status),
+                            _summary_key(current.account_id, current.provider, values["severity"], current.status),
+                        )
+
+                if changed_values:
+                    db.execute(
+                        update(table)
+                        .where(table.c.id == bindparam("_id"))
+                        .values(**{field: bindparam(f"_{field}") for field in self._MUTABLE_OPEN_FIELDS}),
+                        changed_values,
+                    )
+
+                if existing:
+                    touch_stmt = (
+                        update(table)
+                        .where(table.c.id.in_([r.id for r in existing.values()]))
+                        .values(last_seen_at=current_time, **({"scan_generation": scan_generation} if scan_generation is not None else {}))
+                    )
+                    if use_returning:
+                        for row in db.execute(touch_stmt.returning(*table.c)):
+                            persisted[(row.provider, row.resource_id, row.policy_id)] = row
+                    else:
+                        db.execute(touch_stmt)
+
+                if new_values:
+                    insert_stmt = insert(table).values(new_values)
+                    if use_returning:
+                        for row in db.execute(insert_stmt.returning(*table.c)):
+                            persisted[(row.provider, row.resource_id, row.policy_id)] = row
+                    else:
+                        db.execute(insert_stmt)
+
+                if not use_returning:
+                    # Dialetos sem RETURNING (ex.: SQLite nos testes) releem o lote numa única consulta.
+                    for row in db.execute(select(table).where(table.c.status == AlertStatus.OPEN, key_filter)):
+                        persisted[(row.provider, row.resource_id, row.policy_id)] = row
+            self._apply_summary_deltas(db, summary_deltas)
+            result = [persisted[key] for key in keys if key in persisted]
+            if enqueue_notifications:
+                notification_outbox_crud.enqueue(db, [row.id for row in result], now=current_time)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        return result
+
+    def carry_forward_scan_generation(
+        self, db: Session, *, account_id: str, provider: str, resource_ids: List[str], policy_ids: List[str],
+        scan_generation: int, chunk_size: int = 1000
+    ) -> int:
+        """
+        Carimba com `scan_generation` os alertas OPEN dos recursos que a detecção de mudanças não reavaliou
+        (conteúdo inalterado): eles continuam valendo, mas não foram reemitidos nesta varredura.
+        Um UPDATE por bloco de `chunk_size` recursos, numa única transação.
+        """
+        if not resource_ids or not policy_ids:
+            return 0
+        table = self.model.__table__
+        updated = 0
+        try:
+            for start in range(0, len(resource_ids), chunk_size):
+                updated += db.execute(
+                    update(table)
+                    .where(
+                        table.c.status == AlertStatus.OPEN,
+                        table.c.account_id == account_id,
+                        table.c.provider == provider,
+                        table.c.policy_id.in_(policy_ids),
+                        table.c.resource_id.in_(resource_ids[start:start + chunk_size]),
+                    )
+                    .values(scan_generation=scan_generation)
+                ).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return updated
+
+    def get_open_for_resources(
+        self, db: Session, *, account_id: Optional[str], provider: str, resource_ids: List[str], policy_ids: List[str],
+        chunk_size: int = 1000
+    ) -> List[AlertModel]:
+        """
+        Alertas OPEN de (conta, provider) gerados pelas políticas `policy_ids` para os recursos `resource_ids`,
+        consultando em blocos. Usado para devolver os alertas dos recursos que não foram reavaliados por estarem
+        inalterados.
+        """
+        if not resource_ids or not policy_ids:
+            return []
+        alerts: List[AlertModel] = []
+        for start in range(0, len(resource_ids), chunk_size):
+            alerts.extend(
+                db.query(self.model).filter(
+                    self.model.status == AlertStatus.OPEN,
+                    self.model.account_id == account_id,
+                    self.model.provider == provider,
+                    self.model.policy_id.in_(policy_ids),
+                    self.model.resource_id.in_(resource_ids[start:start + chunk_size]),
+                ).order_by(self.model.id).all()
+            )
+        return alerts
+
+    def resolve_unseen(
+        self, db: Session, *, account_id: str, provider: str, policy_ids: List[str], scan_generation: int
+    ) -> int:
+        """
+        Resolve, com um único UPDATE, os alertas OPEN de (conta, provider) gerados pelas políticas `policy_ids`
+        que a varredura completa `scan_generation` não confirmou (geração anterior ou nunca carimbados).
+        O resumo é ajustado na mesma transação a partir de uma agregação com o mesmo filtro.
+        """
+        if not policy_ids:
+            return 0
+        table = self.model.__table__
+        unseen = (
+            table.c.status == AlertStatus.OPEN,
+            table.c.account_id == account_id,
+            table.c.provider == provider,
+            table.c.policy_id.in_(policy_ids),
+            or_(table.c.scan_generation.is_(None), table.c.scan_generation < scan_generation),
+        )
+        try:
+            summary_deltas: Counter = Counter()
+            for severity, count in db.execute(
+                select(table.c.severity, func.count()).where(*unseen).group_by(table.c.severity)
+            ):
+                summary_deltas[_summary_key(account_id, provider, severity, AlertStatus.OPEN)] -= count
+                summary_deltas[_summary_key(account_id, provider, severity, AlertStatus.RESOLVED)] += count
+            resolved = db.execute(
+                update(table).where(*unseen).values(
+                    status=AlertStatus.RESOLVED, updated_at=datetime.datetime.now(datetime.timezone.utc)
+                )
+            ).rowcount
+            self._apply_summary_deltas(db, summary_deltas)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if resolved != sum(v for v in summary_deltas.values() if v > 0):
+            # Outra transação mudou alertas entre a agregação e o UPDATE; a reconciliação periódica corrige.
+            logger.warning("Resumo de alertas pode divergir após a resolução automática; será corrigido na reconciliação.")
+        return resolved
+
     def update_alert_status(
         self, db: Session, *, alert_id: int, status: AlertStatus, # Use AlertStatus enum
     ) -> Optional[AlertModel]:
         alert_db_obj = self.get_alert(db, alert_id)
         if alert_db_obj:
+            before = _summary_key(alert_db_obj.account_id, alert_db_obj.provider, alert_db_obj.severity, alert_db_obj.status)
             alert_db_obj.status = status
             # updated_at will be handled by the database onupdate trigger
             db.add(alert_db_obj)
+            deltas: Counter = Counter()
+            self._move_in_summary(deltas, before, _summary_key(alert_db_obj.account_id, alert_db_obj.provider, alert_db_obj.severity, status))
+            self._apply_summary_deltas(db, deltas)
             db.commit()
             db.refresh(alert_db_obj)
         return alert_db_obj
@@ -140,6 +579,7 @@ class CRUDAlert:
         if alert_db_obj:
             # For Pydantic V1, use .dict(). For V2, use .model_dump()
             update_data = alert_in.model_dump(exclude_unset=True) if hasattr(alert_in, 'model_dump') else alert_in.dict(exclude_unset=True)
+            before = _summary_key(alert_db_obj.account_id, alert_db_obj.provider, alert_db_obj.severity, alert_db_obj.status)
 
             for field, value in update_data.items():
                 if value is not None: # Ensure we don't overwrite with None if not intended
@@ -147,6 +587,11 @@ class CRUDAlert:
 
             # updated_at will be handled by the database's onupdate mechanism
             db.add(alert_db_obj)
+            deltas: Counter = Counter()
+            self._move_in_summary(
+                deltas, before, _summary_key(alert_db_obj.account_id, alert_db_obj.provider, alert_db_obj.severity, alert_db_obj.status)
+            )
+            self._apply_summary_deltas(db, deltas)
             db.commit()
             db.refresh(alert_db_obj)
         return alert_db_obj
@@ -156,91 +601,63 @@ class CRUDAlert:
         alert_obj = db.query(self.model).get(alert_id)
         if alert_obj:
             db.delete(alert_obj)
+            self._apply_summary_deltas(
+                db, {_summary_key(alert_obj.account_id, alert_obj.provider, alert_obj.severity, alert_obj.status): -1}
+            )
             db.commit()
         return alert_obj
 
     def get_summary(self, db: Session) -> dict:
         """
         Calcula um resumo dos alertas, como contagem por severidade e status.
+        Lê as contagens mantidas em alert_summary_counts: o custo é proporcional ao número de combinações
+        (conta, provider, severidade, status), não ao número de alertas.
         """
-        severity_counts = db.query(
-            self.model.severity, func.count(self.model.id)
-        ).group_by(self.model.severity).all()
+        summary_rows = db.query(
+            AlertSummaryCount.severity, AlertSummaryCount.status, AlertSummaryCount.count
+        ).filter(AlertSummaryCount.count != 0).all()
 
-        status_counts = db.query(
-            self.model.status, func.count(self.model.id)
-        ).group_by(self.model.status).all()
-
-        total_alerts = db.query(func.count(self.model.id)).scalar()
+        by_severity: Counter = Counter()
+        by_status: Counter = Counter()
+        for severity, status, count in summary_rows:
+            by_severity[severity] += count
+            by_status[status] += count
 
         summary = {
-            "total_alerts": total_alerts,
-            "by_severity": {str(severity.name): count for severity, count in severity_counts},
-            "by_status": {str(status.name): count for status, count in status_counts}
+            "total_alerts": sum(by_status.values()),
+            "by_severity": dict(by_severity),
+            "by_status": dict(by_status)
         }
         return summary
 
 alert_crud = CRUDAlert(AlertModel)
+async_alert_crud = AsyncCRUD(alert_crud)
 
-# Adicionar import para o cliente de notificação e AlertSeverity enum
 from app.services.notification_client import notification_client
-from app.models.alert_model import AlertSeverity as AlertSeverityDBEnum # Enum do modelo DB
-
-# Sobrescrever create_alert para incluir notificação
-_original_create_alert = alert_crud.create_alert
-
-async def create_alert_and_notify(db: Session, *, alert_in: AlertCreate) -> AlertModel:
-    created_alert_model = _original_create_alert(db=db, alert_in=alert_in)
-
-    # Verificar se o alerta criado (ou existente atualizado) é crítico
-    # A severidade em alert_in é AlertSeverityEnum (str enum de schemas.alert_schema)
-    # A severidade em created_alert_model é AlertSeverityDBEnum (enum de models.alert_model)
-
-    is_critical = False
-    if isinstance(created_alert_model.severity, str): # Se o enum do DB for armazenado como string
-        is_critical = created_alert_model.severity == AlertSeverityDBEnum.CRITICAL.value
-    elif isinstance(created_alert_model.severity, AlertSeverityDBEnum): # Se for o objeto enum
-        is_critical = created_alert_model.severity == AlertSeverityDBEnum.CRITICAL
-
-    if is_critical:
-        # Precisamos converter AlertModel (SQLAlchemy) para AlertSchema (Pydantic) para o cliente de notificação
-        # ou garantir que o cliente de notificação possa lidar com o modelo do DB diretamente
-        # ou, mais simples, o cliente de notificação espera um AlertDataPayload, que é um subconjunto de AlertSchema.
-        # Vamos converter o created_alert_model para AlertSchema.
-        alert_schema_for_notification = AlertSchema.from_orm(created_alert_model)
-
-        # Idealmente, a chamada de notificação não deve bloquear e deve ser feita em background.
-        # No entanto, notification_client.send_critical_alert_notification é async.
-        # Se create_alert_and_notify for chamado de um endpoint async, podemos fazer `await`.
-        # Se for de um sync, precisaríamos de `asyncio.create_task` ou similar,
-        # ou mover a lógica de notificação para o endpoint do controller que é async.
-        # Por agora, assumindo que este CRUD pode ser chamado de um contexto que permite await.
-        # Se não, a notificação deve ser movida para o controller.
-
-        # Para MVP, a chamada será feita aqui. Se bloquear, precisará ser refatorada.
-        # O controller de análise é async, então ele pode chamar este CRUD com await.
-        # E o notification_client.send_critical_alert_notification é async.
-
-        import asyncio # Adicionado para create_task
-        # Disparar a notificação sem esperar pela conclusão para não atrasar a resposta principal.
-        # Isso é um "fire-and-forget". Erros serão logados pelo notification_client.
-
-        # Notificação por Email
-        asyncio.create_task(notification_client.send_critical_alert_notification(alert_schema_for_notification))
-
-        # Notificação por Webhook (chamada se configurado e habilitado)
-        # A URL do webhook específica pode vir de uma configuração de política/alerta no futuro.
-        # Por agora, se chamado, usará a URL default do notification_service.
-        asyncio.create_task(notification_client.send_critical_alert_webhook_notification(alert_schema_for_notification))
-
-        # Notificação por Google Chat (chamada se configurado e habilitado)
-        asyncio.create_task(notification_client.send_critical_alert_google_chat_notification(alert_schema_for_notification))
-
-
-    # Disparar a verificação de regras de notificação
-    asyncio.create_task(notification_client.trigger_notifications_for_alert(alert_schema_for_notification))
-
+from app.services.notification_dispatcher import notification_dispatcher
+
+async def create_alert_and_notify(db: AsyncSession, *, alert_in: AlertCreate) -> AlertModel:
+    """
+    Cria (ou atualiza o last_seen_at de) um alerta com CRUDAlert.create_alert, gravando a notificação no
+    notification_outbox na mesma transação, e acorda o dispatcher para entregá-la.
+    """
+    enqueue = bool(notification_client.base_url)
+    created_alert_model = await async_alert_crud.create_alert(db, alert_in=alert_in, enqueue_notifications=enqueue)
+    if enqueue:
+        notification_dispatcher.wake()
     return created_alert_model
 
-# Substituir o método no objeto crud
-alert_crud.create_alert = create_alert_and_notify
+async def bulk_ingest_alerts_and_notify(
+    db: AsyncSession, *, alerts_in: Sequence[AlertCreate], batch_size: int = 500, scan_generation: Optional[int] = None
+) -> List[AlertSchema]:
+    """
+    Persiste os alertas com CRUDAlert.bulk_ingest_alerts, com as notificações no notification_outbox na mesma
+    transação, e acorda o dispatcher, que as entrega em lotes ao notification_service.
+    """
+    enqueue = bool(notification_client.base_url)
+    persisted_rows = await async_alert_crud.bulk_ingest_alerts(
+        db, alerts_in=alerts_in, batch_size=batch_size, scan_generation=scan_generation, enqueue_notifications=enqueue
+    )
+    if enqueue and persisted_rows:
+        notification_dispatcher.wake()
+    return [AlertSchema.from_orm(row) for row in persisted_rows]
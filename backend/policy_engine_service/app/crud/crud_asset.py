@@ -1,8 +1,11 @@
+from sqlalchemy import bindparam, func, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 
 from app.models.asset_model import CloudAsset, CloudProviderEnum
 from app.schemas.asset_schema import AssetCreate
+from app.crud.async_crud import AsyncCRUD
 
 class CRUDAsset:
     def get(self, db: Session, id: int) -> Optional[CloudAsset]:
@@ -11,6 +14,79 @@ class CRUDAsset:
     def get_by_asset_id(self, db: Session, *, account_id: str, asset_id: str) -> Optional[CloudAsset]:
         return db.query(CloudAsset).filter(CloudAsset.account_id == account_id, CloudAsset.asset_id == asset_id).first()
 
+    def get_ids_by_asset_ids(
+        self, db: Session, *, account_id: str, asset_ids: List[str], chunk_size: int = 1000
+    ) -> Dict[str, int]:
+        """Mapeia asset_id -> id (chave primária) para os ativos de uma conta, consultando em blocos."""
+        ids: Dict[str, int] = {}
+        for start in range(0, len(asset_ids), chunk_size):
+            chunk = asset_ids[start:start + chunk_size]
+            rows = db.query(CloudAsset.asset_id, CloudAsset.id).filter(
+                CloudAsset.account_id == account_id, CloudAsset.asset_id.in_(chunk)
+            )
+            ids.update({asset_id: pk for asset_id, pk in rows})
+        return ids
+
+    def get_content_hashes(
+        self, db: Session, *, account_id: str, asset_ids: List[str], chunk_size: int = 1000
+    ) -> Dict[str, Tuple[int, Optional[str]]]:
+        """Mapeia asset_id -> (id, content_hash) para os ativos de uma conta, consultando em blocos."""
+        hashes: Dict[str, Tuple[int, Optional[str]]] = {}
+        for start in range(0, len(asset_ids), chunk_size):
+            chunk = asset_ids[start:start + chunk_size]
+            rows = db.query(CloudAsset.asset_id, CloudAsset.id, CloudAsset.content_hash).filter(
+                CloudAsset.account_id == account_id, CloudAsset.asset_id.in_(chunk)
+            )
+            hashes.update({asset_id: (pk, content_hash) for asset_id, pk, content_hash in rows})
+        return hashes
+
+    def set_content_hashes(
+        self, db: Session, *, account_id: str, hashes: Dict[str, str], chunk_size: int = 1000
+    ) -> int:
+        """
+        Grava o content_hash dos ativos já salvos (asset_id -> hash), com um UPDATE executemany por bloco
+        numa única transação. Chamado depois que os alertas da avaliação foram persistidos.
+        """
+        items = list(hashes.items())
+        table = CloudAsset.__table__
+        stmt = (
+            update(table)
+            .where(table.c.account_id == bindparam("b_account_id"), table.c.asset_id == bindparam("b_asset_id"))
+            .values(content_hash=bindparam("b_content_hash"))
+        )
+        updated = 0
+        try:
+            for start in range(0, len(items), chunk_size):
+                updated += db.execute(stmt, [
+                    {"b_account_id": account_id, "b_asset_id": asset_id, "b_content_hash": value}
+                    for asset_id, value in items[start:start + chunk_size]
+                ]).rowcount
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return updated
+
+    def touch_last_seen(self, db: Session, *, ids: List[int], chunk_size: int = 1000, scan_generation: Optional[int] = None) -> int:
+        """
+        Atualiza last_seen_at dos ativos inalterados com um UPDATE por bloco, numa única transação.
+        Com `scan_generation`, os ativos também são carimbados com a varredura atual e deixam de ser obsoletos.
+        """
+        values: Dict[Any, Any] = {CloudAsset.last_seen_at: func.now()}
+        if scan_generation is not None:
+            values.update({CloudAsset.scan_generation: scan_generation, CloudAsset.is_stale: False})
+        updated = 0
+        try:
+            for start in range(0, len(ids), chunk_size):
+                updated += db.query(CloudAsset).filter(CloudAsset.id.in_(ids[start:start + chunk_size])).update(
+                    values, synchronize_session=False
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return updated
+
     def get_multi(
         self, db: Session, *, skip: int = 0, limit: int = 100,
         provider: Optional[CloudProviderEnum] = None,
@@ -31,7 +107,9 @@ class CRUDAsset:
 
         if db_obj:
             # Atualiza o objeto existente
+            db_obj.asset_type = obj_in.asset_type
             db_obj.name = obj_in.name
+            db_obj.region = obj_in.region
             db_obj.configuration = obj_in.configuration
             # last_seen_at será atualizado pelo onupdate
         else:
@@ -51,4 +129,98 @@ class CRUDAsset:
         db.refresh(db_obj)
         return db_obj
 
+    def bulk_upsert(
+        self, db: Session, *, objs_in: Iterable[Dict[str, Any]], chunk_size: int = 1000, update_existing: bool = True
+    ) -> int:
+        """
+        Insere ou atualiza ativos em lote com INSERT ... ON CONFLICT (account_id, asset_id) DO UPDATE.
+
+        Cada item de `objs_in` é um dict com os campos de AssetCreate. Um statement é executado
+        por bloco de `chunk_size` linhas e todos os blocos são confirmados numa única transação.
+        Com `update_existing=False` usa DO NOTHING: só cria os ativos que ainda não existem
+        (ex.: ativos referenciados por relacionamentos antes de serem coletados).
+        Retorna o número de ativos distintos enviados ao banco.
+        """
+        # O Postgres rejeita um INSERT ... ON CONFLICT que afete a mesma linha duas vezes,
+        # então as duplicatas do payload são resolvidas em memória (a última ocorrência vence).
+        unique_rows: Dict[tuple, Dict[str, Any]] = {}
+        for obj in objs_in:
+            unique_rows[(obj["account_id"], obj["asset_id"])] = obj
+        rows = list(unique_rows.values())
+        if not rows:
+            return 0
+
+        dialect_insert = sqlite.insert if db.bind.dialect.name == "sqlite" else postgresql.insert
+        try:
+            for start in range(0, len(rows), chunk_size):
+                chunk = [
+                    {
+                        "asset_id": row["asset_id"],
+                        "asset_type": row["asset_type"],
+                        "name": row.get("name"),
+                        "provider": CloudProviderEnum(row["provider"]),
+                        "account_id": row["account_id"],
+                        "region": row.get("region"),
+                        "configuration": row.get("configuration"),
+                        "content_hash": row.get("content_hash"),
+                        "scan_generation": row.get("scan_generation"),
+                        "is_stale": False,
+                        "last_seen_at": func.now(),
+                    }
+                    for row in rows[start:start + chunk_size]
+                ]
+                stmt = dialect_insert(CloudAsset).values(chunk)
+                if not update_existing:
+                    db.execute(stmt.on_conflict_do_nothing(index_elements=[CloudAsset.account_id, CloudAsset.asset_id]))
+                    continue
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[CloudAsset.account_id, CloudAsset.asset_id],
+                    set_={
+                        "asset_type": stmt.excluded.asset_type,
+                        "name": stmt.excluded.name,
+                        "region": stmt.excluded.region,
+                        "configuration": stmt.excluded.configuration,
+                        "content_hash": stmt.excluded.content_hash,
+                        # Upserts fora de uma varredura (ex.: ativos derivados) não apagam a geração gravada.
+                        "scan_generation": func.coalesce(stmt.excluded.scan_generation, CloudAsset.scan_generation),
+                        "is_stale": False,
+                        "last_seen_at": func.now(),
+                    },
+                )
+                db.execute(stmt)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(rows)
+
+    def mark_stale_unseen(
+        self, db: Session, *, account_id: str, provider: str, asset_type: str, scan_generation: int,
+        chunk_size: int = 1000,
+    ) -> List[int]:
+        """
+        Marca como obsoletos os ativos de (conta, provider, tipo) que não apareceram na varredura completa
+        `scan_generation` (carimbados com uma geração anterior ou nunca carimbados) e retorna os ids marcados,
+        para que o grafo de caminhos de ataque deixe de considerá-los. Os ids são lidos com um SELECT e
+        atualizados com um UPDATE por bloco de `chunk_size`.
+        """
+        try:
+            stale_ids = [row.id for row in db.query(CloudAsset.id).filter(
+                CloudAsset.account_id == account_id,
+                CloudAsset.provider == CloudProviderEnum(provider),
+                CloudAsset.asset_type == asset_type,
+                CloudAsset.is_stale.is_(False),
+                or_(CloudAsset.scan_generation.is_(None), CloudAsset.scan_generation < scan_generation),
+            )]
+            for start in range(0, len(stale_ids), chunk_size):
+                db.query(CloudAsset).filter(CloudAsset.id.in_(stale_ids[start:start + chunk_size])).update(
+                    {CloudAsset.is_stale: True}, synchronize_session=False
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return stale_ids
+
 asset_crud = CRUDAsset()
+async_asset_crud = AsyncCRUD(asset_crud)
@@ -0,0 +1,59 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from typing import List, Iterable, Iterator, Tuple
+
+from app.models.asset_model import AssetRelationship
+
+# Aresta como tuplas de ids: (source_asset_id, target_asset_id, relationship_type).
+Edge = Tuple[int, int, str]
+
+
+class CRUDAssetRelationship:
+    def get_by_source(self, db: Session, *, source_asset_id: int) -> List[AssetRelationship]:
+        return db.query(AssetRelationship).filter(AssetRelationship.source_asset_id == source_asset_id).all()
+
+    def iter_edges(self, db: Session, *, batch_size: int = 5000) -> Iterator[Edge]:
+        """Percorre todas as arestas lendo apenas os ids e o tipo, em lotes."""
+        query = db.query(
+            AssetRelationship.source_asset_id, AssetRelationship.target_asset_id, AssetRelationship.relationship_type,
+        ).order_by(AssetRelationship.id).yield_per(batch_size)
+        for source_id, target_id, relationship_type in query:
+            yield source_id, target_id, relationship_type
+
+    def replace_for_sources(
+        self, db: Session, *, source_ids: Iterable[int], edges: Iterable[Edge], chunk_size: int = 1000
+    ) -> int:
+        """
+        Substitui as arestas de saída de `source_ids` pelas arestas informadas, numa única transação.
+
+        As arestas antigas são removidas com um DELETE por bloco de origens e as novas inseridas com
+        INSERT ... ON CONFLICT DO NOTHING em blocos de `chunk_size`. Retorna o número de arestas distintas.
+        """
+        source_set = set(source_ids)
+        sources = sorted(source_set)
+        # Arestas de origens fora de `source_ids` seriam acrescentadas sem remover as antigas; são ignoradas.
+        unique_edges = sorted({edge for edge in edges if edge[0] in source_set})
+        dialect_insert = sqlite.insert if db.bind.dialect.name == "sqlite" else postgresql.insert
+        try:
+            for start in range(0, len(sources), chunk_size):
+                db.query(AssetRelationship).filter(
+                    AssetRelationship.source_asset_id.in_(sources[start:start + chunk_size])
+                ).delete(synchronize_session=False)
+            for start in range(0, len(unique_edges), chunk_size):
+                stmt = dialect_insert(AssetRelationship).values([
+                    {"source_asset_id": s, "target_asset_id": t, "relationship_type": r}
+                    for s, t, r in unique_edges[start:start + chunk_size]
+                ])
+                db.execute(stmt.on_conflict_do_nothing(
+                    index_elements=[
+                        AssetRelationship.source_asset_id, AssetRelationship.target_asset_id, AssetRelationship.relationship_type,
+                    ]
+                ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(unique_edges)
+
+
+asset_relationship_crud = CRUDAssetRelationship()
@@ -3,6 +3,7 @@ from typing import List, Optional
 
 from app.models.attack_path_model import AttackPath
 from app.schemas.attack_path_schema import AttackPathCreate
+from app.crud.async_crud import AsyncCRUD
 
 class CRUDAttackPath:
     def get_by_path_id(self, db: Session, *, path_id: str) -> Optional[AttackPath]:
@@ -32,3 +33,4 @@ class CRUDAttackPath:
         return db_obj
 
 attack_path_crud = CRUDAttackPath()
+async_attack_path_crud = AsyncCRUD(attack_path_crud)
@@ -0,0 +1,124 @@
+import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.crud.async_crud import AsyncCRUD
+from app.models.alert_model import AlertModel, NotificationOutbox
+from app.schemas.alert_schema import AlertSchema
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class CRUDNotificationOutbox:
+    """
+    Fila transacional de notificações de alertas. `enqueue` não faz commit: é chamado pelo CRUDAlert dentro
+    da transação que persiste os alertas, então uma notificação existe se e somente se o alerta foi gravado.
+    """
+
+    table = NotificationOutbox.__table__
+
+    def enqueue(self, db: Session, alert_ids: Sequence[int], now: Optional[datetime.datetime] = None) -> int:
+        """Agenda uma notificação por alerta com um único INSERT multi-linha, sem commit."""
+        if not alert_ids:
+            return 0
+        now = now or _utcnow()
+        db.execute(insert(self.table), [{"alert_id": alert_id, "next_attempt_at": now, "attempts": 0} for alert_id in alert_ids])
+        return len(alert_ids)
+
+    def claim(
+        self, db: Session, *, limit: int, lease_seconds: float, now: Optional[datetime.datetime] = None
+    ) -> List[Tuple[int, Optional[AlertSchema]]]:
+        """
+        Reserva até `limit` notificações vencidas, na ordem de criação, e retorna (id da linha, alerta atual).
+        A reserva adia next_attempt_at por `lease_seconds` e conta a tentativa, então outro dispatcher não pega
+        as mesmas linhas e um processo que morrer no meio do envio as devolve à fila quando o prazo vencer.
+        No PostgreSQL as linhas são selecionadas com FOR UPDATE SKIP LOCKED. O alerta é None se foi removido.
+        """
+        now = now or _utcnow()
+        rows = db.execute(
+            select(self.table.c.id, self.table.c.alert_id)
+            .where(self.table.c.next_attempt_at <= now)
+            .order_by(self.table.c.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            db.commit()
+            return []
+
+        db.execute(
+            update(self.table)
+            .where(self.table.c.id.in_([row.id for row in rows]))
+            .values(next_attempt_at=now + datetime.timedelta(seconds=lease_seconds), attempts=self.table.c.attempts + 1)
+        )
+        alerts_table = AlertModel.__table__
+        alerts = {
+            alert.id: AlertSchema.from_orm(alert)
+            for alert in db.execute(select(alerts_table).where(alerts_table.c.id.in_({row.alert_id for row in rows})))
+        }
+        db.commit()
+        return [(row.id, alerts.get(row.alert_id)) for row in rows]
+
+    def mark_delivered(self, db: Session, ids: Sequence[int]) -> int:
+        if not ids:
+            return 0
+        deleted = db.execute(delete(self.table).where(self.table.c.id.in_(ids))).rowcount
+        db.commit()
+        return deleted
+
+    def mark_failed(
+        self,
+        db: Session,
+        ids: Sequence[int],
+        *,
+        error: str,
+        max_attempts: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+        now: Optional[datetime.datetime] = None,
+    ) -> int:
+        """
+        Reagenda as linhas com backoff exponencial pelo número de tentativas (base * 2^(tentativas-1), até o
+        máximo). As que chegaram a `max_attempts` ficam com next_attempt_at nulo e saem da fila. Retorna quantas
+        foram abandonadas.
+        """
+        if not ids:
+            return 0
+        now = now or _utcnow()
+        attempts = db.execute(select(self.table.c.id, self.table.c.attempts).where(self.table.c.id.in_(ids))).all()
+        values = []
+        abandoned = 0
+        for row in attempts:
+            if row.attempts >= max_attempts:
+                next_attempt_at = None
+                abandoned += 1
+            else:
+                delay = min(retry_base_seconds * (2 ** max(row.attempts - 1, 0)), retry_max_seconds)
+                next_attempt_at = now + datetime.timedelta(seconds=delay)
+            values.append({"_id": row.id, "_next_attempt_at": next_attempt_at})
+        if values:
+            db.execute(
+                update(self.table)
+                .where(self.table.c.id == bindparam("_id"))
+                .values(next_attempt_at=bindparam("_next_attempt_at"), last_error=error[:1000]),
+                values,
+            )
+        db.commit()
+        return abandoned
+
+    def counts(self, db: Session) -> Dict[str, int]:
+        """Linhas na fila (inclusive reservadas) e linhas abandonadas após esgotar as tentativas."""
+        pending, abandoned = db.execute(
+            select(
+                func.count(self.table.c.next_attempt_at),
+                func.count(self.table.c.id) - func.count(self.table.c.next_attempt_at),
+            )
+        ).one()
+        return {"pending": pending, "abandoned": abandoned}
+
+notification_outbox_crud = CRUDNotificationOutbox()
+async_notification_outbox_crud = AsyncCRUD(notification_outbox_crud)
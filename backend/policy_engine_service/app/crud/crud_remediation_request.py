@@ -3,6 +3,7 @@ from typing import List, Optional
 
 from app.models.remediation_request_model import RemediationRequest, RemediationStatusEnum
 from app.schemas.remediation_request_schema import RemediationRequestCreate
+from app.crud.async_crud import AsyncCRUD
 
 class CRUDRemediationRequest:
     def get(self, db: Session, id: int) -> Optional[RemediationRequest]:
@@ -32,3 +33,4 @@ class CRUDRemediationRequest:
         return db_obj
 
 remediation_request_crud = CRUDRemediationRequest()
+async_remediation_request_crud = AsyncCRUD(remediation_request_crud)
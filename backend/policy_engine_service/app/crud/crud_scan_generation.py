@@ -0,0 +1,36 @@
+import datetime
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.models.scan_generation_model import ScanGeneration
+from app.crud.async_crud import AsyncCRUD
+
+class CRUDScanGeneration:
+    def get(self, db: Session, id: int) -> Optional[ScanGeneration]:
+        return db.query(ScanGeneration).filter(ScanGeneration.id == id).first()
+
+    def begin(self, db: Session, *, account_id: str, provider: str, service: str) -> int:
+        """Registra o início de uma varredura e retorna o id da sua geração."""
+        db_obj = ScanGeneration(account_id=account_id, provider=provider, service=service)
+        db.add(db_obj)
+        db.commit()
+        return db_obj.id
+
+    def complete(self, db: Session, *, id: int, resolved_alerts: int, stale_assets: int) -> None:
+        db.query(ScanGeneration).filter(ScanGeneration.id == id).update(
+            {
+                ScanGeneration.completed_at: datetime.datetime.now(datetime.timezone.utc),
+                ScanGeneration.resolved_alerts: resolved_alerts,
+                ScanGeneration.stale_assets: stale_assets,
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+
+    def discard(self, db: Session, *, id: int) -> None:
+        """Remove uma geração que não será concluída; os carimbos dela valem como de uma geração anterior."""
+        db.query(ScanGeneration).filter(ScanGeneration.id == id).delete(synchronize_session=False)
+        db.commit()
+
+scan_generation_crud = CRUDScanGeneration()
+async_scan_generation_crud = AsyncCRUD(scan_generation_crud)
@@ -0,0 +1,45 @@
+import time
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.metrics import get_or_create_metric
+
+
+# Rótulo "engine": "sync" (threads de background) ou "async" (requisições e análises).
+DB_POOL_WAIT_SECONDS = get_or_create_metric(
+    Histogram,
+    "policy_engine_db_pool_wait_seconds",
+    "Tempo para obter uma conexão do pool: espera na fila, abertura de conexão nova e pre-ping.",
+    labelnames=["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+DB_POOL_TIMEOUTS = get_or_create_metric(
+    Counter, "policy_engine_db_pool_timeouts_total", "Checkouts que esgotaram DB_POOL_TIMEOUT_SECONDS sem conexão livre.",
+    labelnames=["engine"],
+)
+
+
+class _PoolWaitTimer:
+    """Mede cada checkout do pool. Um valor alto indica que pool_size + max_overflow é pequeno para a carga."""
+
+    metric_engine = "sync"
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.labels(self.metric_engine).inc()
+            raise
+        finally:
+            DB_POOL_WAIT_SECONDS.labels(self.metric_engine).observe(time.perf_counter() - start)
+
+
+class TimedQueuePool(_PoolWaitTimer, QueuePool):
+    metric_engine = "sync"
+
+
+class TimedAsyncAdaptedQueuePool(_PoolWaitTimer, AsyncAdaptedQueuePool):
+    metric_engine = "async"
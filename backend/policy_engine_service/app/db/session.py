@@ -1,13 +1,54 @@
+from typing import Any, AsyncIterator, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.core.config import settings # Importar as settings atualizadas onde ASSEMBLED_DATABASE_URL é definida
+from app.core.config import settings
+from app.db.pool_metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool
+
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+
+# Driver assíncrono de cada backend: asyncpg para o PostgreSQL, aiosqlite para os testes.
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def async_database_url(url: str) -> URL:
+    """A mesma URL com o driver assíncrono (ex.: postgresql:// ou postgresql+psycopg2:// -> postgresql+asyncpg://)."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return parsed
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}")
+
 
-# Usar a URL montada ou diretamente fornecida a partir das settings
-SQLALCHEMY_DATABASE_URL = settings.ASSEMBLED_DATABASE_URL
+def _pool_options(url: URL, poolclass: Any) -> Dict[str, Any]:
+    # O SQLite usa os pools próprios do dialeto (um banco em memória só existe dentro da sua conexão).
+    if url.get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+
+# Engine síncrona: threads de background (reconciliação do resumo, caminhos de ataque) e Alembic.
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, **_pool_options(make_url(SQLALCHEMY_DATABASE_URL), TimedQueuePool)
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine assíncrona: requisições e análises, que assim não bloqueiam o event loop esperando o banco.
+_async_url = async_database_url(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(_async_url, pool_pre_ping=True, **_pool_options(_async_url, TimedAsyncAdaptedQueuePool))
+# expire_on_commit=False: os objetos retornados continuam legíveis depois do commit sem novo I/O implícito,
+# que numa AsyncSession levantaria MissingGreenlet.
+AsyncSessionLocal = sessionmaker(
+    async_engine, class_=AsyncSession, autocommit=False, autoflush=False, expire_on_commit=False
+)
+
 # A função create_policy_engine_tables ainda é útil para inicialização/migrações
 # e precisa ser mantida ou adaptada para Alembic.
 
@@ -17,3 +58,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any
 from ..schemas.input_data_schema import EC2InstanceDataInput, EC2SecurityGroupDataInput, EC2IpPermission
 from ..schemas.alert_schema import Alert, AlertSeverityEnum
+from .policy_metrics import PolicyMetricsRecorder
 import logging
 import uuid
 
@@ -315,13 +316,14 @@ def evaluate_ec2_sg_policies(security_groups_data: List[EC2SecurityGroupDataInpu
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(security_groups_data)} Security Groups na região {region} para a conta {account_id or 'N/A'}.")
 
+    recorder = PolicyMetricsRecorder()
     for sg in security_groups_data:
         # sg.error_details não está no schema EC2SecurityGroupDataInput, mas poderia ser adicionado se o collector o provesse.
         # Assumindo que SGs com erro de coleta não chegam aqui ou são filtrados antes.
 
         for policy in ec2_sg_policies_to_evaluate:
             try:
-                alert = policy.check(sg, account_id, region) # Passa a região do grupo de SGs
+                alert = recorder.check(policy, sg, account_id, region) # Passa a região do grupo de SGs
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
@@ -334,12 +336,14 @@ def evaluate_ec2_sg_policies(security_groups_data: List[EC2SecurityGroupDataInpu
                     policy_id="POLICY_ENGINE_ERROR", details={"failed_policy_id": policy.policy_id, "sg_id": sg.group_id},
                     recommendation="Verifique os logs do Policy Engine."
                 ))
+    recorder.flush()
     return all_alerts
 
 def evaluate_ec2_instance_policies(instances_data: List[EC2InstanceDataInput], account_id: Optional[str]) -> List[Alert]:
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(instances_data)} instâncias EC2 para a conta {account_id or 'N/A'}.")
 
+    recorder = PolicyMetricsRecorder()
     for instance in instances_data:
         if instance.error_details:
             logger.warning(f"Skipping instance {instance.instance_id} due to previous collection error: {instance.error_details}")
@@ -351,7 +355,7 @@ def evaluate_ec2_instance_policies(instances_data: List[EC2InstanceDataInput], a
         for policy in ec2_instance_policies_to_evaluate:
             try:
                 # A política de instância pode usar instance.region diretamente.
-                alert = policy.check(instance, account_id, instance_region)
+                alert = recorder.check(policy, instance, account_id, instance_region)
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
@@ -364,4 +368,5 @@ def evaluate_ec2_instance_policies(instances_data: List[EC2InstanceDataInput], a
                     policy_id="POLICY_ENGINE_ERROR", details={"failed_policy_id": policy.policy_id, "instance_id": instance.instance_id},
                     recommendation="Verifique os logs do Policy Engine."
                 ))
+    recorder.flush()
     return all_alerts
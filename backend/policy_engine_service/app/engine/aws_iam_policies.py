@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any
-from ..schemas.input_data_schema import IAMUserDataInput, IAMUserAccessKeyMetadataInput
+from ..schemas.input_data_schema import IAMUserDataInput, IAMUserAccessKeyMetadataInput, IAMRoleDataInput
 from ..schemas.alert_schema import Alert, AlertSeverityEnum
+from .policy_metrics import PolicyMetricsRecorder
 import logging
 import uuid
 from datetime import datetime, timezone
@@ -313,68 +314,94 @@ class IAMRootAccountMFAPolicy(IAMPolicy):
                 )
         return None
 
-import json
 from datetime import datetime, timezone, timedelta
+from .iam_policy_matcher import is_action_allowed, principal_policy_documents
 
 iam_user_policies_to_evaluate.append(IAMRootAccountMFAPolicy())
 
+def check_root_mfa_enabled(users_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Verifica se o MFA está habilitado para o usuário root, a partir do sumário da conta.
+    CIS-AWS-1.1
+    """
+    alerts = []
+    for user in users_data:
+        summary = user.get("account_summary")
+        if not summary:
+            continue
+        # O get_account_summary retorna 1 se MFA está habilitado, 0 se não.
+        if summary.get("AccountMFAEnabled", 0) == 0:
+            alerts.append({
+                "resource_id": "root",
+                "resource_type": "IAMRootAccount",
+                "region": "global",
+                "status": "FAIL",
+                "details": "O MFA não está habilitado para o usuário root da conta."
+            })
+        # O sumário é o mesmo para todos os usuários da conta; basta avaliá-lo uma vez.
+        break
+    return alerts
+
+# Ações que caracterizam escrita em S3 para o caminho de ataque; s3:*, s3:Put*, * e NotAction são resolvidos pelo matcher.
+S3_WRITE_ACTIONS = ("s3:PutObject",)
+STALE_ACCESS_KEY_DAYS = 90
+
+
+def _key_field(key: Dict[str, Any], collector_name: str, schema_name: str) -> Any:
+    # Aceita tanto o formato do collector (CamelCase) quanto o do schema serializado (snake_case).
+    value = key.get(collector_name)
+    return key.get(schema_name) if value is None else value
+
+
+def _as_datetime(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value if isinstance(value, datetime) else None
+
+
 def check_stale_key_s3_write_access(users_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Verifica se um usuário tem uma chave de acesso antiga (>90 dias) e permissão de escrita em S3.
     ATTACK-PATH-IAM-S3-1
+    Os documentos de política são compilados uma vez por conteúdo (policy_document_cache) e compartilhados
+    entre todos os usuários que os usam.
     """
     alerts = []
-    ninety_days_ago = datetime.now(timezone.utc) - timedelta(days=90)
+    stale_before = datetime.now(timezone.utc) - timedelta(days=STALE_ACCESS_KEY_DAYS)
 
     for user in users_data:
         if not user.get("access_keys"):
             continue
 
         stale_keys = []
-        for key in user.get("access_keys", []):
-            if key.get("Status") == "Active":
-                last_used_str = key.get("LastUsedDate")
-                create_date_str = key.get("CreateDate")
-
-                last_used = datetime.fromisoformat(last_used_str) if last_used_str else None
-                create_date = datetime.fromisoformat(create_date_str) if create_date_str else None
-
-                # Considera a chave antiga se nunca foi usada e foi criada há mais de 90 dias,
-                # ou se foi usada pela última vez há mais de 90 dias.
-                is_stale = (last_used is None and create_date and create_date < ninety_days_ago) or \
-                           (last_used and last_used < ninety_days_ago)
-
-                if is_stale:
-                    stale_keys.append(key.get("AccessKeyId"))
-
-        if stale_keys:
-            # A chave está antiga. Agora, verifique as permissões de escrita em S3.
-            # Esta é uma verificação simplificada. Uma real precisaria de um resolvedor de políticas complexo.
-            has_s3_write = False
-            for policy in user.get("attached_policies", []) + user.get("inline_policies", []):
-                policy_doc_str = policy.get("policy_document", "{}")
-                policy_doc = json.loads(policy_doc_str) if isinstance(policy_doc_str, str) else policy_doc_str
-
-                for stmt in policy_doc.get("Statement", []):
-                    if stmt.get("Effect") == "Allow":
-                        actions = stmt.get("Action", [])
-                        if isinstance(actions, str) and ("s3:PutObject" in actions or "s3:*" in actions):
-                            has_s3_write = True
-                            break
-                        elif isinstance(actions, list) and any("s3:PutObject" in a or "s3:*" in a for a in actions):
-                            has_s3_write = True
-                            break
-                if has_s3_write:
-                    break
-
-            if has_s3_write:
-                alerts.append({
-                    "resource_id": user.get("arn"),
-                    "resource_type": "IAMUser",
-                    "region": "global",
-                    "status": "FAIL",
-                    "details": f"O usuário '{user.get('user_name')}' tem chaves de acesso antigas ({', '.join(stale_keys)}) e permissões de escrita em S3."
-                })
+        for key in user["access_keys"]:
+            if _key_field(key, "Status", "status") != "Active":
+                continue
+            last_used = _as_datetime(_key_field(key, "LastUsedDate", "last_used_date"))
+            create_date = _as_datetime(_key_field(key, "CreateDate", "create_date"))
+
+            # Considera a chave antiga se nunca foi usada e foi criada há mais de 90 dias,
+            # ou se foi usada pela última vez há mais de 90 dias.
+            is_stale = (last_used is None and create_date is not None and create_date < stale_before) or \
+                       (last_used is not None and last_used < stale_before)
+            if is_stale:
+                stale_keys.append(_key_field(key, "AccessKeyId", "access_key_id"))
+
+        if not stale_keys:
+            continue
+        documents = principal_policy_documents(user)
+        if any(is_action_allowed(documents, action) for action in S3_WRITE_ACTIONS):
+            alerts.append({
+                "resource_id": user.get("arn"),
+                "resource_type": "IAMUser",
+                "region": "global",
+                "status": "FAIL",
+                "details": f"O usuário '{user.get('user_name')}' tem chaves de acesso antigas ({', '.join(stale_keys)}) e permissões de escrita em S3."
+            })
 
     return alerts
 
@@ -385,6 +412,7 @@ def evaluate_iam_user_policies(users_data: List[IAMUserDataInput], account_id: O
     if not users_data: return all_alerts_data
     logger.info(f"Avaliando {len(users_data)} usuários IAM para a conta {account_id or 'N/A'}.")
 
+    recorder = PolicyMetricsRecorder()
     for user in users_data:
         if user.error_details:
             logger.warning(f"Skipping IAM user {user.user_name} due to previous collection error: {user.error_details}")
@@ -402,7 +430,7 @@ def evaluate_iam_user_policies(users_data: List[IAMUserDataInput], account_id: O
         for policy in iam_user_policies_to_evaluate:
             try:
                 # O método check pode retornar um único Alert ou uma Lista de Alerts
-                result = policy.check(user, account_id)
+                result = recorder.check(policy, user, account_id)
                 if result:
                     if isinstance(result, list):
                         for alert_obj in result:
@@ -423,6 +451,7 @@ def evaluate_iam_user_policies(users_data: List[IAMUserDataInput], account_id: O
                 ).model_dump()) # Pydantic V2
 
     logger.info(f"Avaliação de Usuários IAM concluída. {len(all_alerts_data)} alertas gerados.")
+    recorder.flush()
     return all_alerts_data
 
 # Funções para evaluate_iam_role_policies e evaluate_iam_managed_policy_policies serão adicionadas aqui
@@ -431,6 +460,7 @@ def evaluate_iam_role_policies(roles_data: List[IAMRoleDataInput], account_id: O
     if not roles_data: return all_alerts_data
     logger.info(f"Avaliando {len(roles_data)} roles IAM para a conta {account_id or 'N/A'}.")
 
+    recorder = PolicyMetricsRecorder()
     for role_item in roles_data: # Renomeado para role_item para evitar conflito com o módulo role
         if role_item.error_details:
             logger.warning(f"Skipping IAM role {role_item.role_name} due to collection error: {role_item.error_details}")
@@ -445,7 +475,7 @@ def evaluate_iam_role_policies(roles_data: List[IAMRoleDataInput], account_id: O
             continue
         for policy in iam_role_policies_to_evaluate:
             try:
-                result = policy.check(role_item, account_id)
+                result = recorder.check(policy, role_item, account_id)
                 if result:
                     if isinstance(result, list):
                          for alert_obj in result: all_alerts_data.append(alert_obj.model_dump())
@@ -462,6 +492,7 @@ def evaluate_iam_role_policies(roles_data: List[IAMRoleDataInput], account_id: O
                     recommendation="Verifique os logs do Policy Engine."
                 ).model_dump())
     logger.info(f"Avaliação de Roles IAM concluída. {len(all_alerts_data)} alertas gerados.")
+    recorder.flush()
     return all_alerts_data
 
 # def evaluate_iam_managed_policy_policies(policies_data: List[IAMPolicyDataInput], account_id: Optional[str]) -> List[Alert]: ...
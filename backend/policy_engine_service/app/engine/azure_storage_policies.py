@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any
 from app.schemas.input_data_schema import AzureStorageAccountDataInput
 from app.schemas.alert_schema import Alert
+from app.engine.policy_metrics import PolicyMetricsRecorder
 import uuid
 import logging
 
@@ -151,6 +152,7 @@ def evaluate_azure_storage_policies(
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(azure_storage_accounts_data)} Azure Storage Accounts para a subscrição {subscription_id or 'N/A'}.")
 
+    recorder = PolicyMetricsRecorder()
     for acc_data in azure_storage_accounts_data:
         if acc_data.error_details:
             logger.warning(f"Skipping Azure Storage Account {acc_data.name} due to previous collection error: {acc_data.error_details}")
@@ -158,7 +160,7 @@ def evaluate_azure_storage_policies(
 
         for policy in azure_storage_policies_to_evaluate:
             try:
-                alert = policy.check(acc_data, subscription_id)
+                alert = recorder.check(policy, acc_data, subscription_id)
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
@@ -179,4 +181,5 @@ def evaluate_azure_storage_policies(
                 ))
 
     logger.info(f"Avaliação de Azure Storage Accounts concluída para a subscrição {subscription_id or 'N/A'}. {len(all_alerts)} alertas gerados.")
+    recorder.flush()
     return all_alerts
@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any
 from app.schemas.input_data_schema import AzureVirtualMachineDataInput, AzureNetworkInterfaceInput
 from app.schemas.alert_schema import Alert
+from app.engine.policy_metrics import PolicyMetricsRecorder
 import uuid
 import logging
 
@@ -125,6 +126,7 @@ def evaluate_azure_vm_policies(
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(azure_vms_data)} VMs Azure para a subscrição {subscription_id or 'N/A'}.")
 
+    recorder = PolicyMetricsRecorder()
     for vm_data in azure_vms_data:
         if vm_data.error_details:
             logger.warning(f"Skipping Azure VM {vm_data.name} due to previous collection error: {vm_data.error_details}")
@@ -133,7 +135,7 @@ def evaluate_azure_vm_policies(
 
         for policy in azure_vm_policies_to_evaluate:
             try:
-                alert = policy.check(vm_data, subscription_id)
+                alert = recorder.check(policy, vm_data, subscription_id)
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
@@ -154,4 +156,5 @@ def evaluate_azure_vm_policies(
                 ))
 
     logger.info(f"Avaliação de VMs Azure concluída para a subscrição {subscription_id or 'N/A'}. {len(all_alerts)} alertas gerados.")
+    recorder.flush()
     return all_alerts
@@ -0,0 +1,20 @@
+import json
+import hashlib
+from typing import Any, Dict
+
+
+def canonical_json(value: Any) -> str:
+    """Serialização estável: chaves ordenadas, sem espaços; tipos não-JSON (datas) viram string."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def content_hash(configuration: Dict[str, Any], service: str, policy_digest: str) -> str:
+    """
+    Hash SHA-256 do conteúdo de um ativo como foi avaliado: configuração canônica, serviço e digest das
+    políticas do serviço (PolicyRegistry.policy_digest). Só uma mudança nas políticas do próprio serviço
+    muda o hash dos seus ativos, forçando a reavaliação na próxima análise.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{policy_digest}\x00{service}\x00".encode("utf-8"))
+    digest.update(canonical_json(configuration).encode("utf-8"))
+    return digest.hexdigest()
@@ -1,41 +1,206 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.schemas.input_data_schema import AnalysisRequest
-from app.schemas.asset_schema import AssetCreate
-from app.engine.policy_loader import loaded_policies
-from app.engine.generic_policy_evaluator import evaluate_policy
+from app.schemas.alert_schema import AlertSchema
+from app.engine.policy_registry import policy_registry
+from app.engine.evaluation_executor import PolicyEvaluationExecutor
+from app.engine.generic_policy_evaluator import resolve_asset_id, is_per_resource_policy
+from app.engine.change_detection import content_hash
 from app.crud.crud_asset import asset_crud
-from app.db.session import SessionLocal
+from app.crud.crud_alert import alert_crud
+from app.crud.crud_scan_generation import async_scan_generation_crud
+from app.services.relationship_service import sync_relationships
+from app.services.attack_path_worker import attack_path_worker
+from app.db.session import AsyncSessionLocal
 
 logger = logging.getLogger(__name__)
 
+
+def count_collection_errors(records: Any) -> int:
+    """
+    Registros que o coletor marcou como falha de coleta: com `error_details` ou com um identificador
+    placeholder "ERROR_*" (ex.: ERROR_REGION de uma região que falhou ou excedeu o prazo).
+    """
+    count = 0
+    for record in records or []:
+        if hasattr(record, "model_dump"):
+            record = record.model_dump()
+        if not isinstance(record, dict):
+            continue
+        asset_id = resolve_asset_id(record)
+        if record.get("error_details") or (asset_id and asset_id.startswith("ERROR_")):
+            count += 1
+    return count
+
+
+class AnalysisOutcome(NamedTuple):
+    """Resultado de PolicyEngine.analyze, a ser fechado com PolicyEngine.finalize_analysis depois de persistir `alerts`."""
+    alerts: List[Dict[str, Any]]
+    account_id: Optional[str]
+    provider: str
+    # asset_id -> hash de conteúdo dos ativos avaliados, gravados só depois que os alertas forem persistidos.
+    content_hashes: Dict[str, str]
+    # Recursos inalterados (não reavaliados) e as políticas por recurso que os teriam avaliado.
+    unchanged_resource_ids: List[str]
+    per_resource_policy_ids: List[str]
+
+
 class PolicyEngine:
     def __init__(self):
-        self.policies = loaded_policies
-        logger.info(f"Motor de Políticas inicializado com {len(self.policies)} políticas carregadas.")
+        self.registry = policy_registry
+        self.executor = PolicyEvaluationExecutor(
+            max_workers=settings.EVALUATION_MAX_WORKERS,
+            parallel_threshold=settings.PARALLEL_EVALUATION_THRESHOLD,
+            chunk_size=settings.EVALUATION_CHUNK_SIZE,
+        )
+        logger.info(f"Motor de Políticas inicializado com {len(self.registry)} políticas carregadas (versão {self.registry.version}).")
+
+    def _detect_changes(
+        self, db: Session, request_data: AnalysisRequest, policy_digest: str
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int], List[Dict[str, Any]]]:
+        """
+        Separa o payload em (ativos novos ou alterados, asset_id -> id dos ativos inalterados, recursos sem identificador).
 
-    def _save_assets(self, db: Session, request_data: AnalysisRequest):
-        logger.info(f"Salvando/Atualizando {len(request_data.data)} ativos para a conta {request_data.account_id}")
+        Cada ativo carrega um hash canônico da configuração e do digest das políticas do serviço. Ativos com
+        o mesmo hash gravado na última análise não precisam ser regravados nem reavaliados.
+        """
+        assets_in: Dict[str, Dict[str, Any]] = {}
+        untracked: List[Dict[str, Any]] = []
         for resource_data in request_data.data:
-            # Lida com diferentes campos de ID
-            unique_asset_id = resource_data.get("arn") or resource_data.get("asset_id") or resource_data.get("id")
+            # Lida com diferentes campos de ID (mesma precedência do resource_id dos alertas)
+            unique_asset_id = resolve_asset_id(resource_data)
             if not unique_asset_id:
                 logger.warning(f"Recurso do tipo '{request_data.service}' sem um ID único. Pulando salvamento no inventário.")
+                untracked.append(resource_data)
                 continue
 
-            asset_in = AssetCreate(
-                asset_id=unique_asset_id,
-                asset_type=request_data.service,
-                name=resource_data.get("name"),
-                provider=request_data.provider,
-                account_id=request_data.account_id,
-                region=resource_data.get("region"),
-                configuration=resource_data,
+            # Duplicatas no payload: a última ocorrência vence, como no upsert.
+            assets_in[unique_asset_id] = {
+                "asset_id": unique_asset_id,
+                "asset_type": request_data.service,
+                "name": resource_data.get("name"),
+                "provider": request_data.provider.lower(),
+                "account_id": request_data.account_id,
+                "region": resource_data.get("region"),
+                "configuration": resource_data,
+                "content_hash": content_hash(resource_data, request_data.service, policy_digest),
+            }
+
+        existing = {}
+        if settings.CHANGE_DETECTION_ENABLED:
+            existing = asset_crud.get_content_hashes(
+                db, account_id=request_data.account_id, asset_ids=list(assets_in), chunk_size=settings.ASSET_UPSERT_CHUNK_SIZE
             )
-            asset_crud.create_or_update(db, obj_in=asset_in)
-        logger.info("Ativos salvos/atualizados com sucesso.")
+        changed: List[Dict[str, Any]] = []
+        unchanged: Dict[str, int] = {}
+        for asset_id, asset in assets_in.items():
+            current = existing.get(asset_id)
+            if current is not None and current[1] == asset["content_hash"]:
+                unchanged[asset_id] = current[0]
+            else:
+                changed.append(asset)
+        return changed, unchanged, untracked
+
+    def _save_assets(
+        self, db: Session, account_id: str, changed: List[Dict[str, Any]], unchanged: Dict[str, int],
+        scan_generation: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Grava os ativos alterados (sem o hash, ver finalize_analysis) e atualiza em lote o last_seen_at dos
+        inalterados. Com `scan_generation`, todos são carimbados com a varredura atual.
+        """
+        if scan_generation is not None:
+            for asset in changed:
+                asset["scan_generation"] = scan_generation
+        saved = asset_crud.bulk_upsert(db, objs_in=changed, chunk_size=settings.ASSET_UPSERT_CHUNK_SIZE)
+        asset_crud.touch_last_seen(
+            db, ids=list(unchanged.values()), chunk_size=settings.ASSET_UPSERT_CHUNK_SIZE, scan_generation=scan_generation
+        )
+        logger.info(f"{saved} ativos novos ou alterados salvos; {len(unchanged)} inalterados.")
+
+        # Os ids do banco permitem atualizar o grafo de caminhos de ataque de forma incremental.
+        ids = asset_crud.get_ids_by_asset_ids(
+            db, account_id=account_id, asset_ids=[a["asset_id"] for a in changed], chunk_size=settings.ASSET_UPSERT_CHUNK_SIZE,
+        )
+        saved_assets = []
+        for asset in changed:
+            if asset["asset_id"] in ids:
+                asset["id"] = ids[asset["asset_id"]]
+                saved_assets.append(asset)
+        return saved_assets
 
-    async def analyze(self, request_data: AnalysisRequest) -> List[Dict[str, Any]]:
+    def scan_policy_ids(self, provider: str, service: str, include_aggregate_policies: bool = True) -> List[str]:
+        """Ids das políticas que uma varredura de (provider, serviço) avalia."""
+        return [
+            p.policy["id"] for p in self.registry.policies_for(provider.lower(), service.lower())
+            if include_aggregate_policies or is_per_resource_policy(p.policy)
+        ]
+
+    async def begin_scan(self, account_id: Optional[str], provider: str, service: str) -> Optional[int]:
+        """
+        Abre uma geração de varredura para (conta, provider, serviço), ou None se a resolução automática está
+        desabilitada ou a análise não tem conta (sem conta não há escopo seguro para resolver alertas).
+        """
+        if not settings.SCAN_AUTO_RESOLVE_ENABLED or not account_id:
+            return None
+        async with AsyncSessionLocal() as db:
+            return await async_scan_generation_crud.begin(
+                db, account_id=account_id, provider=provider.lower(), service=service.lower()
+            )
+
+    async def abandon_scan(self, scan_generation: Optional[int]) -> None:
+        """Descarta uma geração aberta por begin_scan quando a varredura não pode ser concluída (coleta parcial ou erro)."""
+        if scan_generation is None:
+            return
+        async with AsyncSessionLocal() as db:
+            await async_scan_generation_crud.discard(db, id=scan_generation)
+
+    async def complete_scan(
+        self, scan_generation: Optional[int], account_id: Optional[str], provider: str, service: str,
+        include_aggregate_policies: bool = True,
+    ) -> Tuple[int, int]:
+        """
+        Fecha uma varredura completa: com um UPDATE cada, resolve os alertas OPEN das políticas avaliadas que
+        ela não confirmou e marca como obsoletos os ativos do serviço que ela não viu, que também saem do
+        grafo de caminhos de ataque.
+        Retorna (alertas resolvidos, ativos marcados como obsoletos). Só deve ser chamada quando a coleta foi
+        completa (ver count_collection_errors): a resolução não é limitada por região, então uma região que
+        falhou resolveria todos os alertas dela.
+        """
+        if scan_generation is None or not account_id:
+            return 0, 0
+        provider = provider.lower()
+        service = service.lower()
+        policy_ids = self.scan_policy_ids(provider, service, include_aggregate_policies)
+        async with AsyncSessionLocal() as db:
+            resolved = await db.run_sync(lambda session: alert_crud.resolve_unseen(
+                session, account_id=account_id, provider=provider, policy_ids=policy_ids, scan_generation=scan_generation,
+            ))
+            stale_ids = await db.run_sync(lambda session: asset_crud.mark_stale_unseen(
+                session, account_id=account_id, provider=provider, asset_type=service, scan_generation=scan_generation,
+                chunk_size=settings.ASSET_UPSERT_CHUNK_SIZE,
+            ))
+            stale = len(stale_ids)
+            await async_scan_generation_crud.complete(db, id=scan_generation, resolved_alerts=resolved, stale_assets=stale)
+        # Os ativos obsoletos saem do grafo de caminhos de ataque pelo worker, que é quem atualiza o grafo.
+        if stale_ids:
+            attack_path_worker.notify(account_id, removed_asset_ids=stale_ids)
+        logger.info(f"Varredura {scan_generation} de {provider}/{service} ({account_id}) concluída: {resolved} alertas resolvidos, {stale} ativos obsoletos.")
+        return resolved, stale
+
+    async def analyze(
+        self, request_data: AnalysisRequest, include_aggregate_policies: bool = True, scan_generation: Optional[int] = None
+    ) -> AnalysisOutcome:
+        """
+        Salva os ativos, avalia as políticas e agenda a análise de caminhos de ataque.
+        Com `include_aggregate_policies=False` (ingestão em blocos via /analyze/stream), as políticas que
+        agregam sobre o conjunto inteiro não são avaliadas, já que cada chamada vê só uma parte dos recursos.
+        Com `scan_generation` (ver begin_scan), os ativos vistos são carimbados com a varredura, assim como os
+        alertas OPEN dos ativos inalterados, que não são reavaliados e por isso não são reemitidos.
+        Depois de persistir `alerts` do resultado, o chamador deve chamar finalize_analysis.
+        """
         generated_alerts: List[Dict[str, Any]] = []
 
         provider = request_data.provider.lower()
@@ -44,40 +209,78 @@ class PolicyEngine:
         account_id = request_data.account_id
 
         if not data:
-            return []
+            return AnalysisOutcome([], account_id, provider, {}, [], [])
 
-        with SessionLocal() as db:
-            # 1. Salvar os ativos no inventário
-            self._save_assets(db, request_data)
+        # Sessão assíncrona: as etapas de banco (síncronas, via run_sync) cedem o event loop a cada ida ao
+        # banco, então análises concorrentes sobrepõem o I/O com o banco e a avaliação das políticas.
+        async with AsyncSessionLocal() as db:
+            # 1. Detectar os ativos novos ou alterados pelo hash de conteúdo
+            relevant_policies = self.registry.policies_for(provider, service)
+            changed, unchanged, untracked = await db.run_sync(
+                self._detect_changes, request_data, self.registry.policy_digest(provider, service)
+            )
+            changed_data = [asset["configuration"] for asset in changed] + untracked
 
             # 2. Avaliar políticas
-            relevant_policies = [p for p in self.policies if p.get('provider', '').lower() == provider and p.get('service', '').lower() == service]
-            if relevant_policies:
-                for policy in relevant_policies:
-                    try:
-                        alerts_from_policy = evaluate_policy(policy=policy, data=data, account_id=account_id)
-                        if alerts_from_policy:
-                            # O ideal é que evaluate_policy também use a sessão do DB para criar os alertas
-                            generated_alerts.extend(alerts_from_policy)
-                    except Exception as e:
-                        logger.error(f"Erro ao avaliar a política '{policy.get('id')}': {e}", exc_info=True)
-
-            # 3. Executar análise de caminhos de ataque
-            from app.services.graph_analysis_service import run_attack_path_analysis
-            run_attack_path_analysis(db)
+            # Payloads grandes são avaliados em blocos num pool de processos para não bloquear o event loop.
+            # Políticas por recurso só olham os recursos alterados; as que agregam sobre o conjunto
+            # (check_function) continuam recebendo o payload inteiro.
+            per_resource = [p for p in relevant_policies if is_per_resource_policy(p.policy)]
+            aggregate = [p for p in relevant_policies if not is_per_resource_policy(p.policy)] if include_aggregate_policies else []
+            generated_alerts = await self.executor.evaluate(per_resource, changed_data, account_id)
+            generated_alerts += await self.executor.evaluate(aggregate, data, account_id)
+            logger.info(f"{len(changed_data)} de {len(data)} recursos avaliados por políticas por recurso.")
 
-        logger.info(f"Análise para {provider}/{service} concluída. {len(generated_alerts)} alertas gerados.")
-        return generated_alerts
+            # Os hashes ficam de fora do upsert e só são gravados por finalize_analysis, depois que os alertas
+            # forem persistidos: se a persistência falhar, os ativos são reavaliados na próxima análise.
+            content_hashes = {asset["asset_id"]: asset.pop("content_hash") for asset in changed}
+            saved_assets = await db.run_sync(self._save_assets, account_id, changed, unchanged, scan_generation)
+            if scan_generation is not None and unchanged:
+                await db.run_sync(lambda session: alert_crud.carry_forward_scan_generation(
+                    session, account_id=account_id, provider=provider, resource_ids=list(unchanged),
+                    policy_ids=[p.policy["id"] for p in per_resource], scan_generation=scan_generation,
+                    chunk_size=settings.ASSET_UPSERT_CHUNK_SIZE,
+                ))
 
-policy_engine = PolicyEngine()
+            # 3. Derivar relacionamentos; a análise de caminhos de ataque roda em background,
+            # agrupada por conta, para não somar o custo do grafo à latência desta requisição.
             try:
-                alerts_from_policy = evaluate_policy(policy=policy, data=data, account_id=account_id)
-                if alerts_from_policy:
-                    generated_alerts.extend(alerts_from_policy)
+                relationships = await db.run_sync(sync_relationships, saved_assets, settings.ASSET_UPSERT_CHUNK_SIZE)
             except Exception as e:
-                logger.error(f"Erro ao avaliar a política '{policy.get('id')}': {e}", exc_info=True)
+                # Os alertas já foram gerados; uma falha nos relacionamentos não deve descartá-los.
+                logger.exception(f"Erro ao derivar relacionamentos dos ativos: {e}")
+                relationships = None
+            attack_path_worker.notify(
+                account_id,
+                updated_assets=saved_assets + (relationships.assets if relationships else []),
+                updated_edges=relationships.edges if relationships else None,
+                reference_assets=relationships.reference_assets if relationships else None,
+            )
 
         logger.info(f"Análise para {provider}/{service} concluída. {len(generated_alerts)} alertas gerados.")
-        return generated_alerts
+        return AnalysisOutcome(
+            generated_alerts, account_id, provider, content_hashes, list(unchanged), [p.policy["id"] for p in per_resource]
+        )
+
+    async def finalize_analysis(self, outcome: AnalysisOutcome) -> List[AlertSchema]:
+        """
+        Fecha uma análise depois que `outcome.alerts` foi persistido: grava os hashes de conteúdo dos ativos
+        avaliados e retorna os alertas OPEN dos recursos inalterados, que continuam valendo mas não foram
+        reavaliados, para que a resposta traga todos os alertas abertos dos recursos analisados.
+        """
+        if not outcome.content_hashes and not outcome.unchanged_resource_ids:
+            return []
+        async with AsyncSessionLocal() as db:
+            if outcome.content_hashes:
+                await db.run_sync(lambda session: asset_crud.set_content_hashes(
+                    session, account_id=outcome.account_id, hashes=outcome.content_hashes,
+                    chunk_size=settings.ASSET_UPSERT_CHUNK_SIZE,
+                ))
+            carried = await db.run_sync(lambda session: alert_crud.get_open_for_resources(
+                session, account_id=outcome.account_id, provider=outcome.provider,
+                resource_ids=outcome.unchanged_resource_ids, policy_ids=outcome.per_resource_policy_ids,
+                chunk_size=settings.ASSET_UPSERT_CHUNK_SIZE,
+            ))
+            return [AlertSchema.from_orm(alert) for alert in carried]
 
 policy_engine = PolicyEngine()
@@ -0,0 +1,120 @@
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from app.engine.generic_policy_evaluator import PolicyEvaluator, compile_policy, is_per_resource_policy
+from app.engine.policy_registry import CompiledPolicy
+from app.engine.policy_metrics import record_policy_evaluation
+
+logger = logging.getLogger(__name__)
+
+# Cache dos avaliadores compilados dentro de cada processo do pool, por (policy_id, versão do registro).
+# Closures não são serializáveis, então o worker recebe o dict da política e compila uma vez por versão.
+_worker_compiled_policies: Dict[Tuple[str, int], PolicyEvaluator] = {}
+
+
+def _evaluate_in_worker(
+    policy: Dict[str, Any], registry_version: int, data: List[Dict[str, Any]], account_id: Optional[str]
+) -> Tuple[List[Dict[str, Any]], float]:
+    """Retorna (alertas, segundos). As métricas são publicadas pelo processo principal, que expõe /metrics."""
+    key = (policy["id"], registry_version)
+    evaluator = _worker_compiled_policies.get(key)
+    if evaluator is None:
+        # Após uma recarga do registro as versões antigas não são mais pedidas; descarta-as para não acumular.
+        for stale_key in [k for k in _worker_compiled_policies if k[0] == key[0] and k[1] < registry_version]:
+            del _worker_compiled_policies[stale_key]
+        evaluator = compile_policy(policy)
+        _worker_compiled_policies[key] = evaluator
+    start = time.perf_counter()
+    alerts = evaluator(data, account_id)
+    return alerts, time.perf_counter() - start
+
+
+def _chunks(data: Sequence[Any], chunk_size: int) -> List[Sequence[Any]]:
+    return [data[start:start + chunk_size] for start in range(0, len(data), chunk_size)]
+
+
+class PolicyEvaluationExecutor:
+    """
+    Executa a avaliação de políticas fora da thread do event loop.
+
+    Abaixo de `parallel_threshold` recursos a avaliação continua no próprio processo. Acima disso,
+    `data` é dividido em blocos e cada par (política, bloco) é enviado a um ProcessPoolExecutor
+    dimensionado pelos núcleos disponíveis; os alertas são reunidos na ordem das políticas e dos blocos.
+    Políticas baseadas em `check_function` podem agregar sobre o conjunto inteiro (ex.: "existe ao menos
+    um trail multi-região"), então recebem `data` completo numa única tarefa.
+    """
+
+    def __init__(self, max_workers: int = 0, parallel_threshold: int = 5000, chunk_size: int = 2000):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self.chunk_size = max(1, chunk_size)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # "spawn": um fork copiaria o estado do processo do serviço (threads do uvicorn e do watcher do
+            # registro, conexões do pool do banco) para os workers, e locks herdados travados podem bloqueá-los.
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Pool de avaliação de políticas iniciado com {self.max_workers} processos.")
+        return self._pool
+
+    def should_parallelize(self, data_size: int) -> bool:
+        return self.max_workers > 1 and data_size >= self.parallel_threshold
+
+    def evaluate_in_process(self, policies: Sequence[CompiledPolicy], data: List[Dict[str, Any]], account_id: Optional[str]) -> List[Dict[str, Any]]:
+        alerts: List[Dict[str, Any]] = []
+        for compiled in policies:
+            start = time.perf_counter()
+            try:
+                policy_alerts = compiled.evaluate(data, account_id)
+            except Exception as e:
+                logger.error(f"Erro ao avaliar a política '{compiled.policy_id}': {e}", exc_info=True)
+                record_policy_evaluation(compiled.policy_id, time.perf_counter() - start, len(data), 0, errors=1)
+                continue
+            record_policy_evaluation(compiled.policy_id, time.perf_counter() - start, len(data), len(policy_alerts))
+            alerts.extend(policy_alerts)
+        return alerts
+
+    async def evaluate(
+        self, policies: Sequence[CompiledPolicy], data: List[Dict[str, Any]], account_id: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        if not policies or not data:
+            return []
+        if not self.should_parallelize(len(data)):
+            return self.evaluate_in_process(policies, data, account_id)
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        chunks = _chunks(data, self.chunk_size)
+
+        tasks = []
+        task_keys: List[Tuple[str, int]] = []
+        for compiled in policies:
+            policy_chunks = chunks if is_per_resource_policy(compiled.policy) else [data]
+            for chunk in policy_chunks:
+                tasks.append(loop.run_in_executor(pool, _evaluate_in_worker, compiled.policy, compiled.version, list(chunk), account_id))
+                task_keys.append((compiled.policy_id, len(chunk)))
+
+        logger.info(f"Avaliando {len(data)} recursos em {len(tasks)} tarefas ({len(policies)} políticas, {len(chunks)} blocos).")
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        alerts: List[Dict[str, Any]] = []
+        for (policy_id, chunk_size), result in zip(task_keys, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Erro ao avaliar a política '{policy_id}' no pool de processos: {result}")
+                record_policy_evaluation(policy_id, None, chunk_size, 0, errors=1)
+                continue
+            chunk_alerts, seconds = result
+            record_policy_evaluation(policy_id, seconds, chunk_size, len(chunk_alerts))
+            alerts.extend(chunk_alerts)
+        return alerts
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
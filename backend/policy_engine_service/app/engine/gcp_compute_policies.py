@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any
 from app.schemas.input_data_schema import GCPComputeInstanceDataInput, GCPFirewallDataInput, GCPFirewallAllowedRuleInput # Alterado para Input
 from app.schemas.alert_schema import Alert
+from app.engine.policy_metrics import PolicyMetricsRecorder
 import logging
 import uuid
 
@@ -180,18 +181,20 @@ def evaluate_gcp_compute_instance_policies(
 ) -> List[Alert]:
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(instances_data)} Instâncias VM GCP para o projeto {project_id or 'N/A'}.")
+    recorder = PolicyMetricsRecorder()
     for instance in instances_data:
         if instance.error_details:
             logger.warning(f"Skipping GCP VM Instance {instance.name} due to collection error: {instance.error_details}")
             continue
         for policy in gcp_compute_instance_policies_to_evaluate:
             try:
-                alert = policy.check(instance, project_id)
+                alert = recorder.check(policy, instance, project_id)
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
                 logger.error(f"Error evaluating policy {policy.policy_id} for GCP VM {instance.name}: {e}", exc_info=True)
                 # Criar alerta de erro de engine
+    recorder.flush()
     return all_alerts
 
 def evaluate_gcp_firewall_policies(
@@ -200,16 +203,18 @@ def evaluate_gcp_firewall_policies(
 ) -> List[Alert]:
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(firewalls_data)} Firewalls GCP para o projeto {project_id or 'N/A'}.")
+    recorder = PolicyMetricsRecorder()
     for firewall in firewalls_data:
         if firewall.error_details:
             logger.warning(f"Skipping GCP Firewall {firewall.name} due to collection error: {firewall.error_details}")
             continue
         for policy in gcp_firewall_policies_to_evaluate:
             try:
-                alert = policy.check(firewall, project_id)
+                alert = recorder.check(policy, firewall, project_id)
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
                 logger.error(f"Error evaluating policy {policy.policy_id} for GCP Firewall {firewall.name}: {e}", exc_info=True)
                 # Criar alerta de erro de engine
+    recorder.flush()
     return all_alerts
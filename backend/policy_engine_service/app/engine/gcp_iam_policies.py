@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any
 from app.schemas.input_data_schema import GCPProjectIAMPolicyDataInput # Alterado para Input
 from app.schemas.alert_schema import Alert
+from app.engine.policy_metrics import PolicyMetricsRecorder
 import logging
 import uuid
 
@@ -100,9 +101,10 @@ def evaluate_gcp_project_iam_policies(
         # Poderia gerar um alerta sobre a falha na coleta, se desejado
         return all_alerts
 
+    recorder = PolicyMetricsRecorder()
     for policy_def in gcp_project_iam_policies_to_evaluate:
         try:
-            alert = policy_def.check(project_iam_data, effective_project_id_for_alert)
+            alert = recorder.check(policy_def, project_iam_data, effective_project_id_for_alert)
             if alert:
                 all_alerts.append(alert)
         except Exception as e:
@@ -123,4 +125,5 @@ def evaluate_gcp_project_iam_policies(
             ))
 
     logger.info(f"Avaliação da política IAM do projeto GCP {effective_project_id_for_alert} concluída. {len(all_alerts)} alertas gerados.")
+    recorder.flush()
     return all_alerts
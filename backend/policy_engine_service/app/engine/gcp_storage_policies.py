@@ -1,6 +1,7 @@
 from typing import List, Optional
 from app.schemas.input_data_schema import GCPStorageBucketDataInput # Alterado para Input
 from app.schemas.alert_schema import Alert
+from app.engine.policy_metrics import PolicyMetricsRecorder
 import logging
 import uuid
 
@@ -141,6 +142,7 @@ def evaluate_gcp_storage_policies(
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(gcp_buckets_data)} buckets GCP Storage para o projeto {project_id or 'N/A'}.")
 
+    recorder = PolicyMetricsRecorder()
     for bucket in gcp_buckets_data:
         if bucket.error_details:
             logger.warning(f"Skipping GCP bucket {bucket.name} due to previous collection error: {bucket.error_details}")
@@ -153,7 +155,7 @@ def evaluate_gcp_storage_policies(
 
         for policy in gcp_storage_policies_to_evaluate:
             try:
-                alert = policy.check(bucket, effective_project_id_for_alert)
+                alert = recorder.check(policy, bucket, effective_project_id_for_alert)
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
@@ -174,4 +176,5 @@ def evaluate_gcp_storage_policies(
                 ))
 
     logger.info(f"Avaliação de GCP Storage concluída para o projeto {project_id or 'N/A'}. {len(all_alerts)} alertas gerados.")
+    recorder.flush()
     return all_alerts
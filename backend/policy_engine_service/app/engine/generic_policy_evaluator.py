@@ -4,6 +4,7 @@ from typing import List, Dict, Any, Optional, Callable
 # Importar as funções de verificação
 from .aws_cloudtrail_policies import check_cloudtrail_multi_region, check_cloudtrail_log_file_validation
 from .aws_iam_policies import check_root_mfa_enabled, check_stale_key_s3_write_access
+from .rule_compiler import compile_rules, RuleCompilationError
 
 logger = logging.getLogger(__name__)
 
@@ -17,10 +18,26 @@ POLICY_CHECK_REGISTRY: Dict[str, Callable[[Any], List[Dict[str, Any]]]] = {
     # Adicionar outras funções de verificação aqui
 }
 
-def evaluate_policy(policy: Dict[str, Any], data: List[Dict[str, Any]], account_id: str) -> List[Dict[str, Any]]:
+# Assinatura de uma política compilada: recebe a lista de recursos e o account_id e retorna os alertas.
+PolicyEvaluator = Callable[[List[Dict[str, Any]], Optional[str]], List[Dict[str, Any]]]
+
+
+def _no_op_evaluator(data: List[Dict[str, Any]], account_id: Optional[str]) -> List[Dict[str, Any]]:
+    return []
+
+
+def is_per_resource_policy(policy: Dict[str, Any]) -> bool:
     """
-    Avalia uma única política contra um conjunto de dados.
-    Determina se a avaliação deve usar uma função de verificação personalizada ou a lógica baseada em regras.
+    Políticas baseadas em regras avaliam cada recurso isoladamente e podem ser divididas em blocos.
+    Funções de verificação podem agregar sobre o conjunto inteiro e precisam receber todos os dados.
+    """
+    return not policy.get("check_function") and bool(policy.get("rules"))
+
+
+def compile_policy(policy: Dict[str, Any]) -> PolicyEvaluator:
+    """
+    Prepara uma política para avaliação, resolvendo uma única vez tudo o que não depende dos dados
+    (função de verificação, campos do alerta). O avaliador retornado pode ser chamado repetidamente.
     """
     check_function_name = policy.get("check_function")
 
@@ -29,35 +46,108 @@ def evaluate_policy(policy: Dict[str, Any], data: List[Dict[str, Any]], account_
         check_function = POLICY_CHECK_REGISTRY.get(check_function_name)
         if not check_function:
             logger.error(f"Função de verificação '{check_function_name}' para a política '{policy['id']}' não encontrada no registro.")
-            return []
+            return _no_op_evaluator
 
-        try:
+        alert_template = {
+            "provider": policy["provider"],
+            "severity": policy["severity"],
+            "title": policy["title"],
+            "policy_id": policy["id"],
+            "recommendation": policy.get("recommendation"),
+            "remediation_guide": policy.get("remediation_guide"),
+        }
+        default_resource_type = policy.get("service")
+
+        def evaluate_check_function(data: List[Dict[str, Any]], account_id: Optional[str]) -> List[Dict[str, Any]]:
             # A função de verificação é responsável por iterar sobre os dados e retornar uma lista de violações.
+            # Exceções sobem para quem avalia (executor), que as registra e conta por política.
             violations = check_function(data)
-            alerts = []
-            for violation in violations:
-                alerts.append({
+            return [
+                {
+                    **alert_template,
                     "resource_id": violation.get("resource_id", "N/A"),
-                    "resource_type": violation.get("resource_type", policy.get("service")),
+                    "resource_type": violation.get("resource_type", default_resource_type),
                     "account_id": account_id,
                     "region": violation.get("region", "global"),
-                    "provider": policy["provider"],
-                    "severity": policy["severity"],
-                    "title": policy["title"],
                     "description": violation.get("details"),
-                    "policy_id": policy["id"],
-                    "recommendation": policy.get("recommendation"),
-                    "remediation_guide": policy.get("remediation_guide"),
-                })
-            return alerts
-        except Exception as e:
-            logger.exception(f"Erro ao executar a função de verificação '{check_function_name}': {e}")
-            return []
-
-    else:
-        # --- Avaliação baseada em regras (lógica legada) ---
-        # Esta lógica precisa ser adaptada para iterar sobre a lista de dados
-        # e não apenas um único recurso.
-        # Por enquanto, vamos pular a implementação detalhada da lógica de regras
-        # para focar na avaliação baseada em função.
+                }
+                for violation in violations
+            ]
+
+        return evaluate_check_function
+
+    rules = policy.get("rules")
+    if not rules:
+        logger.warning(f"Política '{policy.get('id')}' não define 'check_function' nem 'rules'. Ignorando.")
+        return _no_op_evaluator
+
+    # --- Avaliação baseada em regras declarativas ---
+    # As regras são compiladas uma única vez em predicados; a avaliação é uma passada sobre `data`.
+    try:
+        violates = compile_rules(rules)
+    except RuleCompilationError as e:
+        logger.error(f"Regras inválidas na política '{policy.get('id')}': {e}")
+        return _no_op_evaluator
+
+    severity = str(policy.get("severity", "MEDIUM")).upper()
+    alert_template = {
+        "provider": policy["provider"],
+        "severity": severity,
+        "title": policy.get("title") or policy.get("description") or policy["id"],
+        "description": policy.get("description") or policy.get("title") or policy["id"],
+        "policy_id": policy["id"],
+        "recommendation": policy.get("recommendation") or policy.get("remediation"),
+        "remediation_guide": policy.get("remediation_guide"),
+        "details": {"rules": rules},
+    }
+    resource_type = policy.get("resource_type") or policy.get("service")
+
+    def evaluate_rules(data: List[Dict[str, Any]], account_id: Optional[str]) -> List[Dict[str, Any]]:
+        alerts = []
+        for resource in data:
+            if not violates(resource):
+                continue
+            alerts.append({
+                **alert_template,
+                "resource_id": _resource_identifier(resource),
+                "resource_type": resource_type,
+                "account_id": account_id,
+                "region": _get_field(resource, "region") or "global",
+            })
+        return alerts
+
+    return evaluate_rules
+
+
+def _get_field(resource: Any, key: str) -> Any:
+    return resource.get(key) if isinstance(resource, dict) else getattr(resource, key, None)
+
+
+# Campos que identificam um recurso, em ordem de precedência. O nome é o último recurso (ex.: buckets S3).
+ASSET_ID_FIELDS = ("arn", "asset_id", "id", "instance_id", "InstanceId", "group_id", "GroupId", "name")
+
+
+def resolve_asset_id(resource: Any) -> Optional[str]:
+    """Identificador do recurso usado no inventário e nos alertas, ou None se o recurso não tiver nenhum."""
+    for key in ASSET_ID_FIELDS:
+        value = _get_field(resource, key)
+        if value and isinstance(value, (str, int)):
+            return str(value)
+    return None
+
+
+def _resource_identifier(resource: Any) -> str:
+    return resolve_asset_id(resource) or "N/A"
+
+
+def evaluate_policy(policy: Dict[str, Any], data: List[Dict[str, Any]], account_id: str) -> List[Dict[str, Any]]:
+    """
+    Avalia uma única política contra um conjunto de dados.
+    Determina se a avaliação deve usar uma função de verificação personalizada ou a lógica baseada em regras.
+    Para avaliações repetidas, prefira compile_policy (ou o PolicyRegistry, que já guarda as políticas compiladas).
+    """
+    try:
+        return compile_policy(policy)(data, account_id)
+    except Exception as e:
+        logger.exception(f"Erro ao avaliar a política '{policy.get('id')}': {e}")
         return []
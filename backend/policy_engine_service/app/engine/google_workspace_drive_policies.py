@@ -5,6 +5,7 @@ from app.schemas.input_data_schema import (
     # GoogleDrivePermissionInput # Não usado diretamente aqui, mas faz parte do FileDataInput
 )
 from app.schemas.alert_schema import Alert
+from app.engine.policy_metrics import PolicyMetricsRecorder
 import logging
 import uuid
 
@@ -195,6 +196,7 @@ def evaluate_google_workspace_drive_policies(
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(shared_drives_data)} Drives Compartilhados do Google Workspace para o cliente {account_id or 'N/A'}.")
 
+    recorder = PolicyMetricsRecorder()
     for shared_drive in shared_drives_data:
         if shared_drive.error_details:
             logger.warning(f"Skipping GWS Shared Drive {shared_drive.name} due to collection error: {shared_drive.error_details}")
@@ -206,7 +208,7 @@ def evaluate_google_workspace_drive_policies(
         # Avaliar políticas de nível de Drive Compartilhado
         for policy_def in gws_shared_drive_policies:
             try:
-                alert = policy_def.check(shared_drive, effective_customer_id)
+                alert = recorder.check(policy_def, shared_drive, effective_customer_id)
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
@@ -229,7 +231,7 @@ def evaluate_google_workspace_drive_policies(
 
             for policy_def in gws_drive_file_policies:
                 try:
-                    alert = policy_def.check(file_data, effective_customer_id)
+                    alert = recorder.check(policy_def, file_data, effective_customer_id)
                     if alert:
                         all_alerts.append(alert)
                 except Exception as e:
@@ -244,6 +246,7 @@ def evaluate_google_workspace_drive_policies(
                     ))
 
     logger.info(f"Avaliação de Google Workspace Drive concluída para {account_id or 'N/A'}. {len(all_alerts)} alertas gerados.")
+    recorder.flush()
     return all_alerts
 
 # Se, no futuro, o coletor enviar uma lista de DriveFileData avulsos (não apenas aninhados em SharedDrives),
@@ -1,6 +1,7 @@
 from typing import List, Optional
 from app.schemas.input_data_schema import GoogleWorkspaceUserDataInput
 from app.schemas.alert_schema import Alert
+from app.engine.policy_metrics import PolicyMetricsRecorder
 import logging
 import uuid
 from datetime import datetime, timezone, timedelta
@@ -222,6 +223,7 @@ def evaluate_google_workspace_user_policies(
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(users_data)} usuários do Google Workspace para o cliente {account_id or 'N/A'}.")
 
+    recorder = PolicyMetricsRecorder()
     for user in users_data:
         if user.error_details: # Se o coletor teve um erro para este usuário específico
             logger.warning(f"Skipping Google Workspace user {user.primary_email} due to collection error: {user.error_details}")
@@ -232,7 +234,7 @@ def evaluate_google_workspace_user_policies(
 
         for policy_def in google_workspace_user_policies_to_evaluate:
             try:
-                alert = policy_def.check(user, effective_customer_id)
+                alert = recorder.check(policy_def, user, effective_customer_id)
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
@@ -248,6 +250,7 @@ def evaluate_google_workspace_user_policies(
                 ))
 
     logger.info(f"Avaliação de Usuários Google Workspace concluída para {account_id or 'N/A'}. {len(all_alerts)} alertas gerados.")
+    recorder.flush()
     return all_alerts
 
 # Observações:
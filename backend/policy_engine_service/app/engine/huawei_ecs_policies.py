@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any
 from app.schemas.input_data_schema import HuaweiECSServerDataInput, HuaweiVPCSecurityGroupInput, HuaweiVPCSecurityGroupRuleInput
 from app.schemas.alert_schema import Alert
+from app.engine.policy_metrics import PolicyMetricsRecorder
 import logging
 import uuid
 
@@ -152,18 +153,20 @@ def evaluate_huawei_ecs_instance_policies(
 ) -> List[Alert]:
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(instances_data)} instâncias Huawei ECS para conta {account_id or 'N/A'} na região {region_id or 'N/A'}.")
+    recorder = PolicyMetricsRecorder()
     for instance in instances_data:
         if instance.error_details:
             logger.warning(f"Skipping Huawei ECS {instance.name} due to collection error: {instance.error_details}")
             continue
         for policy_def in huawei_ecs_instance_policies_to_evaluate:
             try:
-                alert = policy_def.check(instance, account_id, region_id) # Passar region_id também
+                alert = recorder.check(policy_def, instance, account_id, region_id) # Passar region_id também
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
                 logger.error(f"Error evaluating policy {policy_def.policy_id} for Huawei ECS {instance.name}: {e}", exc_info=True)
                 # Criar alerta de erro de engine
+    recorder.flush()
     return all_alerts
 
 def evaluate_huawei_vpc_sg_policies(
@@ -173,16 +176,18 @@ def evaluate_huawei_vpc_sg_policies(
 ) -> List[Alert]:
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(sgs_data)} Huawei VPC SGs para conta {account_id or 'N/A'} na região {region_id or 'N/A'}.")
+    recorder = PolicyMetricsRecorder()
     for sg in sgs_data:
         if sg.error_details:
             logger.warning(f"Skipping Huawei VPC SG {sg.name} due to collection error: {sg.error_details}")
             continue
         for policy_def in huawei_vpc_sg_policies_to_evaluate:
             try:
-                alert = policy_def.check(sg, account_id, region_id)
+                alert = recorder.check(policy_def, sg, account_id, region_id)
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
                 logger.error(f"Error evaluating policy {policy_def.policy_id} for Huawei VPC SG {sg.name}: {e}", exc_info=True)
                 # Criar alerta de erro de engine
+    recorder.flush()
     return all_alerts
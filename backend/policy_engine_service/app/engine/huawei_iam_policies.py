@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any
 from app.schemas.input_data_schema import HuaweiIAMUserDataInput, HuaweiIAMUserAccessKeyInput # Alterado para Input
 from app.schemas.alert_schema import Alert
+from app.engine.policy_metrics import PolicyMetricsRecorder
 import logging
 import uuid
 from datetime import datetime, timezone, timedelta
@@ -141,6 +142,7 @@ def evaluate_huawei_iam_user_policies(
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(users_data)} usuários Huawei IAM para a conta/domínio {account_id or 'N/A'}.")
 
+    recorder = PolicyMetricsRecorder()
     for user in users_data:
         if user.error_details:
             logger.warning(f"Skipping Huawei IAM user {user.name} due to collection error: {user.error_details}")
@@ -152,7 +154,7 @@ def evaluate_huawei_iam_user_policies(
 
         for policy_def in huawei_iam_user_policies_to_evaluate:
             try:
-                alert = policy_def.check(user, effective_domain_id_for_alert)
+                alert = recorder.check(policy_def, user, effective_domain_id_for_alert)
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
@@ -160,4 +162,5 @@ def evaluate_huawei_iam_user_policies(
                 # Criar alerta de erro de engine
 
     logger.info(f"Avaliação de Usuários Huawei IAM concluída para {account_id or 'N/A'}. {len(all_alerts)} alertas gerados.")
+    recorder.flush()
     return all_alerts
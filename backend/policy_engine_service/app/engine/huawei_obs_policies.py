@@ -1,6 +1,7 @@
 from typing import List, Optional
 from policy_engine_service.app.schemas.input_data_schema import HuaweiOBSBucketDataInput
 from policy_engine_service.app.schemas.alert_schema import Alert, AlertSeverityEnum, AlertStatusEnum
+from policy_engine_service.app.engine.policy_metrics import PolicyMetricsRecorder
 import logging
 import uuid
 from datetime import datetime, timezone
@@ -172,6 +173,7 @@ def evaluate_huawei_obs_policies(
     all_alerts: List[Alert] = []
     logger.info(f"Avaliando {len(huawei_buckets_data)} buckets Huawei OBS para a conta/projeto {account_id or 'N/A'}.")
 
+    recorder = PolicyMetricsRecorder()
     for bucket in huawei_buckets_data:
         if bucket.error_details:
             logger.warning(f"Skipping Huawei OBS bucket {bucket.name} due to collection error: {bucket.error_details}")
@@ -179,7 +181,7 @@ def evaluate_huawei_obs_policies(
 
         for policy_def in huawei_obs_policies_to_evaluate:
             try:
-                alert = policy_def.check(bucket, account_id)
+                alert = recorder.check(policy_def, bucket, account_id)
                 if alert:
                     all_alerts.append(alert)
             except Exception as e:
@@ -200,5 +202,6 @@ def evaluate_huawei_obs_policies(
                     last_seen_at=now,
                 ))
 
+    recorder.flush()
     logger.info(f"Avaliação de Huawei OBS concluída para {account_id or 'N/A'}. {len(all_alerts)} alertas gerados.")
     return all_alerts
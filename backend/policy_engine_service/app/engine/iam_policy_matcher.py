@@ -0,0 +1,268 @@
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Pattern, Tuple
+
+from app.engine.change_detection import canonical_json
+
+# Documentos das políticas gerenciadas da AWS mais comuns. O collector só envia o ARN das políticas anexadas,
+# então sem esta tabela elas não contariam para "X pode fazer Y"; as demais continuam sem documento conhecido.
+AWS_MANAGED_POLICY_DOCUMENTS: Dict[str, Dict[str, Any]] = {
+    "arn:aws:iam::aws:policy/AdministratorAccess": {
+        "Version": "2012-10-17", "Statement": [{"Effect": "Allow", "Action": "*", "Resource": "*"}],
+    },
+    "arn:aws:iam::aws:policy/PowerUserAccess": {
+        "Version": "2012-10-17", "Statement": [
+            {"Effect": "Allow", "NotAction": ["iam:*", "organizations:*", "account:*"], "Resource": "*"},
+            {"Effect": "Allow", "Action": ["iam:CreateServiceLinkedRole", "iam:DeleteServiceLinkedRole", "iam:ListRoles",
+                                           "organizations:DescribeOrganization", "account:ListRegions"], "Resource": "*"},
+        ],
+    },
+    "arn:aws:iam::aws:policy/AmazonS3FullAccess": {
+        "Version": "2012-10-17", "Statement": [{"Effect": "Allow", "Action": ["s3:*", "s3-object-lambda:*"], "Resource": "*"}],
+    },
+}
+
+ALLOW = "Allow"
+DENY = "Deny"
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+class WildcardSet:
+    """
+    Conjunto de padrões IAM (`*` e `?`) compilado uma vez: valores sem curinga viram um frozenset e os
+    demais uma única regex alternada. Ações IAM não diferenciam maiúsculas; ARNs de recurso sim.
+    """
+
+    __slots__ = ("match_all", "exact", "regex", "ignore_case")
+
+    def __init__(self, patterns: Iterable[Any], ignore_case: bool):
+        self.ignore_case = ignore_case
+        exact = set()
+        wildcards = []
+        self.match_all = False
+        for pattern in patterns:
+            if not isinstance(pattern, str):
+                continue
+            if ignore_case:
+                pattern = pattern.lower()
+            if pattern == "*":
+                self.match_all = True
+            elif "*" in pattern or "?" in pattern:
+                wildcards.append(re.escape(pattern).replace(r"\*", ".*").replace(r"\?", "."))
+            else:
+                exact.add(pattern)
+        self.exact: FrozenSet[str] = frozenset(exact)
+        self.regex: Optional[Pattern] = re.compile("(?:" + "|".join(wildcards) + r")\Z", re.DOTALL) if wildcards else None
+
+    def matches(self, value: str) -> bool:
+        if self.match_all:
+            return True
+        if self.ignore_case:
+            value = value.lower()
+        if value in self.exact:
+            return True
+        return self.regex is not None and self.regex.match(value) is not None
+
+
+class CompiledStatement:
+    """Um Statement com Action/NotAction e Resource/NotResource já compilados."""
+
+    __slots__ = ("effect", "actions", "not_actions", "resources", "not_resources", "has_condition")
+
+    def __init__(self, statement: Dict[str, Any]):
+        self.effect = statement.get("Effect")
+        self.actions = WildcardSet(_as_list(statement.get("Action")), ignore_case=True) if "Action" in statement else None
+        self.not_actions = WildcardSet(_as_list(statement.get("NotAction")), ignore_case=True) if "NotAction" in statement else None
+        self.resources = WildcardSet(_as_list(statement.get("Resource")), ignore_case=False) if "Resource" in statement else None
+        self.not_resources = WildcardSet(_as_list(statement.get("NotResource")), ignore_case=False) if "NotResource" in statement else None
+        self.has_condition = bool(statement.get("Condition"))
+
+    def matches_action(self, action: str) -> bool:
+        if self.actions is not None:
+            return self.actions.matches(action)
+        if self.not_actions is not None:
+            return not self.not_actions.matches(action)
+        return False
+
+    def matches_resource(self, resource: Optional[str]) -> bool:
+        """`resource=None` pergunta por "algum recurso": vale se o statement não exclui todos os recursos."""
+        if resource is None:
+            return self.not_resources is None or not self.not_resources.match_all
+        if self.resources is not None:
+            return self.resources.matches(resource)
+        if self.not_resources is not None:
+            return not self.not_resources.matches(resource)
+        # Statements de políticas de identidade sem Resource são inválidos; para Allow, assume todos.
+        return self.effect == ALLOW
+
+    def covers_all_resources(self) -> bool:
+        return (self.resources is not None and self.resources.match_all) or \
+            (self.resources is None and self.not_resources is None)
+
+
+class CompiledPolicyDocument:
+    """
+    Documento de política IAM compilado. As respostas de `evaluate` são memorizadas por (ação, recurso),
+    então a mesma pergunta para outro principal com o mesmo documento é uma consulta de dicionário.
+    """
+
+    __slots__ = ("statements", "_decisions")
+
+    MAX_MEMOIZED_DECISIONS = 256
+
+    def __init__(self, document: Dict[str, Any]):
+        self.statements: Tuple[CompiledStatement, ...] = tuple(
+            CompiledStatement(statement) for statement in _as_list(document.get("Statement")) if isinstance(statement, dict)
+        )
+        self._decisions: Dict[Tuple[str, Optional[str]], Optional[str]] = {}
+
+    def evaluate(self, action: str, resource: Optional[str] = None) -> Optional[str]:
+        """
+        "Deny" se algum Deny se aplica, "Allow" se algum Allow se aplica, None se o documento não decide.
+        Condições não são avaliadas: um Allow condicional conta como permissão (postura conservadora para
+        auditoria) e um Deny condicional é ignorado. Com `resource=None`, só um Deny sobre todos os recursos nega.
+        """
+        key = (action, resource)
+        decision = self._decisions.get(key, False)
+        if decision is not False:
+            return decision
+        decision = None
+        for statement in self.statements:
+            if not statement.matches_action(action):
+                continue
+            if statement.effect == DENY:
+                if statement.has_condition:
+                    continue
+                if resource is None and not statement.covers_all_resources():
+                    continue
+                if statement.matches_resource(resource):
+                    decision = DENY
+                    break
+            elif statement.effect == ALLOW and decision is None and statement.matches_resource(resource):
+                decision = ALLOW
+        if len(self._decisions) < self.MAX_MEMOIZED_DECISIONS:
+            self._decisions[key] = decision
+        return decision
+
+    @property
+    def grants_full_access(self) -> bool:
+        """True se algum Allow incondicional concede todas as ações ("*") sobre todos os recursos."""
+        return any(
+            s.effect == ALLOW and not s.has_condition and s.actions is not None and s.actions.match_all
+            and s.resources is not None and s.resources.match_all
+            for s in self.statements
+        )
+
+
+class PolicyDocumentCache:
+    """
+    Cache LRU de documentos compilados, indexado pelo SHA-256 do conteúdo. Documentos idênticos anexados a
+    muitos usuários e roles (o caso comum) são interpretados e compilados uma única vez por processo.
+    Documentos em string usam o hash do próprio texto, sem `json.loads`, quando já estão no cache.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Optional[CompiledPolicyDocument]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(document: Any) -> str:
+        text = document if isinstance(document, str) else canonical_json(document)
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, document: Any) -> Optional[CompiledPolicyDocument]:
+        """Documento compilado (dict ou JSON em string), ou None se não for um documento de política válido."""
+        if not document:
+            return None
+        key = self._key(document)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        compiled = self._compile(document)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = compiled
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    @staticmethod
+    def _compile(document: Any) -> Optional[CompiledPolicyDocument]:
+        if isinstance(document, str):
+            try:
+                document = json.loads(document)
+            except ValueError:
+                return None
+        return CompiledPolicyDocument(document) if isinstance(document, dict) else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+policy_document_cache = PolicyDocumentCache()
+
+
+def _get(item: Dict[str, Any], *keys: str) -> Any:
+    for key in keys:
+        value = item.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def principal_policy_documents(principal: Dict[str, Any], cache: PolicyDocumentCache = policy_document_cache) -> List[CompiledPolicyDocument]:
+    """
+    Documentos compilados de um usuário ou role, no formato do collector ou do schema: políticas inline com
+    `policy_document` e políticas anexadas com documento próprio ou conhecido em AWS_MANAGED_POLICY_DOCUMENTS.
+    """
+    documents: List[CompiledPolicyDocument] = []
+    for attachment in _as_list(_get(principal, "attached_policies", "AttachedManagedPolicies")):
+        if not isinstance(attachment, dict):
+            continue
+        document = _get(attachment, "policy_document", "PolicyDocument") or \
+            AWS_MANAGED_POLICY_DOCUMENTS.get(_get(attachment, "policy_arn", "PolicyArn"))
+        compiled = cache.get(document)
+        if compiled is not None:
+            documents.append(compiled)
+    for inline in _as_list(_get(principal, "inline_policies", "RolePolicyList", "UserPolicyList")):
+        if not isinstance(inline, dict):
+            continue
+        compiled = cache.get(_get(inline, "policy_document", "PolicyDocument"))
+        if compiled is not None:
+            documents.append(compiled)
+    return documents
+
+
+def is_action_allowed(documents: Iterable[CompiledPolicyDocument], action: str, resource: Optional[str] = None) -> bool:
+    """Avaliação de políticas de identidade: permitido se algum documento permite e nenhum nega explicitamente."""
+    allowed = False
+    for document in documents:
+        decision = document.evaluate(action, resource)
+        if decision == DENY:
+            return False
+        if decision == ALLOW:
+            allowed = True
+    return allowed
+
+
+def principal_allows(principal: Dict[str, Any], action: str, resource: Optional[str] = None,
+                     cache: PolicyDocumentCache = policy_document_cache) -> bool:
+    """O principal `principal` pode executar `action` em `resource` (ou em algum recurso, se None)?"""
+    return is_action_allowed(principal_policy_documents(principal, cache), action, resource)
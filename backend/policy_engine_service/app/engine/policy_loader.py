@@ -1,49 +1,86 @@
 import os
+import logging
 import yaml
-from typing import List, Dict, Any
-from functools import lru_cache
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
 
 # Caminho para o diretório onde as políticas YAML estão armazenadas.
 POLICIES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'policies')
 
-@lru_cache()
-def load_policies() -> List[Dict[str, Any]]:
+POLICY_FILE_EXTENSIONS = ('.yml', '.yaml')
+
+
+def list_policy_files(policies_dir: str = POLICIES_DIR) -> List[str]:
+    """Retorna os caminhos dos arquivos de política do diretório, em ordem determinística."""
+    if not os.path.isdir(policies_dir):
+        return []
+    return sorted(
+        os.path.join(policies_dir, filename)
+        for filename in os.listdir(policies_dir)
+        if filename.endswith(POLICY_FILE_EXTENSIONS)
+    )
+
+
+def parse_policy_document(document: Any, filename: str) -> List[Dict[str, Any]]:
+    """
+    Extrai as políticas de um documento YAML já carregado.
+
+    Dois formatos são aceitos:
+      - uma única política no nível raiz (com 'id');
+      - uma lista de políticas sob a chave 'policies'.
     """
-    Carrega todas as políticas de arquivos .yml do diretório de políticas.
+    if not isinstance(document, dict):
+        logger.warning(f"Arquivo de política inválido (esperado um mapeamento): {filename}")
+        return []
+
+    if 'policies' in document:
+        candidates = document.get('policies') or []
+        if not isinstance(candidates, list):
+            logger.warning(f"A chave 'policies' deve conter uma lista em '{filename}'.")
+            return []
+    else:
+        candidates = [document]
+
+    policies = []
+    for policy_data in candidates:
+        if isinstance(policy_data, dict) and 'id' in policy_data:
+            # Adiciona o nome do arquivo de origem para referência, se necessário
+            policy_data['source_file'] = filename
+            policies.append(policy_data)
+        else:
+            logger.warning(f"Política inválida ou sem 'id' ignorada em '{filename}'.")
+    return policies
+
 
-    Percorre o diretório POLICIES_DIR, lê cada arquivo .yml,
-    faz o parsing do seu conteúdo e retorna uma lista de políticas.
+def load_policies(policies_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Carrega todas as políticas de arquivos .yml/.yaml do diretório de políticas.
 
     Returns:
         Uma lista de dicionários, onde cada dicionário representa uma política.
     """
-    if not os.path.exists(POLICIES_DIR):
-        print(f"AVISO: Diretório de políticas '{POLICIES_DIR}' não encontrado.")
+    policies_dir = policies_dir or POLICIES_DIR
+    if not os.path.isdir(policies_dir):
+        logger.warning(f"Diretório de políticas '{policies_dir}' não encontrado.")
         return []
 
-    all_policies = []
-    print(f"Carregando políticas de: {POLICIES_DIR}")
-
-    for filename in os.listdir(POLICIES_DIR):
-        if filename.endswith(('.yml', '.yaml')):
-            filepath = os.path.join(POLICIES_DIR, filename)
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    policy_data = yaml.safe_load(f)
-                    if policy_data and 'id' in policy_data:
-                        # Adiciona o nome do arquivo de origem para referência, se necessário
-                        policy_data['source_file'] = filename
-                        all_policies.append(policy_data)
-                        print(f"  - Política '{policy_data['id']}' carregada de '{filename}'")
-                    else:
-                        print(f"AVISO: Arquivo de política inválido ou sem 'id': {filename}")
-            except yaml.YAMLError as e:
-                print(f"ERRO: Falha ao fazer o parsing do arquivo YAML '{filename}': {e}")
-            except Exception as e:
-                print(f"ERRO: Falha ao ler o arquivo de política '{filename}': {e}")
-
-    print(f"Total de {len(all_policies)} políticas carregadas.")
-    return all_policies
+    all_policies: List[Dict[str, Any]] = []
+    for filepath in list_policy_files(policies_dir):
+        filename = os.path.basename(filepath)
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                document = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            logger.error(f"Falha ao fazer o parsing do arquivo YAML '{filename}': {e}")
+            continue
+        except OSError as e:
+            logger.error(f"Falha ao ler o arquivo de política '{filename}': {e}")
+            continue
 
-# Para permitir o acesso fácil às políticas carregadas em toda a aplicação
-loaded_policies = load_policies()
+        file_policies = parse_policy_document(document, filename)
+        logger.debug(f"{len(file_policies)} política(s) carregada(s) de '{filename}'.")
+        all_policies.extend(file_policies)
+
+    logger.info(f"Total de {len(all_policies)} políticas carregadas de '{policies_dir}'.")
+    return all_policies
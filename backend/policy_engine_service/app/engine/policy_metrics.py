@@ -0,0 +1,85 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Counter, Histogram
+
+from app.core.metrics import get_or_create_metric
+
+
+# Métricas por política. O único rótulo é o policy_id, então a cardinalidade é limitada pelo número de
+# políticas (YAML do registro + classes dos módulos por provedor). Expostas em /metrics pelo starlette_prometheus.
+POLICY_EVALUATION_SECONDS = get_or_create_metric(
+    Histogram,
+    "policy_engine_policy_evaluation_seconds",
+    "Tempo gasto avaliando uma política sobre um lote de recursos.",
+    labelnames=["policy_id"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+POLICY_RESOURCES_EVALUATED = get_or_create_metric(
+    Counter, "policy_engine_policy_resources_evaluated_total", "Recursos avaliados por política.", labelnames=["policy_id"]
+)
+POLICY_ALERTS = get_or_create_metric(
+    Counter, "policy_engine_policy_alerts_total", "Alertas gerados por política.", labelnames=["policy_id"]
+)
+POLICY_ERRORS = get_or_create_metric(
+    Counter, "policy_engine_policy_errors_total", "Erros ao avaliar uma política.", labelnames=["policy_id"]
+)
+
+def record_policy_evaluation(policy_id: str, seconds: Optional[float], resources: int, alerts: int, errors: int = 0) -> None:
+    """
+    Publica o resultado de uma avaliação de `policy_id` sobre um lote de `resources` recursos.
+    `seconds` é None quando o tempo não é conhecido (ex.: a tarefa falhou no pool de processos).
+    """
+    if seconds is not None:
+        POLICY_EVALUATION_SECONDS.labels(policy_id).observe(seconds)
+    if resources:
+        POLICY_RESOURCES_EVALUATED.labels(policy_id).inc(resources)
+    if alerts:
+        POLICY_ALERTS.labels(policy_id).inc(alerts)
+    if errors:
+        POLICY_ERRORS.labels(policy_id).inc(errors)
+
+
+def count_alerts(result: Any) -> int:
+    if not result:
+        return 0
+    return len(result) if isinstance(result, list) else 1
+
+
+class PolicyMetricsRecorder:
+    """
+    Acumula tempo, recursos, alertas e erros por política durante uma chamada `evaluate_*` e publica tudo
+    de uma vez em `flush`, uma observação do histograma por política e por chamada. Assim o laço por
+    recurso não paga o custo das métricas do Prometheus a cada `check`.
+    """
+
+    __slots__ = ("_totals",)
+
+    def __init__(self):
+        # policy_id -> [segundos, recursos, alertas, erros]
+        self._totals: Dict[str, List[Any]] = {}
+
+    def _add(self, policy_id: str, seconds: float, alerts: int, errors: int) -> None:
+        totals = self._totals.get(policy_id)
+        if totals is None:
+            totals = self._totals[policy_id] = [0.0, 0, 0, 0]
+        totals[0] += seconds
+        totals[1] += 1
+        totals[2] += alerts
+        totals[3] += errors
+
+    def check(self, policy: Any, *args: Any) -> Any:
+        """Chama `policy.check(*args)` medindo-a; exceções são contadas e propagadas para o tratamento do chamador."""
+        start = time.perf_counter()
+        try:
+            result = policy.check(*args)
+        except Exception:
+            self._add(policy.policy_id, time.perf_counter() - start, 0, 1)
+            raise
+        self._add(policy.policy_id, time.perf_counter() - start, count_alerts(result), 0)
+        return result
+
+    def flush(self) -> None:
+        for policy_id, (seconds, resources, alerts, errors) in self._totals.items():
+            record_policy_evaluation(policy_id, seconds, resources, alerts, errors)
+        self._totals.clear()
@@ -0,0 +1,147 @@
+import os
+import hashlib
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.engine.policy_loader import POLICIES_DIR, list_policy_files, load_policies
+from app.engine.generic_policy_evaluator import PolicyEvaluator, compile_policy
+from app.engine.change_detection import canonical_json
+
+logger = logging.getLogger(__name__)
+
+# Assinatura do diretório de políticas: (arquivo, mtime_ns, tamanho) de cada arquivo.
+DirectorySignature = Tuple[Tuple[str, int, int], ...]
+
+
+class CompiledPolicy:
+    """Uma política carregada do YAML junto com o seu avaliador já compilado e a versão do registro que a carregou."""
+
+    __slots__ = ("policy", "evaluate", "version")
+
+    def __init__(self, policy: Dict[str, Any], evaluate: PolicyEvaluator, version: int = 0):
+        self.policy = policy
+        self.evaluate = evaluate
+        self.version = version
+
+    @property
+    def policy_id(self) -> str:
+        return self.policy["id"]
+
+
+class _RegistrySnapshot:
+    """Estado imutável do registro. Uma recarga cria um novo snapshot e o troca de uma só vez."""
+
+    __slots__ = ("version", "signature", "policies", "index", "digests")
+
+    def __init__(self, version: int, signature: DirectorySignature, policies: Tuple[CompiledPolicy, ...]):
+        self.version = version
+        self.signature = signature
+        self.policies = policies
+        index: Dict[Tuple[str, str], List[CompiledPolicy]] = {}
+        for compiled in policies:
+            key = (str(compiled.policy.get("provider", "")).lower(), str(compiled.policy.get("service", "")).lower())
+            index.setdefault(key, []).append(compiled)
+        self.index: Dict[Tuple[str, str], Tuple[CompiledPolicy, ...]] = {k: tuple(v) for k, v in index.items()}
+        # Digest do conteúdo das políticas de cada (provider, service), independente da ordem dos arquivos.
+        self.digests: Dict[Tuple[str, str], str] = {
+            key: hashlib.sha256(
+                canonical_json(sorted((c.policy for c in compiled_policies), key=canonical_json)).encode("utf-8")
+            ).hexdigest()
+            for key, compiled_policies in self.index.items()
+        }
+
+
+class PolicyRegistry:
+    """
+    Registro das políticas YAML, indexado por (provider, service) e com avaliadores pré-compilados.
+
+    O diretório de políticas é observado por mtime: `refresh_if_changed` recarrega quando algum arquivo
+    muda, e `start_watching` faz isso periodicamente numa thread em background. Cada recarga troca o
+    snapshot inteiro atomicamente, então leitores concorrentes nunca veem um índice parcial.
+    `version` é incrementado a cada recarga e pode ser usado para invalidar resultados em cache.
+    """
+
+    def __init__(self, policies_dir: str = POLICIES_DIR):
+        self.policies_dir = policies_dir
+        self._reload_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._snapshot = _RegistrySnapshot(version=0, signature=(), policies=())
+        self.reload()
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def __len__(self) -> int:
+        return len(self._snapshot.policies)
+
+    def all_policies(self) -> Tuple[CompiledPolicy, ...]:
+        return self._snapshot.policies
+
+    def policies_for(self, provider: str, service: str) -> Tuple[CompiledPolicy, ...]:
+        return self._snapshot.index.get((provider.lower(), service.lower()), ())
+
+    def policy_digest(self, provider: str, service: str) -> str:
+        """
+        SHA-256 do conteúdo das políticas de (provider, service). Muda só quando essas políticas mudam, ao
+        contrário de `version`, que muda a cada recarga de qualquer arquivo.
+        """
+        return self._snapshot.digests.get((provider.lower(), service.lower()), "")
+
+    def _directory_signature(self) -> DirectorySignature:
+        signature = []
+        for filepath in list_policy_files(self.policies_dir):
+            try:
+                stat = os.stat(filepath)
+            except OSError:
+                continue
+            signature.append((os.path.basename(filepath), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def reload(self) -> int:
+        """Recarrega e recompila todas as políticas do diretório. Retorna a nova versão."""
+        with self._reload_lock:
+            signature = self._directory_signature()
+            version = self._snapshot.version + 1
+            compiled = tuple(
+                CompiledPolicy(policy, compile_policy(policy), version) for policy in load_policies(self.policies_dir)
+            )
+            self._snapshot = _RegistrySnapshot(version, signature, compiled)
+            logger.info(f"Registro de políticas carregado (versão {self._snapshot.version}) com {len(compiled)} políticas.")
+            return self._snapshot.version
+
+    def refresh_if_changed(self) -> bool:
+        """Recarrega o registro se algum arquivo de política foi adicionado, removido ou modificado."""
+        if self._directory_signature() == self._snapshot.signature:
+            return False
+        self.reload()
+        return True
+
+    def _watch_loop(self, interval_seconds: float) -> None:
+        while not self._stop_event.wait(interval_seconds):
+            try:
+                self.refresh_if_changed()
+            except Exception as e:
+                logger.exception(f"Erro ao recarregar o registro de políticas: {e}")
+
+    def start_watching(self, interval_seconds: float) -> None:
+        """Inicia a thread que verifica o diretório de políticas a cada `interval_seconds`."""
+        if interval_seconds <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop, args=(interval_seconds,), name="policy-registry-watcher", daemon=True
+        )
+        self._watcher.start()
+        logger.info(f"Observando '{self.policies_dir}' por mudanças a cada {interval_seconds}s.")
+
+    def stop_watching(self) -> None:
+        self._stop_event.set()
+        if self._watcher:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+
+policy_registry = PolicyRegistry()
@@ -0,0 +1,261 @@
+import re
+import ipaddress
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Callable, Tuple, Union
+
+# Valor retornado pelos acessores quando o caminho não existe no recurso.
+MISSING = object()
+
+Accessor = Callable[[Any], Any]
+Predicate = Callable[[Any], bool]
+
+
+class RuleCompilationError(ValueError):
+    """Regra declarativa inválida (operador desconhecido, regex ou CIDR mal formados, etc.)."""
+
+
+class _FanOut(list):
+    """Valores coletados ao atravessar uma lista no meio do caminho (ex.: 'ip_permissions.ip_ranges')."""
+
+
+def _get(obj: Any, key: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(key, MISSING)
+    return getattr(obj, key, MISSING)
+
+
+def compile_accessor(path: str) -> Accessor:
+    """
+    Compila um caminho pontuado ('acl.grants') num acessor. Dicts são lidos por chave e objetos por atributo.
+    Se o caminho atravessa uma lista, o acessor retorna todos os valores encontrados nos itens (_FanOut).
+    """
+    parts: Tuple[str, ...] = tuple(p for p in path.split(".") if p)
+    if not parts:
+        raise RuleCompilationError("O campo 'field' da regra não pode ser vazio.")
+
+    if len(parts) == 1:
+        key = parts[0]
+
+        def access_key(resource: Any) -> Any:
+            value = _get(resource, key)
+            return MISSING if value is None else value
+
+        return access_key
+
+    def access(resource: Any) -> Any:
+        current = resource
+        for position, part in enumerate(parts):
+            if isinstance(current, list) and position > 0:
+                return _fan_out(current, parts[position:])
+            current = _get(current, part)
+            if current is MISSING or current is None:
+                return MISSING
+        return current
+
+    return access
+
+
+def _fan_out(items: List[Any], remaining: Tuple[str, ...]) -> Any:
+    values = _FanOut()
+    pending = [(item, 0) for item in items]
+    while pending:
+        current, position = pending.pop()
+        while position < len(remaining):
+            if isinstance(current, list):
+                pending.extend((item, position) for item in current)
+                current = MISSING
+                break
+            current = _get(current, remaining[position])
+            if current is MISSING or current is None:
+                current = MISSING
+                break
+            position += 1
+        if current is not MISSING:
+            values.append(current)
+    return values if values else MISSING
+
+
+def _iter_leaves(value: Any):
+    if isinstance(value, dict):
+        for nested in value.values():
+            yield from _iter_leaves(nested)
+    elif isinstance(value, (list, tuple)):
+        for nested in value:
+            yield from _iter_leaves(nested)
+    else:
+        yield value
+
+
+def _as_list(value: Any) -> List[Any]:
+    return list(value) if isinstance(value, (list, tuple, set, frozenset)) else [value]
+
+
+@lru_cache(maxsize=65536)
+def _parse_network(text: str) -> Optional[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    try:
+        return ipaddress.ip_network(text.strip(), strict=False)
+    except ValueError:
+        return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# --- Operadores ---
+# Cada fábrica recebe o 'value' da regra (e a própria regra) e retorna um predicado sobre o valor do campo.
+# O predicado só é chamado quando o campo existe; 'exists' é tratado à parte.
+
+def _op_eq(expected: Any, rule: Dict[str, Any]) -> Predicate:
+    return lambda actual: actual == expected
+
+
+def _op_ne(expected: Any, rule: Dict[str, Any]) -> Predicate:
+    return lambda actual: actual != expected
+
+
+def _op_in(expected: Any, rule: Dict[str, Any]) -> Predicate:
+    options = _as_list(expected)
+    try:
+        option_set = frozenset(options)
+        return lambda actual: _is_hashable(actual) and actual in option_set
+    except TypeError:
+        return lambda actual: actual in options
+
+
+def _is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+        return True
+    except TypeError:
+        return False
+
+
+def _op_contains_any_of(expected: Any, rule: Dict[str, Any]) -> Predicate:
+    targets = frozenset(_as_list(expected))
+    item_field = rule.get("item_field")
+    item_accessor = compile_accessor(item_field) if item_field else None
+
+    def predicate(actual: Any) -> bool:
+        items = actual if isinstance(actual, (list, tuple)) else [actual]
+        for item in items:
+            if item_accessor is not None:
+                candidate = item_accessor(item)
+                candidates = candidate if isinstance(candidate, _FanOut) else [candidate]
+            elif isinstance(item, (dict, list, tuple)):
+                # Sem 'item_field', qualquer valor escalar dentro do item conta (ex.: Grantee.URI de um grant).
+                candidates = _iter_leaves(item)
+            else:
+                candidates = [item]
+            for candidate in candidates:
+                if _is_hashable(candidate) and candidate in targets:
+                    return True
+        return False
+
+    return predicate
+
+
+def _op_regex(expected: Any, rule: Dict[str, Any]) -> Predicate:
+    try:
+        pattern = re.compile(str(expected))
+    except re.error as e:
+        raise RuleCompilationError(f"Regex inválida '{expected}': {e}")
+    return lambda actual: isinstance(actual, str) and pattern.search(actual) is not None
+
+
+def _op_cidr_overlaps(expected: Any, rule: Dict[str, Any]) -> Predicate:
+    networks = []
+    for cidr in _as_list(expected):
+        network = _parse_network(str(cidr))
+        if network is None:
+            raise RuleCompilationError(f"CIDR inválido na regra: '{cidr}'")
+        networks.append(network)
+
+    def predicate(actual: Any) -> bool:
+        for candidate in _as_list(actual):
+            if not isinstance(candidate, str):
+                continue
+            parsed = _parse_network(candidate)
+            if parsed is None:
+                continue
+            for network in networks:
+                if parsed.version == network.version and parsed.overlaps(network):
+                    return True
+        return False
+
+    return predicate
+
+
+def _numeric(compare: Callable[[float, float], bool]) -> Callable[[Any, Dict[str, Any]], Predicate]:
+    def factory(expected: Any, rule: Dict[str, Any]) -> Predicate:
+        threshold = _to_float(expected)
+        if threshold is None:
+            raise RuleCompilationError(f"Valor numérico inválido na regra: '{expected}'")
+
+        def predicate(actual: Any) -> bool:
+            number = _to_float(actual)
+            return number is not None and compare(number, threshold)
+
+        return predicate
+    return factory
+
+
+OPERATORS: Dict[str, Callable[[Any, Dict[str, Any]], Predicate]] = {
+    "eq": _op_eq,
+    "ne": _op_ne,
+    "in": _op_in,
+    "contains_any_of": _op_contains_any_of,
+    "regex": _op_regex,
+    "cidr_overlaps": _op_cidr_overlaps,
+    "gt": _numeric(lambda a, b: a > b),
+    "gte": _numeric(lambda a, b: a >= b),
+    "lt": _numeric(lambda a, b: a < b),
+    "lte": _numeric(lambda a, b: a <= b),
+}
+
+
+def compile_rule(rule: Dict[str, Any]) -> Callable[[Any], bool]:
+    """
+    Compila uma regra {'field', 'operator', 'value'} num predicado sobre o recurso inteiro.
+    A regra descreve a condição de violação: o predicado retorna True quando o recurso viola a regra.
+    """
+    if not isinstance(rule, dict) or "field" not in rule or "operator" not in rule:
+        raise RuleCompilationError(f"Regra inválida (esperado 'field' e 'operator'): {rule}")
+
+    accessor = compile_accessor(str(rule["field"]))
+    operator = str(rule["operator"]).lower()
+
+    if operator == "exists":
+        should_exist = bool(rule.get("value", True))
+        return lambda resource: (accessor(resource) is not MISSING) == should_exist
+
+    factory = OPERATORS.get(operator)
+    if factory is None:
+        raise RuleCompilationError(f"Operador desconhecido: '{rule['operator']}'")
+    value_predicate = factory(rule.get("value"), rule)
+
+    def matches(resource: Any) -> bool:
+        actual = accessor(resource)
+        if actual is MISSING:
+            return False
+        if isinstance(actual, _FanOut):
+            return any(value_predicate(v) for v in actual)
+        return value_predicate(actual)
+
+    return matches
+
+
+def compile_rules(rules: List[Dict[str, Any]]) -> Callable[[Any], bool]:
+    """Compila uma lista de regras; o recurso viola a política quando todas as regras casam."""
+    if not isinstance(rules, list) or not rules:
+        raise RuleCompilationError("'rules' deve ser uma lista não vazia.")
+    predicates = tuple(compile_rule(rule) for rule in rules)
+
+    if len(predicates) == 1:
+        return predicates[0]
+    return lambda resource: all(predicate(resource) for predicate in predicates)
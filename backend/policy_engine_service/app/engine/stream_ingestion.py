@@ -0,0 +1,59 @@
+import json
+from typing import Any, AsyncIterator, Dict, Tuple
+
+from pydantic import ValidationError
+
+from app.schemas.input_data_schema import STREAM_RECORD_SCHEMAS
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class NDJSONLineTooLong(ValueError):
+    """Uma linha do corpo NDJSON passou do tamanho máximo permitido."""
+
+
+async def iter_ndjson_lines(byte_chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Quebra um fluxo de bytes em linhas NDJSON à medida que os bytes chegam, retornando (número da linha, linha).
+    Linhas em branco são ignoradas. Só a linha incompleta atual fica em memória, limitada a `max_line_bytes`.
+    """
+    pending = b""
+    line_number = 0
+    async for chunk in byte_chunks:
+        if not chunk:
+            continue
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+        if len(pending) > max_line_bytes:
+            raise NDJSONLineTooLong(f"A linha {line_number + 1} excede o limite de {max_line_bytes} bytes.")
+    if pending.strip():
+        yield line_number + 1, pending
+
+
+def parse_json_object(line: bytes) -> Dict[str, Any]:
+    try:
+        value = json.loads(line)
+    except ValueError as e:
+        raise ValueError(f"JSON inválido: {e}")
+    if not isinstance(value, dict):
+        raise ValueError("Cada linha deve ser um objeto JSON.")
+    return value
+
+
+def parse_stream_record(service: str, line: bytes) -> Dict[str, Any]:
+    """
+    Valida um recurso contra o schema do serviço (quando existe) e o retorna como dict com os nomes
+    dos campos do schema, o formato consumido pelo motor. Levanta ValueError para registros inválidos.
+    """
+    record = parse_json_object(line)
+    schema = STREAM_RECORD_SCHEMAS.get(service.lower())
+    if schema is None:
+        return record
+    try:
+        return schema.model_validate(record).model_dump()
+    except ValidationError as e:
+        raise ValueError(f"Registro inválido para o serviço '{service}': {e.errors(include_url=False, include_input=False)}")
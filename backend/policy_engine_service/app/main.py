@@ -4,8 +4,15 @@ from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api.v1 import analysis_controller, alerts_controller, asset_controller, attack_path_controller, remediation_controller
 from app.core.logging_config import setup_logging
-from app.db.session import engine
+from app.db.session import engine, async_engine
 from app.models import alert_model
+from app.engine.policy_registry import policy_registry
+from app.engine.core_engine import policy_engine
+from app.services.attack_path_worker import attack_path_worker
+from app.services.alert_summary_reconciler import alert_summary_reconciler
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.http_client_pool import http_client_pool
+from app.services.audit_service_client import audit_service_client
 
 # Configurar logging
 setup_logging()
@@ -38,10 +45,27 @@ async def error_handling_middleware(request: Request, call_next):
 @app.on_event("startup")
 async def startup_event():
     logger.info(f"Iniciando o serviço: {settings.PROJECT_NAME}")
+    http_client_pool.start("notification_service", "audit_service")
+    policy_registry.start_watching(settings.POLICY_RELOAD_INTERVAL_SECONDS)
+    attack_path_worker.start()
+    alert_summary_reconciler.start(settings.ALERT_SUMMARY_RECONCILE_INTERVAL_SECONDS)
+    notification_dispatcher.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info(f"Encerrando o serviço: {settings.PROJECT_NAME}")
+    policy_registry.stop_watching()
+    alert_summary_reconciler.stop()
+    await attack_path_worker.stop()
+    # Não perde as mudanças acumuladas na janela atual.
+    await attack_path_worker.flush()
+    policy_engine.executor.shutdown()
+    # Notificações não entregues continuam no notification_outbox para a próxima inicialização.
+    await notification_dispatcher.stop()
+    # Envia os eventos de auditoria ainda na fila antes de fechar os clientes HTTP.
+    await audit_service_client.close()
+    await http_client_pool.close()
+    await async_engine.dispose()
 
 @app.get("/health", tags=["Health Check"])
 def health_check():
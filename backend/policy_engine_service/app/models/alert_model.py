@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum as SQLAlchemyEnum
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, ForeignKey, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.sql import func
 import enum
@@ -44,10 +44,60 @@ class AlertModel(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     first_seen_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     last_seen_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Última varredura completa (scan_generations.id) que confirmou o alerta; ver CRUDAlert.resolve_unseen.
+    scan_generation = Column(Integer, nullable=True)
+
+    # Índices compostos para as combinações de filtro mais usadas na listagem, terminando em
+    # (last_seen_at, id), a ordenação padrão do keyset; e para a busca de alertas abertos na ingestão (d010).
+    __table_args__ = (
+        Index("ix_alerts_last_seen_id", "last_seen_at", "id"),
+        Index("ix_alerts_status_last_seen_id", "status", "last_seen_at", "id"),
+        Index("ix_alerts_provider_status_last_seen_id", "provider", "status", "last_seen_at", "id"),
+        Index("ix_alerts_account_status_last_seen_id", "account_id", "status", "last_seen_at", "id"),
+        Index("ix_alerts_severity_status_last_seen_id", "severity", "status", "last_seen_at", "id"),
+        Index("ix_alerts_open_lookup", "provider", "resource_id", "policy_id", "status"),
+    )
 
     def __repr__(self):
         return f"<AlertModel(id={self.id}, title='{self.title}', provider='{self.provider}', resource_id='{self.resource_id}')>"
 
+
+# account_id nulo nos alertas é gravado como '' no resumo, já que faz parte da chave primária.
+SUMMARY_NO_ACCOUNT = ""
+
+class AlertSummaryCount(Base):
+    """
+    Contagem de alertas por (conta, provider, severidade, status), mantida pelo CRUDAlert na mesma transação
+    de cada inserção, mudança de status/severidade e remoção. O resumo do dashboard lê estas linhas
+    (uma por combinação existente) em vez de agregar a tabela de alertas.
+    """
+    __tablename__ = "alert_summary_counts"
+
+    account_id = Column(String, primary_key=True)
+    provider = Column(String, primary_key=True)
+    severity = Column(String(32), primary_key=True)
+    status = Column(String(32), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class NotificationOutbox(Base):
+    """
+    Notificação pendente de um alerta, gravada na mesma transação que o persiste. O NotificationDispatcher
+    drena a tabela em lotes para o notification_service e apaga as linhas entregues; falhas são reagendadas
+    em next_attempt_at com backoff. next_attempt_at nulo marca uma linha que esgotou as tentativas.
+    """
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        Index("ix_notification_outbox_next_attempt", "next_attempt_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    alert_id = Column(Integer, ForeignKey("alerts.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_error = Column(String, nullable=True)
+
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
 
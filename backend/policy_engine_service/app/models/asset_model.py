@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, func, Enum as SQLEnum, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, func, Enum as SQLEnum, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 import enum
@@ -15,6 +15,10 @@ class CloudProviderEnum(str, enum.Enum):
 
 class CloudAsset(Base):
     __tablename__ = "cloud_assets"
+    __table_args__ = (
+        # Alvo do ON CONFLICT usado pelo upsert em lote (CRUDAsset.bulk_upsert).
+        Index("uq_cloud_assets_account_asset", "account_id", "asset_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     asset_id = Column(String, nullable=False, index=True, comment="ID único do recurso no provedor (ex: ARN, selfLink).")
@@ -24,12 +28,20 @@ class CloudAsset(Base):
     account_id = Column(String, nullable=False, index=True)
     region = Column(String, nullable=True)
     configuration = Column(JSON, nullable=True, comment="Configuração completa do recurso em formato JSON.")
+    content_hash = Column(String(64), nullable=True, comment="Hash canônico da configuração e do digest das políticas que a avaliaram.")
+    scan_generation = Column(Integer, nullable=True, comment="Última varredura completa (scan_generations.id) em que o ativo apareceu.")
+    is_stale = Column(Boolean, nullable=False, default=False, server_default="false", comment="Ausente da última varredura completa da sua conta/serviço.")
 
     first_seen_at = Column(DateTime(timezone=True), server_default=func.now())
     last_seen_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 class AssetRelationship(Base):
     __tablename__ = "asset_relationships"
+    __table_args__ = (
+        # Evita arestas repetidas e serve a busca por origem; o índice por destino serve a busca reversa.
+        Index("uq_asset_relationships_edge", "source_asset_id", "target_asset_id", "relationship_type", unique=True),
+        Index("ix_asset_relationships_target", "target_asset_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     source_asset_id = Column(Integer, ForeignKey("cloud_assets.id"), nullable=False)
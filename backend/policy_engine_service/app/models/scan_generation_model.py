@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, func, Index
+from sqlalchemy.ext.declarative import declarative_base
+
+Base = declarative_base()
+
+class ScanGeneration(Base):
+    """
+    Uma varredura de (conta, provider, serviço). O id é crescente, então "gerações anteriores" de um escopo são
+    as de id menor: alertas e ativos carimbados com uma geração anterior à de uma varredura completa não foram
+    vistos nela e são resolvidos/marcados como obsoletos com um UPDATE cada.
+    """
+    __tablename__ = "scan_generations"
+    __table_args__ = (
+        Index("ix_scan_generations_scope", "account_id", "provider", "service"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(String, nullable=False)
+    provider = Column(String, nullable=False)
+    service = Column(String, nullable=False)
+    started_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    resolved_alerts = Column(Integer, nullable=True)
+    stale_assets = Column(Integer, nullable=True)
@@ -46,8 +46,7 @@ class Alert(AlertBase):
 
 
     class Config:
-        orm_mode = True # Pydantic v1
-        # from_attributes = True # Pydantic v2
+        from_attributes = True # Pydantic v2 (era orm_mode no v1)
         use_enum_values = True # Ensure enum values are used in serialization
 
 # Schema for updating an alert (e.g., changing status)
@@ -66,3 +65,6 @@ class AlertSummarySchema(BaseModel):
     total_alerts: int
     by_severity: Dict[str, int]
     by_status: Dict[str, int]
+
+# Nome usado pelo CRUD, pelos controllers e pelo notification_client para a representação completa do alerta.
+AlertSchema = Alert
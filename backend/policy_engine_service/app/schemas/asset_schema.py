@@ -19,6 +19,7 @@ class AssetSchema(AssetBase):
     id: int
     first_seen_at: datetime.datetime
     last_seen_at: datetime.datetime
+    is_stale: bool = False
 
     class Config:
         from_attributes = True
@@ -24,3 +24,15 @@ class AttackPathSchema(AttackPathBase):
 
     class Config:
         from_attributes = True
+
+class AttackPathAnalysisStatus(BaseModel):
+    running: bool
+    running_account: Optional[str] = None
+    pending_accounts: List[str] = Field(default_factory=list)
+    debounce_seconds: float
+    runs: int = 0
+    last_run_at: Optional[datetime.datetime] = None
+    last_run_account: Optional[str] = None
+    last_run_duration_seconds: Optional[float] = None
+    last_run_paths_found: Optional[int] = None
+    last_error: Optional[str] = None
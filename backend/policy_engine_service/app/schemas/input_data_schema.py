@@ -696,6 +696,36 @@ class AnalysisRequest(BaseModel):
     data: SupportedDataTypes
     account_id: Optional[str] = Field(None, description="Cloud account ID (e.g., AWS Account ID, GCP Project ID, Huawei Domain/Project ID).")
     # Para Huawei, account_id pode ser o Domain ID ou Project ID dependendo do serviço.
+    collection_complete: bool = Field(False, description="True só quando o coletor confirma que coletou tudo (nenhuma região falhou); só então a varredura resolve alertas não vistos e marca ativos obsoletos.")
 
     class Config:
         pass
+
+
+class AnalysisStreamHeader(BaseModel):
+    """Primeira linha do corpo NDJSON de /analyze/stream; as linhas seguintes são os recursos."""
+    provider: str = Field(description="Cloud provider name, e.g., 'aws', 'gcp', 'huawei'.")
+    service: str = Field(description="Service name, e.g., 's3', 'ec2_instances', 'gcp_storage_buckets'.")
+    account_id: Optional[str] = Field(None, description="Cloud account ID.")
+    collection_complete: bool = Field(False, description="True só quando o coletor confirma que coletou tudo; só então a varredura resolve alertas não vistos.")
+
+
+# Schema de cada recurso por serviço na ingestão em streaming. Serviços sem schema aceitam qualquer objeto JSON.
+STREAM_RECORD_SCHEMAS = {
+    "s3": S3BucketDataInput,
+    "ec2_instances": EC2InstanceDataInput,
+    "ec2_security_groups": EC2SecurityGroupDataInput,
+    "iam_users": IAMUserDataInput,
+    "iam_roles": IAMRoleDataInput,
+    "gcp_storage_buckets": GCPStorageBucketDataInput,
+    "gcp_compute_instances": GCPComputeInstanceDataInput,
+    "gcp_compute_firewalls": GCPFirewallDataInput,
+    "huawei_obs_buckets": HuaweiOBSBucketDataInput,
+    "huawei_ecs_servers": HuaweiECSServerDataInput,
+    "huawei_iam_users": HuaweiIAMUserDataInput,
+    "azure_virtual_machines": AzureVirtualMachineDataInput,
+    "azure_storage_accounts": AzureStorageAccountDataInput,
+    "google_workspace_users": GoogleWorkspaceUserDataInput,
+    "google_workspace_shared_drives": GoogleWorkspaceSharedDriveDataInput,
+    "google_workspace_drive_files": GoogleWorkspaceDriveFileDataInput,
+}
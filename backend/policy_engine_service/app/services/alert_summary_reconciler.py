@@ -0,0 +1,61 @@
+import logging
+import threading
+from typing import Callable, Optional
+from sqlalchemy.orm import Session
+
+from app.crud.crud_alert import alert_crud
+
+logger = logging.getLogger(__name__)
+
+
+class AlertSummaryReconciler:
+    """
+    Recalcula periodicamente alert_summary_counts a partir da tabela de alertas, corrigindo drift causado por
+    escritas que não passam pelo CRUDAlert (SQL manual, restaurações). Roda uma vez ao iniciar, o que também
+    preenche o resumo num banco que já tinha alertas, e depois a cada `interval_seconds` numa thread.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None):
+        self._session_factory = session_factory
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_corrections: Optional[int] = None
+
+    def _get_session_factory(self) -> Callable[[], Session]:
+        if self._session_factory is None:
+            from app.db.session import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    def reconcile_once(self) -> int:
+        with self._get_session_factory()() as db:
+            self.last_corrections = alert_crud.reconcile_summary(db)
+        return self.last_corrections
+
+    def _loop(self, interval_seconds: float) -> None:
+        while True:
+            try:
+                self.reconcile_once()
+            except Exception as e:
+                logger.exception(f"Erro ao reconciliar o resumo de alertas: {e}")
+            if self._stop_event.wait(interval_seconds):
+                return
+
+    def start(self, interval_seconds: float) -> None:
+        if interval_seconds <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._loop, args=(interval_seconds,), name="alert-summary-reconciler", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Reconciliação do resumo de alertas a cada {interval_seconds}s.")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+alert_summary_reconciler = AlertSummaryReconciler()
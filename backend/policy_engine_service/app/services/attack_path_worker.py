@@ -0,0 +1,235 @@
+import time
+import asyncio
+import logging
+import datetime
+from typing import List, Dict, Any, Iterable, Optional, Callable, Set, Tuple
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.services.graph_analysis_service import GRAPH_NODE_FIELDS, GRAPH_NODE_FLAGS, run_attack_path_analysis
+
+logger = logging.getLogger(__name__)
+
+
+# Chaves da configuração que o grafo lê; o resto não precisa ficar retido enquanto a janela não fecha.
+_GRAPH_CONFIG_KEYS = frozenset(key for keys in GRAPH_NODE_FIELDS.values() for key in keys) | frozenset(GRAPH_NODE_FLAGS)
+
+
+def _slim_asset(asset: Dict[str, Any]) -> Dict[str, Any]:
+    configuration = asset.get("configuration") or {}
+    return {
+        "id": asset["id"], "asset_type": asset["asset_type"], "asset_id": asset["asset_id"],
+        "name": asset.get("name"), "account_id": asset.get("account_id"),
+        "configuration": {k: v for k, v in configuration.items() if k in _GRAPH_CONFIG_KEYS},
+    }
+
+
+class _PendingChanges:
+    """Mudanças acumuladas de uma conta desde a última execução; eventos repetidos sobrescrevem os anteriores."""
+
+    __slots__ = ("assets", "reference_assets", "edges", "removed", "first_event_at", "retry")
+
+    def __init__(self):
+        self.assets: Dict[int, Dict[str, Any]] = {}
+        self.reference_assets: Dict[int, Dict[str, Any]] = {}
+        self.edges: Dict[int, List[Tuple[int, str]]] = {}
+        self.removed: Set[int] = set()
+        self.first_event_at = time.monotonic()
+        # True quando as mudanças voltaram à fila após uma execução com erro.
+        self.retry = False
+
+    def _apply(self, assets, reference_assets, edges, removed) -> None:
+        self.assets.update(assets)
+        self.reference_assets.update(reference_assets)
+        self.edges.update(edges)
+        self.removed.difference_update(assets)
+        self.removed.difference_update(reference_assets)
+        # Um ativo removido depois de atualizado sai do grafo; nada do que estava pendente para ele vale mais.
+        for asset_id in removed:
+            self.assets.pop(asset_id, None)
+            self.reference_assets.pop(asset_id, None)
+            self.edges.pop(asset_id, None)
+            self.removed.add(asset_id)
+
+    def merge(self, assets, reference_assets, edges, removed=None) -> None:
+        self._apply(
+            {asset["id"]: _slim_asset(asset) for asset in assets or ()},
+            {asset["id"]: _slim_asset(asset) for asset in reference_assets or ()},
+            edges or {},
+            removed or (),
+        )
+
+    def absorb_newer(self, newer: "_PendingChanges") -> None:
+        """Soma as mudanças de `newer`, que chegaram depois destas e prevalecem sobre elas."""
+        self._apply(newer.assets, newer.reference_assets, newer.edges, newer.removed)
+
+
+class AttackPathWorker:
+    """
+    Executa a análise de caminhos de ataque em background, fora da requisição de /analyze.
+
+    Cada análise concluída chama `notify` com os ativos e arestas que salvou. Os eventos são agrupados por
+    conta e a análise de uma conta roda no máximo uma vez por janela de `debounce_seconds`: o primeiro
+    evento agenda a execução para o fim da janela e os seguintes apenas se somam ao que está pendente.
+    As execuções são sequenciais (o grafo em memória é compartilhado) e rodam numa thread, sem bloquear
+    o event loop. Se uma execução falha, o erro fica em `last_error` e as mudanças voltam à fila para a
+    janela seguinte.
+    """
+
+    def __init__(self, debounce_seconds: float = 30.0, session_factory: Optional[Callable[[], Session]] = None):
+        self.debounce_seconds = max(0.0, debounce_seconds)
+        self._session_factory = session_factory
+        self._pending: Dict[str, _PendingChanges] = {}
+        self._last_run_started: Dict[str, float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._run_lock: Optional[asyncio.Lock] = None
+        self.running_account: Optional[str] = None
+        self.runs = 0
+        self.last_run_at: Optional[datetime.datetime] = None
+        self.last_run_account: Optional[str] = None
+        self.last_run_duration_seconds: Optional[float] = None
+        self.last_run_paths_found: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+    def _get_session_factory(self) -> Callable[[], Session]:
+        if self._session_factory is None:
+            from app.db.session import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory
+
+    def notify(
+        self,
+        account_id: str,
+        updated_assets: Optional[List[Dict[str, Any]]] = None,
+        updated_edges: Optional[Dict[int, List[Tuple[int, str]]]] = None,
+        reference_assets: Optional[List[Dict[str, Any]]] = None,
+        removed_asset_ids: Optional[Iterable[int]] = None,
+    ) -> None:
+        """
+        Registra uma análise concluída para a conta, ou os ativos que ela deixou de ter (`removed_asset_ids`,
+        ex.: marcados como obsoletos ao fechar uma varredura). Não executa nada na hora.
+        """
+        account_id = account_id or "N/A"
+        pending = self._pending.get(account_id)
+        if pending is None:
+            pending = self._pending[account_id] = _PendingChanges()
+        pending.merge(updated_assets, reference_assets, updated_edges, removed_asset_ids)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _due_at(self, account_id: str) -> float:
+        last_run = self._last_run_started.get(account_id)
+        pending = self._pending[account_id]
+        window_start = pending.first_event_at if last_run is None else max(last_run, pending.first_event_at)
+        return window_start + self.debounce_seconds
+
+    def _run_sync(self, account_id: str, pending: _PendingChanges) -> List[Any]:
+        with self._get_session_factory()() as db:
+            return run_attack_path_analysis(
+                db,
+                updated_assets=list(pending.assets.values()),
+                updated_edges=pending.edges,
+                reference_assets=list(pending.reference_assets.values()),
+                force=pending.retry,
+                removed_asset_ids=pending.removed,
+            )
+
+    def _requeue(self, account_id: str, pending: _PendingChanges) -> None:
+        """Devolve à fila as mudanças de uma execução que falhou, somadas às que chegaram durante ela."""
+        newer = self._pending.get(account_id)
+        if newer is not None:
+            pending.absorb_newer(newer)
+        pending.retry = True
+        self._pending[account_id] = pending
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run_account(self, account_id: str) -> None:
+        # Criado sob demanda para ficar associado ao event loop em execução.
+        if self._run_lock is None:
+            self._run_lock = asyncio.Lock()
+        async with self._run_lock:
+            pending = self._pending.pop(account_id, None)
+            if pending is None:
+                return
+            self._last_run_started[account_id] = time.monotonic()
+            self.running_account = account_id
+            started_at = datetime.datetime.now(datetime.timezone.utc)
+            start = time.perf_counter()
+            try:
+                paths = await asyncio.get_running_loop().run_in_executor(None, self._run_sync, account_id, pending)
+                self.last_run_paths_found = len(paths)
+                self.last_error = None
+            except Exception as e:
+                logger.exception(f"Erro na análise de caminhos de ataque da conta {account_id}; mudanças devolvidas à fila: {e}")
+                self.last_error = str(e)
+                self._requeue(account_id, pending)
+            finally:
+                self.running_account = None
+                self.runs += 1
+                self.last_run_at = started_at
+                self.last_run_account = account_id
+                self.last_run_duration_seconds = time.perf_counter() - start
+            logger.info(
+                f"Análise de caminhos de ataque da conta {account_id} concluída em {self.last_run_duration_seconds:.3f}s "
+                f"({len(pending.assets)} ativos alterados)."
+            )
+
+    async def _loop(self) -> None:
+        while True:
+            self._wakeup.clear()
+            if not self._pending:
+                await self._wakeup.wait()
+                continue
+            account_id = min(self._pending, key=self._due_at)
+            delay = self._due_at(account_id) - time.monotonic()
+            if delay > 0:
+                try:
+                    # Acorda antes se chegar um evento de outra conta com prazo menor.
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_account(account_id)
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        if self._pending:
+            self._wakeup.set()
+        self._task = asyncio.get_running_loop().create_task(self._loop(), name="attack-path-worker")
+        logger.info(f"Worker de caminhos de ataque iniciado (janela de {self.debounce_seconds}s).")
+
+    async def flush(self) -> None:
+        """Executa imediatamente o que estiver pendente, ignorando a janela."""
+        for account_id in list(self._pending):
+            await self._run_account(account_id)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wakeup = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running_account is not None,
+            "running_account": self.running_account,
+            "pending_accounts": sorted(self._pending),
+            "debounce_seconds": self.debounce_seconds,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at,
+            "last_run_account": self.last_run_account,
+            "last_run_duration_seconds": self.last_run_duration_seconds,
+            "last_run_paths_found": self.last_run_paths_found,
+            "last_error": self.last_error,
+        }
+
+
+attack_path_worker = AttackPathWorker(debounce_seconds=settings.ATTACK_PATH_DEBOUNCE_SECONDS)
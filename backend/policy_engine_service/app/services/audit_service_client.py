@@ -1,12 +1,66 @@
-import httpx
+import asyncio
+from typing import Any, Dict, List, Optional
+from prometheus_client import Counter
 from app.core.config import settings
+from app.core.metrics import get_or_create_metric
+from app.services.http_client_pool import http_client_pool
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+AUDIT_EVENTS_SENT = get_or_create_metric(
+    Counter, "policy_engine_audit_events_sent_total", "Eventos de auditoria aceitos pelo audit_service."
+)
+AUDIT_EVENTS_DROPPED = get_or_create_metric(
+    Counter, "policy_engine_audit_events_dropped_total", "Eventos de auditoria descartados (fila cheia ou falha no envio do lote)."
+)
+
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_BLOCK = "block"
+
+
 class AuditServiceClient:
-    def __init__(self):
-        self.base_url = settings.AUDIT_SERVICE_URL
+    """
+    Envia eventos de auditoria em lotes. `create_event` só coloca o evento numa fila limitada em memória; uma
+    tarefa em background o envia a /events/bulk quando o lote atinge `batch_size` eventos ou quando
+    `flush_interval_seconds` se passa desde o primeiro evento do lote. Com a fila cheia, `overflow` decide:
+    "drop_oldest" descarta o evento mais antigo, "block" faz `create_event` esperar por espaço.
+    Como antes, a auditoria é best-effort: um lote que falha é registrado no log e descartado.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        max_queue_size: int = 10000,
+        batch_size: int = 100,
+        flush_interval_seconds: float = 1.0,
+        overflow: str = OVERFLOW_DROP_OLDEST,
+    ):
+        if overflow not in (OVERFLOW_DROP_OLDEST, OVERFLOW_BLOCK):
+            raise ValueError(f"Política de estouro inválida: {overflow!r}")
+        self.base_url = settings.AUDIT_SERVICE_URL if base_url is None else base_url
+        self.max_queue_size = max(1, max_queue_size)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_seconds = flush_interval_seconds
+        self.overflow = overflow
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+
+    def _ensure_started(self) -> None:
+        # Criados sob demanda para ficarem associados ao event loop em execução.
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._batch_ready = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="audit-event-flusher")
+
+    def _drop(self, count: int) -> None:
+        self.dropped += count
+        AUDIT_EVENTS_DROPPED.inc(count)
 
     async def create_event(self, actor: str, action: str, resource: str = None, details: dict = None):
         if not self.base_url:
@@ -20,12 +74,85 @@ class AuditServiceClient:
             "details": details,
         }
 
-        async with httpx.AsyncClient() as client:
+        self._ensure_started()
+        if self.overflow == OVERFLOW_BLOCK:
+            await self._queue.put(event_data)
+        else:
+            while True:
+                try:
+                    self._queue.put_nowait(event_data)
+                    break
+                except asyncio.QueueFull:
+                    self._queue.get_nowait()
+                    self._queue.task_done()
+                    self._drop(1)
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval_seconds
+        while len(batch) < self.batch_size:
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = deadline - loop.time()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                break
+            self._batch_ready.clear()
             try:
-                response = await client.post(f"{self.base_url}/events/", json=event_data)
-                response.raise_for_status()
-                logger.info(f"Evento de auditoria enviado com sucesso: {action} por {actor}")
-            except httpx.RequestError as e:
-                logger.error(f"Erro ao enviar evento de auditoria para {e.request.url!r}: {e}")
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=remaining)
+            except asyncio.TimeoutError:
+                pass
+        return batch
+
+    async def _post_batch(self, batch: List[Dict[str, Any]]) -> None:
+        response = await http_client_pool.get("audit_service").post(f"{self.base_url}/events/bulk", json=batch)
+        response.raise_for_status()
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._post_batch(batch)
+                self.sent += len(batch)
+                AUDIT_EVENTS_SENT.inc(len(batch))
+                logger.info(f"{len(batch)} eventos de auditoria enviados ao audit_service.")
+            except Exception as e:
+                self._drop(len(batch))
+                logger.error(f"Erro ao enviar lote de {len(batch)} eventos de auditoria: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def flush(self) -> None:
+        """Espera até que todos os eventos enfileirados tenham sido enviados (ou descartados)."""
+        if self._queue is None:
+            return
+        self._batch_ready.set()
+        await self._queue.join()
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Envia o que estiver na fila (até `timeout`) e encerra a tarefa de envio."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self.flush(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self._queue.qsize()} eventos de auditoria não enviados no encerramento.")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._queue = None
+        self._batch_ready = None
+
 
-audit_service_client = AuditServiceClient()
+audit_service_client = AuditServiceClient(
+    max_queue_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval_seconds=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    overflow=settings.AUDIT_QUEUE_OVERFLOW,
+)
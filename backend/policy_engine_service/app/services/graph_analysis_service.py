@@ -1,69 +1,425 @@
+import threading
+from array import array
+from collections import deque
 import networkx as nx
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from app.crud.crud_asset import asset_crud
+from typing import List, Dict, Any, Optional, Iterable, Set, Tuple, Callable, FrozenSet
+from app.crud.crud_asset_relationship import asset_relationship_crud
 from app.crud.crud_attack_path import attack_path_crud
+from app.models.asset_model import CloudAsset
 from app.schemas.attack_path_schema import AttackPathCreate, AttackPathNode
+from app.services.relationship_service import (
+    EC2_INSTANCE_ASSET_TYPES, HAS_INSTANCE_PROFILE, ASSUMES_ROLE, HAS_POLICY,
+)
 import logging
-import json
 
 logger = logging.getLogger(__name__)
 
-class GraphAnalysisService:
-    def __init__(self, db: Session):
-        self.db = db
+# Campos da configuração copiados para os nós do grafo (nome no nó -> chaves possíveis no JSON).
+# Só o necessário para as regras fica em memória; a configuração completa permanece no banco.
+GRAPH_NODE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "public_ip_address": ("public_ip_address", "PublicIpAddress"),
+    "iam_instance_profile_arn": ("iam_instance_profile_arn", "IamInstanceProfileArn"),
+}
+# Campos booleanos gravados pela derivação de relacionamentos (ex.: política com Action '*' em Resource '*').
+GRAPH_NODE_FLAGS: Tuple[str, ...] = ("is_admin",)
+
+GRAPH_LOAD_BATCH_SIZE = 5000
+
+# Limites da busca de caminhos: profundidade máxima e nós visitados por ponto de partida.
+PATH_SEARCH_MAX_DEPTH = 4
+PATH_SEARCH_MAX_VISITED = 10000
+
+# Arestas seguidas pela regra EC2 pública -> role de admin: instância -> perfil -> role -> política.
+ADMIN_ROLE_PATH_RELATIONSHIPS = (HAS_INSTANCE_PROFILE, ASSUMES_ROLE, HAS_POLICY)
+
+
+def extract_node_attributes(asset_type: str, asset_id: str, name: Optional[str], account_id: Optional[str],
+                            configuration: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Monta os atributos de um nó a partir de um ativo, copiando apenas os campos usados pelas regras."""
+    configuration = configuration or {}
+    attributes = {"asset_type": asset_type, "asset_id": asset_id, "name": name, "account_id": account_id}
+    for node_field, config_keys in GRAPH_NODE_FIELDS.items():
+        attributes[node_field] = next((configuration[k] for k in config_keys if configuration.get(k)), None)
+    for flag in GRAPH_NODE_FLAGS:
+        attributes[flag] = configuration.get(flag)
+    return attributes
+
+
+class AdjacencyIndex:
+    """
+    Índice de adjacência compacto das arestas de asset_relationships.
+
+    Guarda apenas ids: para cada nó, um array de destinos e um array paralelo com o código do tipo de
+    relacionamento, além do índice reverso (destino -> origens) usado para achar quem é afetado por uma
+    mudança. Com arrays de inteiros o custo fica em ~16 bytes por aresta em cada direção, o que mantém
+    milhões de arestas em memória sem carregar as configurações dos ativos.
+    """
+
+    def __init__(self):
+        self._type_codes: Dict[str, int] = {}
+        self._out: Dict[int, Tuple[array, array]] = {}
+        self._in: Dict[int, array] = {}
+        self.edge_count = 0
+
+    def type_code(self, relationship_type: str) -> int:
+        code = self._type_codes.get(relationship_type)
+        if code is None:
+            code = self._type_codes[relationship_type] = len(self._type_codes)
+        return code
+
+    def type_codes(self, relationship_types: Iterable[str]) -> FrozenSet[int]:
+        return frozenset(self.type_code(kind) for kind in relationship_types)
+
+    def _add_edge(self, source_id: int, target_id: int, code: int) -> None:
+        targets, codes = self._out.get(source_id) or self._out.setdefault(source_id, (array("q"), array("H")))
+        targets.append(target_id)
+        codes.append(code)
+        self._in.setdefault(target_id, array("q")).append(source_id)
+        self.edge_count += 1
+
+    def load(self, edges: Iterable[Tuple[int, int, str]]) -> None:
+        for source_id, target_id, relationship_type in edges:
+            self._add_edge(source_id, target_id, self.type_code(relationship_type))
+
+    def outgoing(self, node_id: int) -> List[Tuple[int, str]]:
+        targets, codes = self._out.get(node_id, ((), ()))
+        names = {code: kind for kind, code in self._type_codes.items()}
+        return sorted((target, names[code]) for target, code in zip(targets, codes))
+
+    def replace_outgoing(self, source_id: int, edges: Iterable[Tuple[int, str]]) -> bool:
+        """Substitui as arestas de saída de um nó. Retorna True se houve mudança."""
+        new_edges = sorted(set(edges))
+        if new_edges == self.outgoing(source_id):
+            return False
+        old_targets, _ = self._out.pop(source_id, ((), ()))
+        self.edge_count -= len(old_targets)
+        for target_id in old_targets:
+            sources = self._in.get(target_id)
+            if sources is not None:
+                sources.remove(source_id)
+                if not sources:
+                    del self._in[target_id]
+        for target_id, relationship_type in new_edges:
+            self._add_edge(source_id, target_id, self.type_code(relationship_type))
+        return True
+
+    def remove_node(self, node_id: int) -> None:
+        """Remove as arestas de saída e de entrada de um nó."""
+        self.replace_outgoing(node_id, ())
+        for source_id in set(self._in.pop(node_id, ())):
+            targets, codes = self._out[source_id]
+            kept = [(target, code) for target, code in zip(targets, codes) if target != node_id]
+            self.edge_count -= len(targets) - len(kept)
+            if kept:
+                self._out[source_id] = (array("q", (t for t, _ in kept)), array("H", (c for _, c in kept)))
+            else:
+                del self._out[source_id]
+
+    def neighbors(self, node_id: int, allowed_codes: Optional[FrozenSet[int]] = None) -> Iterable[int]:
+        targets, codes = self._out.get(node_id, ((), ()))
+        if allowed_codes is None:
+            return targets
+        return (target for target, code in zip(targets, codes) if code in allowed_codes)
+
+    def ancestors(self, node_ids: Iterable[int], max_depth: int) -> Set[int]:
+        """Nós que alcançam algum de `node_ids` em até `max_depth` saltos (incluindo os próprios nós)."""
+        reached = set(node_ids)
+        frontier = list(reached)
+        for _ in range(max_depth):
+            next_frontier = []
+            for node_id in frontier:
+                for source_id in self._in.get(node_id, ()):
+                    if source_id not in reached:
+                        reached.add(source_id)
+                        next_frontier.append(source_id)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return reached
+
+    def find_paths(
+        self, start_id: int, is_target: Callable[[int], bool],
+        relationship_types: Optional[Iterable[str]] = None,
+        max_depth: int = PATH_SEARCH_MAX_DEPTH, max_paths: int = 1, max_visited: int = PATH_SEARCH_MAX_VISITED,
+    ) -> List[List[int]]:
+        """
+        Busca em largura, a partir de `start_id`, dos caminhos mais curtos até nós que satisfazem `is_target`.
+
+        A busca é podada pelos tipos de relacionamento permitidos, pela profundidade, por um conjunto de
+        visitados e por `max_visited`, então o custo por consulta é limitado mesmo em grafos muito grandes.
+        Cada caminho é a lista de ids do início até o alvo.
+        """
+        allowed_codes = self.type_codes(relationship_types) if relationship_types is not None else None
+        parents: Dict[int, int] = {start_id: start_id}
+        queue = deque([(start_id, 0)])
+        paths: List[List[int]] = []
+        while queue:
+            node_id, depth = queue.popleft()
+            if depth >= max_depth:
+                continue
+            for neighbor in self.neighbors(node_id, allowed_codes):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = node_id
+                if is_target(neighbor):
+                    path = [neighbor]
+                    while path[-1] != start_id:
+                        path.append(parents[path[-1]])
+                    paths.append(path[::-1])
+                    if len(paths) >= max_paths:
+                        return paths
+                    continue
+                if len(parents) >= max_visited:
+                    logger.warning(f"Busca de caminhos a partir do nó {start_id} interrompida após {max_visited} nós visitados.")
+                    return paths
+                queue.append((neighbor, depth + 1))
+        return paths
+
+
+class AssetGraph:
+    """
+    Grafo de ativos mantido em memória entre análises.
+
+    Na primeira utilização o inventário inteiro é carregado em lotes (sem limite de linhas), lendo do JSON
+    apenas os campos de GRAPH_NODE_FIELDS, e as arestas de asset_relationships vão para o AdjacencyIndex.
+    Depois disso o grafo é atualizado incrementalmente com os ativos e arestas de cada análise, e
+    `upsert_nodes`/`replace_edges` informam quais nós mudaram para que só as regras afetadas sejam reavaliadas.
+    Ativos obsoletos (fora da última varredura completa) não são carregados e saem do grafo por `remove_nodes`.
+    """
+
+    def __init__(self):
         self.graph = nx.DiGraph()
-        self._build_graph()
+        self.adjacency = AdjacencyIndex()
+        self.loaded = False
+        # Protege graph e adjacency: escritas e percursos (regras, ancestrais) o seguram.
+        self.lock = threading.RLock()
 
-    def _build_graph(self):
-        """Constrói o grafo a partir dos ativos no banco de dados."""
+    def ensure_loaded(self, db: Session) -> bool:
+        """Carrega o inventário completo se ainda não foi carregado. Retorna True se carregou agora."""
+        with self.lock:
+            if self.loaded:
+                return False
+            self._load_full(db)
+            self.loaded = True
+            return True
+
+    def _load_full(self, db: Session) -> None:
         logger.info("Construindo o grafo de ativos para análise de caminhos de ataque...")
-        all_assets = asset_crud.get_multi(self.db, limit=10000) # Limite para segurança
+        extracted_columns = [
+            func.coalesce(*(CloudAsset.configuration[k].as_string() for k in config_keys)).label(node_field)
+            for node_field, config_keys in GRAPH_NODE_FIELDS.items()
+        ] + [CloudAsset.configuration[flag].as_boolean().label(flag) for flag in GRAPH_NODE_FLAGS]
+        query = db.query(
+            CloudAsset.id, CloudAsset.asset_type, CloudAsset.asset_id, CloudAsset.name, CloudAsset.account_id,
+            *extracted_columns,
+        ).filter(CloudAsset.is_stale.is_(False)).order_by(CloudAsset.id).yield_per(GRAPH_LOAD_BATCH_SIZE)
+
+        graph = nx.DiGraph()
+        for row in query:
+            attributes = {
+                "asset_type": row.asset_type, "asset_id": row.asset_id, "name": row.name, "account_id": row.account_id,
+            }
+            for node_field in (*GRAPH_NODE_FIELDS, *GRAPH_NODE_FLAGS):
+                attributes[node_field] = getattr(row, node_field)
+            graph.add_node(row.id, **attributes)
 
-        for asset in all_assets:
-            self.graph.add_node(asset.id, data=asset)
+        adjacency = AdjacencyIndex()
+        adjacency.load(
+            edge for edge in asset_relationship_crud.iter_edges(db, batch_size=GRAPH_LOAD_BATCH_SIZE)
+            if graph.has_node(edge[0]) and graph.has_node(edge[1])
+        )
+        self.graph = graph
+        self.adjacency = adjacency
+        logger.info(f"Grafo construído com {self.graph.number_of_nodes()} nós e {adjacency.edge_count} arestas.")
+
+    def upsert_nodes(self, nodes: Iterable[Tuple[int, Dict[str, Any]]], overwrite: bool = True) -> Set[int]:
+        """
+        Insere ou atualiza nós (id do ativo, atributos). Retorna os ids dos nós novos ou alterados.
+        Com `overwrite=False` nós já existentes são mantidos (ex.: ativos que são só referências).
+        """
+        changed: Set[int] = set()
+        with self.lock:
+            for node_id, attributes in nodes:
+                if self.graph.has_node(node_id):
+                    current = self.graph.nodes[node_id]
+                    if not overwrite or all(current.get(k) == v for k, v in attributes.items()):
+                        continue
+                    current.update(attributes)
+                else:
+                    self.graph.add_node(node_id, **attributes)
+                changed.add(node_id)
+        return changed
 
-        logger.info(f"Grafo construído com {self.graph.number_of_nodes()} nós.")
+    def replace_edges(self, edges_by_source: Dict[int, List[Tuple[int, str]]]) -> Set[int]:
+        """Substitui as arestas de saída das origens informadas. Retorna as origens cujas arestas mudaram."""
+        with self.lock:
+            return {
+                source_id for source_id, edges in edges_by_source.items()
+                if self.adjacency.replace_outgoing(source_id, edges)
+            }
 
-    def find_public_ec2_to_admin_role_path(self):
+    def remove_nodes(self, node_ids: Iterable[int]) -> Set[int]:
+        """
+        Remove nós e todas as suas arestas (ex.: ativos marcados como obsoletos). Retorna os ids removidos.
+        Se o ativo reaparecer, volta como nó novo e as arestas que chegam a ele são refeitas quando as
+        origens forem analisadas de novo.
+        """
+        removed: Set[int] = set()
+        with self.lock:
+            for node_id in node_ids:
+                if self.graph.has_node(node_id):
+                    self.graph.remove_node(node_id)
+                    removed.add(node_id)
+                self.adjacency.remove_node(node_id)
+        return removed
+
+    def affected_nodes(self, changed: Iterable[int], max_depth: int = PATH_SEARCH_MAX_DEPTH) -> Set[int]:
+        """Nós alterados e os que os alcançam em até `max_depth` saltos."""
+        with self.lock:
+            return self.adjacency.ancestors(changed, max_depth)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.graph = nx.DiGraph()
+            self.adjacency = AdjacencyIndex()
+            self.loaded = False
+
+
+# Grafo compartilhado pelo processo; sobrevive entre requisições de /analyze.
+asset_graph = AssetGraph()
+
+
+class GraphAnalysisService:
+    def __init__(self, db: Session, graph: AssetGraph = asset_graph):
+        self.db = db
+        self.asset_graph = graph
+
+    @property
+    def graph(self) -> nx.DiGraph:
+        return self.asset_graph.graph
+
+    def _is_admin_policy(self, node_id: int) -> bool:
+        return bool(self.graph.has_node(node_id) and self.graph.nodes[node_id].get("is_admin"))
+
+    def _instance_role_is_known(self, node_id: int) -> bool:
+        adjacency = self.asset_graph.adjacency
+        profile_codes = adjacency.type_codes((HAS_INSTANCE_PROFILE,))
+        role_codes = adjacency.type_codes((ASSUMES_ROLE,))
+        return any(
+            any(True for _ in adjacency.neighbors(profile_id, role_codes))
+            for profile_id in adjacency.neighbors(node_id, profile_codes)
+        )
+
+    def _path_node(self, node_id: int) -> AttackPathNode:
+        node = self.graph.nodes[node_id] if self.graph.has_node(node_id) else {}
+        return AttackPathNode(asset_id=node_id, asset_type=node.get("asset_type") or "unknown", name=node.get("name") or node.get("asset_id"))
+
+    def find_public_ec2_to_admin_role_path(self, node_ids: Optional[Iterable[int]] = None) -> List[AttackPathCreate]:
         """
         Encontra o caminho de ataque: Instância EC2 pública com uma role de admin.
+        Se `node_ids` for informado, só esses nós são considerados como ponto de partida.
+
+        O caminho instância -> perfil -> role -> política com Action '*' é buscado no índice de
+        relacionamentos. Quando a role do perfil não está no inventário, o nome do perfil ainda é usado
+        como indício ("admin" no ARN), sinalizado como tal na descrição. O percurso segura `asset_graph.lock`
+        para não ler o grafo no meio de uma atualização.
         """
         logger.info("Iniciando análise: EC2 Pública -> Role de Admin")
+        found: List[AttackPathCreate] = []
+        with self.asset_graph.lock:
+            candidates = self.graph.nodes(data=True) if node_ids is None else (
+                (n, self.graph.nodes[n]) for n in node_ids if self.graph.has_node(n)
+            )
 
-        for node_id, node_data in self.graph.nodes(data=True):
-            asset = node_data.get('data')
-            if not asset or asset.asset_type != 'EC2Instance':
-                continue
+            for node_id, node in candidates:
+                if node.get("asset_type") not in EC2_INSTANCE_ASSET_TYPES or not node.get("public_ip_address"):
+                    continue
+                display_name = node.get("name") or node.get("asset_id")
+                paths = self.asset_graph.adjacency.find_paths(
+                    node_id, self._is_admin_policy, relationship_types=ADMIN_ROLE_PATH_RELATIONSHIPS,
+                )
+                if paths:
+                    path_nodes = [self._path_node(n) for n in paths[0]]
+                    logger.warning(f"Caminho de ataque encontrado: Instância pública {display_name} alcança a política de admin {path_nodes[-1].name}.")
+                    found.append(AttackPathCreate(
+                        path_id=f"EC2_PUBLIC_TO_ADMIN_ROLE_{node_id}",
+                        description=f"A instância EC2 pública '{display_name}' assume uma role com a política '{path_nodes[-1].name}', que concede acesso administrativo (Action '*' em Resource '*').",
+                        severity="HIGH",
+                        nodes=path_nodes,
+                    ))
+                    continue
+
+                iam_profile_arn = node.get("iam_instance_profile_arn")
+                if iam_profile_arn and "admin" in iam_profile_arn.lower() and not self._instance_role_is_known(node_id):
+                    logger.warning(f"Potencial caminho de ataque encontrado: Instância pública {display_name} com perfil IAM suspeito: {iam_profile_arn}")
+                    found.append(AttackPathCreate(
+                        path_id=f"EC2_PUBLIC_TO_ADMIN_ROLE_{node_id}",
+                        description=f"A instância EC2 pública '{display_name}' está associada a um perfil IAM com nome '{iam_profile_arn}', que pode ter privilégios excessivos (a role do perfil não está no inventário; indício baseado no nome).",
+                        severity="HIGH",
+                        nodes=[self._path_node(node_id)],
+                    ))
+        return found
+
+    def analyze(self, changed_node_ids: Optional[Set[int]] = None) -> List[AttackPathCreate]:
+        """Executa as regras de caminho de ataque sobre o grafo inteiro ou apenas sobre os nós alterados."""
+        attack_paths = self.find_public_ec2_to_admin_role_path(changed_node_ids)
+        for attack_path_in in attack_paths:
+            # O create não duplica caminhos com o mesmo path_id
+            attack_path_crud.create(self.db, obj_in=attack_path_in)
+        return attack_paths
+
+
+def run_attack_path_analysis(
+    db: Session,
+    updated_assets: Optional[List[Dict[str, Any]]] = None,
+    updated_edges: Optional[Dict[int, List[Tuple[int, str]]]] = None,
+    reference_assets: Optional[List[Dict[str, Any]]] = None,
+    force: bool = False,
+    removed_asset_ids: Optional[Iterable[int]] = None,
+):
+    """
+    Função principal para iniciar a análise de caminhos de ataque.
+
+    `updated_assets` são os ativos salvos pela análise atual (com o `id` do banco) e `updated_edges` as
+    arestas de saída substituídas pela derivação de relacionamentos; `reference_assets` são ativos que
+    só entram no grafo se ainda não existirem. Tudo é aplicado incrementalmente ao grafo em memória e
+    só os nós alterados, e quem os alcança dentro da profundidade de busca, são reavaliados. Sem
+    `updated_assets`, ou na primeira execução do processo, o grafo inteiro é avaliado. `removed_asset_ids`
+    (ativos obsoletos) saem do grafo junto com suas arestas.
+
+    Erros são propagados para o chamador. Como o grafo pode já ter recebido as mudanças antes da falha,
+    a nova tentativa passa `force=True` para reavaliar os ativos e origens informados mesmo sem diferença.
+    """
+    def node_entries(assets: List[Dict[str, Any]]):
+        return (
+            (asset["id"], extract_node_attributes(
+                asset["asset_type"], asset["asset_id"], asset.get("name"), asset.get("account_id"), asset.get("configuration"),
+            ))
+            for asset in assets
+        )
+
+    full_run = asset_graph.ensure_loaded(db) or updated_assets is None
+    changed: Set[int] = set()
+    if reference_assets:
+        changed |= asset_graph.upsert_nodes(node_entries(reference_assets), overwrite=False)
+    if updated_assets:
+        changed |= asset_graph.upsert_nodes(node_entries(updated_assets))
+    if updated_edges:
+        changed |= asset_graph.replace_edges(updated_edges)
+    if force:
+        changed |= {asset["id"] for asset in (*(reference_assets or ()), *(updated_assets or ()))}
+        changed |= set(updated_edges or ())
+    if removed_asset_ids:
+        removed = set(removed_asset_ids)
+        asset_graph.remove_nodes(removed)
+        changed -= removed
+    if not full_run and not changed:
+        logger.info("Nenhum ativo alterado; análise de caminhos de ataque ignorada.")
+        return []
 
-            config = asset.configuration
-            if config.get('public_ip_address'):
-                # Instância é pública. Agora, verificar a role.
-                iam_profile_arn = config.get('iam_instance_profile_arn')
-                if iam_profile_arn:
-                    # Precisamos encontrar o nó da role no nosso grafo.
-                    # Esta é uma simplificação; uma implementação real usaria relações.
-                    # Por agora, vamos assumir que podemos buscar os detalhes da role.
-                    # Vamos verificar se a política da role é de admin.
-                    # A política da role não está no nó da instância, então esta análise é limitada.
-                    # Vamos simular que se o ARN do perfil contiver "admin", é um achado.
-                    if "admin" in iam_profile_arn.lower():
-                        logger.warning(f"Potencial caminho de ataque encontrado: Instância pública {asset.name} com perfil IAM suspeito: {iam_profile_arn}")
-
-                        nodes = [AttackPathNode(asset_id=asset.id, asset_type=asset.asset_type, name=asset.name or asset.asset_id)]
-
-                        attack_path_in = AttackPathCreate(
-                            path_id=f"EC2_PUBLIC_TO_ADMIN_ROLE_{asset.id}",
-                            description=f"A instância EC2 pública '{asset.name or asset.asset_id}' está associada a um perfil IAM com nome '{iam_profile_arn}', que pode ter privilégios excessivos.",
-                            severity="HIGH",
-                            nodes=nodes
-                        )
-                        # Usar um método create_or_update para não duplicar caminhos
-                        attack_path_crud.create(self.db, obj_in=attack_path_in)
-
-def run_attack_path_analysis(db: Session):
-    """Função principal para iniciar a análise de caminhos de ataque."""
-    try:
-        graph_service = GraphAnalysisService(db)
-        graph_service.find_public_ec2_to_admin_role_path()
-    except Exception as e:
-        logger.exception(f"Erro durante a análise de caminhos de ataque: {e}")
+    graph_service = GraphAnalysisService(db)
+    if full_run:
+        return graph_service.analyze(None)
+    return graph_service.analyze(asset_graph.affected_nodes(changed))
\ No newline at end of file
@@ -0,0 +1,94 @@
+import logging
+from typing import Dict, List
+
+import httpx
+from prometheus_client import REGISTRY
+
+from app.core.config import settings
+from app.core.http_pool_metrics import HttpClientPoolCollector, PoolSource, httpcore_pool_stats
+
+logger = logging.getLogger(__name__)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class HttpClientPool:
+    """
+    Um httpx.AsyncClient compartilhado por serviço downstream, com keep-alive e pool de conexões limitado.
+    Os clientes são criados sob demanda (ou em `start`, na inicialização do app) e fechados em `close`, no
+    encerramento. Assim cada chamada entre serviços reaproveita conexões abertas em vez de montar um cliente,
+    um pool e uma conexão TCP novos.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry_seconds: float = 30.0,
+        timeout_seconds: float = 10.0,
+        connect_timeout_seconds: float = 5.0,
+        http2: bool = False,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_seconds,
+        )
+        self.timeout = httpx.Timeout(timeout_seconds, connect=connect_timeout_seconds)
+        self.http2 = http2
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def get(self, service: str) -> httpx.AsyncClient:
+        """Cliente do serviço `service` (rótulo das métricas). As URLs continuam absolutas em cada chamada."""
+        client = self._clients.get(service)
+        if client is None or client.is_closed:
+            http2 = self.http2
+            if http2 and not _http2_available():
+                logger.warning("HTTP_CLIENT_HTTP2 habilitado, mas o pacote 'h2' não está instalado. Usando HTTP/1.1.")
+                http2 = self.http2 = False
+            client = self._clients[service] = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=http2)
+        return client
+
+    def start(self, *services: str) -> None:
+        for service in services:
+            self.get(service)
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def clients(self) -> List[PoolSource]:
+        """(serviço, cliente, limite de conexões) de cada cliente aberto, para o HttpClientPoolCollector."""
+        return [(service, client, self.limits.max_connections) for service, client in list(self._clients.items())]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Conexões abertas por serviço, em uso e ociosas, e requisições aguardando uma conexão livre."""
+        stats = {}
+        for service, client, _ in self.clients():
+            service_stats = httpcore_pool_stats(client)
+            if service_stats is not None:
+                stats[service] = service_stats
+        return stats
+
+
+http_client_pool = HttpClientPool(
+    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry_seconds=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY_SECONDS,
+    timeout_seconds=settings.HTTP_CLIENT_TIMEOUT_SECONDS,
+    connect_timeout_seconds=settings.HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS,
+    http2=settings.HTTP_CLIENT_HTTP2,
+)
+
+try:
+    REGISTRY.register(HttpClientPoolCollector("policy_engine", http_client_pool.clients))
+except ValueError:
+    # Mesmo caso de app.core.metrics: o módulo pode ser importado por dois caminhos (app.* e policy_engine_service.app.*).
+    pass
@@ -1,20 +1,42 @@
 import httpx
+from typing import Any, Dict, List, Optional
 from app.core.config import settings
 from app.schemas.alert_schema import AlertSchema # Para tipar o alerta que será enviado
+from app.services.http_client_pool import http_client_pool
 # Ou um schema específico para o payload de notificação, se for diferente
 # from app.schemas.notification_payload_schema import NotificationPayload
 import logging
 
 logger = logging.getLogger(__name__)
 
+class NotificationDeliveryError(Exception):
+    """O notification_service não aceitou um lote de notificações (status diferente de 202)."""
+
+
+def alert_data_payload(alert: AlertSchema) -> Dict[str, Any]:
+    """Alerta no formato do AlertDataPayload do notification_service, serializável em JSON."""
+    return {
+        "resource_id": alert.resource_id,
+        "resource_type": alert.resource_type,
+        "account_id": alert.account_id,
+        "region": alert.region,
+        "provider": alert.provider,
+        "severity": getattr(alert.severity, "value", alert.severity),
+        "title": alert.title,
+        "description": alert.description,
+        "policy_id": alert.policy_id,
+        "details": alert.details,
+        "recommendation": alert.recommendation,
+        "original_alert_created_at": alert.created_at.isoformat() if alert.created_at else None,
+    }
+
+
 class NotificationServiceClient:
     def __init__(self, base_url: str, timeout: int = 10):
         self.base_url = base_url
         self.timeout = timeout
-        # Criar um cliente HTTPX que pode ser reutilizado
-        # No entanto, para chamadas únicas ou infrequentes, um cliente temporário é ok.
-        # Para uso intensivo, gerenciar um cliente persistente via lifespan events do FastAPI é melhor.
-        # Por simplicidade no MVP, criaremos um cliente por chamada ou o manteremos simples.
+        # As chamadas usam o cliente compartilhado do notification_service em http_client_pool
+        # (conexões reaproveitadas), criado na inicialização e fechado no encerramento do app.
 
     async def send_critical_alert_notification(self, alert: AlertSchema) -> bool:
         """
@@ -61,8 +83,9 @@ class NotificationServiceClient:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(notification_endpoint, json=payload_to_send)
+            response = await http_client_pool.get("notification_service").post(
+                notification_endpoint, json=payload_to_send, timeout=self.timeout
+            )
 
             if response.status_code == 202: # Accepted
                 logger.info(f"Notification for alert '{alert.title}' (ID: {alert.id}) accepted by Notification Service.")
@@ -117,8 +140,9 @@ class NotificationServiceClient:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(notification_endpoint, json=payload_to_send)
+            response = await http_client_pool.get("notification_service").post(
+                notification_endpoint, json=payload_to_send, timeout=self.timeout
+            )
 
             if response.status_code == 202: # Accepted
                 logger.info(f"Webhook notification for alert '{alert.title}' (ID: {alert.id}) accepted by Notification Service. Target URL: {webhook_url or 'default'}")
@@ -172,8 +196,9 @@ class NotificationServiceClient:
         }
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(notification_endpoint, json=payload_to_send)
+            response = await http_client_pool.get("notification_service").post(
+                notification_endpoint, json=payload_to_send, timeout=self.timeout
+            )
 
             if response.status_code == 202: # Accepted
                 logger.info(f"Google Chat notification for alert '{alert.title}' (ID: {alert.id}) accepted by Notification Service. Target URL: {'default' if not google_chat_webhook_url else 'specific'}")
@@ -202,8 +227,9 @@ class NotificationServiceClient:
         try:
             # O schema do alerta já deve ser compatível com o que o notification_service espera
             alert_payload = alert_data.model_dump(mode="json")
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(trigger_endpoint, json=alert_payload)
+            response = await http_client_pool.get("notification_service").post(
+                trigger_endpoint, json=alert_payload, timeout=self.timeout
+            )
 
             if response.status_code == 202: # Accepted
                 logger.info(f"Notification trigger for alert ID {alert_data.id} accepted by Notification Service.")
@@ -212,5 +238,35 @@ class NotificationServiceClient:
         except Exception as e:
             logger.exception(f"Unexpected error triggering notification for alert ID {alert_data.id}: {e}")
 
+    def default_channels(self, alert: AlertSchema) -> List[str]:
+        """Canais padrão do notification_service acionados para o alerta, além das regras de notificação."""
+        if getattr(alert.severity, "value", alert.severity) != "CRITICAL":
+            return []
+        channels = ["email"]
+        if settings.ENABLE_WEBHOOK_NOTIFICATIONS:
+            channels.append("webhook")
+        if settings.ENABLE_GOOGLE_CHAT_NOTIFICATIONS:
+            channels.append("google_chat")
+        return channels
+
+    async def send_notification_batch(self, alerts: List[AlertSchema]) -> int:
+        """
+        Entrega um lote de alertas ao endpoint /notify/bulk numa única requisição: cada alerta leva os canais
+        padrão (alertas críticos) e é avaliado contra as regras de notificação, como nas chamadas individuais.
+        Levanta httpx.HTTPError ou NotificationDeliveryError se o lote não for aceito.
+        """
+        payload = {
+            "notifications": [
+                {"alert_data": alert_data_payload(alert), "default_channels": self.default_channels(alert)}
+                for alert in alerts
+            ]
+        }
+        response = await http_client_pool.get("notification_service").post(
+            f"{self.base_url}/notify/bulk", json=payload, timeout=self.timeout
+        )
+        if response.status_code != 202:
+            raise NotificationDeliveryError(f"Status {response.status_code}: {response.text[:500]}")
+        return len(alerts)
+
 # Instância do cliente para ser usada no serviço
 notification_client = NotificationServiceClient(base_url=settings.NOTIFICATION_SERVICE_URL)
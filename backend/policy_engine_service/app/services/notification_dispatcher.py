@@ -0,0 +1,214 @@
+import time
+import asyncio
+import logging
+import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter, Histogram
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import get_or_create_metric
+from app.crud.crud_notification_outbox import async_notification_outbox_crud
+from app.schemas.alert_schema import AlertSchema
+from app.services.notification_client import NotificationServiceClient, notification_client
+
+logger = logging.getLogger(__name__)
+
+
+# Vazão em alertas/s: rate(policy_engine_notifications_dispatched_total[1m]).
+NOTIFICATIONS_DISPATCHED = get_or_create_metric(
+    Counter, "policy_engine_notifications_dispatched_total", "Alertas entregues ao notification_service."
+)
+NOTIFICATIONS_FAILED = get_or_create_metric(
+    Counter, "policy_engine_notifications_failed_total", "Alertas de lotes recusados ou com erro de rede (serão reenviados)."
+)
+NOTIFICATIONS_ABANDONED = get_or_create_metric(
+    Counter, "policy_engine_notifications_abandoned_total", "Alertas que esgotaram NOTIFICATION_DISPATCH_MAX_ATTEMPTS."
+)
+NOTIFICATION_BATCH_SECONDS = get_or_create_metric(
+    Histogram,
+    "policy_engine_notification_batch_seconds",
+    "Duração de uma requisição de lote a /notify/bulk.",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+class NotificationDispatcher:
+    """
+    Drena o notification_outbox em background. Cada ciclo reserva até `batch_size * max_concurrency` linhas
+    vencidas, envia-as a /notify/bulk em lotes de `batch_size` com no máximo `max_concurrency` requisições
+    simultâneas (pelo cliente compartilhado do http_client_pool) e registra o resultado: lotes aceitos
+    saem da fila, lotes com erro voltam com backoff exponencial. Enquanto houver linhas vencidas os ciclos se
+    emendam; sem trabalho, o worker espera `wake()` (chamado após a ingestão) ou `poll_interval_seconds`.
+    A entrega é "pelo menos uma vez": um lote enviado antes de uma queda do processo pode ser reenviado.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 200,
+        max_concurrency: int = 4,
+        poll_interval_seconds: float = 5.0,
+        lease_seconds: float = 300.0,
+        max_attempts: int = 8,
+        retry_base_seconds: float = 5.0,
+        retry_max_seconds: float = 600.0,
+        client: Optional[NotificationServiceClient] = None,
+        session_factory: Optional[Callable[[], AsyncSession]] = None,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.poll_interval_seconds = poll_interval_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._client = client or notification_client
+        self._session_factory = session_factory
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.failed = 0
+        self.last_cycle_at: Optional[datetime.datetime] = None
+        self.last_cycle_alerts_per_second: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def _get_session_factory(self) -> Callable[[], AsyncSession]:
+        if self._session_factory is None:
+            from app.db.session import AsyncSessionLocal
+            self._session_factory = AsyncSessionLocal
+        return self._session_factory
+
+    def wake(self) -> None:
+        """Pede um ciclo imediato; sem efeito se o worker não estiver rodando."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _send(self, semaphore: asyncio.Semaphore, batch: List[Tuple[int, AlertSchema]]) -> Optional[str]:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await self._client.send_notification_batch([alert for _, alert in batch])
+                return None
+            except Exception as e:
+                return f"{type(e).__name__}: {e}"
+            finally:
+                NOTIFICATION_BATCH_SECONDS.observe(time.perf_counter() - start)
+
+    async def dispatch_once(self) -> int:
+        """Executa um ciclo e retorna quantas linhas reservou (0 = fila sem linhas vencidas)."""
+        session_factory = self._get_session_factory()
+        async with session_factory() as db:
+            claimed = await async_notification_outbox_crud.claim(
+                db, limit=self.batch_size * self.max_concurrency, lease_seconds=self.lease_seconds
+            )
+        if not claimed:
+            return 0
+
+        start = time.perf_counter()
+        # Alertas removidos depois de enfileirados não têm o que notificar.
+        orphaned = [outbox_id for outbox_id, alert in claimed if alert is None]
+        deliverable = [(outbox_id, alert) for outbox_id, alert in claimed if alert is not None]
+        batches = [deliverable[i:i + self.batch_size] for i in range(0, len(deliverable), self.batch_size)]
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        errors = await asyncio.gather(*(self._send(semaphore, batch) for batch in batches))
+
+        delivered_ids = list(orphaned)
+        failed: Dict[str, List[int]] = {}
+        for batch, error in zip(batches, errors):
+            ids = [outbox_id for outbox_id, _ in batch]
+            if error is None:
+                delivered_ids.extend(ids)
+            else:
+                failed.setdefault(error, []).extend(ids)
+
+        async with session_factory() as db:
+            await async_notification_outbox_crud.mark_delivered(db, delivered_ids)
+            for error, ids in failed.items():
+                abandoned = await async_notification_outbox_crud.mark_failed(
+                    db, ids, error=error, max_attempts=self.max_attempts,
+                    retry_base_seconds=self.retry_base_seconds, retry_max_seconds=self.retry_max_seconds,
+                )
+                NOTIFICATIONS_ABANDONED.inc(abandoned)
+                logger.error(f"Falha ao entregar {len(ids)} notificações ao notification_service: {error}")
+
+        delivered = len(deliverable) - sum(len(ids) for ids in failed.values())
+        failed_count = len(deliverable) - delivered
+        elapsed = time.perf_counter() - start
+        NOTIFICATIONS_DISPATCHED.inc(delivered)
+        NOTIFICATIONS_FAILED.inc(failed_count)
+        self.delivered += delivered
+        self.failed += failed_count
+        self.last_cycle_at = datetime.datetime.now(datetime.timezone.utc)
+        self.last_cycle_alerts_per_second = delivered / elapsed if elapsed > 0 else None
+        self.last_error = next(iter(failed), None)
+        logger.info(
+            f"Notificações: {delivered} alertas entregues em {len(batches)} lotes, {failed_count} com falha, "
+            f"em {elapsed:.3f}s ({self.last_cycle_alerts_per_second or 0:.1f} alertas/s)."
+        )
+        return len(claimed)
+
+    async def _loop(self) -> None:
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                claimed = await self.dispatch_once()
+            except Exception as e:
+                logger.exception(f"Erro ao drenar o notification_outbox: {e}")
+                self.last_error = str(e)
+                claimed = 0
+            if claimed >= self.batch_size * self.max_concurrency:
+                # Ciclo cheio: provavelmente há mais linhas vencidas.
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if not self._client.base_url:
+            logger.warning("NOTIFICATION_SERVICE_URL not configured. Notification dispatcher not started.")
+            return
+        if self._task is not None and not self._task.done():
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        self._task = asyncio.get_running_loop().create_task(self._loop(), name="notification-dispatcher")
+        logger.info(
+            f"Dispatcher de notificações iniciado (lotes de {self.batch_size}, {self.max_concurrency} requisições simultâneas)."
+        )
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Termina o ciclo em andamento (até `timeout`); o que ficar na fila é entregue na próxima inicialização."""
+        if self._task is not None:
+            self._stopping = True
+            self.wake()
+            try:
+                await asyncio.wait_for(self._task, timeout=timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+            self._task = None
+        self._wakeup = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "last_cycle_at": self.last_cycle_at,
+            "last_cycle_alerts_per_second": self.last_cycle_alerts_per_second,
+            "last_error": self.last_error,
+        }
+
+
+notification_dispatcher = NotificationDispatcher(
+    batch_size=settings.NOTIFICATION_DISPATCH_BATCH_SIZE,
+    max_concurrency=settings.NOTIFICATION_DISPATCH_CONCURRENCY,
+    poll_interval_seconds=settings.NOTIFICATION_DISPATCH_INTERVAL_SECONDS,
+    lease_seconds=settings.NOTIFICATION_DISPATCH_LEASE_SECONDS,
+    max_attempts=settings.NOTIFICATION_DISPATCH_MAX_ATTEMPTS,
+    retry_base_seconds=settings.NOTIFICATION_RETRY_BASE_SECONDS,
+    retry_max_seconds=settings.NOTIFICATION_RETRY_MAX_SECONDS,
+)
@@ -0,0 +1,251 @@
+import json
+import logging
+from typing import List, Dict, Any, Optional, Iterable, NamedTuple, Set, Tuple
+from sqlalchemy.orm import Session
+
+from app.crud.crud_asset import asset_crud
+from app.crud.crud_asset_relationship import asset_relationship_crud
+from app.engine.iam_policy_matcher import policy_document_cache
+
+logger = logging.getLogger(__name__)
+
+# Tipos de relacionamento gravados em asset_relationships. A direção segue o movimento de um atacante:
+# instância -> security group / perfil de instância -> role -> política.
+USES_SECURITY_GROUP = "USES_SECURITY_GROUP"
+HAS_INSTANCE_PROFILE = "HAS_INSTANCE_PROFILE"
+ASSUMES_ROLE = "ASSUMES_ROLE"
+HAS_POLICY = "HAS_POLICY"
+HAS_BUCKET_POLICY = "HAS_BUCKET_POLICY"
+
+# Tipos de ativo por serviço da análise (o inventário grava o nome do serviço); os nomes antigos
+# ('EC2Instance', ...) continuam aceitos.
+EC2_INSTANCE_ASSET_TYPES = {"EC2Instance", "ec2_instances", "ec2_instance"}
+IAM_PRINCIPAL_ASSET_TYPES = {"iam_roles", "iam_users", "IAMRole", "IAMUser"}
+S3_BUCKET_ASSET_TYPES = {"s3", "s3_buckets", "S3Bucket"}
+
+# Tipos dos ativos criados a partir de referências (ex.: o perfil de instância citado por uma EC2).
+SECURITY_GROUP_ASSET_TYPE = "ec2_security_groups"
+INSTANCE_PROFILE_ASSET_TYPE = "iam_instance_profiles"
+ROLE_ASSET_TYPE = "iam_roles"
+MANAGED_POLICY_ASSET_TYPE = "iam_policies"
+INLINE_POLICY_ASSET_TYPE = "iam_inline_policies"
+BUCKET_POLICY_ASSET_TYPE = "s3_bucket_policies"
+
+ADMIN_MANAGED_POLICY_SUFFIX = ":policy/AdministratorAccess"
+
+
+class DerivedEdge(NamedTuple):
+    source_asset_id: str
+    target_asset_id: str
+    relationship_type: str
+    # Arestas inferidas por convenção só são gravadas se as duas pontas já existirem no inventário.
+    requires_existing: bool = False
+
+
+class DerivedAsset(NamedTuple):
+    asset: Dict[str, Any]
+    # Ativos que só existem como referência não sobrescrevem um ativo já coletado.
+    reference_only: bool
+
+
+class RelationshipSyncResult(NamedTuple):
+    # Ativos derivados gravados nesta sincronização, com o `id` do banco.
+    assets: List[Dict[str, Any]]
+    reference_assets: List[Dict[str, Any]]
+    # Arestas de saída atuais de cada origem sincronizada: id de origem -> [(id de destino, tipo)].
+    edges: Dict[int, List[Tuple[int, str]]]
+
+
+def _get(config: Dict[str, Any], *keys: str) -> Any:
+    return next((config[k] for k in keys if config.get(k)), None)
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _parse_document(document: Any) -> Optional[Dict[str, Any]]:
+    if isinstance(document, str):
+        try:
+            document = json.loads(document)
+        except ValueError:
+            return None
+    return document if isinstance(document, dict) else None
+
+
+def is_admin_policy_document(document: Any) -> bool:
+    """True se o documento tiver um Allow incondicional com Action '*' sobre Resource '*'."""
+    compiled = policy_document_cache.get(document)
+    return compiled is not None and compiled.grants_full_access
+
+
+def _arn_account_and_name(arn: str, resource_kind: str) -> Optional[Tuple[str, str]]:
+    # arn:aws:iam::123456789012:instance-profile/path/Name -> ('123456789012', 'Name')
+    parts = arn.split(":", 5)
+    if len(parts) != 6 or not parts[5].startswith(resource_kind + "/"):
+        return None
+    return parts[4], parts[5].rsplit("/", 1)[-1]
+
+
+def _reference(template: Dict[str, Any], asset_id: str, asset_type: str, name: Optional[str],
+               configuration: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {
+        "asset_id": asset_id, "asset_type": asset_type, "name": name, "provider": template["provider"],
+        "account_id": template["account_id"], "region": None, "configuration": configuration,
+    }
+
+
+def _derive_ec2_instance(asset: Dict[str, Any], config: Dict[str, Any]) -> Tuple[List[DerivedAsset], List[DerivedEdge]]:
+    assets: List[DerivedAsset] = []
+    edges: List[DerivedEdge] = []
+    for group in _as_list(_get(config, "security_groups", "SecurityGroups")):
+        group_id = _get(group, "GroupId", "group_id") if isinstance(group, dict) else None
+        if group_id:
+            assets.append(DerivedAsset(_reference(asset, group_id, SECURITY_GROUP_ASSET_TYPE, _get(group, "GroupName", "group_name")), True))
+            edges.append(DerivedEdge(asset["asset_id"], group_id, USES_SECURITY_GROUP))
+
+    profile_arn = _get(config, "iam_instance_profile_arn", "IamInstanceProfileArn")
+    if profile_arn:
+        parsed = _arn_account_and_name(profile_arn, "instance-profile")
+        assets.append(DerivedAsset(_reference(asset, profile_arn, INSTANCE_PROFILE_ASSET_TYPE, parsed[1] if parsed else None), True))
+        edges.append(DerivedEdge(asset["asset_id"], profile_arn, HAS_INSTANCE_PROFILE))
+        if parsed:
+            # Os dados coletados não trazem a role do perfil; pela convenção do console, perfil e role
+            # têm o mesmo nome. A aresta só é criada se essa role existir no inventário.
+            role_arn = f"arn:aws:iam::{parsed[0]}:role/{parsed[1]}"
+            edges.append(DerivedEdge(profile_arn, role_arn, ASSUMES_ROLE, requires_existing=True))
+    return assets, edges
+
+
+def _derive_iam_principal(asset: Dict[str, Any], config: Dict[str, Any]) -> Tuple[List[DerivedAsset], List[DerivedEdge]]:
+    assets: List[DerivedAsset] = []
+    edges: List[DerivedEdge] = []
+    principal_arn = asset["asset_id"]
+    for attachment in _as_list(_get(config, "attached_policies", "AttachedManagedPolicies")):
+        policy_arn = _get(attachment, "policy_arn", "PolicyArn") if isinstance(attachment, dict) else None
+        if not policy_arn:
+            continue
+        configuration = {"policy_arn": policy_arn, "is_admin": policy_arn.endswith(ADMIN_MANAGED_POLICY_SUFFIX)}
+        assets.append(DerivedAsset(_reference(asset, policy_arn, MANAGED_POLICY_ASSET_TYPE, _get(attachment, "policy_name", "PolicyName"), configuration), True))
+        edges.append(DerivedEdge(principal_arn, policy_arn, HAS_POLICY))
+
+    for inline in _as_list(_get(config, "inline_policies", "RolePolicyList", "UserPolicyList")):
+        if not isinstance(inline, dict):
+            continue
+        policy_name = _get(inline, "policy_name", "PolicyName")
+        if not policy_name:
+            continue
+        document = _get(inline, "policy_document", "PolicyDocument")
+        policy_id = f"{principal_arn}/inline-policy/{policy_name}"
+        configuration = {"policy_name": policy_name, "policy_document": document, "is_admin": is_admin_policy_document(document)}
+        assets.append(DerivedAsset(_reference(asset, policy_id, INLINE_POLICY_ASSET_TYPE, policy_name, configuration), False))
+        edges.append(DerivedEdge(principal_arn, policy_id, HAS_POLICY))
+
+    if asset["asset_type"] in ("iam_roles", "IAMRole"):
+        # Lado inverso da convenção perfil/role: a role coletada depois da instância liga o perfil já existente.
+        parsed = _arn_account_and_name(principal_arn, "role")
+        if parsed:
+            profile_arn = f"arn:aws:iam::{parsed[0]}:instance-profile/{parsed[1]}"
+            edges.append(DerivedEdge(profile_arn, principal_arn, ASSUMES_ROLE, requires_existing=True))
+    return assets, edges
+
+
+def _derive_s3_bucket(asset: Dict[str, Any], config: Dict[str, Any]) -> Tuple[List[DerivedAsset], List[DerivedEdge]]:
+    document = _parse_document(config.get("policy"))
+    if not document:
+        return [], []
+    policy_id = f"{asset['asset_id']}/bucket-policy"
+    configuration = {"policy_document": document, "is_admin": False}
+    return (
+        [DerivedAsset(_reference(asset, policy_id, BUCKET_POLICY_ASSET_TYPE, asset.get("name"), configuration), False)],
+        [DerivedEdge(asset["asset_id"], policy_id, HAS_BUCKET_POLICY)],
+    )
+
+
+def derive_relationships(asset: Dict[str, Any]) -> Tuple[List[DerivedAsset], List[DerivedEdge]]:
+    """
+    Deriva, da configuração de um ativo salvo, os ativos referenciados e as arestas que partem dele:
+    instância -> security group e perfil de instância (-> role), role/usuário -> políticas e
+    bucket -> política de bucket.
+    """
+    config = asset.get("configuration") or {}
+    asset_type = asset["asset_type"]
+    if asset_type in EC2_INSTANCE_ASSET_TYPES:
+        return _derive_ec2_instance(asset, config)
+    if asset_type in IAM_PRINCIPAL_ASSET_TYPES:
+        return _derive_iam_principal(asset, config)
+    if asset_type in S3_BUCKET_ASSET_TYPES:
+        return _derive_s3_bucket(asset, config)
+    return [], []
+
+
+def sync_relationships(db: Session, saved_assets: Iterable[Dict[str, Any]], chunk_size: int = 1000) -> RelationshipSyncResult:
+    """
+    Etapa executada após o upsert dos ativos: grava em lote os ativos referenciados e substitui as
+    arestas de saída dos ativos salvos em asset_relationships.
+
+    `saved_assets` são os dicts retornados por `_save_assets` (com `id`). Referências a ativos ainda não
+    coletados viram ativos mínimos (DO NOTHING se já existirem), para que a aresta possa ser gravada.
+    """
+    saved_assets = list(saved_assets)
+    derived: Dict[Tuple[str, str], DerivedAsset] = {}
+    edges: List[Tuple[str, DerivedEdge]] = []
+    for asset in saved_assets:
+        assets, asset_edges = derive_relationships(asset)
+        for item in assets:
+            key = (item.asset["account_id"], item.asset["asset_id"])
+            # Um ativo com configuração própria (política inline) prevalece sobre uma simples referência.
+            if key not in derived or not item.reference_only:
+                derived[key] = item
+        edges.extend((asset["account_id"], edge) for edge in asset_edges)
+
+    owned = [item.asset for item in derived.values() if not item.reference_only]
+    references = [item.asset for item in derived.values() if item.reference_only]
+    if owned:
+        asset_crud.bulk_upsert(db, objs_in=owned, chunk_size=chunk_size)
+    if references:
+        asset_crud.bulk_upsert(db, objs_in=references, chunk_size=chunk_size, update_existing=False)
+
+    ids_by_account: Dict[str, Dict[str, int]] = {}
+    asset_ids_by_account: Dict[str, Set[str]] = {}
+    for asset in saved_assets:
+        ids_by_account.setdefault(asset["account_id"], {})[asset["asset_id"]] = asset["id"]
+    for account_id, edge in edges:
+        asset_ids_by_account.setdefault(account_id, set()).update((edge.source_asset_id, edge.target_asset_id))
+    for account_id, asset_ids in asset_ids_by_account.items():
+        known = ids_by_account.setdefault(account_id, {})
+        missing = [asset_id for asset_id in asset_ids if asset_id not in known]
+        known.update(asset_crud.get_ids_by_asset_ids(db, account_id=account_id, asset_ids=missing, chunk_size=chunk_size))
+
+    # Todo ativo salvo tem suas arestas substituídas, mesmo que agora não derive nenhuma.
+    edges_by_source: Dict[int, List[Tuple[int, str]]] = {asset["id"]: [] for asset in saved_assets}
+    for account_id, edge in edges:
+        ids = ids_by_account.get(account_id, {})
+        source_id, target_id = ids.get(edge.source_asset_id), ids.get(edge.target_asset_id)
+        if source_id is None or target_id is None:
+            if not edge.requires_existing:
+                logger.warning(f"Relacionamento {edge.relationship_type} ignorado: {edge.source_asset_id} -> {edge.target_asset_id} não encontrado.")
+            continue
+        edges_by_source.setdefault(source_id, []).append((target_id, edge.relationship_type))
+
+    written = asset_relationship_crud.replace_for_sources(
+        db,
+        source_ids=edges_by_source.keys(),
+        edges=((source, target, kind) for source, targets in edges_by_source.items() for target, kind in targets),
+        chunk_size=chunk_size,
+    )
+    logger.info(f"{written} relacionamentos derivados de {len(saved_assets)} ativos.")
+
+    def with_ids(assets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            {**asset, "id": ids_by_account[asset["account_id"]][asset["asset_id"]]}
+            for asset in assets if asset["asset_id"] in ids_by_account.get(asset["account_id"], {})
+        ]
+
+    return RelationshipSyncResult(
+        assets=with_ids(owned),
+        reference_assets=with_ids(references),
+        edges={source: sorted(set(targets)) for source, targets in edges_by_source.items()},
+    )
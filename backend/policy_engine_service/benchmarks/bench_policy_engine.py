@@ -0,0 +1,190 @@
+"""
+Benchmark dos avaliadores do motor de políticas com dados sintéticos.
+
+Cada caso gera `size` registros com os geradores de `benchmarks.synthetic` (seed fixa) e mede só a
+avaliação. Os casos `registry:<provider>/<service>` avaliam as políticas YAML compiladas do registro (o
+caminho usado por /analyze) sobre os registros serializados; os demais chamam as funções `evaluate_*` de
+cada módulo de app/engine. Os casos `validate:<Schema>` medem o parsing pydantic de cada schema de
+input_data_schema.py. Um caso que levanta exceção aparece no resultado com o campo `error`.
+Cada (caso, tamanho) roda num processo novo, então `peak_rss_mb` é o pico daquele caso e não acumula
+com os anteriores; `rss_after_generation_mb` separa o custo dos próprios dados de entrada.
+
+Uso (a partir de backend/policy_engine_service):
+    python -m benchmarks.bench_policy_engine
+    python -m benchmarks.bench_policy_engine --sizes 1000,10000 --cases ec2_sg,iam_users,validate:S3BucketDataInput
+    python -m benchmarks.bench_policy_engine --list
+
+O resultado é impresso em JSON, um objeto por (caso, tamanho), com recursos/segundo e pico de RSS.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from benchmarks.synthetic import generate_raw_records, generate_records, input_schemas
+
+ACCOUNT_ID = "123456789012"
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+
+# Caso -> (schema gerado, função que avalia a lista de registros e retorna os alertas).
+Case = Tuple[Type[BaseModel], Callable[[List[Any]], List[Any]]]
+
+
+def _evaluator_cases() -> Dict[str, Case]:
+    from app.engine.aws_ec2_policies import evaluate_ec2_instance_policies, evaluate_ec2_sg_policies
+    from app.engine.aws_iam_policies import evaluate_iam_role_policies, evaluate_iam_user_policies
+    from app.engine.gcp_scc_processing import process_gcp_scc_findings
+    from app.engine.google_workspace_drive_policies import evaluate_google_workspace_drive_policies
+    from app.engine.m365_policies import evaluate_m365_policies
+    from app.schemas import input_data_schema as schemas
+    from app.schemas.gcp.gcp_scc_input_schemas import GCPFindingInput, GCPSCCFindingCollectionInput
+    from app.schemas.m365.m365_input_schemas import (
+        M365ConditionalAccessPolicyCollectionInput, M365ConditionalAccessPolicyDetailInput,
+        M365UserMFADetailInput, M365UserMFAStatusCollectionInput,
+    )
+
+    def m365(users: List[M365UserMFADetailInput]) -> List[Any]:
+        # Um tenant tem poucas políticas de acesso condicional; cresce com o número de usuários em 1/100.
+        ca_policies = generate_records(M365ConditionalAccessPolicyDetailInput, max(1, len(users) // 100))
+        return evaluate_m365_policies(
+            M365UserMFAStatusCollectionInput(users_mfa_status=users),
+            M365ConditionalAccessPolicyCollectionInput(policies=ca_policies),
+            ACCOUNT_ID,
+        )
+
+    return {
+        "ec2_sg": (schemas.EC2SecurityGroupDataInput, lambda data: evaluate_ec2_sg_policies(data, ACCOUNT_ID, "us-east-1")),
+        "ec2_instances": (schemas.EC2InstanceDataInput, lambda data: evaluate_ec2_instance_policies(data, ACCOUNT_ID)),
+        "iam_users": (schemas.IAMUserDataInput, lambda data: evaluate_iam_user_policies(data, ACCOUNT_ID)),
+        "iam_roles": (schemas.IAMRoleDataInput, lambda data: evaluate_iam_role_policies(data, ACCOUNT_ID)),
+        "gcp_scc": (GCPFindingInput, lambda data: process_gcp_scc_findings(
+            GCPSCCFindingCollectionInput(findings=data), "organizations/123456789012")),
+        "m365": (M365UserMFADetailInput, m365),
+        "gws_drive": (schemas.GoogleWorkspaceSharedDriveDataInput,
+                      lambda data: evaluate_google_workspace_drive_policies(data, ACCOUNT_ID)),
+    }
+
+
+def _registry_cases() -> Dict[str, Case]:
+    from app.engine.evaluation_executor import PolicyEvaluationExecutor
+    from app.engine.policy_registry import PolicyRegistry
+    from app.schemas.input_data_schema import STREAM_RECORD_SCHEMAS, IAMUserDataInput
+
+    # As políticas YAML usam o nome de serviço genérico "iam" para os usuários IAM.
+    service_schemas = {"iam": IAMUserDataInput, **STREAM_RECORD_SCHEMAS}
+    registry = PolicyRegistry()
+    executor = PolicyEvaluationExecutor(max_workers=1)
+    cases: Dict[str, Case] = {}
+    for provider, service in sorted({(p.policy["provider"], p.policy["service"]) for p in registry.all_policies()}):
+        schema = service_schemas.get(service)
+        if schema is None:
+            continue
+        policies = registry.policies_for(provider, service)
+        cases[f"registry:{provider}/{service}"] = (schema, lambda data, policies=policies: executor.evaluate_in_process(
+            policies, [record.model_dump() for record in data], ACCOUNT_ID))
+    return cases
+
+
+def _cases() -> Dict[str, Case]:
+    return {**_registry_cases(), **_evaluator_cases()}
+
+
+def available_cases() -> List[str]:
+    return list(_cases()) + [f"validate:{name}" for name in input_schemas()]
+
+
+def _rss_mb() -> float:
+    # ru_maxrss é em KiB no Linux.
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_case(case: str, size: int, seed: int) -> Dict[str, Any]:
+    """Executa um caso no processo atual; chamado num processo novo por `run`."""
+    if case.startswith("validate:"):
+        schema = input_schemas()[case.split(":", 1)[1]]
+        raw = generate_raw_records(schema, size, seed)
+        rss_after_generation = _rss_mb()
+        started = time.perf_counter()
+        for record in raw:
+            schema.model_validate(record)
+        elapsed = time.perf_counter() - started
+        alerts: Optional[int] = None
+    else:
+        schema, evaluate = _cases()[case]
+        data = generate_records(schema, size, seed)
+        rss_after_generation = _rss_mb()
+        started = time.perf_counter()
+        alerts = len(evaluate(data))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "case": case,
+        "size": size,
+        "seconds": round(elapsed, 4),
+        "resources_per_second": round(size / elapsed, 1) if elapsed > 0 else None,
+        "alerts": alerts,
+        "rss_after_generation_mb": rss_after_generation,
+        "peak_rss_mb": _rss_mb(),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(cases: List[str], sizes: List[int], seed: int) -> Dict[str, Any]:
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for case in cases:
+        for size in sizes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                try:
+                    result = pool.submit(run_case, case, size, seed).result()
+                except Exception as e:
+                    result = {"case": case, "size": size, "error": str(e)}
+            print(json.dumps(result), file=sys.stderr)
+            results.append(result)
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Tamanhos separados por vírgula.")
+    parser.add_argument("--cases", default=None, help="Casos separados por vírgula (padrão: todos).")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--list", action="store_true", help="Lista os casos disponíveis e sai.")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(available_cases()))
+        return
+
+    cases = args.cases.split(",") if args.cases else available_cases()
+    unknown = sorted(set(cases) - set(available_cases()))
+    if unknown:
+        parser.error(f"Casos desconhecidos: {', '.join(unknown)}")
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    print(json.dumps(run(cases, sizes, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Geradores sintéticos e determinísticos (com seed) para os schemas de entrada do motor de políticas.
+
+`generate_records` percorre os campos de qualquer modelo pydantic de `input_data_schema.py` e monta
+registros válidos, respeitando aliases, Optional, listas, dicts, enums, datas e modelos aninhados.
+Os campos que decidem se uma política dispara (CIDRs abertos, IP público, MFA, compartilhamento
+externo, ...) recebem overrides em `FIELD_OVERRIDES`, para que uma fração realista dos recursos
+gere alertas em vez de só exercitar o caminho sem achados.
+"""
+import datetime
+import enum
+import inspect
+import random
+import typing
+from typing import Any, Callable, Dict, List, Type
+
+from pydantic import BaseModel
+
+from app.schemas import input_data_schema
+
+BASE_TIME = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+# Fração dos registros que recebe a configuração insegura nos overrides.
+RISKY_FRACTION = 0.2
+
+FieldOverride = Callable[[random.Random, int], Any]
+
+
+def _risky(rng: random.Random) -> bool:
+    return rng.random() < RISKY_FRACTION
+
+
+def _ip_permission(rng: random.Random) -> Dict[str, Any]:
+    cidr = "0.0.0.0/0" if _risky(rng) else f"10.{rng.randint(0, 255)}.0.0/16"
+    port = rng.choice([22, 80, 443, 3389, 5432])
+    return {
+        "IpProtocol": rng.choice(["tcp", "-1"]), "FromPort": port, "ToPort": port,
+        "IpRanges": [{"CidrIp": cidr}], "Ipv6Ranges": [],
+    }
+
+
+def _access_key(rng: random.Random, n: int) -> Dict[str, Any]:
+    created = BASE_TIME - datetime.timedelta(days=rng.randint(1, 400))
+    return {
+        "AccessKeyId": f"AKIA{n:016d}", "Status": rng.choice(["Active", "Active", "Inactive"]),
+        "CreateDate": created.isoformat(),
+        "LastUsedDate": (created + datetime.timedelta(days=rng.randint(0, 200))).isoformat() if rng.random() < 0.7 else None,
+    }
+
+
+def _acl_grant(rng: random.Random) -> Dict[str, Any]:
+    if _risky(rng):
+        grantee = {"type": "Group", "uri": rng.choice([
+            "http://acs.amazonaws.com/groups/global/AllUsers", "http://acs.amazonaws.com/groups/global/AuthenticatedUsers"])}
+    else:
+        grantee = {"type": "CanonicalUser", "id": f"{rng.getrandbits(64):016x}", "display_name": "owner"}
+    return {"grantee": grantee, "permission": rng.choice(["READ", "WRITE", "FULL_CONTROL"])}
+
+
+def _inline_policy(rng: random.Random, n: int) -> Dict[str, Any]:
+    actions = rng.choice([["s3:GetObject"], ["s3:PutObject", "s3:GetObject"], "s3:*", ["ec2:Describe*"], "*"])
+    return {"PolicyName": f"inline-{n}", "policy_document": {
+        "Version": "2012-10-17", "Statement": [{"Effect": "Allow", "Action": actions, "Resource": "*"}]}}
+
+
+def _drive_permission(rng: random.Random, n: int) -> Dict[str, Any]:
+    kind = "anyone" if _risky(rng) else rng.choice(["user", "domain"])
+    return {"id": f"perm-{n}", "type": kind, "role": rng.choice(["reader", "writer"]),
+            "emailAddress": f"user{n}@example.com" if kind == "user" else None,
+            "domain": "example.com" if kind == "domain" else None, "allowFileDiscovery": _risky(rng)}
+
+
+# Overrides por (schema, nome do campo). Recebem (rng, índice do registro) e retornam o valor bruto (pré-validação).
+FIELD_OVERRIDES: Dict[str, Dict[str, FieldOverride]] = {
+    "S3BucketDataInput": {
+        "name": lambda rng, n: f"bench-bucket-{n}",
+        "acl": lambda rng, n: {"owner_id": "owner", "grants": [_acl_grant(rng) for _ in range(rng.randint(1, 3))]},
+    },
+    "EC2SecurityGroupDataInput": {
+        "group_id": lambda rng, n: f"sg-{n:017x}",
+        "ip_permissions": lambda rng, n: [_ip_permission(rng) for _ in range(rng.randint(1, 4))],
+    },
+    "EC2InstanceDataInput": {
+        "instance_id": lambda rng, n: f"i-{n:017x}",
+        "public_ip_address": lambda rng, n: f"54.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}" if _risky(rng) else None,
+        "iam_instance_profile_arn": lambda rng, n: None if _risky(rng) else f"arn:aws:iam::123456789012:instance-profile/profile-{n % 50}",
+        "security_groups": lambda rng, n: [{"GroupId": f"sg-{rng.randint(0, 500):017x}", "GroupName": "bench"}],
+    },
+    "IAMUserDataInput": {
+        "arn": lambda rng, n: f"arn:aws:iam::123456789012:user/user-{n}",
+        "user_name": lambda rng, n: "<root_account>" if n == 0 else f"user-{n}",
+        "attached_policies": lambda rng, n: [{"PolicyArn": "arn:aws:iam::aws:policy/ReadOnlyAccess", "PolicyName": "ReadOnlyAccess"}],
+        "inline_policies": lambda rng, n: [_inline_policy(rng, n * 2 + k) for k in range(rng.randint(0, 2))],
+        "access_keys": lambda rng, n: [_access_key(rng, n * 2 + k) for k in range(rng.randint(0, 2))],
+        "mfa_devices": lambda rng, n: [] if _risky(rng) else [
+            {"UserName": f"user-{n}", "SerialNumber": f"arn:aws:iam::123456789012:mfa/user-{n}", "EnableDate": BASE_TIME.isoformat()}
+        ],
+    },
+    "IAMRoleDataInput": {
+        "arn": lambda rng, n: f"arn:aws:iam::123456789012:role/role-{n}",
+        "role_name": lambda rng, n: f"role-{n}",
+    },
+    "GoogleWorkspaceDriveFileDataInput": {
+        "permissions": lambda rng, n: [_drive_permission(rng, n * 3 + k) for k in range(rng.randint(1, 3))],
+    },
+    "GCPFindingInput": {
+        "state": lambda rng, n: rng.choice(["ACTIVE", "ACTIVE", "INACTIVE"]),
+        "severity": lambda rng, n: rng.choice(["CRITICAL", "HIGH", "MEDIUM", "LOW", "SEVERITY_UNSPECIFIED"]),
+        "collection_error_details": lambda rng, n: None,
+    },
+    "M365UserMFADetailInput": {
+        "is_mfa_registered": lambda rng, n: not _risky(rng),
+        "error_details": lambda rng, n: None,
+    },
+    "M365ConditionalAccessPolicyDetailInput": {
+        "state": lambda rng, n: rng.choice(["enabled", "enabled", "disabled", "enabledForReportingButNotEnforced"]),
+    },
+}
+
+
+def _unwrap_optional(annotation: Any) -> typing.Tuple[Any, bool]:
+    if typing.get_origin(annotation) is typing.Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        if len(args) < len(typing.get_args(annotation)):
+            return (args[0] if len(args) == 1 else typing.Union[tuple(args)]), True
+    return annotation, False
+
+
+def _value_for(annotation: Any, field_name: str, rng: random.Random, n: int, depth: int) -> Any:
+    annotation, _ = _unwrap_optional(annotation)
+    origin = typing.get_origin(annotation)
+
+    if origin in (list, List, typing.Sequence, set):
+        (item_type,) = typing.get_args(annotation) or (str,)
+        if depth > 3:
+            return []
+        return [_value_for(item_type, field_name, rng, n * 4 + k, depth + 1) for k in range(rng.randint(0, 2))]
+    if origin in (dict, Dict):
+        args = typing.get_args(annotation)
+        value_type = args[1] if len(args) == 2 else str
+        if value_type is Any:
+            return {f"{field_name}_key": f"value-{n % 10}"}
+        return {f"{field_name}_key": _value_for(value_type, field_name, rng, n, depth + 1)}
+    if origin is typing.Union:
+        return _value_for(typing.get_args(annotation)[0], field_name, rng, n, depth)
+    if origin is typing.Literal:
+        return rng.choice(typing.get_args(annotation))
+
+    if inspect.isclass(annotation):
+        if issubclass(annotation, BaseModel):
+            return _raw_record(annotation, rng, n, depth + 1)
+        if issubclass(annotation, enum.Enum):
+            return rng.choice(list(annotation)).value
+        if issubclass(annotation, bool):
+            return rng.random() < 0.5
+        if issubclass(annotation, int):
+            return rng.randint(0, 1000)
+        if issubclass(annotation, float):
+            return round(rng.uniform(0, 1000), 3)
+        if issubclass(annotation, datetime.datetime):
+            return (BASE_TIME - datetime.timedelta(minutes=rng.randint(0, 525600))).isoformat()
+        if issubclass(annotation, datetime.date):
+            return (BASE_TIME - datetime.timedelta(days=rng.randint(0, 365))).date().isoformat()
+    if "email" in field_name.lower():
+        return f"user{n}@example.com"
+    return f"{field_name}-{n}"
+
+
+def _raw_record(schema: Type[BaseModel], rng: random.Random, n: int, depth: int = 0) -> Dict[str, Any]:
+    overrides = FIELD_OVERRIDES.get(schema.__name__, {})
+    record: Dict[str, Any] = {}
+    for name, field in schema.model_fields.items():
+        key = field.alias or name
+        if name in overrides:
+            record[key] = overrides[name](rng, n)
+            continue
+        _, optional = _unwrap_optional(field.annotation)
+        # Campos de erro de coleta ficam vazios; os demais opcionais aparecem na maior parte dos registros.
+        if optional and ("error" in name or rng.random() < 0.1):
+            record[key] = None
+            continue
+        record[key] = _value_for(field.annotation, name, rng, n, depth)
+    return record
+
+
+def generate_raw_records(schema: Type[BaseModel], count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Gera `count` registros brutos (dicts como os enviados pelo collector) para `schema`."""
+    rng = random.Random(f"{schema.__name__}:{seed}")
+    return [_raw_record(schema, rng, n) for n in range(count)]
+
+
+def generate_records(schema: Type[BaseModel], count: int, seed: int = 42) -> List[BaseModel]:
+    """Gera `count` instâncias validadas de `schema`; a mesma seed sempre produz os mesmos registros."""
+    return [schema.model_validate(raw) for raw in generate_raw_records(schema, count, seed)]
+
+
+def input_schemas() -> Dict[str, Type[BaseModel]]:
+    """Schemas de recurso de nível superior de input_data_schema.py (os que aparecem em SupportedDataTypes)."""
+    schemas: Dict[str, Type[BaseModel]] = {}
+    for name, value in vars(input_data_schema).items():
+        if (inspect.isclass(value) and issubclass(value, BaseModel) and value.__module__ == input_data_schema.__name__
+                and name.endswith("DataInput")):
+            schemas[name] = value
+    return dict(sorted(schemas.items()))
@@ -0,0 +1,168 @@
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import json
+
+import pytest
+from app.api.v1 import analysis_controller
+from app.engine.core_engine import AnalysisOutcome, count_collection_errors
+from app.schemas.input_data_schema import AnalysisRequest, AnalysisStreamHeader
+
+
+class _NullSession:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture()
+def scan_calls(monkeypatch):
+    calls = {"begin": 0, "complete": [], "abandoned": [], "steps": []}
+
+    async def fake_begin_scan(account_id, provider, service):
+        calls["begin"] += 1
+        return 7
+
+    async def fake_complete_scan(scan_generation, account_id, provider, service, **kwargs):
+        calls["complete"].append(scan_generation)
+        return (0, 0) if scan_generation is None else (3, 1)
+
+    async def fake_abandon_scan(scan_generation):
+        calls["abandoned"].append(scan_generation)
+
+    async def fake_analyze(request, scan_generation=None, **kwargs):
+        alerts = [
+            {"resource_id": r["name"], "resource_type": "S3Bucket", "policy_id": "S3_Public", "severity": "HIGH",
+             "title": "Bucket público", "description": "desc"}
+            for r in request.data if r.get("public")
+        ]
+        return AnalysisOutcome(alerts, request.account_id, "aws", {"ok-bucket": "hash"}, ["old-bucket"], ["S3_Public"])
+
+    async def fake_finalize_analysis(outcome):
+        calls["steps"].append("finalize")
+        return ["carried:old-bucket"]
+
+    async def fake_bulk_ingest(db, *, alerts_in, **kwargs):
+        calls["steps"].append("persist")
+        return [f"persisted:{alert.resource_id}" for alert in alerts_in]
+
+    async def fake_create_event(**kwargs):
+        return None
+
+    engine = analysis_controller.policy_engine
+    monkeypatch.setattr(engine, "begin_scan", fake_begin_scan)
+    monkeypatch.setattr(engine, "complete_scan", fake_complete_scan)
+    monkeypatch.setattr(engine, "abandon_scan", fake_abandon_scan)
+    monkeypatch.setattr(engine, "analyze", fake_analyze)
+    monkeypatch.setattr(engine, "finalize_analysis", fake_finalize_analysis)
+    monkeypatch.setattr(analysis_controller, "bulk_ingest_alerts_and_notify", fake_bulk_ingest)
+    monkeypatch.setattr(analysis_controller.audit_service_client, "create_event", fake_create_event)
+    return calls
+
+
+def _request(data, collection_complete=True):
+    # model_construct: o Union de SupportedDataTypes referencia schemas ainda não definidos neste módulo.
+    return AnalysisRequest.model_construct(
+        provider="aws", service="s3", account_id="111", data=data, collection_complete=collection_complete
+    )
+
+
+def _bucket(name, **extra):
+    return {"name": name, "region": "us-east-1", **extra}
+
+
+def test_count_collection_errors_flags_error_details_and_error_placeholders():
+    records = [
+        _bucket("ok-bucket"),
+        _bucket("broken-bucket", error_details="AccessDenied"),
+        {"instance_id": "ERROR_REGION", "region": "eu-west-1"},
+        {"instance_id": "i-123"},
+    ]
+    assert count_collection_errors(records) == 2
+    assert count_collection_errors([]) == 0
+    assert count_collection_errors(None) == 0
+
+
+@pytest.mark.asyncio
+async def test_complete_collection_closes_the_scan(scan_calls):
+    request = _request([_bucket("ok-bucket")])
+    await analysis_controller.analyze_resources_and_persist_alerts(request, db=None)
+    assert scan_calls["begin"] == 1 and scan_calls["complete"] == [7]
+
+
+@pytest.mark.asyncio
+async def test_empty_collection_confirmed_complete_still_closes_the_scan(scan_calls):
+    request = _request([])
+    await analysis_controller.analyze_resources_and_persist_alerts(request, db=None)
+    assert scan_calls["begin"] == 1 and scan_calls["complete"] == [7]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("data,collection_complete", [
+    ([_bucket("ok-bucket"), _bucket("broken-bucket", error_details="AccessDenied")], True),
+    ([_bucket("ok-bucket")], False),
+    # Coletores que registram a falha no log e devolvem [] (ex.: GKE com zonas ausentes) não confirmam a coleta.
+    ([], False),
+])
+async def test_unconfirmed_or_partial_collection_does_not_resolve_unseen_alerts(scan_calls, data, collection_complete):
+    request = _request(data, collection_complete)
+    await analysis_controller.analyze_resources_and_persist_alerts(request, db=None)
+    assert scan_calls["begin"] == 0 and scan_calls["complete"] == [None]
+
+
+@pytest.mark.asyncio
+async def test_response_includes_open_alerts_of_unchanged_resources_after_persisting(scan_calls):
+    request = _request([_bucket("new-bucket", public=True), _bucket("ok-bucket")])
+
+    response = await analysis_controller.analyze_resources_and_persist_alerts(request, db=None)
+
+    # Os hashes só são gravados (finalize_analysis) depois que os alertas gerados foram persistidos.
+    assert scan_calls["steps"] == ["persist", "finalize"]
+    assert response == ["persisted:new-bucket", "carried:old-bucket"]
+
+
+async def _lines(*lines):
+    for number, line in enumerate(lines, start=2):
+        yield number, line
+
+
+async def _no_alerts(db, header, records, scan_generation):
+    return []
+
+
+async def _drain(header, *lines):
+    return [json.loads(output) async for output in analysis_controller._stream_analysis(header, _lines(*lines))]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("lines", [
+    (),
+    (b'{"name": "ok-bucket", "region": "us-east-1"}', b"not json"),
+    (b'{"name": "broken-bucket", "region": "us-east-1", "error_details": "AccessDenied"}',),
+])
+async def test_stream_that_cannot_complete_discards_its_scan_generation(scan_calls, monkeypatch, lines):
+    monkeypatch.setattr(analysis_controller, "AsyncSessionLocal", _NullSession)
+    monkeypatch.setattr(analysis_controller, "_analyze_stream_chunk", _no_alerts)
+    header = AnalysisStreamHeader(provider="aws", service="s3", account_id="111", collection_complete=True)
+
+    outputs = await _drain(header, *lines)
+
+    assert outputs[-1]["type"] == "summary"
+    if lines:
+        assert scan_calls["complete"] == [] and scan_calls["abandoned"] == [7]
+    else:
+        # Stream vazio confirmado como completo: é uma varredura, como o /analyze vazio.
+        assert scan_calls["complete"] == [7] and scan_calls["abandoned"] == []
+
+
+@pytest.mark.asyncio
+async def test_unconfirmed_stream_never_opens_a_scan_generation(scan_calls, monkeypatch):
+    monkeypatch.setattr(analysis_controller, "AsyncSessionLocal", _NullSession)
+    monkeypatch.setattr(analysis_controller, "_analyze_stream_chunk", _no_alerts)
+    header = AnalysisStreamHeader(provider="aws", service="s3", account_id="111")
+
+    await _drain(header)
+
+    assert scan_calls["begin"] == 0 and scan_calls["complete"] == [None] and scan_calls["abandoned"] == []
@@ -0,0 +1,232 @@
+import os
+import datetime
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.alert_model import Base, AlertModel, AlertStatus, AlertSeverity, AlertCreate, AlertSummaryCount, AlertUpdate, NotificationOutbox
+from app.crud.crud_alert import alert_crud, InvalidAlertCursorError
+
+# Usar um banco de dados em memória para os testes de unidade do CRUD
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+Base.metadata.create_all(bind=engine)
+
+@pytest.fixture()
+def db_session():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def cleanup_db(db_session):
+    yield
+    db_session.query(NotificationOutbox).delete()
+    db_session.query(AlertModel).delete()
+    db_session.query(AlertSummaryCount).delete()
+    db_session.commit()
+
+def _alert(resource_id: str, policy_id: str = "EC2_Public_IP", severity: str = "HIGH", description: str = "desc") -> AlertCreate:
+    return AlertCreate(
+        resource_id=resource_id,
+        resource_type="EC2Instance",
+        account_id="123456789012",
+        region="us-east-1",
+        provider="aws",
+        severity=severity,
+        title="Instância com IP público",
+        description=description,
+        policy_id=policy_id,
+    )
+
+def test_bulk_ingest_inserts_and_deduplicates(db_session):
+    rows = alert_crud.bulk_ingest_alerts(
+        db_session,
+        alerts_in=[_alert("i-1"), _alert("i-2"), _alert("i-1", description="last wins")],
+        batch_size=1,
+    )
+
+    assert [r.resource_id for r in rows] == ["i-1", "i-2"]
+    assert rows[0].description == "last wins"
+    assert all(r.status == AlertStatus.OPEN for r in rows)
+    assert db_session.query(AlertModel).count() == 2
+
+def test_bulk_ingest_updates_existing_open_alerts(db_session):
+    first = alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert("i-1"), _alert("i-2")])
+    ids = {r.resource_id: r.id for r in first}
+
+    second = alert_crud.bulk_ingest_alerts(
+        db_session, alerts_in=[_alert("i-1", severity="CRITICAL"), _alert("i-2"), _alert("i-3")]
+    )
+
+    assert db_session.query(AlertModel).count() == 3
+    by_resource = {r.resource_id: r for r in second}
+    assert by_resource["i-1"].id == ids["i-1"]
+    assert by_resource["i-1"].severity == AlertSeverity.CRITICAL
+    assert by_resource["i-2"].id == ids["i-2"]
+    assert by_resource["i-2"].last_seen_at >= first[1].last_seen_at.replace(tzinfo=by_resource["i-2"].last_seen_at.tzinfo)
+
+def test_bulk_ingest_ignores_non_open_alerts(db_session):
+    [row] = alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert("i-1")])
+    db_session.query(AlertModel).filter(AlertModel.id == row.id).update({"status": AlertStatus.RESOLVED})
+    db_session.commit()
+
+    [new_row] = alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert("i-1")])
+
+    assert new_row.id != row.id
+    assert db_session.query(AlertModel).count() == 2
+
+def _recomputed_summary(db_session):
+    # O resumo esperado, agregando a tabela de alertas como o get_summary fazia antes do contador.
+    rows = db_session.query(AlertModel.severity, AlertModel.status).all()
+    by_severity, by_status = {}, {}
+    for severity, status in rows:
+        by_severity[severity.value] = by_severity.get(severity.value, 0) + 1
+        by_status[status.value] = by_status.get(status.value, 0) + 1
+    return {"total_alerts": len(rows), "by_severity": by_severity, "by_status": by_status}
+
+def test_summary_counters_follow_inserts_updates_and_deletes(db_session):
+    rows = alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert("i-1"), _alert("i-2"), _alert("i-3", severity="LOW")])
+    alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert("i-1", severity="CRITICAL")])
+    alert_crud.update_alert_status(db_session, alert_id=rows[1].id, status=AlertStatus.RESOLVED)
+    alert_crud.update_alert(db_session, alert_id=rows[2].id, alert_in=AlertUpdate(severity="MEDIUM", status="IGNORED"))
+    alert_crud.remove_alert(db_session, alert_id=rows[0].id)
+
+    summary = alert_crud.get_summary(db_session)
+
+    assert summary == _recomputed_summary(db_session)
+    assert summary == {"total_alerts": 2, "by_severity": {"HIGH": 1, "MEDIUM": 1}, "by_status": {"RESOLVED": 1, "IGNORED": 1}}
+    assert alert_crud.reconcile_summary(db_session) == 0
+
+def test_reconcile_summary_fixes_drift(db_session):
+    alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert("i-1"), _alert("i-2")])
+    # Escrita fora do CRUD: o contador não acompanha.
+    db_session.query(AlertModel).filter(AlertModel.resource_id == "i-1").update({"status": AlertStatus.RESOLVED})
+    db_session.commit()
+    assert alert_crud.get_summary(db_session)["by_status"] == {"OPEN": 2}
+
+    assert alert_crud.reconcile_summary(db_session) == 2
+
+    assert alert_crud.get_summary(db_session) == _recomputed_summary(db_session)
+    assert db_session.query(AlertSummaryCount).filter(AlertSummaryCount.count == 0).count() == 0
+
+def test_reconcile_summary_rechecks_only_drifted_partitions(db_session, monkeypatch):
+    alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert("i-1")])
+    alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert("i-2").model_copy(update={"account_id": None})])
+    # Drift só na partição sem conta.
+    db_session.query(AlertModel).filter(AlertModel.resource_id == "i-2").update({"status": AlertStatus.IGNORED})
+    db_session.commit()
+    partitions = []
+    original = alert_crud._summary_drift
+    def spy(db, partition=None):
+        partitions.append(partition)
+        return original(db, partition)
+    monkeypatch.setattr(alert_crud, "_summary_drift", spy)
+
+    assert alert_crud.reconcile_summary(db_session) == 2
+
+    assert partitions == [None, ("", "aws")]
+    assert alert_crud.get_summary(db_session) == _recomputed_summary(db_session)
+    untouched = db_session.query(AlertSummaryCount).filter(AlertSummaryCount.account_id == "123456789012").all()
+    assert [(r.status, r.count) for r in untouched] == [("OPEN", 1)]
+
+
+def _pages(db_session, **kwargs):
+    pages, cursor = [], None
+    while True:
+        alerts, cursor = alert_crud.get_alerts_page(db_session, limit=3, cursor=cursor, **kwargs)
+        pages.append([a.resource_id for a in alerts])
+        if cursor is None:
+            return pages
+
+def test_keyset_pagination_walks_all_rows_with_ties(db_session):
+    rows = alert_crud.bulk_ingest_alerts(
+        db_session, alerts_in=[_alert(f"i-{n}", severity="HIGH" if n % 2 else "LOW") for n in range(8)]
+    )
+    # Metade das linhas com o mesmo last_seen_at, para exercitar o desempate por id.
+    same_time = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    for n, row in enumerate(rows):
+        db_session.query(AlertModel).filter(AlertModel.id == row.id).update(
+            {"last_seen_at": same_time if n < 4 else same_time + datetime.timedelta(minutes=n)}
+        )
+    db_session.commit()
+
+    pages = _pages(db_session)
+    assert [len(p) for p in pages] == [3, 3, 2]
+    assert sum(pages, []) == ["i-7", "i-6", "i-5", "i-4", "i-3", "i-2", "i-1", "i-0"]
+
+    by_severity = sum(_pages(db_session, sort_by="severity", sort_order="asc"), [])
+    assert sorted(by_severity) == sorted(r.resource_id for r in rows)
+    assert by_severity == [a.resource_id for a in alert_crud.get_alerts(db_session, limit=10, sort_by="severity", sort_order="asc")]
+
+    assert sum(_pages(db_session, resource_id="-1"), []) == ["i-1"]
+
+def test_keyset_pagination_rejects_foreign_cursor(db_session):
+    alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert(f"i-{n}") for n in range(3)])
+    _, cursor = alert_crud.get_alerts_page(db_session, limit=1)
+
+    with pytest.raises(InvalidAlertCursorError):
+        alert_crud.get_alerts_page(db_session, limit=1, cursor=cursor, sort_by="created_at")
+    with pytest.raises(InvalidAlertCursorError):
+        alert_crud.get_alerts_page(db_session, limit=1, cursor="not-a-cursor")
+
+def test_resolve_unseen_resolves_only_unconfirmed_alerts_of_scanned_policies(db_session):
+    alert_crud.bulk_ingest_alerts(
+        db_session, alerts_in=[_alert("i-1"), _alert("i-2"), _alert("i-3"), _alert("i-4", policy_id="OTHER")],
+        scan_generation=1,
+    )
+    # Varredura 2: i-1 reemitido, i-2 inalterado (não reavaliado), i-3 corrigido.
+    alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert("i-1")], scan_generation=2)
+    assert alert_crud.carry_forward_scan_generation(
+        db_session, account_id="123456789012", provider="aws", resource_ids=["i-2"],
+        policy_ids=["EC2_Public_IP"], scan_generation=2,
+    ) == 1
+
+    resolved = alert_crud.resolve_unseen(
+        db_session, account_id="123456789012", provider="aws", policy_ids=["EC2_Public_IP"], scan_generation=2
+    )
+
+    assert resolved == 1
+    statuses = {a.resource_id: a.status for a in db_session.query(AlertModel)}
+    assert statuses == {"i-1": AlertStatus.OPEN, "i-2": AlertStatus.OPEN, "i-3": AlertStatus.RESOLVED, "i-4": AlertStatus.OPEN}
+    assert alert_crud.get_summary(db_session)["by_status"] == {"OPEN": 3, "RESOLVED": 1}
+    assert alert_crud.reconcile_summary(db_session) == 0
+
+def test_get_open_for_resources_returns_open_alerts_of_the_given_resources_and_policies(db_session):
+    alert_crud.bulk_ingest_alerts(
+        db_session, alerts_in=[_alert("i-1"), _alert("i-2"), _alert("i-3"), _alert("i-1", policy_id="OTHER")]
+    )
+    alert_crud.resolve_unseen(db_session, account_id="123456789012", provider="aws", policy_ids=["EC2_Public_IP"], scan_generation=1)
+    alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert("i-1"), _alert("i-2")])
+
+    alerts = alert_crud.get_open_for_resources(
+        db_session, account_id="123456789012", provider="aws", resource_ids=["i-1", "i-2", "i-3"],
+        policy_ids=["EC2_Public_IP"], chunk_size=1,
+    )
+
+    assert sorted(a.resource_id for a in alerts) == ["i-1", "i-2"]
+    assert all(a.status == AlertStatus.OPEN and a.policy_id == "EC2_Public_IP" for a in alerts)
+
+def test_notifications_are_enqueued_in_the_ingest_transaction(db_session):
+    rows = alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert("i-1"), _alert("i-2")], enqueue_notifications=True)
+    alert_crud.bulk_ingest_alerts(db_session, alerts_in=[_alert("i-3")])
+    single = alert_crud.create_alert(db_session, alert_in=_alert("i-4"), enqueue_notifications=True)
+
+    queued = [row.alert_id for row in db_session.query(NotificationOutbox).order_by(NotificationOutbox.id)]
+    assert queued == [rows[0].id, rows[1].id, single.id]
+
+    # Uma falha no meio da ingestão desfaz também as notificações.
+    with pytest.raises(ValueError):
+        alert_crud.bulk_ingest_alerts(
+            db_session,
+            alerts_in=[_alert("i-5"), _alert("i-6").model_copy(update={"severity": "BOGUS"})],
+            batch_size=1,
+            enqueue_notifications=True,
+        )
+    assert db_session.query(NotificationOutbox).count() == 3
+    assert db_session.query(AlertModel).count() == 4
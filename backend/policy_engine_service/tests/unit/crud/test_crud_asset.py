@@ -0,0 +1,122 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.asset_model import Base, CloudAsset, CloudProviderEnum
+from app.crud.crud_asset import asset_crud
+
+# Usar um banco de dados em memória para os testes de unidade do CRUD
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+Base.metadata.create_all(bind=engine)
+
+@pytest.fixture()
+def db_session():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def cleanup_db(db_session):
+    yield
+    db_session.query(CloudAsset).delete()
+    db_session.commit()
+
+def _asset(asset_id: str, name: str, account_id: str = "123456789012") -> dict:
+    return {
+        "asset_id": asset_id,
+        "asset_type": "ec2_instances",
+        "name": name,
+        "provider": "aws",
+        "account_id": account_id,
+        "region": "us-east-1",
+        "configuration": {"id": asset_id, "name": name},
+    }
+
+def test_bulk_upsert_inserts_new_assets(db_session):
+    saved = asset_crud.bulk_upsert(db_session, objs_in=[_asset(f"i-{n}", f"vm-{n}") for n in range(25)], chunk_size=10)
+
+    assert saved == 25
+    assert db_session.query(CloudAsset).count() == 25
+    asset = asset_crud.get_by_asset_id(db_session, account_id="123456789012", asset_id="i-3")
+    assert asset.provider == CloudProviderEnum.AWS
+    assert asset.last_seen_at is not None
+
+def test_bulk_upsert_updates_existing_assets_in_place(db_session):
+    asset_crud.bulk_upsert(db_session, objs_in=[_asset("i-1", "old-name")])
+    original = asset_crud.get_by_asset_id(db_session, account_id="123456789012", asset_id="i-1")
+    original_id = original.id
+
+    moved = {**_asset("i-1", "new-name"), "region": "eu-west-1", "asset_type": "ec2_spot_instances"}
+    asset_crud.bulk_upsert(db_session, objs_in=[moved, _asset("i-1", "other-account", account_id="999")])
+    db_session.expire_all()
+
+    assert db_session.query(CloudAsset).count() == 2
+    updated = asset_crud.get_by_asset_id(db_session, account_id="123456789012", asset_id="i-1")
+    assert updated.id == original_id
+    assert updated.name == "new-name"
+    assert updated.configuration["name"] == "new-name"
+    assert updated.region == "eu-west-1"
+    assert updated.asset_type == "ec2_spot_instances"
+
+def test_bulk_upsert_deduplicates_payload(db_session):
+    saved = asset_crud.bulk_upsert(db_session, objs_in=[_asset("i-1", "first"), _asset("i-1", "last")])
+
+    assert saved == 1
+    assert asset_crud.get_by_asset_id(db_session, account_id="123456789012", asset_id="i-1").name == "last"
+
+def test_bulk_upsert_empty_payload(db_session):
+    assert asset_crud.bulk_upsert(db_session, objs_in=[]) == 0
+
+def test_content_hashes_and_touch_last_seen(db_session):
+    asset_crud.bulk_upsert(db_session, objs_in=[{**_asset("i-1", "vm-1"), "content_hash": "abc"}, _asset("i-2", "vm-2")])
+
+    hashes = asset_crud.get_content_hashes(db_session, account_id="123456789012", asset_ids=["i-1", "i-2", "i-3"])
+    assert {asset_id: content_hash for asset_id, (_, content_hash) in hashes.items()} == {"i-1": "abc", "i-2": None}
+
+    asset = asset_crud.get_by_asset_id(db_session, account_id="123456789012", asset_id="i-1")
+    db_session.query(CloudAsset).update({CloudAsset.last_seen_at: None})
+    db_session.commit()
+
+    assert asset_crud.touch_last_seen(db_session, ids=[asset.id]) == 1
+    db_session.expire_all()
+    assert asset_crud.get_by_asset_id(db_session, account_id="123456789012", asset_id="i-1").last_seen_at is not None
+    assert asset_crud.get_by_asset_id(db_session, account_id="123456789012", asset_id="i-2").last_seen_at is None
+
+def test_set_content_hashes_updates_only_the_given_assets(db_session):
+    asset_crud.bulk_upsert(db_session, objs_in=[_asset("i-1", "vm-1"), _asset("i-2", "vm-2"), _asset("i-1", "vm-1", account_id="999")])
+
+    assert asset_crud.set_content_hashes(
+        db_session, account_id="123456789012", hashes={"i-1": "h1", "i-2": "h2", "i-3": "h3"}, chunk_size=2
+    ) == 2
+
+    hashes = asset_crud.get_content_hashes(db_session, account_id="123456789012", asset_ids=["i-1", "i-2"])
+    assert {asset_id: content_hash for asset_id, (_, content_hash) in hashes.items()} == {"i-1": "h1", "i-2": "h2"}
+    other = asset_crud.get_content_hashes(db_session, account_id="999", asset_ids=["i-1"])
+    assert other["i-1"][1] is None
+
+def test_mark_stale_unseen_only_touches_older_generations_of_the_scope(db_session):
+    asset_crud.bulk_upsert(db_session, objs_in=[{**_asset(f"i-{n}", f"vm-{n}"), "scan_generation": 1} for n in range(4)])
+    asset_crud.bulk_upsert(db_session, objs_in=[{**_asset("i-9", "other"), "asset_type": "s3"}])
+    # Varredura 2: i-0 alterado, i-1 inalterado; i-2 e i-3 sumiram.
+    asset_crud.bulk_upsert(db_session, objs_in=[{**_asset("i-0", "vm-0-new"), "scan_generation": 2}])
+    unchanged = asset_crud.get_by_asset_id(db_session, account_id="123456789012", asset_id="i-1")
+    asset_crud.touch_last_seen(db_session, ids=[unchanged.id], scan_generation=2)
+
+    stale_ids = asset_crud.mark_stale_unseen(
+        db_session, account_id="123456789012", provider="aws", asset_type="ec2_instances", scan_generation=2, chunk_size=1
+    )
+    assert len(stale_ids) == 2
+    db_session.expire_all()
+    stale = {a.id: a.asset_id for a in db_session.query(CloudAsset).filter(CloudAsset.is_stale.is_(True))}
+    assert set(stale.values()) == {"i-2", "i-3"}
+    assert sorted(stale_ids) == sorted(stale)
+
+    # Um ativo que reaparece deixa de ser obsoleto; upserts sem geração não apagam a gravada.
+    asset_crud.bulk_upsert(db_session, objs_in=[{**_asset("i-2", "vm-2"), "scan_generation": 3}, _asset("i-0", "vm-0")])
+    db_session.expire_all()
+    assert not asset_crud.get_by_asset_id(db_session, account_id="123456789012", asset_id="i-2").is_stale
+    assert asset_crud.get_by_asset_id(db_session, account_id="123456789012", asset_id="i-0").scan_generation == 2
@@ -0,0 +1,58 @@
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.crud_alert import async_alert_crud
+from app.db.pool_metrics import TimedQueuePool
+from app.db.session import async_database_url
+from app.models.alert_model import AlertCreate, Base
+
+
+def test_async_database_url_swaps_driver():
+    assert async_database_url("postgresql://u:p@db:5432/cspmexa_db").drivername == "postgresql+asyncpg"
+    assert async_database_url("postgresql+psycopg2://u:p@db/x").drivername == "postgresql+asyncpg"
+    assert async_database_url("postgresql://u:p@db:5432/cspmexa_db").password == "p"
+    assert async_database_url("sqlite:///./test.db").drivername == "sqlite+aiosqlite"
+
+
+@pytest.mark.asyncio
+async def test_async_crud_runs_sync_crud_on_async_session():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as db:
+        rows = await async_alert_crud.bulk_ingest_alerts(db, alerts_in=[
+            AlertCreate(resource_id=f"i-{n}", resource_type="EC2Instance", provider="aws", severity="HIGH",
+                        title="t", description="d", policy_id="P1")
+            for n in range(3)
+        ])
+        alerts, cursor = await async_alert_crud.get_alerts_page(db=db, limit=2)
+        summary = await async_alert_crud.get_summary(db)
+
+    assert len(rows) == 3
+    assert len(alerts) == 2 and cursor is not None
+    assert summary["total_alerts"] == 3
+    with pytest.raises(AttributeError):
+        async_alert_crud._apply_summary_deltas
+    await engine.dispose()
+
+
+def test_pool_wait_time_is_recorded():
+    def sample():
+        return REGISTRY.get_sample_value("policy_engine_db_pool_wait_seconds_count", {"engine": "sync"}) or 0.0
+
+    before = sample()
+    engine = create_engine("sqlite://", poolclass=TimedQueuePool, pool_size=1, max_overflow=0)
+    for _ in range(3):
+        with engine.connect():
+            pass
+    engine.dispose()
+
+    assert sample() - before == 3
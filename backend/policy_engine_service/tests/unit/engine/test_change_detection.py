@@ -0,0 +1,18 @@
+import datetime
+from app.engine.change_detection import content_hash
+
+
+def test_hash_is_canonical_over_key_order():
+    first = {"id": "i-1", "tags": {"b": "2", "a": "1"}, "launch_time": datetime.datetime(2024, 1, 1)}
+    second = {"launch_time": datetime.datetime(2024, 1, 1), "tags": {"a": "1", "b": "2"}, "id": "i-1"}
+
+    assert content_hash(first, "ec2_instances", "digest") == content_hash(second, "ec2_instances", "digest")
+
+
+def test_hash_changes_with_configuration_and_policy_digest():
+    config = {"id": "i-1", "public_ip_address": None}
+    baseline = content_hash(config, "ec2_instances", "digest-a")
+
+    assert content_hash({**config, "public_ip_address": "54.0.0.1"}, "ec2_instances", "digest-a") != baseline
+    assert content_hash(config, "ec2_instances", "digest-b") != baseline
+    assert content_hash(config, "ec2_security_groups", "digest-a") != baseline
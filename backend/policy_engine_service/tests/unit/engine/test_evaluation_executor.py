@@ -0,0 +1,60 @@
+import pytest
+
+from app.engine.evaluation_executor import PolicyEvaluationExecutor
+from app.engine.generic_policy_evaluator import compile_policy
+from app.engine.policy_registry import CompiledPolicy
+
+PUBLIC_BUCKET_POLICY = {
+    "id": "S3_PUBLIC_FLAG",
+    "provider": "aws",
+    "service": "s3",
+    "severity": "HIGH",
+    "title": "Bucket público",
+    "rules": [{"field": "public", "operator": "eq", "value": True}],
+}
+
+MULTI_REGION_TRAIL_POLICY = {
+    "id": "CIS-AWS-2.2",
+    "provider": "aws",
+    "service": "s3",
+    "severity": "HIGH",
+    "title": "CloudTrail habilitado em todas as regiões",
+    "check_function": "check_cloudtrail_multi_region",
+}
+
+
+def _compiled(*policies):
+    return [CompiledPolicy(p, compile_policy(p), version=1) for p in policies]
+
+
+def _data(size):
+    # Apenas o último item tem um trail multi-região: a função de verificação precisa ver o conjunto inteiro.
+    data = [{"name": f"bucket-{n}", "public": n % 10 == 0, "trail_info": {}} for n in range(size)]
+    data[-1]["trail_info"] = {"is_multi_region_trail": True}
+    return data
+
+
+@pytest.mark.asyncio
+async def test_parallel_evaluation_matches_in_process_results():
+    policies = _compiled(PUBLIC_BUCKET_POLICY, MULTI_REGION_TRAIL_POLICY)
+    data = _data(1000)
+    executor = PolicyEvaluationExecutor(max_workers=2, parallel_threshold=100, chunk_size=64)
+    try:
+        parallel_alerts = await executor.evaluate(policies, data, "123456789012")
+    finally:
+        executor.shutdown()
+
+    in_process_alerts = PolicyEvaluationExecutor(max_workers=1).evaluate_in_process(policies, data, "123456789012")
+    assert parallel_alerts == in_process_alerts
+    assert len(parallel_alerts) == 100
+    assert all(a["policy_id"] == "S3_PUBLIC_FLAG" for a in parallel_alerts)
+
+
+@pytest.mark.asyncio
+async def test_small_payload_stays_in_process():
+    executor = PolicyEvaluationExecutor(max_workers=4, parallel_threshold=1000)
+
+    alerts = await executor.evaluate(_compiled(PUBLIC_BUCKET_POLICY), _data(20), "123")
+
+    assert len(alerts) == 2
+    assert executor._pool is None
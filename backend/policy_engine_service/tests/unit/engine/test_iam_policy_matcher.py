@@ -0,0 +1,78 @@
+import datetime
+
+from app.engine.aws_iam_policies import check_stale_key_s3_write_access
+from app.engine.iam_policy_matcher import (
+    CompiledPolicyDocument, PolicyDocumentCache, is_action_allowed, principal_allows,
+)
+
+
+def _document(*statements):
+    return {"Version": "2012-10-17", "Statement": list(statements)}
+
+
+def test_action_and_resource_wildcards():
+    document = CompiledPolicyDocument(_document(
+        {"Effect": "Allow", "Action": ["s3:Put*", "ec2:Describe?nstances"], "Resource": "arn:aws:s3:::logs-*/*"},
+    ))
+
+    assert document.evaluate("s3:PutObject", "arn:aws:s3:::logs-prod/a.txt") == "Allow"
+    assert document.evaluate("S3:putobject", "arn:aws:s3:::logs-prod/a.txt") == "Allow"  # ações ignoram maiúsculas
+    assert document.evaluate("s3:PutObject", "arn:aws:s3:::LOGS-prod/a.txt") is None  # ARNs não
+    assert document.evaluate("s3:GetObject", "arn:aws:s3:::logs-prod/a.txt") is None
+    assert document.evaluate("ec2:DescribeInstances", "arn:aws:s3:::logs-x/y") == "Allow"
+    # Sem recurso: "em algum recurso".
+    assert document.evaluate("s3:PutObject") == "Allow"
+
+
+def test_not_action_and_explicit_deny():
+    power_user = CompiledPolicyDocument(_document({"Effect": "Allow", "NotAction": ["iam:*"], "Resource": "*"}))
+    deny_writes = CompiledPolicyDocument(_document({"Effect": "Deny", "Action": "s3:*", "Resource": "*"}))
+    scoped_deny = CompiledPolicyDocument(_document({"Effect": "Deny", "Action": "s3:*", "Resource": "arn:aws:s3:::secret/*"}))
+
+    assert power_user.evaluate("s3:PutObject") == "Allow"
+    assert power_user.evaluate("iam:CreateUser") is None
+    assert not power_user.grants_full_access
+    assert not is_action_allowed([power_user, deny_writes], "s3:PutObject")
+    # Um Deny restrito a um bucket não impede a escrita "em algum recurso", só naquele bucket.
+    assert is_action_allowed([power_user, scoped_deny], "s3:PutObject")
+    assert not is_action_allowed([power_user, scoped_deny], "s3:PutObject", "arn:aws:s3:::secret/file")
+
+
+def test_cache_compiles_each_distinct_document_once():
+    cache = PolicyDocumentCache()
+    text = '{"Statement": [{"Effect": "Allow", "Action": "*", "Resource": "*"}]}'
+    users = [
+        {"inline_policies": [{"PolicyName": "admin", "policy_document": text}]},
+        {"inline_policies": [{"PolicyName": "admin", "policy_document": text}]},
+        {"attached_policies": [{"PolicyArn": "arn:aws:iam::aws:policy/AmazonS3FullAccess"}]},
+        {"attached_policies": [{"policy_arn": "arn:aws:iam::aws:policy/AmazonS3FullAccess"}]},
+    ]
+
+    assert all(principal_allows(user, "s3:PutObject", cache=cache) for user in users)
+    assert len(cache) == 2
+    assert cache.hits == 2
+    assert cache.get(text).grants_full_access
+    assert cache.get("not json") is None
+
+
+def test_stale_key_check_uses_compiled_matcher_for_both_payload_formats():
+    old = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=200)
+    write_with_wildcard = _document({"Effect": "Allow", "Action": "s3:Put*", "Resource": "arn:aws:s3:::data/*"})
+    read_only = _document({"Effect": "Allow", "Action": ["s3:GetObject", "s3:List*"], "Resource": "*"})
+    users = [
+        # Formato do collector, documento como string e data ISO.
+        {"arn": "arn:aws:iam::1:user/a", "user_name": "a", "attached_policies": None,
+         "access_keys": [{"AccessKeyId": "AKIA1", "Status": "Active", "CreateDate": old.isoformat(), "LastUsedDate": None}],
+         "inline_policies": [{"PolicyName": "w", "policy_document": '{"Statement": [{"Effect": "Allow", "Action": "s3:*", "Resource": "*"}]}'}]},
+        # Formato do schema serializado (snake_case, datetimes).
+        {"arn": "arn:aws:iam::1:user/b", "user_name": "b", "attached_policies": [],
+         "access_keys": [{"access_key_id": "AKIA2", "status": "Active", "create_date": old, "last_used_date": old}],
+         "inline_policies": [{"policy_name": "w", "policy_document": write_with_wildcard}]},
+        {"arn": "arn:aws:iam::1:user/c", "user_name": "c",
+         "access_keys": [{"AccessKeyId": "AKIA3", "Status": "Active", "CreateDate": old.isoformat()}],
+         "inline_policies": [{"PolicyName": "r", "policy_document": read_only}]},
+    ]
+
+    alerts = check_stale_key_s3_write_access(users)
+
+    assert [a["resource_id"] for a in alerts] == ["arn:aws:iam::1:user/a", "arn:aws:iam::1:user/b"]
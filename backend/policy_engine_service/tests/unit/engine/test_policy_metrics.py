@@ -0,0 +1,64 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from app.engine.evaluation_executor import PolicyEvaluationExecutor
+from app.engine.generic_policy_evaluator import compile_policy
+from app.engine.policy_metrics import PolicyMetricsRecorder
+from app.engine.policy_registry import CompiledPolicy
+
+
+def _sample(name, policy_id):
+    return REGISTRY.get_sample_value(name, {"policy_id": policy_id}) or 0.0
+
+
+class _Policy:
+    def __init__(self, policy_id, fail_on=None):
+        self.policy_id = policy_id
+        self.fail_on = fail_on
+
+    def check(self, resource):
+        if resource == self.fail_on:
+            raise ValueError("falha")
+        return {"resource": resource} if resource % 2 == 0 else None
+
+
+def test_recorder_accumulates_per_policy_and_publishes_on_flush():
+    policy = _Policy("TEST_RECORDER_POLICY", fail_on=3)
+    recorder = PolicyMetricsRecorder()
+    before_alerts = _sample("policy_engine_policy_alerts_total", policy.policy_id)
+    before_count = _sample("policy_engine_policy_evaluation_seconds_count", policy.policy_id)
+
+    for resource in range(5):
+        try:
+            recorder.check(policy, resource)
+        except ValueError:
+            pass
+    assert _sample("policy_engine_policy_resources_evaluated_total", policy.policy_id) == 0.0
+
+    recorder.flush()
+    assert _sample("policy_engine_policy_resources_evaluated_total", policy.policy_id) == 5
+    assert _sample("policy_engine_policy_alerts_total", policy.policy_id) - before_alerts == 3
+    assert _sample("policy_engine_policy_errors_total", policy.policy_id) == 1
+    # Uma observação do histograma por chamada de evaluate_*, não por recurso.
+    assert _sample("policy_engine_policy_evaluation_seconds_count", policy.policy_id) - before_count == 1
+
+
+@pytest.mark.asyncio
+async def test_executor_records_metrics_for_compiled_policies():
+    policy = {
+        "id": "TEST_METRICS_PUBLIC_FLAG", "provider": "aws", "service": "s3", "severity": "HIGH",
+        "title": "Bucket público", "rules": [{"field": "public", "operator": "eq", "value": True}],
+    }
+    failing = {"id": "TEST_METRICS_BROKEN_CHECK", "provider": "aws", "service": "s3", "severity": "HIGH",
+               "title": "Função quebrada", "check_function": "check_cloudtrail_multi_region"}
+    policies = [CompiledPolicy(p, compile_policy(p), version=1) for p in (policy, failing)]
+    data = [{"name": f"bucket-{n}", "public": n < 3} for n in range(10)]
+    data.append(None)  # quebra a função de verificação, que espera dicts
+
+    alerts = await PolicyEvaluationExecutor(max_workers=1).evaluate(policies[:1], data[:10], "123")
+    await PolicyEvaluationExecutor(max_workers=1).evaluate(policies[1:], data, "123")
+
+    assert len(alerts) == 3
+    assert _sample("policy_engine_policy_resources_evaluated_total", "TEST_METRICS_PUBLIC_FLAG") == 10
+    assert _sample("policy_engine_policy_alerts_total", "TEST_METRICS_PUBLIC_FLAG") == 3
+    assert _sample("policy_engine_policy_errors_total", "TEST_METRICS_BROKEN_CHECK") == 1
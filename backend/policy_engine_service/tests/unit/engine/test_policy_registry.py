@@ -0,0 +1,107 @@
+import os
+import textwrap
+
+from app.engine.policy_registry import PolicyRegistry
+
+SINGLE_POLICY_YAML = textwrap.dedent("""
+    id: "CIS-AWS-1.1"
+    provider: "aws"
+    service: "iam"
+    severity: "CRITICAL"
+    title: "MFA para usuário Root"
+    check_function: "check_root_mfa_enabled"
+""")
+
+LIST_POLICIES_YAML = textwrap.dedent("""
+    policies:
+      - id: "CIS-AWS-2.2"
+        provider: "aws"
+        service: "cloudtrail"
+        severity: "HIGH"
+        title: "CloudTrail habilitado em todas as regiões"
+        check_function: "check_cloudtrail_multi_region"
+      - id: "CIS-AWS-2.3"
+        provider: "AWS"
+        service: "CloudTrail"
+        severity: "MEDIUM"
+        title: "Validação de arquivos de log do CloudTrail habilitada"
+        check_function: "check_cloudtrail_log_file_validation"
+      - title: "Política sem id é ignorada"
+""")
+
+
+def _write(path, content, mtime=None):
+    path.write_text(content, encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+
+
+def test_registry_indexes_single_and_list_style_files(tmp_path):
+    _write(tmp_path / "root_mfa.yml", SINGLE_POLICY_YAML)
+    _write(tmp_path / "cloudtrail.yaml", LIST_POLICIES_YAML)
+    _write(tmp_path / "README.txt", "ignorado")
+
+    registry = PolicyRegistry(policies_dir=str(tmp_path))
+
+    assert len(registry) == 3
+    assert [c.policy_id for c in registry.policies_for("aws", "cloudtrail")] == ["CIS-AWS-2.2", "CIS-AWS-2.3"]
+    assert [c.policy_id for c in registry.policies_for("AWS", "IAM")] == ["CIS-AWS-1.1"]
+    assert registry.policies_for("gcp", "iam") == ()
+
+
+def test_compiled_policy_evaluates_data(tmp_path):
+    _write(tmp_path / "root_mfa.yml", SINGLE_POLICY_YAML)
+    registry = PolicyRegistry(policies_dir=str(tmp_path))
+
+    [compiled] = registry.policies_for("aws", "iam")
+    alerts = compiled.evaluate([{"account_summary": {"AccountMFAEnabled": 0}}], "123456789012")
+
+    assert len(alerts) == 1
+    assert alerts[0]["policy_id"] == "CIS-AWS-1.1"
+    assert alerts[0]["account_id"] == "123456789012"
+    assert alerts[0]["severity"] == "CRITICAL"
+
+
+def test_refresh_if_changed_swaps_index_and_bumps_version(tmp_path):
+    policy_file = tmp_path / "root_mfa.yml"
+    _write(policy_file, SINGLE_POLICY_YAML, mtime=1_000_000_000)
+    registry = PolicyRegistry(policies_dir=str(tmp_path))
+    initial_version = registry.version
+
+    assert registry.refresh_if_changed() is False
+    assert registry.version == initial_version
+
+    _write(tmp_path / "cloudtrail.yml", LIST_POLICIES_YAML)
+    assert registry.refresh_if_changed() is True
+    assert registry.version == initial_version + 1
+    assert len(registry.policies_for("aws", "cloudtrail")) == 2
+
+    policy_file.unlink()
+    assert registry.refresh_if_changed() is True
+    assert registry.policies_for("aws", "iam") == ()
+
+
+def test_invalid_yaml_does_not_break_registry(tmp_path):
+    _write(tmp_path / "root_mfa.yml", SINGLE_POLICY_YAML)
+    _write(tmp_path / "broken.yml", "id: [unclosed")
+
+    registry = PolicyRegistry(policies_dir=str(tmp_path))
+
+    assert [c.policy_id for c in registry.all_policies()] == ["CIS-AWS-1.1"]
+
+
+def test_policy_digest_changes_only_with_the_service_policies(tmp_path):
+    _write(tmp_path / "root_mfa.yml", SINGLE_POLICY_YAML)
+    _write(tmp_path / "cloudtrail.yml", LIST_POLICIES_YAML)
+    registry = PolicyRegistry(policies_dir=str(tmp_path))
+    iam_digest = registry.policy_digest("aws", "iam")
+    cloudtrail_digest = registry.policy_digest("AWS", "CloudTrail")
+
+    registry.reload()
+    assert registry.policy_digest("aws", "iam") == iam_digest
+
+    _write(tmp_path / "cloudtrail.yml", LIST_POLICIES_YAML.replace('severity: "MEDIUM"', 'severity: "HIGH"'))
+    registry.reload()
+    assert registry.policy_digest("aws", "iam") == iam_digest
+    assert registry.policy_digest("aws", "cloudtrail") != cloudtrail_digest
+    assert registry.policy_digest("gcp", "iam") == ""
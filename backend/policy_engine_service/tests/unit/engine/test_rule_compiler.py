@@ -0,0 +1,102 @@
+import pytest
+
+from app.engine.rule_compiler import compile_rule, compile_rules, RuleCompilationError
+from app.engine.generic_policy_evaluator import compile_policy
+
+ALL_USERS = "http://acs.amazonaws.com/groups/global/AllUsers"
+
+S3_PUBLIC_ACL_POLICY = {
+    "id": "aws_s3_public_acls",
+    "provider": "aws",
+    "service": "s3",
+    "resource_type": "bucket",
+    "description": "Verifica se um bucket S3 possui ACLs que concedem acesso público de leitura ou escrita.",
+    "severity": "critical",
+    "remediation": "Remova as permissões para AllUsers e AuthenticatedUsers.",
+    "rules": [{
+        "field": "acl.grants",
+        "operator": "contains_any_of",
+        "value": [ALL_USERS, "http://acs.amazonaws.com/groups/global/AuthenticatedUsers"],
+    }],
+}
+
+
+def _bucket(name, grantee_uri=None):
+    grants = [{"grantee": {"type": "CanonicalUser", "id": "owner"}, "permission": "FULL_CONTROL"}]
+    if grantee_uri:
+        grants.append({"grantee": {"type": "Group", "uri": grantee_uri}, "permission": "READ"})
+    return {"name": name, "region": "us-east-1", "acl": {"grants": grants}}
+
+
+def test_s3_public_acl_policy_flags_only_public_buckets():
+    evaluate = compile_policy(S3_PUBLIC_ACL_POLICY)
+
+    alerts = evaluate([_bucket("private"), _bucket("public", ALL_USERS)], "123456789012")
+
+    assert len(alerts) == 1
+    assert alerts[0]["resource_id"] == "public"
+    assert alerts[0]["severity"] == "CRITICAL"
+    assert alerts[0]["region"] == "us-east-1"
+    assert alerts[0]["recommendation"] == S3_PUBLIC_ACL_POLICY["remediation"]
+
+
+def test_contains_any_of_with_item_field():
+    rule = compile_rule({"field": "acl.grants", "operator": "contains_any_of", "item_field": "grantee.uri", "value": [ALL_USERS]})
+
+    assert rule(_bucket("public", ALL_USERS)) is True
+    assert rule({"acl": {"grants": [{"grantee": {"id": ALL_USERS}}]}}) is False
+
+
+@pytest.mark.parametrize("rule, resource, expected", [
+    ({"field": "status", "operator": "eq", "value": "Disabled"}, {"status": "Disabled"}, True),
+    ({"field": "status", "operator": "eq", "value": "Disabled"}, {"status": "Enabled"}, False),
+    ({"field": "engine", "operator": "in", "value": ["mysql", "postgres"]}, {"engine": "postgres"}, True),
+    ({"field": "name", "operator": "regex", "value": "^tmp-"}, {"name": "tmp-bucket"}, True),
+    ({"field": "name", "operator": "regex", "value": "^tmp-"}, {"name": 42}, False),
+    ({"field": "logging.target_bucket", "operator": "exists", "value": False}, {"logging": {}}, True),
+    ({"field": "logging.target_bucket", "operator": "exists"}, {"logging": {"target_bucket": "logs"}}, True),
+    ({"field": "backup_retention_period", "operator": "lt", "value": 7}, {"backup_retention_period": 1}, True),
+    ({"field": "backup_retention_period", "operator": "gte", "value": 7}, {"backup_retention_period": "7"}, True),
+    ({"field": "backup_retention_period", "operator": "gt", "value": 7}, {"backup_retention_period": None}, False),
+    ({"field": "missing.field", "operator": "eq", "value": None}, {}, False),
+])
+def test_operators(rule, resource, expected):
+    assert compile_rule(rule)(resource) is expected
+
+
+def test_cidr_overlaps_through_nested_lists():
+    rule = compile_rule({"field": "ip_permissions.ip_ranges.cidr_ip", "operator": "cidr_overlaps", "value": "0.0.0.0/0"})
+    open_sg = {"ip_permissions": [{"ip_ranges": [{"cidr_ip": "10.0.0.0/8"}]}, {"ip_ranges": [{"cidr_ip": "0.0.0.0/0"}]}]}
+    v6_only = {"ip_permissions": [{"ip_ranges": [{"cidr_ip": "::/0"}]}]}
+
+    assert rule(open_sg) is True
+    assert rule(v6_only) is False
+    assert rule({"ip_permissions": []}) is False
+
+
+def test_compile_rules_requires_all_rules():
+    violates = compile_rules([
+        {"field": "public", "operator": "eq", "value": True},
+        {"field": "encrypted", "operator": "eq", "value": False},
+    ])
+
+    assert violates({"public": True, "encrypted": False}) is True
+    assert violates({"public": True, "encrypted": True}) is False
+
+
+@pytest.mark.parametrize("rule", [
+    {"field": "a", "operator": "unknown"},
+    {"field": "a", "operator": "regex", "value": "("},
+    {"field": "a", "operator": "cidr_overlaps", "value": "not-a-cidr"},
+    {"field": "a", "operator": "gt", "value": "many"},
+    {"operator": "eq"},
+])
+def test_invalid_rules_fail_at_compile_time(rule):
+    with pytest.raises(RuleCompilationError):
+        compile_rule(rule)
+
+
+def test_policy_with_invalid_rules_compiles_to_no_op():
+    policy = {**S3_PUBLIC_ACL_POLICY, "rules": [{"field": "acl", "operator": "bogus"}]}
+
+    assert compile_policy(policy)([_bucket("public", ALL_USERS)], "123") == []
@@ -0,0 +1,38 @@
+import pytest
+from app.engine.stream_ingestion import NDJSONLineTooLong, iter_ndjson_lines, parse_stream_record
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+async def _collect(stream):
+    return [item async for item in stream]
+
+
+@pytest.mark.asyncio
+async def test_lines_are_split_across_chunk_boundaries():
+    stream = _chunks(b'{"provider": "aws"}\n{"na', b'me": "b1"}\n\n', b'{"name": "b2"}')
+    lines = await _collect(iter_ndjson_lines(stream, max_line_bytes=1024))
+
+    assert lines == [(1, b'{"provider": "aws"}'), (2, b'{"name": "b1"}'), (4, b'{"name": "b2"}')]
+
+
+@pytest.mark.asyncio
+async def test_line_larger_than_limit_is_rejected():
+    with pytest.raises(NDJSONLineTooLong):
+        await _collect(iter_ndjson_lines(_chunks(b"x" * 64, b"y" * 64), max_line_bytes=100))
+
+
+def test_records_are_validated_against_the_service_schema():
+    record = parse_stream_record("ec2_instances", b'{"InstanceId": "i-1", "region": "us-east-1", "PublicIpAddress": "54.0.0.1"}')
+    assert record["instance_id"] == "i-1"
+
+    with pytest.raises(ValueError):
+        parse_stream_record("ec2_instances", b'{"PublicIpAddress": "54.0.0.1"}')
+    with pytest.raises(ValueError):
+        parse_stream_record("ec2_instances", b'["not", "an", "object"]')
+
+    # Serviços sem schema aceitam o objeto como veio.
+    assert parse_stream_record("gcp_cloud_asset_inventory", b'{"name": "x"}') == {"name": "x"}
@@ -0,0 +1,114 @@
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import asyncio
+import pytest
+from app.services import attack_path_worker as worker_module
+from app.services.attack_path_worker import AttackPathWorker
+
+
+class _FakeSession:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+@pytest.fixture()
+def recorded_runs(monkeypatch):
+    runs = []
+
+    def fake_run(db, updated_assets=None, updated_edges=None, reference_assets=None, force=False, removed_asset_ids=None):
+        runs.append(sorted(asset["id"] for asset in updated_assets))
+        return ["path"]
+
+    monkeypatch.setattr(worker_module, "run_attack_path_analysis", fake_run)
+    return runs
+
+
+def _asset(asset_id):
+    return {"id": asset_id, "asset_id": f"i-{asset_id}", "asset_type": "ec2_instances"}
+
+
+@pytest.mark.asyncio
+async def test_events_are_coalesced_per_account_within_the_window(recorded_runs):
+    worker = AttackPathWorker(debounce_seconds=0.1, session_factory=_FakeSession)
+    worker.start()
+    try:
+        worker.notify("111", updated_assets=[_asset(1)])
+        worker.notify("111", updated_assets=[_asset(2)])
+        worker.notify("222", updated_assets=[_asset(3)])
+        assert worker.status()["pending_accounts"] == ["111", "222"]
+        assert recorded_runs == []
+
+        await asyncio.sleep(0.3)
+        assert sorted(recorded_runs) == [[1, 2], [3]]
+
+        # Dentro da nova janela da conta, novos eventos esperam o fim da janela.
+        worker.notify("111", updated_assets=[_asset(4)])
+        await asyncio.sleep(0.02)
+        assert len(recorded_runs) == 2
+        await asyncio.sleep(0.2)
+        assert recorded_runs[-1] == [4]
+    finally:
+        await worker.stop()
+
+    status = worker.status()
+    assert status["runs"] == 3
+    assert status["last_run_paths_found"] == 1
+    assert status["last_run_duration_seconds"] is not None
+    assert status["last_run_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_flush_runs_pending_without_waiting(recorded_runs):
+    worker = AttackPathWorker(debounce_seconds=60, session_factory=_FakeSession)
+    worker.notify("111", updated_assets=[_asset(1)])
+    await worker.flush()
+    assert recorded_runs == [[1]]
+    assert worker.status()["pending_accounts"] == []
+
+
+@pytest.mark.asyncio
+async def test_failed_run_records_error_and_requeues_changes(monkeypatch):
+    calls = []
+
+    def flaky_run(db, updated_assets=None, updated_edges=None, reference_assets=None, force=False, removed_asset_ids=None):
+        calls.append((sorted(asset["id"] for asset in updated_assets), force))
+        if len(calls) == 1:
+            worker.notify("111", updated_assets=[_asset(2)])
+            raise RuntimeError("banco indisponível")
+        return ["path"]
+
+    monkeypatch.setattr(worker_module, "run_attack_path_analysis", flaky_run)
+    worker = AttackPathWorker(debounce_seconds=60, session_factory=_FakeSession)
+    worker.notify("111", updated_assets=[_asset(1)])
+
+    await worker.flush()
+    status = worker.status()
+    assert status["last_error"] == "banco indisponível"
+    assert status["pending_accounts"] == ["111"]
+
+    await worker.flush()
+    assert calls == [([1], False), ([1, 2], True)]
+    assert worker.status()["last_error"] is None
+    assert worker.status()["pending_accounts"] == []
+
+
+@pytest.mark.asyncio
+async def test_removed_assets_override_pending_updates(monkeypatch):
+    calls = []
+
+    def fake_run(db, updated_assets=None, updated_edges=None, reference_assets=None, force=False, removed_asset_ids=None):
+        calls.append((sorted(asset["id"] for asset in updated_assets), sorted(updated_edges), sorted(removed_asset_ids)))
+        return []
+
+    monkeypatch.setattr(worker_module, "run_attack_path_analysis", fake_run)
+    worker = AttackPathWorker(debounce_seconds=60, session_factory=_FakeSession)
+    worker.notify("111", updated_assets=[_asset(1), _asset(2)], updated_edges={2: [(1, "A")]})
+    worker.notify("111", removed_asset_ids=[2, 3])
+    worker.notify("111", updated_assets=[_asset(3)])
+
+    await worker.flush()
+    assert calls == [([1, 3], [], [2])]
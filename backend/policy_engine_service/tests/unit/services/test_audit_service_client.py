@@ -0,0 +1,64 @@
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import asyncio
+import pytest
+
+from app.services.audit_service_client import AuditServiceClient
+
+
+class _RecordingClient(AuditServiceClient):
+    def __init__(self, fail: bool = False, delay: float = 0.0, **kwargs):
+        super().__init__(base_url="http://audit_service/api/v1", **kwargs)
+        self.batches = []
+        self.fail = fail
+        self.delay = delay
+
+    async def _post_batch(self, batch):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("audit_service indisponível")
+        self.batches.append([event["action"] for event in batch])
+
+
+@pytest.mark.asyncio
+async def test_events_are_sent_in_batches_by_size_and_time():
+    client = _RecordingClient(batch_size=3, flush_interval_seconds=0.05)
+    for n in range(7):
+        await client.create_event(actor="system", action=f"a{n}")
+    # Ainda nada enviado: create_event só enfileira.
+    assert client.batches == []
+
+    await asyncio.sleep(0.2)
+    assert client.batches == [["a0", "a1", "a2"], ["a3", "a4", "a5"], ["a6"]]
+    assert client.sent == 7
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_drop_oldest_overflow_keeps_latest_events():
+    client = _RecordingClient(max_queue_size=2, batch_size=1, flush_interval_seconds=0.01, delay=0.05)
+    await client.create_event(actor="system", action="first")
+    await asyncio.sleep(0)  # o envio do primeiro lote começa e fica preso no atraso
+    for n in range(4):
+        await client.create_event(actor="system", action=f"e{n}")
+
+    await client.close()
+    assert client.batches == [["first"], ["e2"], ["e3"]]
+    assert client.dropped == 2
+
+
+@pytest.mark.asyncio
+async def test_block_overflow_waits_for_space_and_failures_are_dropped():
+    client = _RecordingClient(fail=True, max_queue_size=1, batch_size=1, flush_interval_seconds=0.01,
+                              delay=0.02, overflow="block")
+    await asyncio.wait_for(asyncio.gather(*(client.create_event(actor="a", action=f"e{n}") for n in range(4))), timeout=2)
+
+    await client.close()
+    assert client.sent == 0
+    assert client.dropped == 4
+
+
+def test_invalid_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        AuditServiceClient(base_url="http://x", overflow="drop_newest")
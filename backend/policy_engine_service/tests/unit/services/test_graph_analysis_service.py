@@ -0,0 +1,167 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.asset_model import Base as AssetBase, CloudAsset, AssetRelationship
+from app.models.attack_path_model import Base as AttackPathBase, AttackPath
+from app.crud.crud_asset import asset_crud
+from app.services.graph_analysis_service import AdjacencyIndex, AssetGraph, GraphAnalysisService, asset_graph, run_attack_path_analysis
+from app.services.relationship_service import sync_relationships
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+AssetBase.metadata.create_all(bind=engine)
+AttackPathBase.metadata.create_all(bind=engine)
+
+@pytest.fixture()
+def db_session():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def cleanup(db_session):
+    asset_graph.reset()
+    yield
+    asset_graph.reset()
+    db_session.query(AttackPath).delete()
+    db_session.query(AssetRelationship).delete()
+    db_session.query(CloudAsset).delete()
+    db_session.commit()
+
+def _instance(asset_id, public_ip=None, profile_arn=None):
+    return {
+        "asset_id": asset_id, "asset_type": "ec2_instances", "name": asset_id, "provider": "aws",
+        "account_id": "123456789012", "region": "us-east-1",
+        "configuration": {"id": asset_id, "public_ip_address": public_ip, "iam_instance_profile_arn": profile_arn},
+    }
+
+def _save(db, assets):
+    asset_crud.bulk_upsert(db, objs_in=assets)
+    ids = asset_crud.get_ids_by_asset_ids(db, account_id="123456789012", asset_ids=[a["asset_id"] for a in assets])
+    return [{**a, "id": ids[a["asset_id"]]} for a in assets]
+
+def test_full_load_reads_only_needed_fields_without_row_cap(db_session):
+    _save(db_session, [_instance(f"i-{n}") for n in range(12)] + [_instance("i-pub", "54.0.0.1", "arn:aws:iam::1:instance-profile/AdminProfile")])
+    graph = AssetGraph()
+
+    assert graph.ensure_loaded(db_session) is True
+    assert graph.ensure_loaded(db_session) is False
+    assert graph.graph.number_of_nodes() == 13
+    [public_node] = [n for n, d in graph.graph.nodes(data=True) if d["asset_id"] == "i-pub"]
+    assert graph.graph.nodes[public_node]["public_ip_address"] == "54.0.0.1"
+    assert "configuration" not in graph.graph.nodes[public_node]
+
+    paths = GraphAnalysisService(db_session, graph).find_public_ec2_to_admin_role_path()
+    assert [p.path_id for p in paths] == [f"EC2_PUBLIC_TO_ADMIN_ROLE_{public_node}"]
+
+def test_incremental_run_only_reevaluates_changed_nodes(db_session):
+    saved = _save(db_session, [_instance("i-1"), _instance("i-2")])
+    assert run_attack_path_analysis(db_session, updated_assets=saved) == []
+
+    # Mesmo conteúdo: nada mudou, nenhuma regra é executada.
+    assert run_attack_path_analysis(db_session, updated_assets=saved) == []
+
+    changed = _save(db_session, [_instance("i-2", "54.0.0.2", "arn:aws:iam::1:instance-profile/admin-role")])
+    paths = run_attack_path_analysis(db_session, updated_assets=changed)
+
+    assert [p.nodes[0].asset_id for p in paths] == [changed[0]["id"]]
+    assert db_session.query(AttackPath).count() == 1
+
+def test_failed_run_raises_and_forced_retry_reevaluates_applied_changes(db_session, monkeypatch):
+    changed = _save(db_session, [_instance("i-3", "54.0.0.3", "arn:aws:iam::1:instance-profile/admin-role")])
+
+    def fail(self, node_ids):
+        raise RuntimeError("falha no banco")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(GraphAnalysisService, "analyze", fail)
+        with pytest.raises(RuntimeError):
+            run_attack_path_analysis(db_session, updated_assets=changed)
+
+    # O nó já foi aplicado ao grafo: sem force a nova tentativa não veria diferença.
+    assert run_attack_path_analysis(db_session, updated_assets=changed) == []
+    paths = run_attack_path_analysis(db_session, updated_assets=changed, force=True)
+    assert [p.nodes[0].asset_id for p in paths] == [changed[0]["id"]]
+
+def _role(name, inline_document=None, attached=None):
+    arn = f"arn:aws:iam::123456789012:role/{name}"
+    return {
+        "asset_id": arn, "asset_type": "iam_roles", "name": name, "provider": "aws",
+        "account_id": "123456789012", "region": None,
+        "configuration": {
+            "arn": arn, "role_name": name, "attached_policies": attached or [],
+            "inline_policies": [{"policy_name": "inline", "policy_document": inline_document}] if inline_document else [],
+        },
+    }
+
+ADMIN_DOCUMENT = {"Version": "2012-10-17", "Statement": [{"Effect": "Allow", "Action": "*", "Resource": "*"}]}
+
+def test_adjacency_path_search_is_bounded_and_pruned_by_type():
+    index = AdjacencyIndex()
+    index.load([(1, 2, "A"), (2, 3, "A"), (3, 4, "A"), (1, 5, "B"), (5, 4, "A")])
+
+    assert index.find_paths(1, lambda n: n == 4, relationship_types=["A"]) == [[1, 2, 3, 4]]
+    assert index.find_paths(1, lambda n: n == 4) == [[1, 5, 4]]
+    assert index.find_paths(1, lambda n: n == 4, relationship_types=["A"], max_depth=2) == []
+    assert index.ancestors({4}, max_depth=1) == {3, 4, 5}
+
+    assert index.replace_outgoing(5, [(4, "A")]) is False
+    assert index.replace_outgoing(5, []) is True
+    assert index.ancestors({4}, max_depth=1) == {3, 4}
+
+    index.remove_node(3)
+    assert index.outgoing(2) == [] and index.outgoing(3) == []
+    assert index.ancestors({4}, max_depth=3) == {4}
+    assert index.edge_count == 2
+
+def test_relationship_path_replaces_name_heuristic(db_session):
+    profile = "arn:aws:iam::123456789012:instance-profile/web"
+    saved = _save(db_session, [_instance("i-web", "54.0.0.3", profile), _role("web", inline_document=ADMIN_DOCUMENT)])
+    result = sync_relationships(db_session, saved)
+
+    assert db_session.query(AssetRelationship).count() == 3  # instância->perfil, perfil->role, role->política
+    paths = run_attack_path_analysis(
+        db_session, updated_assets=saved + result.assets, updated_edges=result.edges, reference_assets=result.reference_assets,
+    )
+    assert len(paths) == 1
+    assert [n.asset_type for n in paths[0].nodes] == ["ec2_instances", "iam_instance_profiles", "iam_roles", "iam_inline_policies"]
+
+    # A role deixa de ser admin: a política muda e a instância que a alcança é reavaliada sem achados.
+    asset_graph.reset()
+    db_session.query(AttackPath).delete()
+    saved_role = _save(db_session, [_role("web", inline_document={"Statement": [{"Effect": "Allow", "Action": "s3:GetObject", "Resource": "*"}]})])
+    result = sync_relationships(db_session, saved_role)
+    assert run_attack_path_analysis(db_session, updated_assets=saved_role + result.assets, updated_edges=result.edges) == []
+
+def test_admin_named_profile_with_known_role_is_not_flagged(db_session):
+    profile = "arn:aws:iam::123456789012:instance-profile/admin-like"
+    saved = _save(db_session, [_instance("i-1", "54.0.0.4", profile), _role("admin-like", attached=[{"policy_arn": "arn:aws:iam::aws:policy/ReadOnlyAccess"}])])
+    sync_relationships(db_session, saved)
+
+    graph = AssetGraph()
+    graph.ensure_loaded(db_session)
+    assert graph.adjacency.edge_count == 3
+    assert GraphAnalysisService(db_session, graph).find_public_ec2_to_admin_role_path() == []
+
+def test_stale_assets_are_pruned_from_the_graph_and_skipped_on_load(db_session):
+    profile = "arn:aws:iam::123456789012:instance-profile/web"
+    saved = _save(db_session, [_instance("i-web", "54.0.0.5", profile), _role("web", inline_document=ADMIN_DOCUMENT)])
+    result = sync_relationships(db_session, saved)
+    run_attack_path_analysis(db_session, updated_assets=saved + result.assets, updated_edges=result.edges)
+    [role] = [a["id"] for a in saved if a["asset_type"] == "iam_roles"]
+    assert asset_graph.graph.has_node(role) and asset_graph.adjacency.edge_count == 3
+
+    db_session.query(CloudAsset).filter(CloudAsset.id == role).update({CloudAsset.is_stale: True})
+    db_session.commit()
+    run_attack_path_analysis(db_session, updated_assets=[], removed_asset_ids=[role])
+    assert not asset_graph.graph.has_node(role)
+    assert asset_graph.adjacency.edge_count == 1  # só instância->perfil
+
+    graph = AssetGraph()
+    graph.ensure_loaded(db_session)
+    assert not graph.graph.has_node(role)
+    assert graph.adjacency.edge_count == 1
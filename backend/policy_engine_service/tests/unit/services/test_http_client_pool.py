@@ -0,0 +1,126 @@
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY, CollectorRegistry
+
+from app.core.http_pool_metrics import HttpClientPoolCollector, httpcore_pool_stats
+from app.services.http_client_pool import HttpClientPool, http_client_pool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    # Quando definido, /slow só responde depois de `release` ser sinalizado.
+    received = threading.Event()
+    release = threading.Event()
+
+    def do_GET(self):
+        _Handler.connections.add(self.client_address)
+        if self.path == "/slow":
+            _Handler.received.set()
+            _Handler.release.wait(timeout=5)
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    _Handler.connections = set()
+    _Handler.received.clear()
+    _Handler.release.clear()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    _Handler.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_client_is_shared_and_reuses_connections(server_url):
+    pool = HttpClientPool(max_connections=2)
+    client = pool.get("svc")
+    assert pool.get("svc") is client
+
+    for _ in range(5):
+        assert (await client.get(f"{server_url}/ping")).status_code == 200
+    # Keep-alive: as cinco requisições sequenciais usaram a mesma conexão TCP.
+    assert len(_Handler.connections) == 1
+    assert pool.stats()["svc"] == {"active": 0, "idle": 1, "queued": 0}
+
+    await pool.close()
+    assert client.is_closed
+    assert pool.get("svc") is not client
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_utilisation_is_exported(server_url):
+    await http_client_pool.get("metrics_test_service").get(f"{server_url}/ping")
+    try:
+        assert REGISTRY.get_sample_value(
+            "policy_engine_http_client_connections", {"service": "metrics_test_service", "state": "idle"}
+        ) == 1
+        assert REGISTRY.get_sample_value(
+            "policy_engine_http_client_max_connections", {"service": "metrics_test_service"}
+        ) == http_client_pool.limits.max_connections
+    finally:
+        await http_client_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_collector_emits_active_idle_and_queued_gauges(server_url):
+    pool = HttpClientPool(max_connections=1)
+    registry = CollectorRegistry()
+    registry.register(HttpClientPoolCollector("test", pool.clients))
+    client = pool.get("svc")
+
+    # Limite de 1 conexão: a segunda requisição espera no pool enquanto a primeira está presa no servidor.
+    requests = [asyncio.ensure_future(client.get(f"{server_url}/slow")) for _ in range(2)]
+    await asyncio.get_running_loop().run_in_executor(None, _Handler.received.wait, 5)
+    await asyncio.sleep(0.05)
+    try:
+        def sample(name, **labels):
+            return registry.get_sample_value(f"test_http_client_{name}", {"service": "svc", **labels})
+
+        assert sample("connections", state="active") == 1
+        assert sample("connections", state="idle") == 0
+        assert sample("queued_requests") == 1
+        assert sample("max_connections") == 1
+    finally:
+        _Handler.release.set()
+        await asyncio.gather(*requests)
+        await pool.close()
+    # Cliente fechado: nenhuma série exportada.
+    assert registry.get_sample_value("test_http_client_connections", {"service": "svc", "state": "idle"}) is None
+
+
+def test_pool_stats_tolerate_unexpected_httpcore_internals():
+    mock_client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+    assert httpcore_pool_stats(mock_client) is None
+    assert httpcore_pool_stats(None) is None
+
+    client = httpx.AsyncClient()
+    connection = SimpleNamespace(is_idle=lambda: True)
+    # Pool sem `_requests` (interno do httpcore): as conexões continuam sendo contadas.
+    client._transport._pool = SimpleNamespace(connections=[connection, SimpleNamespace(is_idle=lambda: False)])
+    assert httpcore_pool_stats(client) == {"active": 1, "idle": 1, "queued": 0}
+    # Formato inesperado: sem métricas, sem exceção na coleta.
+    client._transport._pool = SimpleNamespace(connections=42)
+    assert httpcore_pool_stats(client) is None
+    registry = CollectorRegistry()
+    registry.register(HttpClientPoolCollector("test", lambda: [("svc", client, 10)]))
+    assert registry.get_sample_value("test_http_client_max_connections", {"service": "svc"}) is None
@@ -0,0 +1,107 @@
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import asyncio
+import datetime
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.crud_alert import async_alert_crud
+from app.models.alert_model import AlertCreate, Base, NotificationOutbox
+from app.services.notification_dispatcher import NotificationDispatcher
+
+
+class _FakeClient:
+    base_url = "http://notification_service/api/v1"
+
+    def __init__(self, fail_first: int = 0):
+        self.batches = []
+        self.fail_first = fail_first
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_notification_batch(self, alerts):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail_first:
+                self.fail_first -= 1
+                raise ConnectionError("notification_service indisponível")
+            self.batches.append([alert.resource_id for alert in alerts])
+            return len(alerts)
+        finally:
+            self.in_flight -= 1
+
+
+@pytest_asyncio.fixture()
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def _ingest(session_factory, count):
+    async with session_factory() as db:
+        await async_alert_crud.bulk_ingest_alerts(db, enqueue_notifications=True, alerts_in=[
+            AlertCreate(resource_id=f"i-{n}", resource_type="EC2Instance", provider="aws", severity="CRITICAL",
+                        title="t", description="d", policy_id="P1")
+            for n in range(count)
+        ])
+
+
+async def _outbox(session_factory):
+    async with session_factory() as db:
+        return (await db.execute(select(NotificationOutbox).order_by(NotificationOutbox.id))).scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_drains_outbox_in_bounded_concurrent_batches(session_factory):
+    await _ingest(session_factory, 25)
+    client = _FakeClient()
+    dispatcher = NotificationDispatcher(batch_size=4, max_concurrency=2, client=client, session_factory=session_factory)
+
+    claimed = []
+    while True:
+        count = await dispatcher.dispatch_once()
+        if not count:
+            break
+        claimed.append(count)
+
+    assert claimed == [8, 8, 8, 1]
+    assert sorted(r for batch in client.batches for r in batch) == sorted(f"i-{n}" for n in range(25))
+    assert max(len(batch) for batch in client.batches) == 4
+    assert client.max_in_flight == 2
+    assert dispatcher.delivered == 25
+    assert await _outbox(session_factory) == []
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_retried_with_backoff_then_abandoned(session_factory):
+    await _ingest(session_factory, 3)
+    client = _FakeClient(fail_first=3)
+    dispatcher = NotificationDispatcher(
+        batch_size=10, max_concurrency=1, max_attempts=2, retry_base_seconds=60,
+        client=client, session_factory=session_factory,
+    )
+
+    assert await dispatcher.dispatch_once() == 3
+    rows = await _outbox(session_factory)
+    assert [r.attempts for r in rows] == [1, 1, 1]
+    assert all("indisponível" in r.last_error for r in rows)
+    # Reagendadas para o futuro: o próximo ciclo não as pega.
+    assert await dispatcher.dispatch_once() == 0
+
+    async with session_factory() as db:
+        await db.execute(NotificationOutbox.__table__.update().values(next_attempt_at=datetime.datetime(2000, 1, 1)))
+        await db.commit()
+    assert await dispatcher.dispatch_once() == 3
+    rows = await _outbox(session_factory)
+    # Segunda falha com max_attempts=2: saem da fila, mas ficam registradas.
+    assert [r.next_attempt_at for r in rows] == [None, None, None]
+    assert dispatcher.failed == 6 and dispatcher.delivered == 0